@@ -0,0 +1,4 @@
+#!/usr/bin/env bash
+
+./ppt_plot_plan_main --batch \
+'/Users/livestockinformation/Livestock Information Ltd/Data - UK data/UK View/planning/planning-visual/plans.json'
@@ -0,0 +1,76 @@
+import gc
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from source.benchmarks.synthetic_plan import write_synthetic_plan, write_synthetic_config
+from source.visualiser.excel_config import ExcelConfigWorkbook
+from source.visualiser.excel_plan import ExcelPlan
+from source.visualiser.format_registry import FormatRegistry
+
+
+def measure_activities(plan_path, config_path):
+    """
+    Reads the plan and creates its activities, measuring the memory the activities hold on to once the rows read from
+    the sheet have been dropped, and the time taken to create them from the rows.
+
+    :return: (number of activities, bytes retained, seconds to create the activities)
+    """
+    with ExcelConfigWorkbook(config_path) as config:
+        plot_config = config.parse_plot_config()
+        format_config = config.parse_format_config()
+    # Compiled up front, so that the shared formats aren't counted against the activities.
+    format_registry = FormatRegistry(format_config, plot_config)
+    for format_name in format_config:
+        format_registry.shape_formatting(format_name)
+
+    flagged_rows = list(ExcelPlan.read_flagged_rows(plan_path, 'Plan', engine='lxml'))
+    start = time.perf_counter()
+    ExcelPlan.plan_data_from_rows(flagged_rows, format_config, plot_config, format_registry)
+    seconds = time.perf_counter() - start
+    del flagged_rows
+
+    # Timed above without tracemalloc, which slows down allocation.
+    gc.collect()
+    tracemalloc.start()
+    try:
+        flagged_rows = list(ExcelPlan.read_flagged_rows(plan_path, 'Plan', engine='lxml'))
+        plan_data = ExcelPlan.plan_data_from_rows(flagged_rows, format_config, plot_config, format_registry)
+        del flagged_rows
+        gc.collect()
+        retained_bytes, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return len(plan_data), retained_bytes, seconds
+
+
+def main(num_rows=100_000):
+    """
+    Measures the bytes held per activity, and the time to create the activities, for a large synthetic plan (half of
+    the rows are flagged).
+    """
+    logging.disable(logging.WARNING)
+    with tempfile.TemporaryDirectory() as folder:
+        plan_path = os.path.join(folder, 'synthetic_plan.xlsx')
+        config_path = os.path.join(folder, 'synthetic_config.xlsx')
+        write_synthetic_plan(plan_path, num_rows, num_extra_columns=0, done_ratio=0.5)
+        write_synthetic_config(config_path)
+        num_activities, retained_bytes, seconds = measure_activities(plan_path, config_path)
+
+    results = {
+        'num_rows': num_rows,
+        'activities': num_activities,
+        'bytes_per_activity': round(retained_bytes / num_activities),
+        'build_seconds': round(seconds, 3),
+        'microseconds_per_activity': round(seconds / num_activities * 1_000_000, 1),
+    }
+    print(json.dumps(results, indent=2))
+    return results
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
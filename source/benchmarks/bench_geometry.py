@@ -0,0 +1,80 @@
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from pptx.util import Cm
+
+from source.visualiser.plot_driver import PlotDriver
+
+plot_config = {
+    'top': Cm(2),
+    'left': Cm(1),
+    'bottom': Cm(18),
+    'right': Cm(32),
+    'track_height': Cm(0.5),
+    'track_gap': Cm(0.1),
+    'min_start_date': datetime(2021, 1, 1),
+    'max_end_date': datetime(2023, 12, 31),
+    'milestone_width': Cm(0.4),
+    'milestone_text_width': Cm(3),
+    'activity_text_width': Cm(4),
+    'text_margin': Cm(0.1),
+    'activity_shape': 'RECTANGLE',
+    'milestone_shape': 'DIAMOND'
+}
+
+
+def single_geometry(plot_driver, start_dates, end_dates):
+    """
+    The horizontal geometry of each activity calculated a date at a time, the way PlanActivity does when it isn't
+    given pre-calculated geometry.
+    """
+    half_milestone_width = plot_driver.milestone_width / 2
+    geometry = []
+    for start_date, end_date in zip(start_dates, end_dates):
+        start_x = plot_driver._date_to_x_coordinate(start_date, "start")
+        end_x = plot_driver._date_to_x_coordinate(end_date, "end")
+        middle_x = plot_driver._date_to_x_coordinate(start_date, "middle")
+        geometry.append((round(start_x), round(end_x - start_x), round(middle_x - half_milestone_width)))
+    return geometry
+
+
+def main(num_activities=100_000):
+    """
+    Compares calculating the horizontal geometry of a large number of activities one at a time with calculating it
+    using PlotDriver.activity_x_geometry.
+    """
+    plot_driver = PlotDriver(plot_config)
+    plot_driver.num_days_in_date_range = plot_driver.max_end_date.toordinal() - plot_driver.min_start_date.toordinal() + 1
+
+    generator = random.Random(1)
+    start_dates = [
+        plot_driver.min_start_date + timedelta(days=generator.randrange(plot_driver.num_days_in_date_range))
+        for _ in range(num_activities)
+    ]
+    end_dates = [start_date + timedelta(days=generator.randrange(0, 90)) for start_date in start_dates]
+
+    start = time.perf_counter()
+    single = single_geometry(plot_driver, start_dates, end_dates)
+    single_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = plot_driver.activity_x_geometry(start_dates, end_dates)
+    batch_seconds = time.perf_counter() - start
+
+    batch_as_single = list(zip(batch['left'].tolist(), batch['width'].tolist(), batch['milestone_left'].tolist()))
+    results = {
+        'num_activities': num_activities,
+        'single': {'seconds': round(single_seconds, 3)},
+        'batch': {'seconds': round(batch_seconds, 3)},
+        'speed_up': round(single_seconds / batch_seconds, 1),
+        'identical': single == batch_as_single,
+    }
+    print(json.dumps(results, indent=2))
+    return results
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
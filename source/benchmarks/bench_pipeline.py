@@ -0,0 +1,156 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, date
+
+from source.benchmarks.synthetic_plan import write_synthetic_plan, write_synthetic_config
+from source.visualiser.instrumentation import Instrumentation
+from source.visualiser.plan_visualiser import PlanVisualiser
+from source.visualiser.read_excel import read_excel, ENGINES
+
+test_files = os.path.join(os.path.dirname(__file__), '..', 'tests', 'test_resources', 'unit_test_01', 'input_files')
+ppt_template = os.path.join(test_files, 'unit_test_dummy_ppt.pptx')
+
+DEFAULT_SIZES = (100, 1_000, 10_000, 100_000)
+
+# Fixed so that the same bars are split into done and not done on every run.
+TODAY = datetime(2021, 6, 15)
+
+
+def run_pipeline(
+        folder,
+        num_rows,
+        engine='lxml',
+        renderer='xml',
+        num_swimlanes=5,
+        milestone_ratio=0.3,
+        done_ratio=0.3,
+        num_years=3,
+        num_extra_columns=10,
+        seed=1
+):
+    """
+    Generates a synthetic plan and config and plots it, timing each stage of the pipeline separately.  Every row of the
+    plan is flagged, so num_rows activities are plotted.
+
+    :param folder: Where the generated workbooks and plotted slide are written.
+    :param num_rows:
+    :param engine: Engine for reading the plan sheet (see read_excel.stream_excel)
+    :param renderer: 'xml' or 'pptx' (see PlanVisualiser)
+    :return: Instrumentation report (see Instrumentation.report), with the generated plan and the stages run
+    """
+    plan_path = os.path.join(folder, f'plan_{num_rows}.xlsx')
+    config_path = os.path.join(folder, f'config_{num_rows}.xlsx')
+    template = os.path.join(folder, f'template_{num_rows}.pptx')
+    write_synthetic_plan(
+        plan_path, num_rows, seed=seed, num_extra_columns=num_extra_columns, flag_ratio=1.0,
+        num_swimlanes=num_swimlanes, milestone_ratio=milestone_ratio, done_ratio=done_ratio, num_years=num_years
+    )
+    write_synthetic_config(config_path, num_swimlanes)
+    shutil.copyfile(ppt_template, template)
+
+    instrumentation = Instrumentation()
+
+    # The whole sheet read the generic way, for comparison with the projected, filtered read done by read_plan_data.
+    with instrumentation.span('read_excel') as span:
+        span.add('rows', len(read_excel(plan_path, 'Plan', engine=engine)))
+
+    visualiser = PlanVisualiser.from_excel(
+        plan_path, config_path, template, 'Plan', excel_engine=engine, renderer=renderer,
+        instrumentation=instrumentation
+    )
+    visualiser.plot_driver.today = TODAY
+
+    layout = visualiser.create_layout(today=date(TODAY.year, TODAY.month, TODAY.day))
+    visualiser.render_layout(layout)
+    visualiser.save()
+
+    num_activity_shapes = sum(1 for element in layout.elements if element.kind == 'activity')
+
+    report = instrumentation.report()
+    report['plan'] = {
+        'rows': num_rows,
+        'activities': len(visualiser.plan_data),
+        'milestones': sum(1 for activity in visualiser.plan_data if activity.activity_type == 'milestone'),
+        # Bars which span today and have a done format are plotted as two shapes.
+        'split_bars': num_activity_shapes - len(visualiser.plan_data),
+        'swimlanes': len(visualiser.swimlane_data),
+        'layout_elements': len(layout.elements),
+        'output_bytes': os.path.getsize(visualiser.slides_out_path),
+    }
+    return report
+
+
+def _run_size(options, num_rows):
+    """
+    Runs the pipeline for one size in a worker process, so that the peak memory reported is for that size alone.
+    """
+    logging.disable(logging.WARNING)
+    with tempfile.TemporaryDirectory() as folder:
+        return run_pipeline(
+            folder,
+            num_rows,
+            engine=options.engine,
+            renderer=options.renderer,
+            num_swimlanes=options.swimlanes,
+            milestone_ratio=options.milestone_ratio,
+            done_ratio=options.done_ratio,
+            num_years=options.years,
+            num_extra_columns=options.extra_columns,
+            seed=options.seed
+        )
+
+
+def get_options(args):
+    parser = argparse.ArgumentParser(
+        description='Times each stage of plotting synthetic plans of increasing size and outputs the results as JSON.'
+    )
+    parser.add_argument('sizes', nargs='*', type=int, default=list(DEFAULT_SIZES), help='Numbers of plan rows')
+    parser.add_argument('--engine', choices=ENGINES, default='lxml', help='Engine for reading the plan sheet')
+    parser.add_argument('--renderer', choices=('xml', 'pptx'), default='xml')
+    parser.add_argument('--swimlanes', type=int, default=5)
+    parser.add_argument('--milestone-ratio', type=float, default=0.3)
+    parser.add_argument('--done-ratio', type=float, default=0.3, help='Proportion of bars split into done/not done')
+    parser.add_argument('--years', type=int, default=3, help='Number of years the plan is spread across')
+    parser.add_argument('--extra-columns', type=int, default=10, help='Unused columns in the plan sheet')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='File to write the JSON results to, as well as printing them')
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    """
+    Plots synthetic plans of each size (100 to 100,000 rows by default) and reports the time, CPU time and memory
+    taken by each stage (reading Excel, reading the plan, layout, rendering and saving), so that renderers and engines
+    can be compared and regressions caught.
+    """
+    options = get_options(sys.argv[1:] if args is None else args)
+
+    results = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'options': {name: value for name, value in vars(options).items() if name not in ('sizes', 'output')},
+        'runs': [],
+    }
+    for num_rows in options.sizes:
+        # A fresh process for each size, so that memory used by one doesn't count against the next.
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            results['runs'].append(executor.submit(_run_size, options, num_rows).result())
+
+    results_json = json.dumps(results, indent=2)
+    print(results_json)
+    if options.output is not None:
+        with open(options.output, 'w') as output_file:
+            output_file.write(results_json)
+    return results
+
+
+if __name__ == '__main__':
+    main()
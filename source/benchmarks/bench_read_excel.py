@@ -0,0 +1,41 @@
+import json
+import os
+import sys
+import tempfile
+import time
+
+from source.benchmarks.synthetic_plan import write_synthetic_plan, plan_columns
+from source.visualiser.read_excel import stream_excel, ENGINES
+
+
+def time_read(excel_path, sheet_name, engine):
+    """
+    Reads the plan sheet the way ExcelPlan.read_plan_data does (projected columns, flagged rows only).
+    """
+    row_filters = {'Visual Flag': lambda flag: flag is True}
+    start = time.perf_counter()
+    num_rows = sum(1 for _ in stream_excel(excel_path, sheet_name, columns=plan_columns, row_filters=row_filters,
+                                           engine=engine))
+    return time.perf_counter() - start, num_rows
+
+
+def main(num_rows=50_000):
+    """
+    Compares the time to read a large synthetic plan sheet with each of the Excel reading engines.
+    """
+    with tempfile.TemporaryDirectory() as folder:
+        excel_path = os.path.join(folder, 'synthetic_plan.xlsx')
+        write_synthetic_plan(excel_path, num_rows)
+
+        results = {'num_rows': num_rows}
+        for engine in ENGINES:
+            seconds, num_flagged = time_read(excel_path, 'Plan', engine)
+            results[engine] = {'seconds': round(seconds, 3), 'flagged_rows': num_flagged}
+
+    results['speed_up'] = round(results['openpyxl']['seconds'] / results['lxml']['seconds'], 1)
+    print(json.dumps(results, indent=2))
+    return results
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
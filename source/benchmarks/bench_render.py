@@ -0,0 +1,68 @@
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+from datetime import datetime
+
+from source.benchmarks.synthetic_plan import write_synthetic_plan
+from source.visualiser.excel_config import ExcelConfigWorkbook
+from source.visualiser.excel_plan import ExcelPlan
+from source.visualiser.plan_visualiser import PlanVisualiser
+
+test_files = os.path.join(os.path.dirname(__file__), '..', 'tests', 'test_resources', 'unit_test_01', 'input_files')
+config_workbook = os.path.join(test_files, 'unit_test_01_config.xlsx')
+ppt_template = os.path.join(test_files, 'unit_test_dummy_ppt.pptx')
+
+
+def time_render(plan_path, folder, renderer):
+    """
+    Plots the synthetic plan with the given renderer.
+    """
+    with ExcelConfigWorkbook(config_workbook) as config:
+        plot_config = config.parse_plot_config()
+        format_config = config.parse_format_config()
+    plot_config.today = datetime(2021, 6, 15)
+    plan_data = ExcelPlan.read_plan_data(plan_path, 'Plan', format_config, plot_config, engine='lxml')
+
+    template = os.path.join(folder, f'{renderer}.pptx')
+    shutil.copyfile(ppt_template, template)
+    visualiser = PlanVisualiser(
+        plan_data, plot_config, format_config, template, [f'Swimlane {n}' for n in range(1, 6)], renderer
+    )
+
+    start = time.perf_counter()
+    visualiser.plot_slide()
+    seconds = time.perf_counter() - start
+
+    with zipfile.ZipFile(visualiser.slides_out_path) as slides_out:
+        slide_xml = slides_out.read('ppt/slides/slide1.xml')
+    return seconds, len(plan_data), slide_xml
+
+
+def main(num_rows=6_000):
+    """
+    Compares the time to plot a synthetic plan (half of the rows are flagged) with each renderer.
+    """
+    logging.disable(logging.WARNING)
+    with tempfile.TemporaryDirectory() as folder:
+        plan_path = os.path.join(folder, 'synthetic_plan.xlsx')
+        write_synthetic_plan(plan_path, num_rows, num_extra_columns=0)
+
+        results = {'num_rows': num_rows}
+        slides = {}
+        for renderer in ('pptx', 'xml'):
+            seconds, num_activities, slides[renderer] = time_render(plan_path, folder, renderer)
+            results[renderer] = {'seconds': round(seconds, 3), 'activities': num_activities}
+
+    results['speed_up'] = round(results['pptx']['seconds'] / results['xml']['seconds'], 1)
+    results['identical'] = slides['pptx'] == slides['xml']
+    print(json.dumps(results, indent=2))
+    return results
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
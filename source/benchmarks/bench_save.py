@@ -0,0 +1,88 @@
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+from datetime import datetime
+
+from source.benchmarks.synthetic_plan import write_synthetic_plan
+from source.visualiser.excel_config import ExcelConfigWorkbook
+from source.visualiser.excel_plan import ExcelPlan
+from source.visualiser.plan_visualiser import PlanVisualiser
+from source.visualiser.streaming_writer import save_streaming
+
+test_files = os.path.join(os.path.dirname(__file__), '..', 'tests', 'test_resources', 'unit_test_01', 'input_files')
+config_workbook = os.path.join(test_files, 'unit_test_01_config.xlsx')
+ppt_template = os.path.join(test_files, 'unit_test_dummy_ppt.pptx')
+
+
+def plot_plan(plan_path):
+    """
+    Plots the synthetic plan, without saving it.
+    """
+    with ExcelConfigWorkbook(config_workbook) as config:
+        plot_config = config.parse_plot_config()
+        format_config = config.parse_format_config()
+    plot_config.today = datetime(2021, 6, 15)
+    plan_data = ExcelPlan.read_plan_data(plan_path, 'Plan', format_config, plot_config, engine='lxml')
+
+    visualiser = PlanVisualiser(
+        plan_data, plot_config, format_config, ppt_template, [f'Swimlane {n}' for n in range(1, 6)], 'xml'
+    )
+    visualiser.plot_slide(slides_out=os.devnull)
+    return visualiser
+
+
+def time_save(save, slides_out):
+    """
+    :return: The seconds taken to save and the peak memory allocated (over what was allocated before) while saving.
+    """
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        save(slides_out)
+        seconds = time.perf_counter() - start
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return seconds, peak_bytes
+
+
+def main(num_rows=20_000, compress_level=6):
+    """
+    Compares Presentation.save with a streaming save of a large synthetic plan (half of the rows are flagged).
+    """
+    logging.disable(logging.WARNING)
+    with tempfile.TemporaryDirectory() as folder:
+        plan_path = os.path.join(folder, 'synthetic_plan.xlsx')
+        write_synthetic_plan(plan_path, num_rows, num_extra_columns=0)
+        visualiser = plot_plan(plan_path)
+
+        results = {'num_rows': num_rows, 'activities': len(visualiser.plan_data)}
+        saves = {
+            'pptx': visualiser.prs.save,
+            'streaming': lambda slides_out: save_streaming(visualiser.prs, slides_out, ppt_template, compress_level),
+        }
+        slides = {}
+        for name, save in saves.items():
+            slides_out = os.path.join(folder, f'{name}.pptx')
+            seconds, peak_bytes = time_save(save, slides_out)
+            results[name] = {
+                'seconds': round(seconds, 3),
+                'peak_mb': round(peak_bytes / 1024 / 1024, 1),
+                'file_kb': round(os.path.getsize(slides_out) / 1024),
+            }
+            with zipfile.ZipFile(slides_out) as saved:
+                slides[name] = saved.read('ppt/slides/slide1.xml')
+
+    results['memory_saving'] = round(results['pptx']['peak_mb'] / max(results['streaming']['peak_mb'], 0.1), 1)
+    results['identical'] = slides['pptx'] == slides['streaming']
+    print(json.dumps(results, indent=2))
+    return results
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,148 @@
+import random
+from datetime import datetime, timedelta
+
+import openpyxl
+
+plan_columns = [
+    'Task Name',
+    'Visual Text',
+    'Duration',
+    'Start',
+    'Finish',
+    'Visual Flag',
+    'Visual Swimlane',
+    'Visual Track # Within Swimlane',
+    'Visual # Tracks To Cover',
+    'Text Layout',
+    'Format String',
+    'Done Format String'
+]
+
+plot_config_columns = [
+    'Config Name', 'Top', 'Left', 'Bottom', 'Right', 'Track Height', 'Track Gap', 'Min Date', 'Max Date',
+    'Milestone Width', 'Milestone Text Width', 'Activity Text Width', 'Text Margin', 'Activity Shape', 'Milestone Shape'
+]
+
+format_config_columns = [
+    'Format Name', 'Fill Red', 'Fill Green', 'Fill Blue', 'Line Red', 'Line Green', 'Line Blue', 'Corner Radius (Cm)',
+    'Font Size (Pt)', 'Font Bold', 'Font Italic', 'Font Red', 'Font Green', 'Font Blue', 'Text Vertical Align'
+]
+
+# Formats written by write_synthetic_config: (name, fill, line, font, font size, vertical align)
+synthetic_formats = [
+    ('Default', (32, 56, 100), (255, 255, 255), (255, 255, 255), 8, 'middle'),
+    ('Done', (146, 208, 80), (255, 255, 255), (0, 0, 0), 8, 'middle'),
+    ('swimlane_format_odd', (217, 217, 217), (217, 217, 217), (89, 89, 89), 14, 'top'),
+    ('swimlane_format_even', (255, 255, 255), (255, 255, 255), (89, 89, 89), 14, 'top'),
+    ('month_shape_format_odd', (226, 239, 218), (226, 239, 218), (32, 56, 100), 14, 'middle'),
+    ('month_shape_format_even', (169, 208, 142), (169, 208, 142), (32, 56, 100), 14, 'middle'),
+    ('today_line', (32, 56, 100), (32, 56, 100), (255, 255, 255), 14, None),
+]
+
+
+def swimlane_names(num_swimlanes):
+    return [f'Swimlane {swimlane + 1}' for swimlane in range(num_swimlanes)]
+
+
+def write_synthetic_plan(
+        excel_path,
+        num_rows,
+        sheet_name='Plan',
+        seed=1,
+        num_extra_columns=50,
+        flag_ratio=0.5,
+        num_swimlanes=5,
+        milestone_ratio=0.5,
+        done_ratio=0.0,
+        num_years=1,
+        start_date=datetime(2021, 1, 1),
+        max_track=9
+):
+    """
+    Writes a plan workbook in the SmartSheet export layout with num_rows randomly generated rows, for benchmarking.
+
+    SmartSheet exports carry many columns which the visualiser doesn't use, so num_extra_columns columns of filler are
+    added.  Only flag_ratio of the rows have Visual Flag set.
+
+    :param excel_path:
+    :param num_rows:
+    :param sheet_name:
+    :param seed: Seed for random generator so that the same workbook is generated each time.
+    :param num_extra_columns:
+    :param flag_ratio:
+    :param num_swimlanes: Rows are spread across swimlanes named as by swimlane_names.
+    :param milestone_ratio: Proportion of rows which are milestones (zero duration) rather than bars.
+    :param done_ratio: Proportion of bars which have a Done Format String, so are split into a done and a not done
+    part if they span today.  Uses the 'Done' format, which is in the config written by write_synthetic_config.
+    :param num_years: Activities start anywhere in the num_years from start_date.
+    :param start_date:
+    :param max_track: Highest track number an activity is put on within its swimlane.
+    :return:
+    """
+    generator = random.Random(seed)
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet(sheet_name)
+
+    extra_columns = [f'Extra Column {column + 1}' for column in range(num_extra_columns)]
+    sheet.append(plan_columns + extra_columns)
+
+    swimlanes = swimlane_names(num_swimlanes)
+    num_days = 365 * num_years
+    for row in range(num_rows):
+        start = start_date + timedelta(days=generator.randrange(0, num_days))
+        duration = 0 if generator.random() < milestone_ratio else generator.randrange(1, 90)
+        finish = start + timedelta(days=duration)
+        flag = generator.random() < flag_ratio
+        done_format = 'Done' if duration > 0 and generator.random() < done_ratio else None
+        sheet.append([
+            f'Activity {row + 1}',
+            None,
+            duration,
+            start,
+            finish,
+            flag,
+            generator.choice(swimlanes),
+            generator.randrange(1, max_track + 1),
+            1,
+            generator.choice(['Left', 'Right', 'Shape']),
+            'Default',
+            done_format
+        ] + [generator.random() for _ in extra_columns])
+
+    workbook.save(excel_path)
+
+
+def write_synthetic_config(excel_path, num_swimlanes=5):
+    """
+    Writes a config workbook to go with a plan written by write_synthetic_plan, with the standard PlotConfig,
+    FormatConfig and Swimlanes sheets.
+
+    The date range isn't set, so it's taken from the plan, and the colours are given as values rather than looked up
+    with formulas the way the config workbook template does.
+
+    :param excel_path:
+    :param num_swimlanes: Should be the same as for the plan.
+    :return:
+    """
+    workbook = openpyxl.Workbook()
+    workbook.remove(workbook.active)
+
+    plot_config_sheet = workbook.create_sheet('PlotConfig')
+    plot_config_sheet.append(plot_config_columns)
+    plot_config_sheet.append(
+        ['Synthetic Plan', 1, 2, 19, 33.87, 0.5, 0.1, None, None, 0.4, 7, 7, 0.1, 'rectangle', 'diamond']
+    )
+
+    format_config_sheet = workbook.create_sheet('FormatConfig')
+    format_config_sheet.append(format_config_columns)
+    for name, fill_rgb, line_rgb, font_rgb, font_size, vertical_align in synthetic_formats:
+        format_config_sheet.append(
+            [name, *fill_rgb, *line_rgb, 0, font_size, False, False, *font_rgb, vertical_align]
+        )
+
+    swimlanes_sheet = workbook.create_sheet('Swimlanes')
+    swimlanes_sheet.append(['Swimlane'])
+    for swimlane in swimlane_names(num_swimlanes):
+        swimlanes_sheet.append([swimlane])
+
+    workbook.save(excel_path)
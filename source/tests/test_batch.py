@@ -0,0 +1,194 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from unittest import TestCase
+
+from PIL import Image
+
+from source.tests.testing_utilities import write_plan, swimlane_order
+from source.visualiser import batch
+from source.visualiser.batch import BatchJob, read_manifest, run_batch
+from source.visualiser.exceptions import PptPlanVisualiserException
+from source.visualiser.render_cache import RenderResultCache
+
+unit_test_files = 'test_resources/unit_test_01/input_files'
+config_workbook = 'unit_test_01_config.xlsx'
+template = 'unit_test_dummy_ppt.pptx'
+
+
+def read_parts(slides):
+    with zipfile.ZipFile(io.BytesIO(slides)) as package:
+        return {name: package.read(name) for name in package.namelist()}
+
+
+class TestBatch(TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        for file_name in (config_workbook, template):
+            shutil.copyfile(os.path.join(unit_test_files, file_name), os.path.join(self.folder, file_name))
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def job(self, name, plan=config_workbook, output_file=None):
+        return BatchJob(
+            name,
+            os.path.join(self.folder, plan),
+            'Plan',
+            os.path.join(self.folder, config_workbook),
+            os.path.join(self.folder, template),
+            output_file=None if output_file is None else os.path.join(self.folder, output_file)
+        )
+
+    def write_manifest(self, manifest, file_name='plans.json'):
+        manifest_path = os.path.join(self.folder, file_name)
+        with open(manifest_path, 'w') as manifest_file:
+            json.dump(manifest, manifest_file)
+        return manifest_path
+
+    def test_read_manifest(self):
+        manifest_path = self.write_manifest({'jobs': [
+            {
+                'excel_plan_workbook': 'plan.xlsx',
+                'excel_plan_sheet': 'Plan',
+                'excel_config_workbook': '/configs/config.xlsx',
+                'ppt_template_file': 'template.pptx',
+                'swimlanes_sheet': 'Lanes',
+            },
+            {
+                'name': 'Second',
+                'excel_plan_workbook': 'plan2.xlsx',
+                'excel_plan_sheet': 'Plan',
+                'excel_config_workbook': 'config.xlsx',
+                'ppt_template_file': 'template.pptx',
+                'output_file': 'out/second.pptx',
+            },
+        ]})
+
+        jobs = read_manifest(manifest_path)
+
+        self.assertEqual(['1: plan.xlsx', 'Second'], [job.name for job in jobs])
+        self.assertEqual(os.path.join(self.folder, 'plan.xlsx'), jobs[0].excel_plan_workbook)
+        self.assertEqual('/configs/config.xlsx', jobs[0].excel_config_workbook)
+        self.assertEqual(('Lanes', 'PlotConfig'), (jobs[0].swimlanes_sheet, jobs[0].plot_config_sheet))
+        self.assertIsNone(jobs[0].output_file)
+        self.assertEqual(os.path.join(self.folder, 'out/second.pptx'), jobs[1].output_file)
+
+    def test_invalid_manifest(self):
+        with self.assertRaises(PptPlanVisualiserException):
+            read_manifest(self.write_manifest({'plans': []}))
+        with self.assertRaises(PptPlanVisualiserException):
+            read_manifest(self.write_manifest([{'excel_plan_workbook': 'plan.xlsx'}]))
+
+    def test_failed_job_doesnt_stop_others(self):
+        jobs = [
+            self.job('First', output_file='first.pptx'),
+            self.job('Missing plan', plan='missing.xlsx', output_file='missing.pptx'),
+            self.job('Third', output_file='third.pptx'),
+        ]
+
+        results = run_batch(jobs, max_workers=2)
+
+        self.assertEqual(['First', 'Missing plan', 'Third'], [result.name for result in results])
+        self.assertEqual([True, False, True], [result.succeeded for result in results])
+        self.assertIn('missing.xlsx', results[1].error)
+        self.assertEqual('plan_read', results[1].timings['spans'][-1]['name'])
+        self.assertIn('render', [span['name'] for span in results[0].timings['spans']])
+        self.assertFalse(os.path.exists(os.path.join(self.folder, 'missing.pptx')))
+        for result in (results[0], results[2]):
+            with zipfile.ZipFile(result.output_file) as slides_out:
+                self.assertIn('ppt/slides/slide1.xml', slides_out.namelist())
+
+    def test_config_shared_between_jobs(self):
+        jobs = [self.job('First', output_file='first.pptx'), self.job('Second')]
+
+        results = run_batch(jobs, max_workers=1)
+
+        self.assertTrue(all(result.succeeded for result in results))
+        self.assertEqual(1, len(batch._configs))
+        self.assertEqual((1, 1), (batch._template_cache.misses, batch._template_cache.hits))
+        self.assertEqual(os.path.join(self.folder, 'unit_test_dummy_ppt_out.pptx'), results[1].output_file)
+
+    def test_swimlanes_not_shared_between_jobs(self):
+        # Neither plan's swimlanes are in the config, so each is added after the configured ones in plan order.
+        write_plan(os.path.join(self.folder, 'a.xlsx'), ['Lane X', 'Lane Y'])
+        write_plan(os.path.join(self.folder, 'b.xlsx'), ['Lane Y', 'Lane X'])
+        job_b = self.job('B', plan='b.xlsx', output_file='b.pptx')
+
+        alone = run_batch([job_b], max_workers=1)
+        self.assertTrue(alone[0].succeeded, alone[0].error)
+        self.assertEqual(['Lane Y', 'Lane X'], swimlane_order(alone[0].output_file, ('Lane X', 'Lane Y')))
+
+        after_a = run_batch([self.job('A', plan='a.xlsx', output_file='a.pptx'), job_b], max_workers=1)
+        self.assertTrue(all(result.succeeded for result in after_a))
+        self.assertEqual(['Lane X', 'Lane Y'], swimlane_order(after_a[0].output_file, ('Lane X', 'Lane Y')))
+        self.assertEqual(['Lane Y', 'Lane X'], swimlane_order(after_a[1].output_file, ('Lane X', 'Lane Y')))
+
+    def test_cached_slide_independent_of_earlier_jobs(self):
+        # The result cache serves whatever was stored under a job's key, so the slide mustn't depend on the jobs the
+        # worker plotted before it.  The zip entries are timestamped, so the parts are compared rather than the file.
+        write_plan(os.path.join(self.folder, 'a.xlsx'), ['Lane X', 'Lane Y'])
+        write_plan(os.path.join(self.folder, 'b.xlsx'), ['Lane Y', 'Lane X'])
+        job_a = self.job('A', plan='a.xlsx')
+        job_b = self.job('B', plan='b.xlsx')
+
+        batch._init_worker(None)
+        alone_result, alone = batch.run_job_in_memory(job_b)
+        self.assertTrue(alone_result.succeeded, alone_result.error)
+
+        # A new worker, which plots another plan first.
+        batch._init_worker(None)
+        batch.run_job_in_memory(job_a)
+        _, after_a = batch.run_job_in_memory(job_b)
+
+        self.assertEqual(read_parts(alone), read_parts(after_a))
+
+    def test_worker_set_up_by_first_job(self):
+        batch._init_worker(None)
+        template_cache = batch._template_cache
+        self.assertTrue(batch.run_job(self.job('First', output_file='first.pptx')).succeeded)
+        self.assertIs(template_cache, batch._template_cache)
+
+        # Jobs with other settings set the worker up again.
+        cache_dir = os.path.join(self.folder, 'cache')
+        self.assertTrue(batch.run_job(self.job('Second', output_file='second.pptx'), cache_dir).succeeded)
+        self.assertIsNot(template_cache, batch._template_cache)
+        self.assertEqual(cache_dir, batch._parse_cache.cache_dir)
+
+    def test_thumbnails(self):
+        results = run_batch([self.job('First', output_file='first.pptx')], max_workers=1, thumbnail_width=200)
+
+        self.assertEqual(os.path.join(self.folder, 'first.png'), results[0].thumbnail_file)
+        with Image.open(results[0].thumbnail_file) as thumbnail:
+            self.assertEqual(200, thumbnail.width)
+
+    def test_duplicate_output_files(self):
+        with self.assertRaises(PptPlanVisualiserException):
+            run_batch([self.job('First'), self.job('Second')], max_workers=1)
+
+    def test_result_cache(self):
+        result_cache = RenderResultCache(cache_dir=os.path.join(self.folder, 'renders'))
+        jobs = [
+            self.job('First', output_file='first.pptx'),
+            self.job('Same again', output_file='same.pptx'),
+            self.job('Missing plan', plan='missing.xlsx', output_file='missing.pptx'),
+        ]
+
+        results = run_batch(jobs, max_workers=1, result_cache=result_cache)
+
+        self.assertEqual([True, True, False], [result.succeeded for result in results])
+        self.assertEqual((1, 1), (result_cache.misses, result_cache.hits))
+        self.assertEqual('memory', results[1].timings['result_cache'])
+        with open(results[0].output_file, 'rb') as first, open(results[1].output_file, 'rb') as same:
+            self.assertEqual(first.read(), same.read())
+
+        # A later batch, e.g. another run of the app, finds the slide in the cache folder.
+        os.remove(results[0].output_file)
+        later_cache = RenderResultCache(cache_dir=os.path.join(self.folder, 'renders'))
+        results = run_batch(jobs[:1], max_workers=1, result_cache=later_cache)
+        self.assertEqual('disk', results[0].timings['result_cache'])
+        self.assertTrue(os.path.exists(results[0].output_file))
+        self.assertEqual(0, later_cache.misses)
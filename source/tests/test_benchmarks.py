@@ -0,0 +1,37 @@
+import json
+import shutil
+import tempfile
+from unittest import TestCase
+
+from source.benchmarks.bench_pipeline import run_pipeline
+from source.benchmarks.synthetic_plan import write_synthetic_config, swimlane_names
+from source.visualiser.excel_config import ExcelConfigWorkbook
+
+
+class TestPipelineBenchmark(TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_synthetic_config(self):
+        config_path = f'{self.folder}/config.xlsx'
+        write_synthetic_config(config_path, num_swimlanes=3)
+
+        with ExcelConfigWorkbook(config_path) as config:
+            self.assertEqual(swimlane_names(3), config.parse_swimlane_config())
+            self.assertIn('Done', config.parse_format_config())
+            self.assertIsNone(config.parse_plot_area_config()['min_start_date'])
+
+    def test_run_pipeline(self):
+        report = run_pipeline(self.folder, 200, num_swimlanes=3, milestone_ratio=0.5, done_ratio=1.0)
+
+        span_names = [span['name'] for span in report['spans']]
+        for stage in ('read_excel', 'plan_read', 'layout', 'render', 'save'):
+            self.assertIn(stage, span_names)
+        plan = report['plan']
+        self.assertEqual((200, 200, 3), (plan['rows'], plan['activities'], plan['swimlanes']))
+        self.assertTrue(0 < plan['milestones'] < 200)
+        self.assertGreater(plan['split_bars'], 0)
+        json.dumps(report)
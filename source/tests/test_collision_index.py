@@ -0,0 +1,178 @@
+import os
+import random
+import shutil
+import tempfile
+from datetime import datetime
+from unittest import TestCase
+
+from source.visualiser.collision_index import find_collisions, SHAPE_OVERLAP, LABEL_OVERLAPS_SHAPE, LABEL_OVERLAP
+from source.visualiser.excel_config import ExcelConfigWorkbook
+from source.visualiser.excel_plan import ExcelPlan
+from source.visualiser.exceptions import PptPlanVisualiserException
+from source.visualiser.layout import PlanLayout, ShapeStyle
+from source.visualiser.plan_visualiser import PlanVisualiser
+
+unit_test_files = 'test_resources/unit_test_01/input_files'
+
+STYLE = ShapeStyle((0, 0, 255), (0, 0, 0))
+
+
+def add_activity(layout, activity_id, left, top, width, height=100, label=None):
+    """
+    Adds a shape for an activity, and optionally a label (left, width) alongside it.
+    """
+    layout.add_element('activity', 'RECTANGLE', left, top, width, height, STYLE, activity_id=activity_id)
+    if label is not None:
+        label_left, label_width = label
+        layout.add_element(
+            'activity_text', 'RECTANGLE', label_left, top, label_width, height, ShapeStyle(), text=f'{activity_id}',
+            activity_id=activity_id
+        )
+
+
+def brute_force_collisions(layout):
+    elements = [element for element in layout.elements if element.kind in ('activity', 'activity_text')]
+    return {
+        (first.z_order, second.z_order)
+        for index, first in enumerate(elements)
+        for second in elements[index + 1:]
+        if first.activity_id != second.activity_id and
+        first.left < second.right and second.left < first.right and
+        first.top < second.bottom and second.top < first.bottom
+    }
+
+
+class TestFindCollisions(TestCase):
+    def test_shape_overlap(self):
+        layout = PlanLayout()
+        add_activity(layout, 1, 0, 0, 1000)
+        add_activity(layout, 2, 500, 0, 1000)
+        add_activity(layout, 3, 500, 150, 1000)  # Next track down.
+
+        report = find_collisions(layout)
+
+        self.assertEqual(1, len(report.collisions))
+        collision = report.collisions[0]
+        self.assertEqual(SHAPE_OVERLAP, collision.kind)
+        self.assertEqual((1, 2), collision.activity_ids)
+        self.assertEqual((500, 0, 1000, 100), collision.overlap)
+
+    def test_touching_is_not_a_collision(self):
+        layout = PlanLayout()
+        add_activity(layout, 1, 0, 0, 1000)
+        add_activity(layout, 2, 1000, 0, 1000)
+        add_activity(layout, 3, 0, 100, 1000)
+
+        self.assertEqual([], find_collisions(layout).collisions)
+
+    def test_labels(self):
+        layout = PlanLayout()
+        add_activity(layout, 1, 0, 0, 100, label=(100, 2000))  # Right aligned label running over activity 2.
+        add_activity(layout, 2, 1500, 0, 100)
+        add_activity(layout, 3, 2500, 0, 100, label=(1900, 600))  # Left aligned label running over activity 1's.
+        add_activity(layout, 4, 5000, 0, 1000, label=(5000, 1000))  # Label within its own shape.
+        add_activity(layout, 5, 5500, 0, 1000)
+
+        report = find_collisions(layout)
+
+        kinds = {collision.activity_ids: collision.kind for collision in report.collisions}
+        self.assertEqual({
+            (1, 2): LABEL_OVERLAPS_SHAPE,
+            (1, 3): LABEL_OVERLAP,
+            (4, 5): SHAPE_OVERLAP,
+        }, kinds)
+        self.assertEqual({SHAPE_OVERLAP: 1, LABEL_OVERLAPS_SHAPE: 1, LABEL_OVERLAP: 1}, report.counts)
+
+    def test_same_activity_not_a_collision(self):
+        layout = PlanLayout()
+        # Done and not done parts of a split bar, with a label overflowing to the right.
+        add_activity(layout, 1, 0, 0, 500)
+        add_activity(layout, 1, 500, 0, 500, label=(1000, 1000))
+
+        self.assertEqual([], find_collisions(layout).collisions)
+
+    def test_other_elements_ignored(self):
+        layout = PlanLayout()
+        layout.add_element('swimlane', 'RECTANGLE', 0, 0, 10000, 1000, STYLE)
+        layout.add_element('today_line', 'LINE', 500, 0, 0, 1000, STYLE)
+        add_activity(layout, 1, 0, 0, 1000)
+
+        report = find_collisions(layout)
+        self.assertEqual([], report.collisions)
+        self.assertEqual(1, report.num_elements_checked)
+
+    def test_matches_brute_force(self):
+        generator = random.Random(3)
+        layout = PlanLayout()
+        for activity_id in range(400):
+            track = generator.randrange(20)
+            num_tracks = generator.choice([1, 1, 1, 2])
+            left = generator.randrange(0, 100000)
+            width = generator.randrange(1, 5000)
+            label = generator.choice([None, (left + width, 7000), (left - 7000, 7000)])
+            add_activity(layout, activity_id, left, track * 150, width, num_tracks * 150 - 50, label)
+
+        report = find_collisions(layout)
+
+        self.assertEqual(brute_force_collisions(layout), {collision.z_orders for collision in report.collisions})
+        self.assertEqual(len(report.collisions), len({collision.z_orders for collision in report.collisions}))
+
+
+class TestPlanVisualiserCollisionCheck(TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.template = os.path.join(self.folder, 'template.pptx')
+        shutil.copyfile(os.path.join(unit_test_files, 'unit_test_dummy_ppt.pptx'), self.template)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def visualiser(self, collision_check, track_numbers):
+        with ExcelConfigWorkbook(os.path.join(unit_test_files, 'unit_test_01_config.xlsx')) as config:
+            plot_config = config.parse_plot_config()
+            format_config = config.parse_format_config()
+        plot_config.today = datetime(2021, 3, 1)
+
+        rows = []
+        for index, (start, finish, track) in enumerate(track_numbers):
+            rows.append((index, {
+                'Task Name': f'Activity {index}',
+                'Visual Text': None,
+                'Duration': (finish - start).days,
+                'Start': start,
+                'Finish': finish,
+                'Visual Swimlane': 'Swimlane 1',
+                'Visual Track # Within Swimlane': track,
+                'Visual # Tracks To Cover': 1,
+                'Text Layout': 'Shape',
+                'Format String': 'Test Config 01',
+                'Done Format String': None,
+            }))
+        plan_data = ExcelPlan.plan_data_from_rows(rows, format_config, plot_config)
+        return PlanVisualiser(
+            plan_data, plot_config, format_config, self.template, [], collision_check=collision_check
+        )
+
+    def test_collision_check(self):
+        activities = [
+            (datetime(2021, 1, 1), datetime(2021, 2, 1), 1),
+            (datetime(2021, 1, 15), datetime(2021, 3, 1), 1),
+            (datetime(2021, 1, 15), datetime(2021, 3, 1), 2),
+        ]
+        visualiser = self.visualiser('warn', activities)
+        with self.assertLogs(level='WARNING'):
+            visualiser.plot_slide()
+        self.assertEqual([(0, 1)], [collision.activity_ids for collision in visualiser.collision_report.collisions])
+        self.assertIn('collision_check', [span.name for span in visualiser.instrumentation.spans])
+
+        visualiser = self.visualiser('fail', activities)
+        with self.assertRaises(PptPlanVisualiserException):
+            visualiser.plot_slide()
+
+        visualiser = self.visualiser(None, activities)
+        visualiser.plot_slide()
+        self.assertIsNone(visualiser.collision_report)
+
+    def test_unknown_collision_check(self):
+        with self.assertRaises(PptPlanVisualiserException):
+            self.visualiser('ignore', [(datetime(2021, 1, 1), datetime(2021, 2, 1), 1)])
@@ -0,0 +1,142 @@
+import os
+import random
+import shutil
+import tempfile
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+from unittest import TestCase
+
+from pptx import Presentation
+
+from source.visualiser.date_window import DateWindow, DateWindowIndex, quarter_windows, clip_to_window, \
+    CLIPPED_START_MARK, CLIPPED_END_MARK
+from source.visualiser.excel_config import ExcelConfigWorkbook
+from source.visualiser.excel_plan import ExcelPlan
+from source.visualiser.plan_visualiser import PlanVisualiser
+
+unit_test_files = 'test_resources/unit_test_01/input_files'
+
+
+class TestDateWindow(TestCase):
+    def test_months(self):
+        self.assertEqual(DateWindow(date(2021, 11, 1), date(2022, 4, 30)), DateWindow.months(date(2021, 11, 17), 6))
+        self.assertEqual(DateWindow(date(2021, 2, 1), date(2021, 2, 28)), DateWindow.months(datetime(2021, 2, 3), 1))
+
+    def test_quarter_windows(self):
+        windows = quarter_windows(datetime(2021, 2, 1), datetime(2021, 10, 31))
+        self.assertEqual(['Q1 2021', 'Q2 2021', 'Q3 2021', 'Q4 2021'], [window.name for window in windows])
+        self.assertEqual(DateWindow(date(2021, 4, 1), date(2021, 6, 30), 'Q2 2021'), windows[1])
+
+
+class TestDateWindowIndex(TestCase):
+    def test_matches_brute_force(self):
+        generator = random.Random(5)
+        plan_data = []
+        for _ in range(2000):
+            start = date(2021, 1, 1) + timedelta(days=generator.randrange(0, 730))
+            duration = generator.choice([0, generator.randrange(1, 30), generator.randrange(1, 400)])
+            plan_data.append(SimpleNamespace(start_date=start, end_date=start + timedelta(days=duration)))
+        # One activity running the whole length of the plan.
+        plan_data.append(SimpleNamespace(start_date=date(2020, 1, 1), end_date=date(2023, 12, 31)))
+        plan_data.append(SimpleNamespace(start_date=date(2021, 6, 1), end_date=None))
+
+        index = DateWindowIndex(plan_data)
+        for window_start, window_end in [
+            (date(2021, 1, 1), date(2021, 3, 31)),
+            (date(2021, 6, 1), date(2021, 6, 1)),
+            (date(2022, 5, 10), date(2022, 11, 30)),
+            (date(2019, 1, 1), date(2019, 12, 31)),
+        ]:
+            expected = [
+                position for position, activity in enumerate(plan_data)
+                if activity.start_date <= window_end and (activity.end_date or activity.start_date) >= window_start
+            ]
+            self.assertEqual(expected, index.intersecting(window_start, window_end))
+
+
+class TestPlanVisualiserWindows(TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.template = os.path.join(self.folder, 'template.pptx')
+        shutil.copyfile(os.path.join(unit_test_files, 'unit_test_dummy_ppt.pptx'), self.template)
+
+        with ExcelConfigWorkbook(os.path.join(unit_test_files, 'unit_test_01_config.xlsx')) as config:
+            plot_config = config.parse_plot_config()
+            format_config = config.parse_format_config()
+        plot_config.today = datetime(2021, 5, 1)
+
+        activities = [
+            ('Inside', datetime(2021, 1, 10), datetime(2021, 2, 20)),
+            ('Across', datetime(2021, 2, 1), datetime(2021, 5, 15)),
+            ('Milestone', datetime(2021, 8, 1), datetime(2021, 8, 1)),
+        ]
+        rows = []
+        for index, (name, start, finish) in enumerate(activities):
+            rows.append((index, {
+                'Task Name': name,
+                'Visual Text': None,
+                'Duration': (finish - start).days,
+                'Start': start,
+                'Finish': finish,
+                'Visual Swimlane': 'Swimlane 1',
+                'Visual Track # Within Swimlane': index + 1,
+                'Visual # Tracks To Cover': 1,
+                'Text Layout': 'Shape',
+                'Format String': 'Test Config 01',
+                'Done Format String': None,
+            }))
+        plan_data = ExcelPlan.plan_data_from_rows(rows, format_config, plot_config)
+        self.visualiser = PlanVisualiser(
+            plan_data, plot_config, format_config, self.template, [],
+            slides_out_path=os.path.join(self.folder, 'out.pptx')
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_clip_to_window(self):
+        inside, across, _ = self.visualiser.plan_data
+        window = DateWindow(date(2021, 1, 1), date(2021, 3, 31))
+        self.assertIs(inside, clip_to_window(inside, window))
+
+        window = DateWindow(date(2021, 3, 1), date(2021, 3, 31))
+        clipped = clip_to_window(across, window)
+        self.assertEqual((datetime(2021, 3, 1), datetime(2021, 3, 31)), (clipped.start_date, clipped.end_date))
+        self.assertEqual(f'{CLIPPED_START_MARK}Across{CLIPPED_END_MARK}', clipped.description)
+        self.assertEqual(datetime(2021, 2, 1), across.start_date)
+
+    def test_plot_windows(self):
+        plot_driver = self.visualiser.plot_driver
+        date_range = plot_driver.min_start_date, plot_driver.max_end_date
+
+        windows = quarter_windows(plot_driver.min_start_date, plot_driver.max_end_date)
+        self.visualiser.plot_windows(windows, max_workers=1, today=date(2021, 5, 1))
+
+        self.assertEqual(date_range, (plot_driver.min_start_date, plot_driver.max_end_date))
+        prs = Presentation(self.visualiser.slides_out_path)
+        self.assertEqual(3, len(prs.slides))
+
+        slide_texts = [
+            [shape.text_frame.text for shape in slide.shapes if shape.has_text_frame] for slide in prs.slides
+        ]
+        self.assertIn('Inside', slide_texts[0])
+        self.assertIn(f'Across{CLIPPED_END_MARK}', slide_texts[0])
+        self.assertIn(f'{CLIPPED_START_MARK}Across', slide_texts[1])
+        self.assertNotIn('Milestone', slide_texts[1])
+        self.assertIn('Milestone', slide_texts[2])
+        months = {'Jan', 'Feb', 'Mar', 'Apr'}
+        self.assertEqual({'Jan', 'Feb', 'Mar'}, {text for text in slide_texts[0] if text in months})
+
+        # The today line is only on the slide for the quarter including today.
+        today_lines = [
+            sum(1 for element in layout.elements if element.kind == 'today_line')
+            for layout in self.visualiser.page_layouts
+        ]
+        self.assertEqual([0, 1, 0], today_lines)
+
+        # Everything fits within the plot area, even activities carrying on outside the window.
+        for layout in self.visualiser.page_layouts:
+            for element in layout.elements:
+                if element.kind == 'activity':
+                    self.assertGreaterEqual(element.left, plot_driver.left)
+                    self.assertLessEqual(element.right, plot_driver.right + 1)
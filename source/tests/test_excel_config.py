@@ -0,0 +1,49 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from source.visualiser import excel_config
+from source.visualiser.excel_config import ExcelConfigWorkbook, ExcelPlotConfig, ExcelFormatConfig, \
+    ExcelSwimlaneConfig
+
+config_workbook_path = 'test_resources/unit_test_01/input_files/unit_test_01_config.xlsx'
+
+
+class TestExcelConfigWorkbook(TestCase):
+    def test_workbook_loaded_once(self):
+        with patch.object(excel_config, 'load_workbook', wraps=excel_config.load_workbook) as load_workbook:
+            with ExcelConfigWorkbook(config_workbook_path) as config_workbook:
+                config_workbook.parse_plot_config()
+                config_workbook.parse_format_config()
+                config_workbook.parse_swimlane_config()
+
+        self.assertEqual(1, load_workbook.call_count)
+
+    def test_not_loaded_until_read(self):
+        with patch.object(excel_config, 'load_workbook') as load_workbook:
+            ExcelConfigWorkbook(config_workbook_path)
+
+        load_workbook.assert_not_called()
+
+    def test_same_config_as_separate_parsers(self):
+        with ExcelConfigWorkbook(config_workbook_path) as config_workbook:
+            format_config = config_workbook.parse_format_config()
+            swimlanes = config_workbook.parse_swimlane_config()
+            plot_config = config_workbook.parse_plot_config()
+
+        self.assertEqual(ExcelFormatConfig(config_workbook_path, 'FormatConfig').parse_format_config(), format_config)
+        self.assertEqual(ExcelSwimlaneConfig(config_workbook_path, 'Swimlanes').parse_swimlane_config(), swimlanes)
+        expected_plot_config = ExcelPlotConfig(config_workbook_path, 'PlotConfig').parse_plot_config()
+        self.assertEqual(expected_plot_config.top, plot_config.top)
+        self.assertEqual(expected_plot_config.track_height, plot_config.track_height)
+
+    def test_sheet_names_overridden(self):
+        # Point the swimlanes parser at a different sheet to check that the override is used.
+        with ExcelConfigWorkbook(config_workbook_path, swimlanes_sheet='Plan') as config_workbook:
+            with self.assertRaises(KeyError):
+                config_workbook.parse_swimlane_config()
+
+    def test_read_other_sheet(self):
+        with ExcelConfigWorkbook(config_workbook_path) as config_workbook:
+            plan_records = config_workbook.read_sheet('Plan')
+
+        self.assertEqual('Activity 01', plan_records[0]['Task Name'])
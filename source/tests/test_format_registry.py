@@ -0,0 +1,119 @@
+from dataclasses import FrozenInstanceError
+from unittest import TestCase
+
+from pptx import Presentation
+from pptx.util import Cm, Pt
+
+from source.visualiser.activity_layout_attributes import ActivityLayoutAttributes
+from source.visualiser.format_registry import FormatRegistry
+from source.visualiser.plan_activity import PlanActivity
+from source.visualiser.plot_driver import PlotDriver
+from source.visualiser.text_formatting import TextFormatting
+from source.visualiser.visual_element_shape import VisualElementShape
+from source.tests.testing_utilities import parse_date
+
+plot_config = {
+    'top': Cm(0),
+    'left': Cm(0),
+    'bottom': Cm(20),
+    'right': Cm(30),
+    'track_height': Cm(1),
+    'track_gap': Cm(0.5),
+    'min_start_date': parse_date('2021-01-01'),
+    'max_end_date': parse_date('2021-12-31'),
+    'milestone_width': Cm(0.4),
+    'milestone_text_width': Cm(0.5),
+    'activity_text_width': Cm(5),
+    'text_margin': Cm(0.2),
+    'activity_shape': 'RECTANGLE',
+    'milestone_shape': 'DIAMOND'
+}
+
+format_config = {
+    'Default': {
+        'fill_rgb': (0, 255, 255),
+        'line_rgb': (255, 0, 0),
+        'corner_radius': Cm(0.1),
+        'font_size': Pt(8),
+        'font_bold': False,
+        'font_italic': True,
+        'font_colour_rgb': (0, 0, 0),
+        'text_vertical_align': 'middle'
+    },
+    'Done': {
+        'fill_rgb': (0, 0, 255),
+        'line_rgb': (0, 0, 0),
+        'corner_radius': 0,
+        'font_size': Pt(10),
+        'font_bold': True,
+        'font_italic': False,
+        'font_colour_rgb': (255, 255, 255),
+        'text_vertical_align': 'top'
+    },
+}
+
+
+class TestFormatRegistry(TestCase):
+    def setUp(self):
+        self.plot_driver = PlotDriver(plot_config)
+        self.plot_driver.num_days_in_date_range = 365
+        self.format_registry = FormatRegistry(format_config, self.plot_driver)
+
+    def test_format_compiled_once(self):
+        formatting = self.format_registry.shape_formatting('Default')
+
+        self.assertIs(formatting, self.format_registry.shape_formatting('Default'))
+        self.assertIsNot(formatting, self.format_registry.shape_formatting('Done'))
+        self.assertEqual('#0ff', formatting.fill_colour.get_hex())
+        self.assertEqual(Cm(0.2), formatting.text_formatting.margin_left)
+        self.assertTrue(formatting.text_formatting.font_italic)
+
+    def test_unknown_format(self):
+        with self.assertRaises(KeyError):
+            self.format_registry.shape_formatting('Not A Format')
+
+    def test_formatting_immutable(self):
+        formatting = self.format_registry.shape_formatting('Default')
+
+        with self.assertRaises(FrozenInstanceError):
+            formatting.fill_colour = None
+        with self.assertRaises(FrozenInstanceError):
+            formatting.text_formatting.horizontal_align = 'left'
+
+    def test_variant(self):
+        text_formatting = TextFormatting(font_colour=(255, 0, 0))
+
+        variant = text_formatting.variant(horizontal_align='right', margin_right=Cm(1))
+
+        self.assertEqual('centre', text_formatting.horizontal_align)
+        self.assertEqual('right', variant.horizontal_align)
+        self.assertEqual(Cm(1), variant.margin_right)
+        self.assertEqual(text_formatting.font_colour, variant.font_colour)
+        # Same changes give the same variant, whatever order they are given in.
+        self.assertIs(variant, text_formatting.variant(margin_right=Cm(1), horizontal_align='right'))
+
+    def test_shared_formatting_not_changed_by_plotting(self):
+        formatting = self.format_registry.shape_formatting('Default')
+        slide = Presentation().slides.add_slide(Presentation().slide_layouts[6])
+
+        activities = []
+        for activity_id, (activity_type, text_layout) in enumerate([('bar', 'Left'), ('milestone', 'Right')]):
+            activity = PlanActivity(
+                activity_id,
+                f'Activity {activity_id}',
+                activity_type,
+                parse_date('2021-02-01'),
+                parse_date('2021-03-01'),
+                ActivityLayoutAttributes('Swimlane', 1, 1, text_layout),
+                VisualElementShape.RECTANGLE,
+                self.plot_driver,
+                formatting,
+                swimlane_start_track=1
+            )
+            activity.plot_ppt_shapes(slide.shapes)
+            activities.append(activity)
+
+        self.assertEqual('centre', formatting.text_formatting.horizontal_align)
+        self.assertEqual(Cm(0.2), formatting.text_formatting.margin_left)
+        self.assertEqual(Cm(0.2), formatting.text_formatting.margin_right)
+        self.assertIs(formatting, activities[1].shape_formatting_1)
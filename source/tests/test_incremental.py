@@ -0,0 +1,109 @@
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from unittest import TestCase
+
+from lxml import etree
+from pptx import Presentation
+
+from source.visualiser.incremental import tag_shape, shape_tag, tag_slide, slide_signature
+from source.visualiser.plan_visualiser import PlanVisualiser
+
+unit_test_files = 'test_resources/unit_test_01/input_files'
+
+
+def canonical_xml(element):
+    return etree.tostring(element, method='c14n')
+
+
+def slide_tags(pptx_path):
+    sp_tree = Presentation(pptx_path).slides[0].shapes._spTree
+    return [shape_tag(sp) for sp in sp_tree.iterchildren() if shape_tag(sp) is not None]
+
+
+class TestShapeTags(TestCase):
+    def test_tags(self):
+        slide = Presentation().slides.add_slide(Presentation().slide_layouts[6])
+        sp = slide.shapes.add_textbox(0, 0, 10, 10)._element
+        sp_tree = slide.shapes._spTree
+
+        self.assertIsNone(shape_tag(sp))
+        self.assertIsNone(slide_signature(sp_tree))
+
+        tag_shape(sp, 'activity:3:0', 'abc')
+        tag_shape(sp, 'activity:3:1', 'def')
+        tag_slide(sp_tree, '123')
+
+        self.assertEqual(('activity:3:1', 'def'), shape_tag(sp))
+        self.assertEqual('123', slide_signature(sp_tree))
+        self.assertEqual(1, len(sp.xpath('./*/p:cNvPr/a:extLst/a:ext')))
+
+
+class TestIncrementalRender(TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.template = os.path.join(self.folder, 'template.pptx')
+        shutil.copyfile(os.path.join(unit_test_files, 'unit_test_dummy_ppt.pptx'), self.template)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def visualiser(self, slides_out_file='template_out.pptx'):
+        config_workbook = os.path.join(unit_test_files, 'unit_test_01_config.xlsx')
+        visualiser = PlanVisualiser.from_excel(config_workbook, config_workbook, self.template, 'Plan')
+        visualiser.plot_driver.today = datetime(2021, 3, 1)
+        visualiser.slides_out_path = os.path.join(self.folder, slides_out_file)
+        return visualiser
+
+    def test_no_previous_output(self):
+        render_stats = self.visualiser().plot_slide_incremental()
+
+        self.assertTrue(render_stats.full_render)
+        self.assertEqual(len(slide_tags(os.path.join(self.folder, 'template_out.pptx'))), render_stats.added)
+
+    def test_nothing_changed(self):
+        visualiser = self.visualiser()
+        visualiser.plot_slide()
+        previous_xml = canonical_xml(visualiser.shapes._spTree)
+
+        visualiser = self.visualiser()
+        render_stats = visualiser.plot_slide_incremental()
+
+        self.assertFalse(render_stats.full_render)
+        self.assertEqual(0, render_stats.touched)
+        self.assertEqual(previous_xml, canonical_xml(visualiser.shapes._spTree))
+
+    def test_changed_activities(self):
+        self.visualiser().plot_slide()
+        previous_tags = slide_tags(os.path.join(self.folder, 'template_out.pptx'))
+
+        visualiser = self.visualiser()
+        visualiser.plan_data[0].description = 'Changed description'
+        removed_activity = visualiser.plan_data.pop(1)
+        render_stats = visualiser.plot_slide_incremental()
+
+        # The changed activity's text, and the shapes and text of the removed activity.
+        num_removed_shapes = len([key for key, _ in previous_tags if f':{removed_activity.activity_id}:' in key])
+        self.assertEqual((0, 1, num_removed_shapes), (render_stats.added, render_stats.modified, render_stats.removed))
+        self.assertGreater(render_stats.reused, 0)
+
+        # Same shapes, in the same order, as plotting the changed plan from scratch.
+        full_visualiser = self.visualiser('full_out.pptx')
+        full_visualiser.plan_data[0].description = 'Changed description'
+        full_visualiser.plan_data.pop(1)
+        full_visualiser.plot_slide()
+        self.assertEqual(
+            slide_tags(os.path.join(self.folder, 'full_out.pptx')),
+            slide_tags(os.path.join(self.folder, 'template_out.pptx'))
+        )
+
+    def test_swimlanes_changed(self):
+        self.visualiser().plot_slide()
+
+        visualiser = self.visualiser()
+        last_swimlane = list(visualiser.swimlane_data)[-1]
+        visualiser.swimlane_data[last_swimlane]['end_track'] += 1
+        render_stats = visualiser.plot_slide_incremental()
+
+        self.assertTrue(render_stats.full_render)
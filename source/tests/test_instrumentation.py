@@ -0,0 +1,80 @@
+import json
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from source.visualiser.instrumentation import Instrumentation
+from source.visualiser.plan_visualiser import PlanVisualiser
+
+unit_test_files = 'test_resources/unit_test_01/input_files'
+
+
+class TestInstrumentation(TestCase):
+    def test_spans(self):
+        instrumentation = Instrumentation()
+        with instrumentation.span('outer', items=2) as outer:
+            with instrumentation.span('inner') as inner:
+                inner.add('rows')
+                inner.add('rows', 4)
+            instrumentation.record('separate', 0.5, 0.25, formats=3)
+        outer.add('items')
+
+        self.assertEqual(['outer', 'inner', 'separate'], [span.name for span in instrumentation.spans])
+        self.assertEqual([None, 'outer', 'outer'], [span.parent for span in instrumentation.spans])
+        self.assertEqual({'items': 3}, outer.counts)
+        self.assertEqual({'rows': 5}, inner.counts)
+        self.assertGreaterEqual(outer.wall_seconds, inner.wall_seconds)
+
+        report = json.loads(instrumentation.to_json())
+        self.assertEqual(outer.wall_seconds, report['total_wall_seconds'])
+        self.assertEqual({'formats': 3}, report['spans'][2]['counts'])
+        self.assertEqual(0.25, report['spans'][2]['cpu_seconds'])
+
+    def test_span_recorded_on_error(self):
+        instrumentation = Instrumentation()
+        with self.assertRaises(ValueError):
+            with instrumentation.span('failing'):
+                raise ValueError()
+        with instrumentation.span('next'):
+            pass
+
+        self.assertIsNone(instrumentation.spans[1].parent)
+
+
+class TestPlanVisualiserInstrumentation(TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_stages_recorded(self):
+        template = os.path.join(self.folder, 'template.pptx')
+        shutil.copyfile(os.path.join(unit_test_files, 'unit_test_dummy_ppt.pptx'), template)
+        config_workbook = os.path.join(unit_test_files, 'unit_test_01_config.xlsx')
+
+        visualiser = PlanVisualiser.from_excel(config_workbook, config_workbook, template, 'Plan')
+        visualiser.plot_slide()
+        report_path = os.path.join(self.folder, 'timings.json')
+        visualiser.instrumentation.write_json(report_path)
+
+        with open(report_path) as report_file:
+            spans = {span['name']: span for span in json.load(report_file)['spans']}
+        self.assertEqual(
+            [
+                'config_load', 'plan_read', 'format_compile', 'template_load', 'align_months', 'extract_swimlane_data',
+                'layout', 'swimlanes', 'month_bar', 'activities', 'today_line', 'render', 'save'
+            ],
+            list(spans)
+        )
+        self.assertEqual('plan_read', spans['format_compile']['parent'])
+        self.assertEqual('layout', spans['activities']['parent'])
+
+        plan_read_counts = spans['plan_read']['counts']
+        self.assertEqual(len(visualiser.plan_data), plan_read_counts['rows_flagged'])
+        self.assertGreaterEqual(plan_read_counts['rows_read'], plan_read_counts['rows_flagged'])
+        self.assertEqual(len(visualiser.plan_data), spans['activities']['counts']['activities'])
+
+        layout_shapes = sum(spans[name]['counts']['shapes'] for name in ('swimlanes', 'month_bar', 'activities', 'today_line'))
+        self.assertEqual(layout_shapes, spans['render']['counts']['shapes_emitted'])
@@ -0,0 +1,117 @@
+import ast
+import os
+import shutil
+import tempfile
+from datetime import date, datetime
+from unittest import TestCase
+
+from lxml import etree
+
+from source.visualiser import layout as layout_module
+from source.visualiser.layout import PlanLayout, ShapeStyle, TextStyle, LINE_SHAPE
+from source.visualiser.plan_visualiser import PlanVisualiser
+
+unit_test_files = 'test_resources/unit_test_01/input_files'
+
+
+def canonical_xml(element):
+    return etree.tostring(element, method='c14n')
+
+
+class TestPlanLayout(TestCase):
+    def test_styles_interned(self):
+        layout = PlanLayout()
+        red = ShapeStyle(fill_rgb=(255, 0, 0), line_rgb=(0, 0, 0))
+        text = TextStyle(font_size=101600, font_rgb=(1, 2, 3))
+
+        first = layout.add_element('activity', 'RECTANGLE', 0, 0, 10, 10, red, 'a', text, activity_id=1)
+        second = layout.add_element('activity', 'RECTANGLE', 10, 0, 10, 10, ShapeStyle((255, 0, 0), (0, 0, 0)), 'b',
+                                    TextStyle(font_size=101600, font_rgb=(1, 2, 3)), activity_id=2)
+        third = layout.add_element('month', 'RECTANGLE', 20, 0, 10, 10, ShapeStyle())
+
+        self.assertEqual(1, len(layout.text_styles))
+        self.assertEqual(2, len(layout.shape_styles))
+        self.assertEqual(first.shape_style_id, second.shape_style_id)
+        self.assertIsNone(layout.text_style(third))
+        self.assertEqual([0, 1, 2], [element.z_order for element in layout.elements])
+        self.assertEqual((20, 30), (second.right, third.right))
+
+    def test_json_round_trip(self):
+        layout = PlanLayout(1000, 500)
+        layout.add_element('swimlane', 'RECTANGLE', 0, 0, 100, 50, ShapeStyle((1, 2, 3), (4, 5, 6)), 'Lane',
+                           TextStyle(vertical_align='top', horizontal_align='left'))
+        layout.add_element('activity', 'ROUNDED_RECTANGLE', 5, 5, 20, 10, ShapeStyle((1, 2, 3)), activity_id=7,
+                           corner_adjustment=0.25)
+        layout.add_element('today_line', LINE_SHAPE, 50, 0, 0, 50, ShapeStyle(line_rgb=(255, 0, 0)))
+
+        loaded = PlanLayout.from_json(layout.to_json())
+
+        self.assertEqual(layout, loaded)
+        self.assertEqual((4, 5, 6), loaded.shape_style(loaded.elements[0]).line_rgb)
+        self.assertEqual(0.25, loaded.elements[1].corner_adjustment)
+
+    def test_no_powerpoint_dependency(self):
+        with open(layout_module.__file__) as layout_file:
+            tree = ast.parse(layout_file.read())
+        imported = [alias.name for node in ast.walk(tree) if isinstance(node, ast.Import) for alias in node.names]
+        imported += [node.module for node in ast.walk(tree) if isinstance(node, ast.ImportFrom)]
+
+        self.assertFalse([module for module in imported if module.split('.')[0] == 'pptx'])
+
+
+class TestPlanVisualiserLayout(TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def visualiser(self, renderer='xml'):
+        template = os.path.join(self.folder, f'{renderer}.pptx')
+        shutil.copyfile(os.path.join(unit_test_files, 'unit_test_dummy_ppt.pptx'), template)
+        config_workbook = os.path.join(unit_test_files, 'unit_test_01_config.xlsx')
+
+        visualiser = PlanVisualiser.from_excel(config_workbook, config_workbook, template, 'Plan', renderer=renderer)
+        visualiser.plot_driver.today = datetime(2021, 3, 1)
+        return visualiser
+
+    def test_layout_matches_plotted_shapes(self):
+        visualiser = self.visualiser('pptx')
+        layout = visualiser.create_layout(today=date(2021, 3, 1))
+        num_existing_shapes = len(visualiser.shapes)
+
+        visualiser.render_layout(layout)
+
+        plotted = list(visualiser.shapes)[num_existing_shapes:]
+        self.assertEqual(len(layout.elements), len(plotted))
+        for element, shape in zip(layout.elements_in_drawing_order(), plotted):
+            self.assertEqual(
+                (element.left, element.top, element.width, element.height),
+                (shape.left, shape.top, shape.width, shape.height)
+            )
+            if element.text is not None:
+                self.assertEqual(element.text, shape.text_frame.text)
+
+    def test_layout_contents(self):
+        visualiser = self.visualiser()
+        layout = visualiser.create_layout(today=date(2021, 3, 1))
+
+        kinds = [element.kind for element in layout.elements]
+        self.assertEqual(len(visualiser.swimlane_data), kinds.count('swimlane'))
+        self.assertEqual(len(visualiser.plan_data), kinds.count('activity_text'))
+        self.assertEqual('today_line', kinds[-1])
+        self.assertEqual(
+            {activity.activity_id for activity in visualiser.plan_data},
+            {element.activity_id for element in layout.elements if element.kind == 'activity'}
+        )
+        self.assertEqual(int(visualiser.prs.slide_width), layout.slide_width)
+
+    def test_saved_layout_renders_the_same(self):
+        reference = self.visualiser('pptx')
+        layout = reference.create_layout(today=date(2021, 3, 1))
+        reference.render_layout(layout)
+
+        visualiser = self.visualiser('xml')
+        visualiser.render_layout(PlanLayout.from_json(layout.to_json()))
+
+        self.assertEqual(canonical_xml(reference.shapes._spTree), canonical_xml(visualiser.shapes._spTree))
@@ -0,0 +1,143 @@
+import datetime
+import os
+import tempfile
+from unittest import TestCase
+
+import openpyxl
+from ddt import ddt, data, unpack
+
+from source.visualiser.excel_config import ExcelConfigWorkbook
+from source.visualiser.excel_plan import ExcelPlan
+from source.visualiser.lxml_sheet_reader import iter_sheet_rows, from_excel, MAC_EPOCH
+from source.visualiser.read_excel import read_excel, stream_excel
+
+unit_test_config = 'test_resources/unit_test_01/input_files/unit_test_01_config.xlsx'
+kbt_config = 'test_resources/input_files/config_files/KBT-VisualConfig.xlsx'
+
+# Every sheet of every xlsx test resource, to check that both engines read them the same way.
+parity_test_data = [
+    (unit_test_config, 'PlotConfig'),
+    (unit_test_config, 'FormatConfig'),
+    (unit_test_config, 'Swimlanes'),
+    (unit_test_config, 'Lookup'),
+    (unit_test_config, 'Plan'),
+    ('test_resources/unit_test_01/input_files/unit_test_01.plan.xlsx', 'Plan'),
+    (kbt_config, 'PlotConfig'),
+    (kbt_config, 'FormatConfig'),
+    (kbt_config, 'Swimlanes'),
+    (kbt_config, 'Lookup'),
+    ('test_resources/input_files/config_files/KBT-VisualConfig-old.xlsx', 'FormatConfig'),
+    ('test_resources/input_files/excel_plan_file/ExcelPlanFile01.xlsx', 'ppt_plan_driver'),
+    ('test_resources/input_files/excel_plan_file/UK-View Plan-2.xlsx', 'UK-View Plan'),
+    ('test_resources/input_files/excel_plan_file/UK-View Plan-2.xlsx', 'Comments'),
+]
+
+from_excel_test_data = [
+    (44197, datetime.datetime(2021, 1, 1)),
+    (44197.5, datetime.datetime(2021, 1, 1, 12)),
+    (59, datetime.datetime(1900, 2, 28)),  # Before Excel's non-existent 29th February 1900
+    (0.25, datetime.time(6)),
+]
+
+
+def trim(row):
+    # openpyxl and lxml can differ in how many trailing blank cells they return for a row.
+    row = list(row)
+    while row and row[-1] is None:
+        row.pop()
+    return row
+
+
+@ddt
+class TestLxmlSheetReader(TestCase):
+    @data(*parity_test_data)
+    @unpack
+    def test_table_parity(self, excel_path, sheet_name):
+        self.assertEqual(read_excel(excel_path, sheet_name), read_excel(excel_path, sheet_name, engine='lxml'))
+
+    @data(*parity_test_data)
+    @unpack
+    def test_raw_row_parity(self, excel_path, sheet_name):
+        workbook = openpyxl.load_workbook(excel_path, read_only=True, data_only=True)
+        sheet = workbook[sheet_name]
+        sheet.reset_dimensions()
+        openpyxl_rows = [trim(row) for row in sheet.iter_rows(values_only=True)]
+        workbook.close()
+
+        lxml_rows = [trim(row) for row in iter_sheet_rows(excel_path, sheet_name)]
+
+        self.assertEqual(openpyxl_rows, lxml_rows)
+
+    def test_projected_and_filtered_parity(self):
+        columns = ['Task Name', 'Start', 'Visual Track # Within Swimlane']
+        row_filters = {'Visual Flag': lambda flag: flag is True}
+
+        openpyxl_rows = list(stream_excel(unit_test_config, 'Plan', columns=columns, row_filters=row_filters))
+        lxml_rows = list(stream_excel(unit_test_config, 'Plan', columns=columns, row_filters=row_filters,
+                                      engine='lxml'))
+
+        self.assertEqual(4, len(lxml_rows))
+        self.assertEqual(openpyxl_rows, lxml_rows)
+
+    def test_plan_data_parity(self):
+        with ExcelConfigWorkbook(unit_test_config) as config_workbook:
+            plot_config = config_workbook.parse_plot_config()
+            format_config = config_workbook.parse_format_config()
+
+        plan_data = ExcelPlan.read_plan_data(unit_test_config, 'Plan', format_config, plot_config)
+        lxml_plan_data = ExcelPlan.read_plan_data(unit_test_config, 'Plan', format_config, plot_config, engine='lxml')
+
+        self.assertEqual([str(activity) for activity in plan_data], [str(activity) for activity in lxml_plan_data])
+        self.assertEqual(
+            [activity.activity_layout_attributes.track_number for activity in plan_data],
+            [activity.activity_layout_attributes.track_number for activity in lxml_plan_data]
+        )
+
+    def test_value_types_and_1904_dates(self):
+        workbook = openpyxl.Workbook()
+        workbook.epoch = openpyxl.utils.datetime.CALENDAR_MAC_1904
+        sheet = workbook.active
+        sheet.title = 'Values'
+        sheet.append(['Int', 'Float', 'Bool', 'Date', 'Time', 'Text'])
+        sheet.append([1, 2.5, True, datetime.datetime(2021, 3, 4), datetime.time(13, 30), 'abc'])
+        sheet.append([None, -1e-3, False, datetime.datetime(2021, 3, 4, 10, 15), None, 'x005F_y'])
+        sheet.append([])
+        sheet.append([3])  # After the blank row so not part of the table
+
+        with tempfile.TemporaryDirectory() as folder:
+            excel_path = os.path.join(folder, 'values.xlsx')
+            workbook.save(excel_path)
+            table = read_excel(excel_path, 'Values')
+            lxml_table = read_excel(excel_path, 'Values', engine='lxml')
+
+        self.assertEqual(2, len(lxml_table))
+        self.assertEqual(datetime.datetime(2021, 3, 4), lxml_table[0]['Date'])
+        self.assertEqual(table, lxml_table)
+
+    def test_iso_dates(self):
+        workbook = openpyxl.Workbook(iso_dates=True)
+        sheet = workbook.active
+        sheet.title = 'Values'
+        sheet.append(['Date'])
+        sheet.append([datetime.datetime(2021, 3, 4, 10, 15)])
+
+        with tempfile.TemporaryDirectory() as folder:
+            excel_path = os.path.join(folder, 'iso_dates.xlsx')
+            workbook.save(excel_path)
+            table = read_excel(excel_path, 'Values')
+            lxml_table = read_excel(excel_path, 'Values', engine='lxml')
+
+        self.assertEqual(datetime.datetime(2021, 3, 4, 10, 15), lxml_table[0]['Date'])
+        self.assertEqual(table, lxml_table)
+
+    @data(*from_excel_test_data)
+    @unpack
+    def test_from_excel(self, serial, expected_value):
+        self.assertEqual(expected_value, from_excel(serial))
+
+    def test_from_excel_1904(self):
+        self.assertEqual(datetime.datetime(1904, 1, 2), from_excel(1, MAC_EPOCH))
+
+    def test_missing_sheet(self):
+        with self.assertRaises(KeyError):
+            list(iter_sheet_rows(unit_test_config, 'Not A Sheet'))
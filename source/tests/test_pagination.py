@@ -0,0 +1,147 @@
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest import TestCase
+
+from lxml import etree
+from pptx import Presentation
+
+from source.visualiser.excel_config import ExcelConfigWorkbook
+from source.visualiser.excel_plan import ExcelPlan
+from source.visualiser.pagination import paginate, tracks_per_page
+from source.visualiser.plan_visualiser import PlanVisualiser
+
+unit_test_files = 'test_resources/unit_test_01/input_files'
+
+
+def activity(swimlane, track, num_tracks=1):
+    return SimpleNamespace(activity_layout_attributes=SimpleNamespace(
+        swimlane_name=swimlane, track_number=track, number_of_tracks_to_span=num_tracks
+    ))
+
+
+def swimlane_data(*lane_sizes):
+    data = {}
+    end_track = 0
+    for index, num_tracks in enumerate(lane_sizes):
+        data[f'Lane {index}'] = {'start_track': end_track + 1, 'end_track': end_track + num_tracks}
+        end_track += num_tracks
+    return data
+
+
+class TestPaginate(TestCase):
+    def test_one_page(self):
+        plan_data = [activity('Lane 0', 1), activity('Lane 1', 3)]
+        pages = paginate(plan_data, swimlane_data(5, 3), 20)
+
+        self.assertEqual(1, len(pages))
+        self.assertEqual([0, 1], pages[0].activity_indexes)
+        self.assertEqual({'start_track': 6, 'end_track': 8, 'first_track_within_lane': 1, 'plan_row': 1},
+                         pages[0].swimlane_data['Lane 1'])
+
+    def test_breaks_at_swimlanes(self):
+        plan_data = [activity('Lane 0', 10), activity('Lane 1', 8), activity('Lane 2', 1), activity('Lane 2', 15)]
+        pages = paginate(plan_data, swimlane_data(10, 8, 15), 20)
+
+        self.assertEqual([['Lane 0', 'Lane 1'], ['Lane 2']], [list(page.swimlane_data) for page in pages])
+        self.assertEqual([[0, 1], [2, 3]], [page.activity_indexes for page in pages])
+        self.assertEqual({'start_track': 1, 'end_track': 15, 'first_track_within_lane': 1, 'plan_row': 2},
+                         pages[1].swimlane_data['Lane 2'])
+
+    def test_splits_large_swimlane(self):
+        # An activity covering tracks 20 and 21, so the first page stops at track 19 rather than cut through it.
+        plan_data = [activity('Lane 0', 1), activity('Lane 0', 20, 2), activity('Lane 0', 45), activity('Lane 1', 1)]
+        pages = paginate(plan_data, swimlane_data(45, 2), 20)
+
+        self.assertEqual(
+            [(1, 1, 19), (20, 1, 20), (40, 1, 6)],
+            [
+                (lane['first_track_within_lane'], lane['start_track'], lane['end_track'])
+                for lane in (page.swimlane_data['Lane 0'] for page in pages)
+            ]
+        )
+        self.assertEqual({'start_track': 7, 'end_track': 8, 'first_track_within_lane': 1, 'plan_row': 1},
+                         pages[2].swimlane_data['Lane 1'])
+        self.assertEqual([[0], [1], [2, 3]], [page.activity_indexes for page in pages])
+        self.assertTrue(all(page.num_tracks <= 20 for page in pages))
+
+    def test_activity_split_when_no_choice(self):
+        plan_data = [activity('Lane 0', 1, 30)]
+        with self.assertLogs(level='WARNING'):
+            pages = paginate(plan_data, swimlane_data(30), 20)
+        self.assertEqual([[0], []], [page.activity_indexes for page in pages])
+
+
+class TestPlanVisualiserPlotPages(TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.template = os.path.join(self.folder, 'template.pptx')
+        shutil.copyfile(os.path.join(unit_test_files, 'unit_test_dummy_ppt.pptx'), self.template)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def visualiser(self, slides_out_path):
+        with ExcelConfigWorkbook(os.path.join(unit_test_files, 'unit_test_01_config.xlsx')) as config:
+            plot_config = config.parse_plot_config()
+            format_config = config.parse_format_config()
+        plot_config.today = datetime(2021, 3, 1)
+
+        rows = []
+        for index in range(120):
+            start = datetime(2021, 1, 1) + timedelta(days=index)
+            rows.append((index, {
+                'Task Name': f'Activity {index}',
+                'Visual Text': None,
+                'Duration': 20,
+                'Start': start,
+                'Finish': start + timedelta(days=20),
+                'Visual Swimlane': f'Swimlane {index // 40}',
+                'Visual Track # Within Swimlane': index % 40 + 1,
+                'Visual # Tracks To Cover': 1,
+                'Text Layout': 'Shape',
+                'Format String': 'Test Config 01',
+                'Done Format String': None,
+            }))
+        plan_data = ExcelPlan.plan_data_from_rows(rows, format_config, plot_config)
+        return PlanVisualiser(
+            plan_data, plot_config, format_config, self.template, [], slides_out_path=slides_out_path
+        )
+
+    def test_plot_pages(self):
+        visualiser = self.visualiser(os.path.join(self.folder, 'out.pptx'))
+        num_tracks = tracks_per_page(visualiser.plot_driver)
+        self.assertLess(num_tracks, 120)
+
+        render_stats = visualiser.plot_pages(max_workers=1)
+
+        prs = Presentation(visualiser.slides_out_path)
+        num_pages = len(visualiser.page_layouts)
+        self.assertEqual(num_pages, len(prs.slides))
+        self.assertGreaterEqual(num_pages, -(-120 // num_tracks))
+        self.assertEqual(sum(len(layout.elements) for layout in visualiser.page_layouts), render_stats.added)
+
+        month_names = {element.text for element in visualiser.layout.elements if element.kind == 'month'}
+        activity_names = set()
+        for slide in prs.slides:
+            texts = [shape.text_frame.text for shape in slide.shapes if shape.has_text_frame]
+            # Month bar and swimlane headers repeated on every page.
+            self.assertTrue(month_names <= set(texts))
+            self.assertTrue(any(text.startswith('Swimlane') for text in texts))
+            activity_names.update(text for text in texts if text.startswith('Activity'))
+            shape_ids = [shape.shape_id for shape in slide.shapes]
+            self.assertEqual(len(shape_ids), len(set(shape_ids)))
+            for shape in slide.shapes:
+                self.assertLessEqual(shape.top + shape.height, visualiser.plot_driver.bottom + 1)
+        self.assertEqual({f'Activity {index}' for index in range(120)}, activity_names)
+
+        # Plotting the pages in other processes gives the same deck.
+        parallel = self.visualiser(os.path.join(self.folder, 'out_parallel.pptx'))
+        parallel.plot_pages(max_workers=2, today=datetime.today().date())
+        parallel_prs = Presentation(parallel.slides_out_path)
+        self.assertEqual(
+            [etree.tostring(slide.shapes._spTree) for slide in prs.slides],
+            [etree.tostring(slide.shapes._spTree) for slide in parallel_prs.slides]
+        )
@@ -0,0 +1,146 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from pptx.util import Cm
+
+from source.visualiser import excel_config, read_excel
+from source.visualiser.excel_config import ExcelConfigWorkbook
+from source.visualiser.excel_plan import ExcelPlan
+from source.visualiser import parse_cache
+from source.visualiser.parse_cache import ParsedInputCache, evict_least_recently_used
+
+config_workbook_path = 'test_resources/unit_test_01/input_files/unit_test_01_config.xlsx'
+
+
+def read_inputs(excel_path, cache):
+    with ExcelConfigWorkbook(excel_path, cache=cache) as config_workbook:
+        plot_config = config_workbook.parse_plot_config()
+        format_config = config_workbook.parse_format_config()
+        swimlanes = config_workbook.parse_swimlane_config()
+    plan_data = ExcelPlan.read_plan_data(excel_path, 'Plan', format_config, plot_config, cache=cache)
+    return plot_config, format_config, swimlanes, plan_data
+
+
+class TestParsedInputCache(TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.folder, 'cache')
+        self.excel_path = os.path.join(self.folder, 'config.xlsx')
+        shutil.copyfile(config_workbook_path, self.excel_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_miss_then_hit(self):
+        cache = ParsedInputCache(self.cache_dir)
+
+        first = cache.get_or_parse(self.excel_path, 'test', 'Sheet', lambda: {'width': Cm(1.5)})
+        second = cache.get_or_parse(self.excel_path, 'test', 'Sheet', lambda: self.fail('Should be cached'))
+
+        self.assertEqual((1, 1), (cache.hits, cache.misses))
+        self.assertEqual(first, second)
+        # pptx lengths need special handling to survive pickling.
+        self.assertIsInstance(second['width'], Cm)
+        self.assertEqual(1.5, second['width'].cm)
+
+    def test_key_includes_kind_and_sheet(self):
+        cache = ParsedInputCache(self.cache_dir)
+
+        self.assertNotEqual(cache.key(self.excel_path, 'a', 'Sheet'), cache.key(self.excel_path, 'b', 'Sheet'))
+        self.assertNotEqual(cache.key(self.excel_path, 'a', 'Sheet'), cache.key(self.excel_path, 'a', 'Other'))
+
+    def test_changed_file_not_found(self):
+        cache = ParsedInputCache(self.cache_dir)
+        cache.get_or_parse(self.excel_path, 'test', 'Sheet', lambda: 1)
+
+        with open(self.excel_path, 'ab') as excel_file:
+            excel_file.write(b'changed')
+
+        self.assertEqual(2, cache.get_or_parse(self.excel_path, 'test', 'Sheet', lambda: 2))
+        self.assertEqual((0, 2), (cache.hits, cache.misses))
+
+    def test_corrupt_entry_is_a_miss(self):
+        cache = ParsedInputCache(self.cache_dir)
+        cache.get_or_parse(self.excel_path, 'test', 'Sheet', lambda: 1)
+        with open(cache._entry_path(cache.key(self.excel_path, 'test', 'Sheet')), 'wb') as entry_file:
+            entry_file.write(b'not a pickle')
+
+        self.assertEqual(2, cache.get_or_parse(self.excel_path, 'test', 'Sheet', lambda: 2))
+        # The corrupt entry has been replaced.
+        self.assertEqual(2, cache.get_or_parse(self.excel_path, 'test', 'Sheet', lambda: 3))
+
+    def test_least_recently_used_evicted(self):
+        cache = ParsedInputCache(self.cache_dir)
+        for index, sheet in enumerate(['Sheet1', 'Sheet2', 'Sheet3']):
+            cache.get_or_parse(self.excel_path, 'test', sheet, lambda: b'x' * 1000)
+            entry_path = cache._entry_path(cache.key(self.excel_path, 'test', sheet))
+            os.utime(entry_path, ns=(index * 10 ** 9, index * 10 ** 9))
+
+        # Using Sheet1 makes it the most recently used, so Sheet2 is now the oldest.
+        cache.get_or_parse(self.excel_path, 'test', 'Sheet1', lambda: self.fail('Should be cached'))
+        cache.max_bytes = 2500
+        cache.get_or_parse(self.excel_path, 'test', 'Sheet4', lambda: b'x' * 1000)
+
+        self.assertEqual(2, cache.evictions)
+        hits = cache.hits
+        cache.get_or_parse(self.excel_path, 'test', 'Sheet1', lambda: self.fail('Should be cached'))
+        cache.get_or_parse(self.excel_path, 'test', 'Sheet4', lambda: self.fail('Should be cached'))
+        self.assertEqual(hits + 2, cache.hits)
+        self.assertEqual(2, len(os.listdir(self.cache_dir)))
+
+    def test_warm_run_does_not_read_excel(self):
+        cold_inputs = read_inputs(self.excel_path, ParsedInputCache(self.cache_dir))
+
+        cache = ParsedInputCache(self.cache_dir)
+        with patch.object(excel_config, 'load_workbook') as config_load_workbook, \
+                patch.object(read_excel, 'load_workbook') as plan_load_workbook:
+            warm_inputs = read_inputs(self.excel_path, cache)
+
+        config_load_workbook.assert_not_called()
+        plan_load_workbook.assert_not_called()
+        self.assertEqual((4, 0), (cache.hits, cache.misses))
+
+        cold_plot_config, cold_format_config, cold_swimlanes, cold_plan_data = cold_inputs
+        warm_plot_config, warm_format_config, warm_swimlanes, warm_plan_data = warm_inputs
+        self.assertEqual(cold_format_config, warm_format_config)
+        self.assertEqual(cold_swimlanes, warm_swimlanes)
+        self.assertEqual(cold_plot_config.track_height, warm_plot_config.track_height)
+        self.assertEqual([str(activity) for activity in cold_plan_data], [str(activity) for activity in warm_plan_data])
+
+    def test_undeletable_entry_skipped(self):
+        os.mkdir(self.cache_dir)
+        entry_paths = []
+        for index in range(3):
+            entry_path = os.path.join(self.cache_dir, f'entry{index}')
+            with open(entry_path, 'wb') as entry_file:
+                entry_file.write(b'x' * 1000)
+            os.utime(entry_path, ns=(index * 10 ** 9, index * 10 ** 9))
+            entry_paths.append(entry_path)
+
+        # As on Windows, when the oldest entry is still open or mapped by another process.
+        remove = os.remove
+
+        def remove_unless_locked(path):
+            if path == entry_paths[0]:
+                raise PermissionError(13, 'The process cannot access the file', path)
+            remove(path)
+
+        with patch.object(parse_cache.os, 'remove', remove_unless_locked):
+            self.assertEqual(1, evict_least_recently_used(entry_paths, 2000))
+
+        self.assertEqual(['entry0', 'entry2'], sorted(os.listdir(self.cache_dir)))
+
+    def test_same_inputs_as_uncached(self):
+        uncached_plot_config, uncached_format_config, _, uncached_plan_data = read_inputs(self.excel_path, None)
+        read_inputs(self.excel_path, ParsedInputCache(self.cache_dir))
+        plot_config, format_config, _, plan_data = read_inputs(self.excel_path, ParsedInputCache(self.cache_dir))
+
+        self.assertEqual(uncached_format_config, format_config)
+        self.assertEqual(vars(uncached_plot_config), vars(plot_config))
+        self.assertEqual(
+            [(activity.start_date, activity.end_date) for activity in uncached_plan_data],
+            [(activity.start_date, activity.end_date) for activity in plan_data]
+        )
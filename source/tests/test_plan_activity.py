@@ -1,3 +1,6 @@
+import os
+from dataclasses import replace
+from datetime import datetime
 from unittest import TestCase
 
 from colour import Color
@@ -6,6 +9,8 @@ from pptx import Presentation
 from pptx.util import Cm
 
 from source.visualiser.activity_layout_attributes import ActivityLayoutAttributes
+from source.visualiser.excel_config import ExcelConfigWorkbook
+from source.visualiser.excel_plan import ExcelPlan
 from source.visualiser.plan_activity import PlanActivity
 from source.visualiser.plot_driver import PlotDriver
 from source.tests.testing_utilities import parse_date
@@ -13,6 +18,8 @@ from source.visualiser.visual_element_shape import VisualElementShape
 
 from source.visualiser.shape_formatting import ShapeFormatting
 
+unit_test_files = 'test_resources/unit_test_01/input_files'
+
 plan_visual_config_test_data = {
     'vis_cfg_01': {
         'top': Cm(0),
@@ -154,3 +161,52 @@ class TestPlanActivity(TestCase):
         self.assertEqual(exp_res['is_future'], activity.is_future())
         self.assertEqual(exp_res['is_current'], activity.is_current())
         self.assertEqual(exp_res['plot_start'], plotted_shape.left)
+
+
+class TestPlanActivityRecords(TestCase):
+    def setUp(self):
+        with ExcelConfigWorkbook(os.path.join(unit_test_files, 'unit_test_01_config.xlsx')) as config:
+            self.plot_config = config.parse_plot_config()
+            self.format_config = config.parse_format_config()
+
+        rows = []
+        for index in range(20):
+            rows.append((index, {
+                'Task Name': f'Activity {index}',
+                'Visual Text': None,
+                'Duration': index % 2,
+                # New objects for every row, as a reader creates them.
+                'Start': datetime(2021, 3, 1 + index % 2),
+                'Finish': datetime(2021, 3, 2),
+                'Visual Swimlane': ''.join(['Swimlane ', str(index % 2)]),
+                'Visual Track # Within Swimlane': 1 + index // 2,
+                'Visual # Tracks To Cover': 1,
+                'Text Layout': ''.join(['Sha', 'pe']),
+                'Format String': 'Test Config 01',
+                'Done Format String': None,
+            }))
+        self.plan_data = ExcelPlan.plan_data_from_rows(rows, self.format_config, self.plot_config)
+
+    def test_slots(self):
+        activity = self.plan_data[0]
+        self.assertFalse(hasattr(activity, '__dict__'))
+        self.assertFalse(hasattr(activity.activity_layout_attributes, '__dict__'))
+        with self.assertRaises(AttributeError):
+            activity.not_a_field = 1
+
+        clipped = replace(activity, description='Clipped')
+        self.assertEqual('Clipped', clipped.description)
+        self.assertIsNone(clipped.x_geometry)
+        self.assertIs(activity.plan_visual_config, clipped.plan_visual_config)
+
+    def test_shared_values(self):
+        first, second, third = self.plan_data[:3]
+        self.assertIs(first.start_date, third.start_date)
+        self.assertIs(first.end_date, second.end_date)
+        self.assertIs(first.activity_layout_attributes.swimlane_name, third.activity_layout_attributes.swimlane_name)
+        self.assertIs(first.activity_layout_attributes.text_layout, second.activity_layout_attributes.text_layout)
+        self.assertIs(first.shape_formatting_1, second.shape_formatting_1)
+
+        # Values which are equal but of different types aren't mixed up.
+        self.assertEqual('Swimlane 1', second.activity_layout_attributes.swimlane_name)
+        self.assertNotEqual(first.start_date, second.start_date)
@@ -1,6 +1,72 @@
+import io
+import os
+import shutil
+import tempfile
+import zipfile
 from unittest import TestCase
 
+from pptx import Presentation
+
+from source.visualiser.exceptions import PptPlanVisualiserException
+from source.visualiser.plan_visualiser import PlanVisualiser
+
+unit_test_files = 'test_resources/unit_test_01/input_files'
+
+
+def read_bytes(file_name):
+    with open(os.path.join(unit_test_files, file_name), 'rb') as file:
+        return file.read()
+
+
+def slide_xml(deck):
+    with zipfile.ZipFile(deck) as package:
+        return package.read('ppt/slides/slide1.xml')
+
 
 class TestPlanVisual(TestCase):
     def test_create_plan_visual(self):
         pass
+
+
+class TestPlotInMemory(TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.template = os.path.join(self.folder, 'template.pptx')
+        shutil.copyfile(os.path.join(unit_test_files, 'unit_test_dummy_ppt.pptx'), self.template)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_same_as_from_files(self):
+        config_workbook = os.path.join(unit_test_files, 'unit_test_01_config.xlsx')
+        from_files = PlanVisualiser.from_excel(
+            os.path.join(unit_test_files, 'unit_test_01.plan.xlsx'), config_workbook, self.template, 'Plan'
+        )
+        from_files.plot_slide()
+
+        in_memory = PlanVisualiser.from_excel(
+            read_bytes('unit_test_01.plan.xlsx'),
+            io.BytesIO(read_bytes('unit_test_01_config.xlsx')),
+            read_bytes('unit_test_dummy_ppt.pptx'),
+            'Plan',
+            excel_engine='lxml'
+        )
+        self.assertIsNone(in_memory.slides_out_path)
+        deck = in_memory.plot_slide_bytes()
+
+        self.assertEqual(slide_xml(from_files.slides_out_path), slide_xml(io.BytesIO(deck)))
+        self.assertEqual(['template.pptx', 'template_out.pptx'], sorted(os.listdir(self.folder)))
+
+    def test_plot_to_stream(self):
+        with open(self.template, 'rb') as template_file:
+            visualiser = PlanVisualiser.from_excel(
+                os.path.join(unit_test_files, 'unit_test_01.plan.xlsx'),
+                os.path.join(unit_test_files, 'unit_test_01_config.xlsx'),
+                template_file,
+                'Plan'
+            )
+        slides_out = io.BytesIO()
+        visualiser.plot_slide(slides_out)
+        with self.assertRaises(PptPlanVisualiserException):
+            visualiser.save()
+        self.assertEqual(1, len(Presentation(io.BytesIO(slides_out.getvalue())).slides))
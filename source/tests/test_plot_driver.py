@@ -1,3 +1,5 @@
+import random
+from datetime import timedelta
 from unittest import TestCase
 from ddt import ddt, data, unpack
 from pptx.util import Cm
@@ -45,6 +47,14 @@ plot_milestone_test_data = [
 ]
 
 
+# Plot configs for checking that the batch and lookup calculations give identical results to the original calculation.
+geometry_test_data = [
+    (dict(tpc), 0),
+    (dict(tpc, left=Cm(1.3), right=Cm(31.7), max_end_date=parse_date('2023-12-31')), 1),
+    (dict(tpc, left=Cm(0.7), right=Cm(25.4), milestone_width=Cm(0.4), max_end_date=parse_date('2021-07-13')), 2),
+]
+
+
 def plot_activity_test_generator():
     for entry in plot_activity_test_data:
         string_start, string_end, exp_left, exp_width = entry
@@ -91,3 +101,69 @@ class TestPlotDriver(TestCase):
         left = self.plot_driver.milestone_left(start_date, milestone_width)
 
         self.assertEqual(expected_left, left)
+
+    def random_dates(self, plot_driver, seed, num_dates=500):
+        # Includes dates outside the plot date range, which aren't in the lookup table.
+        rand = random.Random(seed)
+        num_days = plot_driver.num_days_in_date_range
+        start_dates = [plot_driver.min_start_date + timedelta(days=rand.randint(-30, num_days + 30)) for _ in range(num_dates)]
+        end_dates = [start_date + timedelta(days=rand.randint(0, 100)) for start_date in start_dates]
+        return start_dates, end_dates
+
+    def create_plot_driver(self, plot_config):
+        plot_driver = PlotDriver(plot_config)
+        plot_driver.num_days_in_date_range = plot_driver.max_end_date.toordinal() - plot_driver.min_start_date.toordinal() + 1
+        return plot_driver
+
+    @data(*geometry_test_data)
+    @unpack
+    def test_lookup_matches_calculation(self, plot_config, seed):
+        plot_driver = self.create_plot_driver(plot_config)
+        start_dates, end_dates = self.random_dates(plot_driver, seed)
+
+        for test_date in start_dates + end_dates:
+            for alignment_case in ["start", "end", "middle"]:
+                self.assertEqual(
+                    plot_driver._date_to_x_coordinate(test_date, alignment_case),
+                    plot_driver.date_to_x_coordinate(test_date, alignment_case)
+                )
+
+    @data(*geometry_test_data)
+    @unpack
+    def test_batch_geometry_matches_single(self, plot_config, seed):
+        plot_driver = self.create_plot_driver(plot_config)
+        start_dates, end_dates = self.random_dates(plot_driver, seed)
+
+        geometry = plot_driver.activity_x_geometry(start_dates, end_dates)
+
+        for index, (start_date, end_date) in enumerate(zip(start_dates, end_dates)):
+            start_x = plot_driver._date_to_x_coordinate(start_date, "start")
+            end_x = plot_driver._date_to_x_coordinate(end_date, "end")
+            middle_x = plot_driver._date_to_x_coordinate(start_date, "middle")
+            self.assertEqual(start_x, geometry['start_x'][index])
+            self.assertEqual(round(start_x), geometry['left'][index])
+            self.assertEqual(round(end_x - start_x), geometry['width'][index])
+            self.assertEqual(round(start_x) + round(end_x - start_x), geometry['right'][index])
+            self.assertEqual(round(middle_x - plot_driver.milestone_width / 2), geometry['milestone_left'][index])
+
+    def test_batch_geometry_list(self):
+        start_dates, end_dates = self.random_dates(self.plot_driver, 3, num_dates=10)
+
+        geometry = self.plot_driver.activity_x_geometry(start_dates, end_dates)
+        geometry_list = self.plot_driver.activity_x_geometry_list(start_dates, end_dates)
+
+        self.assertEqual(geometry['left'].tolist(), [activity_geometry.left for activity_geometry in geometry_list])
+        self.assertIsInstance(geometry_list[0].left, int)
+
+    def test_lookup_follows_date_range_changes(self):
+        test_date = parse_date('2021-01-15')
+        before = self.plot_driver.date_to_x_coordinate(test_date)
+
+        self.plot_driver.min_start_date = parse_date('2021-01-08')
+        self.plot_driver.num_days_in_date_range = 24
+
+        self.assertNotEqual(before, self.plot_driver.date_to_x_coordinate(test_date))
+        self.assertEqual(
+            self.plot_driver._date_to_x_coordinate(test_date),
+            self.plot_driver.date_to_x_coordinate(test_date)
+        )
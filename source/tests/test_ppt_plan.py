@@ -1,4 +1,7 @@
 from unittest import TestCase
+from unittest.mock import patch
+
+from source.visualiser import ppt_plot_plan_main
 
 
 class TestApp(TestCase):
@@ -6,3 +9,112 @@ class TestApp(TestCase):
         # For now just using this to drive the testing bit of the github action.
         # Will replace with a proper test at some point :-)
         self.assertTrue(True)
+
+    def test_parameters_with_sheet_names(self):
+        args = ['ppt_plot_plan_main', 'plan.xlsx', 'Plan', 'config.xlsx', 'Plot', 'Format', 'Lanes', 'template.pptx']
+        with patch.object(ppt_plot_plan_main.sys, 'argv', args):
+            parameters = ppt_plot_plan_main.get_parameters()
+
+        self.assertEqual('config.xlsx', parameters['excel_config_workbook'])
+        self.assertEqual('Plot', parameters['plot_config_sheet'])
+        self.assertEqual('Format', parameters['format_config_sheet'])
+        self.assertEqual('Lanes', parameters['swimlanes_sheet'])
+        self.assertEqual('template.pptx', parameters['ppt_template_file'])
+
+    def test_parameters_without_sheet_names(self):
+        args = ['ppt_plot_plan_main', 'plan.xlsx', 'Plan', 'config.xlsx', 'template.pptx']
+        with patch.object(ppt_plot_plan_main.sys, 'argv', args):
+            parameters = ppt_plot_plan_main.get_parameters()
+
+        self.assertEqual('template.pptx', parameters['ppt_template_file'])
+        self.assertNotIn('plot_config_sheet', parameters)
+
+    def test_wrong_number_of_parameters(self):
+        with patch.object(ppt_plot_plan_main.sys, 'argv', ['ppt_plot_plan_main', 'plan.xlsx']):
+            self.assertIsNone(ppt_plot_plan_main.get_parameters())
+
+    def test_cache_options(self):
+        args = ['ppt_plot_plan_main', '--no-cache', 'plan.xlsx', 'Plan', 'config.xlsx', 'template.pptx']
+        with patch.object(ppt_plot_plan_main.sys, 'argv', args):
+            parameters = ppt_plot_plan_main.get_parameters()
+
+        self.assertFalse(parameters['use_cache'])
+        self.assertEqual('template.pptx', parameters['ppt_template_file'])
+
+    def test_cache_off_by_default(self):
+        args = ['ppt_plot_plan_main', 'plan.xlsx', 'Plan', 'config.xlsx', 'template.pptx']
+        with patch.object(ppt_plot_plan_main.sys, 'argv', args):
+            parameters = ppt_plot_plan_main.get_parameters()
+
+        self.assertFalse(parameters['use_cache'])
+
+    def test_cache_opt_in(self):
+        args = ['ppt_plot_plan_main', '--cache', 'plan.xlsx', 'Plan', 'config.xlsx', 'template.pptx']
+        with patch.object(ppt_plot_plan_main.sys, 'argv', args):
+            parameters = ppt_plot_plan_main.get_parameters()
+
+        self.assertTrue(parameters['use_cache'])
+        self.assertEqual(ppt_plot_plan_main.DEFAULT_CACHE_DIR, parameters['cache_dir'])
+
+    def test_cache_dir_implies_cache(self):
+        args = ['ppt_plot_plan_main', 'plan.xlsx', 'Plan', 'config.xlsx', 'template.pptx', '--cache-dir', 'cache']
+        with patch.object(ppt_plot_plan_main.sys, 'argv', args):
+            parameters = ppt_plot_plan_main.get_parameters()
+
+        self.assertTrue(parameters['use_cache'])
+        self.assertEqual('cache', parameters['cache_dir'])
+
+    def test_batch_options(self):
+        args = ['ppt_plot_plan_main', '--batch', 'plans.json', '--workers', '3']
+        with patch.object(ppt_plot_plan_main.sys, 'argv', args):
+            parameters = ppt_plot_plan_main.get_parameters()
+
+        self.assertEqual('plans.json', parameters['batch_manifest'])
+        self.assertEqual(3, parameters['workers'])
+        self.assertNotIn('excel_plan_workbook', parameters)
+
+    def test_batch_with_files(self):
+        args = ['ppt_plot_plan_main', '--batch', 'plans.json', 'plan.xlsx', 'Plan', 'config.xlsx', 'template.pptx']
+        with patch.object(ppt_plot_plan_main.sys, 'argv', args):
+            self.assertIsNone(ppt_plot_plan_main.get_parameters())
+
+    def test_incremental_option(self):
+        args = ['ppt_plot_plan_main', 'plan.xlsx', 'Plan', 'config.xlsx', 'template.pptx']
+        with patch.object(ppt_plot_plan_main.sys, 'argv', args + ['--incremental']):
+            self.assertTrue(ppt_plot_plan_main.get_parameters()['incremental'])
+        with patch.object(ppt_plot_plan_main.sys, 'argv', args):
+            self.assertFalse(ppt_plot_plan_main.get_parameters()['incremental'])
+
+    def test_timings_report_option(self):
+        args = ['ppt_plot_plan_main', 'plan.xlsx', 'Plan', 'config.xlsx', 'template.pptx', '--timings-report', 't.json']
+        with patch.object(ppt_plot_plan_main.sys, 'argv', args):
+            self.assertEqual('t.json', ppt_plot_plan_main.get_parameters()['timings_report'])
+
+    def test_svg_option(self):
+        args = ['ppt_plot_plan_main', 'plan.xlsx', 'Plan', 'config.xlsx', 'template.pptx', '--svg', 'plan.svg']
+        with patch.object(ppt_plot_plan_main.sys, 'argv', args):
+            self.assertEqual('plan.svg', ppt_plot_plan_main.get_parameters()['svg_out_path'])
+
+    def test_thumbnail_option(self):
+        args = ['ppt_plot_plan_main', 'plan.xlsx', 'Plan', 'config.xlsx', 'template.pptx', '--thumbnail', '320']
+        with patch.object(ppt_plot_plan_main.sys, 'argv', args):
+            self.assertEqual(320, ppt_plot_plan_main.get_parameters()['thumbnail_width'])
+
+    def test_paginate_option(self):
+        args = ['ppt_plot_plan_main', 'plan.xlsx', 'Plan', 'config.xlsx', 'template.pptx', '--paginate', '--workers', '2']
+        with patch.object(ppt_plot_plan_main.sys, 'argv', args):
+            parameters = ppt_plot_plan_main.get_parameters()
+        self.assertTrue(parameters['paginate'])
+        self.assertEqual(2, parameters['workers'])
+
+    def test_window_options(self):
+        args = ['ppt_plot_plan_main', 'plan.xlsx', 'Plan', 'config.xlsx', 'template.pptx']
+        with patch.object(ppt_plot_plan_main.sys, 'argv', args + ['--window-months', '6']):
+            self.assertEqual(6, ppt_plot_plan_main.get_parameters()['window_months'])
+        with patch.object(ppt_plot_plan_main.sys, 'argv', args + ['--quarters']):
+            self.assertTrue(ppt_plot_plan_main.get_parameters()['quarters'])
+
+    def test_watch_option(self):
+        args = ['ppt_plot_plan_main', 'plan.xlsx', 'Plan', 'config.xlsx', 'template.pptx', '--watch']
+        with patch.object(ppt_plot_plan_main.sys, 'argv', args):
+            self.assertTrue(ppt_plot_plan_main.get_parameters()['watch'])
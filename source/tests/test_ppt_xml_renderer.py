@@ -0,0 +1,135 @@
+import os
+import shutil
+import tempfile
+import zipfile
+from datetime import datetime
+from unittest import TestCase
+
+from colour import Color
+from lxml import etree
+from pptx import Presentation
+from pptx.util import Cm, Pt
+
+from source.visualiser.exceptions import PptPlanVisualiserException
+from source.visualiser.plan_visualiser import PlanVisualiser
+from source.visualiser.plotable_element import PlotableElement
+from source.visualiser.ppt_xml_renderer import PptXmlRenderer
+from source.visualiser.shape_formatting import ShapeFormatting
+from source.visualiser.text_formatting import TextFormatting
+from source.visualiser.visual_element_shape import VisualElementShape
+
+unit_test_files = 'test_resources/unit_test_01/input_files'
+
+red_text = TextFormatting(font_colour=(255, 0, 0), font_size=Pt(8), horizontal_align='left')
+blue_fill = ShapeFormatting(Color(rgb=(0, 0, 0)), Color(rgb=(0, 0, 1)), Cm(0.1), red_text)
+green_fill = ShapeFormatting(Color(rgb=(0, 0, 0)), Color(rgb=(0, 1, 0)), Cm(0.2), TextFormatting())
+no_fill = ShapeFormatting(None, None, None, red_text)
+
+
+def make_elements():
+    elements = []
+    for index in range(10):
+        left = Cm(index) + 0.5
+        for shape, formatting, text in [
+            (VisualElementShape.RECTANGLE, blue_fill, None),
+            (VisualElementShape.ROUNDED_RECTANGLE, blue_fill, None),
+            (VisualElementShape.ROUNDED_RECTANGLE, green_fill, f'Rounded {index}'),
+            (VisualElementShape.DIAMOND, green_fill, None),
+            (VisualElementShape.RECTANGLE, no_fill, f'Text {index}\x07 & <more>'),
+            (VisualElementShape.RECTANGLE, no_fill, ''),
+        ]:
+            top = Cm(index % 3)
+            elements.append(PlotableElement(
+                shape, top, left, top + Cm(0.4 + index / 10), left + Cm(2.3), formatting, text, formatting.text_formatting
+            ))
+    return elements
+
+
+def new_slide():
+    presentation = Presentation()
+    slide = presentation.slides.add_slide(presentation.slide_layouts[5])  # Title only, so already has a shape
+    return slide
+
+
+def canonical_xml(element):
+    return etree.tostring(element, method='c14n')
+
+
+class TestPptXmlRenderer(TestCase):
+    def test_same_xml_as_plot_ppt(self):
+        reference_slide = new_slide()
+        for element in make_elements():
+            element.plot_ppt(reference_slide.shapes)
+
+        slide = new_slide()
+        renderer = PptXmlRenderer(slide.shapes)
+        for element in make_elements():
+            element.plot_ppt(renderer)
+        renderer.flush()
+
+        self.assertEqual(canonical_xml(reference_slide.shapes._spTree), canonical_xml(slide.shapes._spTree))
+
+    def test_templates_reused(self):
+        renderer = PptXmlRenderer(new_slide().shapes)
+        for element in make_elements():
+            renderer.plot_element(element)
+
+        # Empty text uses the same template as any other text.
+        self.assertEqual(5, len(renderer._templates))
+
+    def test_shapes_added_on_flush(self):
+        slide = new_slide()
+        renderer = PptXmlRenderer(slide.shapes)
+
+        shapes = [renderer.plot_element(element) for element in make_elements()[:3]]
+
+        self.assertEqual(1, len(slide.shapes))
+        renderer.flush()
+        self.assertEqual(4, len(slide.shapes))
+        self.assertEqual([3, 4, 5], [shape.shape_id for shape in shapes])
+        self.assertEqual(0, shapes[0].left)
+
+        # Shapes added through python-pptx after a flush carry on from the renderer's ids.
+        self.assertEqual(6, slide.shapes.add_textbox(0, 0, 10, 10).shape_id)
+        self.assertEqual(7, renderer.plot_element(make_elements()[0]).shape_id)
+
+    def test_shapes_before_extension_list(self):
+        slide = new_slide()
+        sp_tree = slide.shapes._spTree
+        ext_lst = etree.SubElement(sp_tree, '{http://schemas.openxmlformats.org/presentationml/2006/main}extLst')
+        renderer = PptXmlRenderer(slide.shapes)
+
+        for element in make_elements()[:3]:
+            renderer.plot_element(element)
+        renderer.flush()
+
+        self.assertIs(ext_lst, sp_tree[-1])
+        self.assertEqual(4, len(slide.shapes))
+
+
+class TestPlanVisualiserRenderer(TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def plot_slide(self, renderer):
+        template = os.path.join(self.folder, f'{renderer}.pptx')
+        shutil.copyfile(os.path.join(unit_test_files, 'unit_test_dummy_ppt.pptx'), template)
+        config_workbook = os.path.join(unit_test_files, 'unit_test_01_config.xlsx')
+
+        visualiser = PlanVisualiser.from_excel(config_workbook, config_workbook, template, 'Plan', renderer=renderer)
+        # Fix the date so that the done and to do parts of the activities are split the same way each time.
+        visualiser.plot_driver.today = datetime(2021, 3, 1)
+        visualiser.plot_slide()
+
+        with zipfile.ZipFile(visualiser.slides_out_path) as slides_out:
+            return slides_out.read('ppt/slides/slide1.xml')
+
+    def test_xml_renderer_matches_pptx(self):
+        self.assertEqual(self.plot_slide('pptx'), self.plot_slide('xml'))
+
+    def test_unknown_renderer(self):
+        with self.assertRaises(PptPlanVisualiserException):
+            self.plot_slide('svg')
@@ -0,0 +1,95 @@
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from unittest import TestCase
+
+from PIL import Image
+
+from source.visualiser import raster_renderer
+from source.visualiser.layout import PlanLayout, ShapeStyle, TextStyle, LINE_SHAPE
+from source.visualiser.plan_visualiser import PlanVisualiser
+from source.visualiser.raster_renderer import RasterRenderer
+
+unit_test_files = 'test_resources/unit_test_01/input_files'
+
+
+class TestRasterRenderer(TestCase):
+    def setUp(self):
+        # 10,000 EMUs to a pixel at 100 pixels wide.
+        layout = PlanLayout(1000000, 500000)
+        layout.add_element('swimlane', 'RECTANGLE', 0, 0, 1000000, 200000, ShapeStyle((0, 0, 255), (0, 0, 255)), 'Lane',
+                           TextStyle(vertical_align='top', horizontal_align='left', font_size=100000))
+        layout.add_element('activity', 'ROUNDED_RECTANGLE', 100000, 250000, 300000, 100000,
+                           ShapeStyle((255, 0, 0), (255, 0, 0)), activity_id=1, corner_adjustment=0.25)
+        layout.add_element('activity', 'DIAMOND', 500000, 250000, 100000, 100000, ShapeStyle((0, 255, 0), (0, 255, 0)),
+                           activity_id=2)
+        layout.add_element('activity_text', 'RECTANGLE', 600000, 250000, 300000, 100000, ShapeStyle(), 'Tiny',
+                           TextStyle(font_size=20000), activity_id=2)
+        layout.add_element('today_line', LINE_SHAPE, 950000, 0, 0, 500000, ShapeStyle(line_rgb=(0, 0, 0)))
+        self.layout = layout
+
+    def test_render(self):
+        image = RasterRenderer(width=100, supersample=1).render(self.layout)
+
+        self.assertEqual((100, 50), image.size)
+        self.assertEqual((0, 0, 255), image.getpixel((50, 10)))
+        self.assertEqual((255, 0, 0), image.getpixel((25, 30)))
+        self.assertEqual((0, 255, 0), image.getpixel((55, 30)))
+        # Corner of the diamond's bounding box, and the text-only element which has no fill.
+        self.assertEqual((255, 255, 255), image.getpixel((51, 26)))
+        self.assertEqual((255, 255, 255), image.getpixel((75, 30)))
+        self.assertEqual((0, 0, 0), image.getpixel((95, 40)))
+
+    def test_text_drawn(self):
+        layout_without_text = PlanLayout(1000000, 500000)
+        layout_without_text.add_element('swimlane', 'RECTANGLE', 0, 0, 1000000, 200000, ShapeStyle((0, 0, 255), (0, 0, 255)))
+
+        renderer = RasterRenderer(width=100, supersample=1)
+        self.assertNotEqual(renderer.render(self.layout).crop((0, 0, 100, 20)).tobytes(),
+                            renderer.render(layout_without_text).crop((0, 0, 100, 20)).tobytes())
+
+    def test_text_measurement_cached(self):
+        renderer = RasterRenderer(width=200)
+        renderer.render(self.layout)
+        hits = raster_renderer._text_width.cache_info().hits
+
+        renderer.render(self.layout)
+
+        self.assertGreater(raster_renderer._text_width.cache_info().hits, hits)
+
+    def test_write(self):
+        folder = tempfile.mkdtemp()
+        try:
+            image_path = os.path.join(folder, 'plan.png')
+            RasterRenderer(width=64).write(self.layout, image_path)
+
+            with Image.open(image_path) as image:
+                self.assertEqual(('PNG', (64, 32)), (image.format, image.size))
+        finally:
+            shutil.rmtree(folder)
+
+
+class TestPlanVisualiserThumbnail(TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_thumbnail_of_plotted_slide(self):
+        template = os.path.join(self.folder, 'template.pptx')
+        shutil.copyfile(os.path.join(unit_test_files, 'unit_test_dummy_ppt.pptx'), template)
+        config_workbook = os.path.join(unit_test_files, 'unit_test_01_config.xlsx')
+        visualiser = PlanVisualiser.from_excel(config_workbook, config_workbook, template, 'Plan')
+        visualiser.plot_driver.today = datetime(2021, 1, 5)
+        visualiser.plot_slide()
+
+        thumbnail_path = visualiser.plot_thumbnail(raster_renderer=RasterRenderer(width=320))
+
+        self.assertEqual(os.path.join(self.folder, 'template_out.png'), thumbnail_path)
+        span_names = [span.name for span in visualiser.instrumentation.spans]
+        self.assertEqual(1, span_names.count('layout'))
+        with Image.open(thumbnail_path) as thumbnail:
+            self.assertEqual(320, thumbnail.width)
+            self.assertGreater(len(thumbnail.getcolors(maxcolors=100000)), 2)
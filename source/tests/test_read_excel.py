@@ -1,8 +1,22 @@
+import io
 from unittest import TestCase, skip
 
-from source.visualiser.read_excel import read_excel
+from ddt import ddt, data, unpack
 
+from source.visualiser.exceptions import PptPlanVisualiserException
+from source.visualiser.read_excel import read_excel, stream_excel
 
+unit_test_workbook = 'test_resources/unit_test_01/input_files/unit_test_01_config.xlsx'
+
+table_size_test_data = [
+    (unit_test_workbook, 'PlotConfig', 1),
+    (unit_test_workbook, 'FormatConfig', 8),
+    (unit_test_workbook, 'Swimlanes', 1),
+    (unit_test_workbook, 'Plan', 4),
+]
+
+
+@ddt
 class TestReadExcel(TestCase):
     @skip
     def test_read_excel(self):
@@ -12,3 +26,58 @@ class TestReadExcel(TestCase):
 
         self.assertEqual('Default', table[0]['Format Name'])
 
+    @data(*table_size_test_data)
+    @unpack
+    def test_table_size(self, excel_path, sheet_name, expected_num_rows):
+        table = read_excel(excel_path, sheet_name)
+
+        self.assertEqual(expected_num_rows, len(table))
+
+    def test_stream_matches_read_excel(self):
+        table = read_excel(unit_test_workbook, 'FormatConfig')
+        streamed = [row for _, row in stream_excel(unit_test_workbook, 'FormatConfig')]
+
+        self.assertEqual(table, streamed)
+
+    def test_stream_is_generator(self):
+        rows = stream_excel(unit_test_workbook, 'FormatConfig')
+
+        row_index, row = next(rows)
+        rows.close()
+
+        self.assertEqual(0, row_index)
+        self.assertEqual('Default', row['Format Name'])
+
+    def test_column_projection(self):
+        columns = ['Format Name', 'Font Size (Pt)', 'Not A Column']
+        rows = [row for _, row in stream_excel(unit_test_workbook, 'FormatConfig', columns=columns)]
+
+        self.assertEqual(columns, list(rows[0]))
+        self.assertEqual(8, rows[0]['Font Size (Pt)'])
+        self.assertIsNone(rows[0]['Not A Column'])
+
+    def test_row_filter(self):
+        row_filters = {
+            'Visual Flag': lambda flag: flag is True,
+            'Visual Track # Within Swimlane': lambda track_num: track_num != 2
+        }
+        rows = list(stream_excel(unit_test_workbook, 'Plan', row_filters=row_filters))
+        all_rows = read_excel(unit_test_workbook, 'Plan')
+
+        self.assertEqual([0, 2, 3], [row_index for row_index, _ in rows])
+        for row_index, row in rows:
+            # Row index is position within whole table so filtered rows can still be identified.
+            self.assertEqual(all_rows[row_index], row)
+
+    def test_unknown_engine(self):
+        with self.assertRaises(PptPlanVisualiserException):
+            read_excel(unit_test_workbook, 'Plan', engine='pandas')
+
+    @data('openpyxl', 'lxml')
+    def test_workbook_in_memory(self, engine):
+        with open(unit_test_workbook, 'rb') as workbook_file:
+            workbook_bytes = workbook_file.read()
+        expected = read_excel(unit_test_workbook, 'FormatConfig', engine=engine)
+
+        self.assertEqual(expected, read_excel(workbook_bytes, 'FormatConfig', engine=engine))
+        self.assertEqual(expected, read_excel(io.BytesIO(workbook_bytes), 'FormatConfig', engine=engine))
@@ -0,0 +1,111 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+from unittest import TestCase
+
+from source.visualiser.render_cache import RenderResultCache, RENDERED, MEMORY, DISK, COALESCED
+
+
+class TestRenderResultCache(TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_key(self):
+        path = os.path.join(self.folder, 'plan.xlsx')
+        with open(path, 'wb') as file:
+            file.write(b'version 1')
+        cache = RenderResultCache()
+        key = cache.key([path], 'Plan', False)
+        self.assertEqual(key, cache.key([path], 'Plan', False))
+        self.assertNotEqual(key, cache.key([path], 'Plan', True))
+
+        with open(path, 'wb') as file:
+            file.write(b'version 2')
+        self.assertNotEqual(key, cache.key([path], 'Plan', False))
+
+    def test_get_or_render(self):
+        cache = RenderResultCache()
+        renders = []
+
+        def render():
+            renders.append(1)
+            return b'slide', 2.0, None
+
+        first = cache.get_or_render('key', render)
+        second = cache.get_or_render('key', render)
+
+        self.assertEqual((RENDERED, MEMORY), (first.source, second.source))
+        self.assertEqual(b'slide', bytes(second.content))
+        self.assertEqual(1, len(renders))
+        self.assertEqual((1, 1, 2.0, 0.5), (cache.hits, cache.misses, cache.saved_seconds, cache.hit_rate))
+
+    def test_failures_not_cached(self):
+        cache = RenderResultCache()
+        outcome = cache.get_or_render('key', lambda: (None, 1.0, 'ValueError: bad plan'))
+        self.assertFalse(outcome.succeeded)
+        self.assertEqual('ValueError: bad plan', outcome.error)
+        self.assertIsNone(cache.get('key'))
+
+    def test_lru_eviction(self):
+        cache = RenderResultCache(max_bytes=10)
+        cache.put('a', b'1234', 1.0)
+        cache.put('b', b'1234', 1.0)
+        cache.get('a')
+        cache.put('c', b'1234', 1.0)
+
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('a'))
+        self.assertEqual((1, 8), (cache.evictions, cache.stats()['bytes']))
+
+        # Too big to hold at all.
+        cache.put('d', b'12345678901', 1.0)
+        self.assertIsNone(cache.get('d'))
+
+    def test_cache_dir(self):
+        RenderResultCache(cache_dir=self.folder).put('key', b'slide', 3.0)
+
+        outcome = RenderResultCache(cache_dir=self.folder).get('key')
+        self.assertEqual((DISK, 3.0, b'slide'), (outcome.source, outcome.seconds, bytes(outcome.content)))
+
+        cache = RenderResultCache(cache_dir=self.folder, max_disk_bytes=30)
+        cache.put('other', b'another slide', 1.0)
+        self.assertEqual(1, cache.evictions)
+        self.assertIsNone(RenderResultCache(cache_dir=self.folder).get('key'))
+
+    def test_concurrent_requests_coalesced(self):
+        cache = RenderResultCache()
+        started = threading.Event()
+        finish = threading.Event()
+        renders = []
+
+        def render():
+            renders.append(1)
+            started.set()
+            finish.wait(10)
+            return b'slide', 1.5, None
+
+        outcomes = []
+
+        def request():
+            outcomes.append(cache.get_or_render('key', render))
+
+        threads = [threading.Thread(target=request) for _ in range(4)]
+        threads[0].start()
+        started.wait(10)
+        for thread in threads[1:]:
+            thread.start()
+        # Give the other requests time to start waiting for the render.
+        time.sleep(0.2)
+        finish.set()
+        for thread in threads:
+            thread.join(10)
+
+        self.assertEqual(1, len(renders))
+        self.assertEqual([b'slide'] * 4, [bytes(outcome.content) for outcome in outcomes])
+        self.assertEqual([COALESCED, COALESCED, COALESCED, RENDERED], sorted(outcome.source for outcome in outcomes))
+        self.assertEqual((3, 4.5), (cache.coalesced, cache.saved_seconds))
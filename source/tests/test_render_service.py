@@ -0,0 +1,176 @@
+import json
+import os
+import shutil
+import tempfile
+import urllib.error
+import urllib.request
+import uuid
+from io import BytesIO
+from unittest import TestCase
+
+from pptx import Presentation
+
+from source.tests.testing_utilities import write_plan, swimlane_order
+from source.visualiser.render_service import RenderService
+
+unit_test_files = 'test_resources/unit_test_01/input_files'
+plan_file = os.path.join(unit_test_files, 'unit_test_01.plan.xlsx')
+config_file = os.path.join(unit_test_files, 'unit_test_01_config.xlsx')
+template_file = os.path.join(unit_test_files, 'unit_test_dummy_ppt.pptx')
+
+
+def multipart(fields, files):
+    boundary = uuid.uuid4().hex
+    body = BytesIO()
+    for name, value in fields.items():
+        body.write(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, path in files.items():
+        body.write(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{os.path.basename(path)}"\r\n'
+            f'Content-Type: application/octet-stream\r\n\r\n'.encode()
+        )
+        with open(path, 'rb') as file:
+            body.write(file.read())
+        body.write(b'\r\n')
+    body.write(f'--{boundary}--\r\n'.encode())
+    return f'multipart/form-data; boundary={boundary}', body.getvalue()
+
+
+class TestRenderService(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.service = RenderService(max_workers=1, max_queue=2, default_template=os.path.abspath(template_file))
+        cls.service.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.service.close()
+
+    def request(self, path, body=None, content_type='application/json'):
+        request = urllib.request.Request(self.service.url + path, data=body)
+        if body is not None:
+            request.add_header('Content-Type', content_type)
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                return response.status, response.headers, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers, e.read()
+
+    def test_render_paths(self):
+        body = json.dumps({
+            'excel_plan_workbook': os.path.abspath(plan_file),
+            'excel_plan_sheet': 'Plan',
+            'excel_config_workbook': os.path.abspath(config_file),
+        }).encode()
+
+        status, headers, content = self.request('/render', body)
+        self.assertEqual(200, status, content)
+        self.assertGreater(float(headers['X-Render-Seconds']), 0)
+        self.assertEqual(1, len(Presentation(BytesIO(content)).slides))
+
+        # The same slide again comes from the result cache.
+        _, headers, second = self.request('/render', body)
+        self.assertEqual('memory', headers['X-Render-Source'])
+        self.assertEqual(
+            [shape.name for shape in Presentation(BytesIO(content)).slides[0].shapes],
+            [shape.name for shape in Presentation(BytesIO(second)).slides[0].shapes]
+        )
+
+        status, _, content = self.request('/latency')
+        latency = json.loads(content)
+        self.assertGreaterEqual(latency['count'], 2)
+        self.assertLessEqual(latency['p50'], latency['max'])
+
+    def test_render_uploads(self):
+        content_type, body = multipart(
+            {'excel_plan_sheet': 'Plan', 'pack_tracks': 'false'},
+            {'excel_plan_workbook': plan_file, 'excel_config_workbook': config_file, 'ppt_template_file': template_file}
+        )
+        status, headers, content = self.request('/render', body, content_type)
+        self.assertEqual(200, status, content)
+        self.assertTrue(headers['Content-Type'].endswith('presentationml.presentation'))
+        prs = Presentation(BytesIO(content))
+        self.assertTrue(any(shape.has_text_frame and shape.text_frame.text for shape in prs.slides[0].shapes))
+
+    def test_uploads_bounded(self):
+        # Nothing is kept for later requests, so each request's uploads are deleted once it has been answered.
+        with RenderService(max_workers=1, max_upload_bytes=0) as service:
+            files = {
+                'excel_plan_workbook': plan_file,
+                'excel_config_workbook': config_file,
+                'ppt_template_file': template_file,
+            }
+            content_type, body = multipart({'excel_plan_sheet': 'Plan'}, files)
+            for _ in range(2):
+                request = urllib.request.Request(service.url + '/render', data=body)
+                request.add_header('Content-Type', content_type)
+                with urllib.request.urlopen(request, timeout=60) as response:
+                    self.assertEqual(200, response.status)
+                self.assertEqual([], os.listdir(service._work_dir))
+
+    def test_bad_requests(self):
+        status, _, content = self.request('/render', b'{"excel_plan_workbook": "missing.xlsx"}')
+        self.assertEqual(400, status)
+        self.assertIn('Missing fields', json.loads(content)['error'])
+
+        status, _, _ = self.request('/render', json.dumps({
+            'excel_plan_workbook': os.path.abspath(plan_file),
+            'excel_plan_sheet': 'Plan',
+            'excel_config_workbook': os.path.abspath(config_file),
+            'colour': 'red',
+        }).encode())
+        self.assertEqual(400, status)
+
+        for path in (['plan.xlsx'], {'path': 'plan.xlsx'}, 1):
+            status, _, content = self.request('/render', json.dumps({
+                'excel_plan_workbook': path,
+                'excel_plan_sheet': 'Plan',
+                'excel_config_workbook': os.path.abspath(config_file),
+            }).encode())
+            self.assertEqual(400, status)
+            self.assertIn('should be a path', json.loads(content)['error'])
+
+        # Valid request, but the plot fails.
+        status, _, content = self.request('/render', json.dumps({
+            'excel_plan_workbook': os.path.abspath(plan_file),
+            'excel_plan_sheet': 'No such sheet',
+            'excel_config_workbook': os.path.abspath(config_file),
+        }).encode())
+        self.assertEqual(422, status)
+        self.assertIn('error', json.loads(content))
+
+        status, _, _ = self.request('/unknown')
+        self.assertEqual(404, status)
+
+    def test_swimlane_order_independent_of_earlier_requests(self):
+        # The worker process, and the config it has parsed, is kept between requests.  Neither plan's swimlanes are in
+        # the config, so each is added after the configured ones in plan order.
+        folder = tempfile.mkdtemp()
+        try:
+            plans = {}
+            for name, swimlanes in (('a', ['Lane X', 'Lane Y']), ('b', ['Lane Y', 'Lane X'])):
+                plans[name] = os.path.join(folder, f'{name}.xlsx')
+                write_plan(plans[name], swimlanes)
+
+            orders = {}
+            for name in ('a', 'b'):
+                status, _, content = self.request('/render', json.dumps({
+                    'excel_plan_workbook': plans[name],
+                    'excel_plan_sheet': 'Plan',
+                    'excel_config_workbook': os.path.abspath(config_file),
+                }).encode())
+                self.assertEqual(200, status, content)
+                orders[name] = swimlane_order(BytesIO(content), ('Lane X', 'Lane Y'))
+        finally:
+            shutil.rmtree(folder)
+
+        self.assertEqual({'a': ['Lane X', 'Lane Y'], 'b': ['Lane Y', 'Lane X']}, orders)
+
+    def test_health(self):
+        status, _, content = self.request('/health')
+        self.assertEqual(200, status)
+        health = json.loads(content)
+        self.assertEqual('ok', health['status'])
+        self.assertEqual(1, health['workers'])
+        self.assertEqual(0, health['in_progress'])
+        self.assertIn('hit_rate', health['result_cache'])
@@ -0,0 +1,143 @@
+import io
+import os
+import shutil
+import tempfile
+import zipfile
+from unittest import TestCase
+
+from pptx import Presentation
+
+from source.visualiser.exceptions import PptPlanVisualiserException
+from source.visualiser.plan_visualiser import PlanVisualiser
+from source.visualiser.streaming_writer import save_streaming, ZipStreamWriter
+
+unit_test_files = 'test_resources/unit_test_01/input_files'
+plan_file = os.path.join(unit_test_files, 'unit_test_01.plan.xlsx')
+config_file = os.path.join(unit_test_files, 'unit_test_01_config.xlsx')
+template_file = os.path.join(unit_test_files, 'unit_test_dummy_ppt.pptx')
+
+
+class WriteOnlyStream(io.RawIOBase):
+    """
+    Stream which can't seek or tell, like a socket or pipe.
+    """
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.buffer.extend(data)
+        return len(data)
+
+
+def read_parts(package):
+    with zipfile.ZipFile(package) as package_zip:
+        return {name: package_zip.read(name) for name in package_zip.namelist()}
+
+
+class TestStreamingSave(TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.visualiser = PlanVisualiser.from_excel(plan_file, config_file, template_file, 'Plan')
+        self.visualiser.plot_slide(slides_out=io.BytesIO())
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_same_as_save(self):
+        expected = io.BytesIO()
+        self.visualiser.prs.save(expected)
+        slides_out = os.path.join(self.folder, 'streamed.pptx')
+        counts = {}
+        save_streaming(self.visualiser.prs, slides_out, template_file, counts=counts)
+
+        with zipfile.ZipFile(slides_out) as streamed:
+            self.assertIsNone(streamed.testzip())
+        streamed = read_parts(slides_out)
+        self.assertEqual(read_parts(expected).keys(), streamed.keys())
+        for name in ('ppt/slides/slide1.xml', '[Content_Types].xml'):
+            self.assertEqual(read_parts(expected)[name], streamed[name], name)
+
+        # Everything apart from the slides and the presentation part is as it was in the template, stored the same way.
+        serialised = ('[Content_Types].xml', 'ppt/presentation.xml', 'ppt/_rels/presentation.xml.rels')
+        template = read_parts(template_file)
+        with zipfile.ZipFile(template_file) as template_zip, zipfile.ZipFile(slides_out) as streamed_zip:
+            for name in streamed:
+                if name not in serialised and not name.startswith('ppt/slides/'):
+                    self.assertEqual(template[name], streamed[name], name)
+                    self.assertEqual(
+                        template_zip.getinfo(name).compress_type, streamed_zip.getinfo(name).compress_type, name
+                    )
+
+        self.assertEqual(1, counts['parts_streamed'])
+        self.assertEqual(len(self.visualiser.prs.slides[0].shapes), counts['shapes_streamed'])
+        self.assertGreater(counts['parts_copied'], 0)
+        self.assertEqual(
+            [shape.name for shape in self.visualiser.prs.slides[0].shapes],
+            [shape.name for shape in Presentation(slides_out).slides[0].shapes]
+        )
+
+    def test_no_source(self):
+        slides_out = io.BytesIO()
+        counts = {}
+        save_streaming(self.visualiser.prs, slides_out, counts=counts)
+        self.assertEqual(0, counts['parts_copied'])
+        self.assertEqual(1, len(Presentation(slides_out).slides))
+
+    def test_unseekable_output(self):
+        slides_out = WriteOnlyStream()
+        save_streaming(self.visualiser.prs, slides_out, template_file, compress_level=1)
+        self.assertEqual(1, len(Presentation(io.BytesIO(bytes(slides_out.buffer))).slides))
+
+    def test_save_over_source(self):
+        slides_out = os.path.join(self.folder, 'plan.pptx')
+        shutil.copyfile(template_file, slides_out)
+        save_streaming(self.visualiser.prs, slides_out, slides_out)
+        self.assertEqual(1, len(Presentation(slides_out).slides))
+
+    def test_invalid_compress_level(self):
+        with self.assertRaises(PptPlanVisualiserException):
+            save_streaming(self.visualiser.prs, io.BytesIO(), template_file, compress_level=10)
+
+
+class TestStreamingVisualiser(TestCase):
+    def test_pages(self):
+        visualiser = PlanVisualiser.from_excel(plan_file, config_file, template_file, 'Plan', streaming_save=True)
+        visualiser.plot_slide(slides_out=io.BytesIO())
+        slides_out = io.BytesIO()
+        visualiser.prs.slides.add_slide(visualiser.prs.slide_layouts[0])
+        visualiser.save(slides_out)
+
+        save_span = [span for span in visualiser.instrumentation.spans if span.name == 'save'][-1]
+        self.assertEqual(2, save_span.counts['parts_streamed'])
+        self.assertEqual(2, len(Presentation(slides_out).slides))
+
+
+class TestZipStreamWriter(TestCase):
+    def test_write_and_copy(self):
+        source = io.BytesIO()
+        with zipfile.ZipFile(source, 'w') as source_zip:
+            source_zip.writestr('stored.txt', b'stored', zipfile.ZIP_STORED)
+            source_zip.writestr('deflated.txt', b'deflated ' * 100, zipfile.ZIP_DEFLATED)
+
+        out = io.BytesIO()
+        writer = ZipStreamWriter(out)
+        with writer.open('written.txt') as entry:
+            entry.write(b'written ')
+            entry.write(b'in pieces')
+        with zipfile.ZipFile(source) as source_zip:
+            self.assertTrue(writer.copy_from(source_zip, 'stored.txt'))
+            self.assertTrue(writer.copy_from(source_zip, 'deflated.txt'))
+            self.assertFalse(writer.copy_from(source_zip, 'missing.txt'))
+        with self.assertRaises(PptPlanVisualiserException):
+            writer.write_bytes('written.txt', b'again')
+        writer.close()
+
+        with zipfile.ZipFile(out) as out_zip:
+            self.assertIsNone(out_zip.testzip())
+            self.assertEqual(b'written in pieces', out_zip.read('written.txt'))
+            self.assertEqual(b'stored', out_zip.read('stored.txt'))
+            self.assertEqual(zipfile.ZIP_STORED, out_zip.getinfo('stored.txt').compress_type)
+            self.assertEqual(b'deflated ' * 100, out_zip.read('deflated.txt'))
@@ -0,0 +1,93 @@
+import ast
+import io
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from unittest import TestCase
+
+from lxml import etree
+
+from source.visualiser import svg_renderer
+from source.visualiser.layout import PlanLayout, ShapeStyle, TextStyle, LINE_SHAPE
+from source.visualiser.plan_visualiser import PlanVisualiser
+from source.visualiser.svg_renderer import SvgRenderer
+
+unit_test_files = 'test_resources/unit_test_01/input_files'
+
+SVG = '{http://www.w3.org/2000/svg}'
+
+
+class TestSvgRenderer(TestCase):
+    def setUp(self):
+        layout = PlanLayout(952500, 476250)
+        layout.add_element('swimlane', 'RECTANGLE', 0, 0, 952500, 200000, ShapeStyle((1, 2, 3), (4, 5, 6)), 'Lane & Co',
+                           TextStyle(margin_left=1000, vertical_align='top', horizontal_align='left', font_bold=True))
+        layout.add_element('activity', 'ROUNDED_RECTANGLE', 100, 200, 400, 100, ShapeStyle((255, 0, 0), (0, 0, 0)),
+                           activity_id=1, corner_adjustment=0.25)
+        layout.add_element('activity', 'DIAMOND', 1000, 200, 100, 100, ShapeStyle((0, 255, 0), (0, 0, 0)), activity_id=2)
+        layout.add_element('activity_text', 'RECTANGLE', 1100, 200, 500, 100, ShapeStyle(), 'Milestone',
+                           TextStyle(horizontal_align='right'), activity_id=2)
+        layout.add_element('today_line', LINE_SHAPE, 700, 0, 0, 476250, ShapeStyle(line_rgb=(255, 0, 0)))
+        self.layout = layout
+
+    def test_elements(self):
+        svg = etree.fromstring(SvgRenderer().to_string(self.layout).encode('utf-8'))
+
+        self.assertEqual('0 0 952500 476250', svg.get('viewBox'))
+        self.assertEqual(('100', '50'), (svg.get('width'), svg.get('height')))
+
+        # The text-only element has no fill so no shape is drawn for it.
+        shapes = [child for child in svg if child.tag != f'{SVG}style' and child.tag != f'{SVG}text']
+        self.assertEqual([f'{SVG}rect', f'{SVG}rect', f'{SVG}polygon', f'{SVG}line'], [shape.tag for shape in shapes])
+        self.assertEqual('25', shapes[1].get('rx'))
+        self.assertEqual('1050,200 1100,250 1050,300 1000,250', shapes[2].get('points'))
+        self.assertEqual(('700', '476250', '#ff0000'), (shapes[3].get('x2'), shapes[3].get('y2'), shapes[3].get('stroke')))
+
+        texts = svg.findall(f'{SVG}text')
+        self.assertEqual(['Lane & Co', 'Milestone'], [text.text for text in texts])
+        self.assertEqual(('1000', '0'), (texts[0].get('x'), texts[0].get('y')))
+        self.assertEqual('1600', texts[1].get('x'))
+
+        style = svg.find(f'{SVG}style').text
+        self.assertIn('.s0 { fill: #010203; stroke: #040506; }', style)
+        self.assertIn('text-anchor: start; dominant-baseline: hanging; font-weight: bold;', style)
+
+    def test_streamed_to_file(self):
+        svg = io.StringIO()
+        SvgRenderer().write(self.layout, svg)
+
+        self.assertEqual(SvgRenderer().to_string(self.layout), svg.getvalue())
+
+    def test_no_powerpoint_dependency(self):
+        with open(svg_renderer.__file__) as svg_renderer_file:
+            tree = ast.parse(svg_renderer_file.read())
+        imported = [alias.name for node in ast.walk(tree) if isinstance(node, ast.Import) for alias in node.names]
+        imported += [node.module for node in ast.walk(tree) if isinstance(node, ast.ImportFrom)]
+
+        self.assertFalse([module for module in imported if module.split('.')[0] == 'pptx'])
+
+
+class TestPlanVisualiserSvg(TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_plot_svg(self):
+        template = os.path.join(self.folder, 'template.pptx')
+        shutil.copyfile(os.path.join(unit_test_files, 'unit_test_dummy_ppt.pptx'), template)
+        config_workbook = os.path.join(unit_test_files, 'unit_test_01_config.xlsx')
+        visualiser = PlanVisualiser.from_excel(config_workbook, config_workbook, template, 'Plan')
+        visualiser.plot_driver.today = datetime(2021, 1, 5)
+
+        svg_path = visualiser.plot_svg()
+
+        self.assertEqual(os.path.join(self.folder, 'template_out.svg'), svg_path)
+        self.assertFalse(os.path.exists(visualiser.slides_out_path))
+        svg = etree.parse(svg_path).getroot()
+        texts = [text.text for text in svg.iter(f'{SVG}text')]
+        for activity in visualiser.plan_data:
+            self.assertIn(activity.description, texts)
+        self.assertEqual(1, len(svg.findall(f'{SVG}line')))
@@ -0,0 +1,104 @@
+import io
+import os
+import shutil
+import tempfile
+import zipfile
+from unittest import TestCase
+
+from pptx import Presentation
+from pptx.util import Cm
+
+from source.visualiser.plan_visualiser import PlanVisualiser
+from source.visualiser.template_cache import TemplateCache
+
+unit_test_files = 'test_resources/unit_test_01/input_files'
+template_file = os.path.join(unit_test_files, 'unit_test_dummy_ppt.pptx')
+other_template_file = 'test_resources/input_files/ppt_templates/PlanVisual-01_out.pptx'
+
+
+def saved_parts(presentation):
+    # Zip entries are time stamped when saved, so compare the contents of each part rather than the whole file.
+    saved = io.BytesIO()
+    presentation.save(saved)
+    with zipfile.ZipFile(saved) as package:
+        return {name: package.read(name) for name in package.namelist()}
+
+
+def add_textbox(presentation, text):
+    presentation.slides[0].shapes.add_textbox(Cm(1), Cm(2), Cm(3), Cm(4)).text = text
+
+
+class TestTemplateCache(TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_same_output_as_fresh_template(self):
+        cache = TemplateCache()
+        first = cache.presentation(template_file)
+        add_textbox(first, 'First')
+        second = cache.presentation(template_file)
+        add_textbox(second, 'Second')
+
+        fresh = Presentation(template_file)
+        add_textbox(fresh, 'Second')
+
+        # Changes to the first copy mustn't show up in the second.
+        self.assertEqual(saved_parts(fresh), saved_parts(second))
+        self.assertEqual((1, 1), (cache.misses, cache.hits))
+
+    def test_least_recently_used_evicted(self):
+        cache = TemplateCache(max_templates=2)
+        third_template_file = os.path.join(self.folder, 'third.pptx')
+        shutil.copyfile(template_file, third_template_file)
+
+        cache.presentation(template_file)
+        cache.presentation(other_template_file)
+        cache.presentation(template_file)
+        cache.presentation(third_template_file)
+
+        self.assertEqual(2, len(cache))
+        self.assertEqual(1, cache.evictions)
+        cache.presentation(template_file)
+        self.assertEqual((3, 2), (cache.misses, cache.hits))
+
+    def test_changed_template_parsed_again(self):
+        cache = TemplateCache()
+        copied_template_file = os.path.join(self.folder, 'template.pptx')
+        shutil.copyfile(template_file, copied_template_file)
+        cache.presentation(copied_template_file)
+
+        shutil.copyfile(other_template_file, copied_template_file)
+        presentation = cache.presentation(copied_template_file)
+
+        self.assertEqual(2, cache.misses)
+        self.assertEqual(saved_parts(Presentation(other_template_file)), saved_parts(presentation))
+
+    def test_plotted_slide_same_as_fresh_template(self):
+        config_workbook = os.path.join(unit_test_files, 'unit_test_01_config.xlsx')
+        cache = TemplateCache()
+
+        slides = []
+        for template_cache in (None, cache, cache):
+            visualiser = PlanVisualiser.from_excel(
+                config_workbook, config_workbook, template_file, 'Plan', template_cache=template_cache
+            )
+            visualiser.render_layout(visualiser.create_layout())
+            slides.append(saved_parts(visualiser.prs))
+
+        self.assertEqual(slides[0], slides[1])
+        self.assertEqual(slides[0], slides[2])
+
+    def test_template_bytes(self):
+        cache = TemplateCache()
+        with open(template_file, 'rb') as file:
+            template_bytes = file.read()
+
+        presentation = cache.presentation(template_bytes)
+        cache.presentation(template_file)
+        cache.presentation(bytes(template_bytes))
+
+        self.assertEqual(saved_parts(Presentation(template_file)), saved_parts(presentation))
+        self.assertEqual((2, 1), (cache.misses, cache.hits))
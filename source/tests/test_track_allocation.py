@@ -0,0 +1,182 @@
+import os
+import random
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+from unittest import TestCase
+
+from source.visualiser.excel_config import ExcelConfigWorkbook
+from source.visualiser.excel_plan import ExcelPlan
+from source.visualiser.plan_visualiser import PlanVisualiser
+from source.visualiser.track_allocation import TrackInterval, pack_tracks
+
+unit_test_files = 'test_resources/unit_test_01/input_files'
+
+
+def overlapping(intervals, tracks):
+    """
+    Pairs of intervals which have been put on the same track but overlap.
+    """
+    occupied = {}
+    for interval, track in zip(intervals, tracks):
+        for covered_track in range(track, track + interval.num_tracks):
+            occupied.setdefault(covered_track, []).append(interval)
+    return [
+        (first, second)
+        for track_intervals in occupied.values()
+        for index, first in enumerate(track_intervals)
+        for second in track_intervals[index + 1:]
+        if first.left < second.right and second.left < first.right
+    ]
+
+
+def max_overlap(intervals):
+    edges = sorted([(interval.left, 1) for interval in intervals] + [(interval.right, -1) for interval in intervals])
+    depth = max_depth = 0
+    for _, change in edges:
+        depth += change
+        max_depth = max(max_depth, depth)
+    return max_depth
+
+
+class TestPackTracks(TestCase):
+    def test_minimum_tracks(self):
+        generator = random.Random(1)
+        intervals = []
+        for _ in range(2000):
+            left = generator.randrange(0, 100000)
+            intervals.append(TrackInterval(left, left + generator.randrange(1, 5000)))
+
+        tracks = pack_tracks(intervals)
+
+        self.assertEqual([], overlapping(intervals, tracks))
+        self.assertEqual(max_overlap(intervals), max(tracks))
+
+    def test_adjacent_share_track(self):
+        intervals = [TrackInterval(0, 10), TrackInterval(10, 20), TrackInterval(5, 15)]
+
+        self.assertEqual([1, 1, 2], pack_tracks(intervals))
+
+    def test_pinned_tracks(self):
+        intervals = [
+            TrackInterval(0, 100, track=1),
+            TrackInterval(50, 60, track=3),
+            TrackInterval(0, 10),
+            TrackInterval(20, 70),
+            TrackInterval(65, 80),
+        ]
+
+        tracks = pack_tracks(intervals)
+
+        self.assertEqual([1, 3, 2, 2, 3], tracks)
+        self.assertEqual([], overlapping(intervals, tracks))
+
+    def test_multiple_tracks(self):
+        intervals = [
+            TrackInterval(0, 10),
+            TrackInterval(5, 20, num_tracks=2),
+            TrackInterval(12, 30),
+            TrackInterval(25, 40, num_tracks=3, track=2),
+            TrackInterval(45, 50, num_tracks=4),
+        ]
+
+        tracks = pack_tracks(intervals)
+
+        self.assertEqual([1, 2, 1, 2, 1], tracks)
+        self.assertEqual([], overlapping(intervals, tracks))
+
+    def test_random_with_pins_and_spans(self):
+        generator = random.Random(2)
+        intervals = []
+        for _ in range(1000):
+            left = generator.randrange(0, 50000)
+            interval = TrackInterval(left, left + generator.randrange(1, 3000), generator.choice([1, 1, 1, 2, 3]))
+            if generator.random() < 0.1:
+                interval.track = generator.randrange(1, 20)
+            intervals.append(interval)
+
+        tracks = pack_tracks(intervals)
+
+        # Activities pinned to overlapping tracks are left as they are.
+        self.assertEqual([], [
+            (first, second) for first, second in overlapping(intervals, tracks)
+            if first.track is None or second.track is None
+        ])
+        self.assertEqual([interval.track for interval in intervals if interval.track is not None],
+                         [track for interval, track in zip(intervals, tracks) if interval.track is not None])
+
+    def test_many_multiple_track_activities(self):
+        # Each activity overlaps the next 499, so they need 1000 tracks at once.
+        intervals = [TrackInterval(left, left + 500, num_tracks=2) for left in range(10000)]
+
+        start = time.perf_counter()
+        tracks = pack_tracks(intervals)
+        seconds = time.perf_counter() - start
+
+        self.assertEqual([], overlapping(intervals, tracks))
+        self.assertEqual(2 * max_overlap(intervals), max(tracks) + 1)
+        # Scanning up from the first track for each activity took several seconds.
+        self.assertLess(seconds, 5)
+
+
+class TestPlanVisualiserPackTracks(TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.template = os.path.join(self.folder, 'template.pptx')
+        shutil.copyfile(os.path.join(unit_test_files, 'unit_test_dummy_ppt.pptx'), self.template)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def visualiser(self, pack_tracks):
+        with ExcelConfigWorkbook(os.path.join(unit_test_files, 'unit_test_01_config.xlsx')) as config:
+            plot_config = config.parse_plot_config()
+            format_config = config.parse_format_config()
+        plot_config.today = datetime(2021, 3, 1)
+
+        generator = random.Random(1)
+        rows = []
+        for index in range(300):
+            start = datetime(2021, 1, 1) + timedelta(days=generator.randrange(0, 365))
+            duration = generator.choice([0, generator.randrange(1, 60)])
+            rows.append((index, {
+                'Task Name': f'Activity {index}',
+                'Visual Text': None,
+                'Duration': duration,
+                'Start': start,
+                'Finish': start + timedelta(days=duration),
+                'Visual Swimlane': f'Swimlane {index % 3}',
+                # A few activities are pinned to a track, the rest are left for the visualiser to allocate.
+                'Visual Track # Within Swimlane': 2 if index % 25 == 0 else None,
+                'Visual # Tracks To Cover': 2 if index % 40 == 0 else 1,
+                'Text Layout': generator.choice(['Left', 'Right', 'Shape']),
+                'Format String': 'Test Config 01',
+                'Done Format String': None,
+            }))
+        plan_data = ExcelPlan.plan_data_from_rows(rows, format_config, plot_config)
+        return PlanVisualiser(plan_data, plot_config, format_config, self.template, [], pack_tracks=pack_tracks)
+
+    def test_pack_tracks(self):
+        unpacked = self.visualiser(pack_tracks=False)
+        packed = self.visualiser(pack_tracks=True)
+
+        num_unpacked_tracks = max(lane['end_track'] for lane in unpacked.swimlane_data.values())
+        num_packed_tracks = max(lane['end_track'] for lane in packed.swimlane_data.values())
+        self.assertLess(num_packed_tracks * 3, num_unpacked_tracks)
+
+        intervals = []
+        tracks = []
+        for activity in packed.plan_data:
+            layout_attributes = activity.activity_layout_attributes
+            left, right = activity.horizontal_extent()
+            swimlane_start_track = packed.swimlane_data[layout_attributes.swimlane_name]['start_track']
+            pinned_track = layout_attributes.track_number if layout_attributes.track_number_specified else None
+            intervals.append(TrackInterval(left, right, layout_attributes.number_of_tracks_to_span, pinned_track))
+            tracks.append(swimlane_start_track + layout_attributes.track_number - 1)
+        self.assertEqual({2}, {interval.track for interval in intervals if interval.track is not None})
+        self.assertEqual([], [
+            (first, second) for first, second in overlapping(intervals, tracks)
+            if first.track is None or second.track is None
+        ])
+        self.assertIn('track_allocation', [span.name for span in packed.instrumentation.spans])
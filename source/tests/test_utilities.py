@@ -1,8 +1,24 @@
+import pickle
+from dataclasses import dataclass, replace
+from typing import Union
 from unittest import TestCase
 from ddt import ddt, data, unpack
 import source.visualiser.utilities as ut
 from source.tests.testing_utilities import parse_date
 
+
+@ut.slotted
+@dataclass
+class SlottedRecord:
+    name: str
+    size: int = 1
+    parent: Union['SlottedRecord', None] = None
+
+    @property
+    def double_size(self):
+        return self.size * 2
+
+
 first_day_of_month_test_data = [
     ('2021-03-21', '2021-03-01')
 ]
@@ -19,3 +35,18 @@ class TestUtilities(TestCase):
         result = ut.first_day_of_month(date)
 
         self.assertEqual(exp_result, result)
+
+
+    def test_slotted(self):
+        record = SlottedRecord('first')
+        self.assertEqual(('name', 'size', 'parent'), SlottedRecord.__slots__)
+        self.assertFalse(hasattr(record, '__dict__'))
+        self.assertEqual(1, record.size)
+        self.assertEqual(2, record.double_size)
+
+        record.size = 3
+        self.assertEqual(SlottedRecord('first', 3), record)
+        self.assertEqual(SlottedRecord('second', 3, record), replace(record, name='second', parent=record))
+        self.assertEqual(record, pickle.loads(pickle.dumps(record)))
+        with self.assertRaises(AttributeError):
+            record.colour = 'red'
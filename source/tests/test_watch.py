@@ -0,0 +1,138 @@
+import json
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from source.tests.testing_utilities import write_plan
+from source.visualiser.watch import FileWatcher, WatchSession
+
+unit_test_files = 'test_resources/unit_test_01/input_files'
+
+
+def touch(path, seconds_later=10):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + seconds_later * 1_000_000_000))
+
+
+class TestFileWatcher(TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, 'plan.xlsx')
+        with open(self.path, 'w') as file:
+            file.write('version 1')
+        self.now = 0.0
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_debounce(self):
+        watcher = FileWatcher([self.path], debounce=0.5, clock=lambda: self.now)
+        self.assertEqual(set(), watcher.poll())
+
+        with open(self.path, 'w') as file:
+            file.write('version 2 - being saved')
+        self.now = 1.0
+        self.assertEqual(set(), watcher.poll())
+
+        # Still being written, so the wait starts again.
+        touch(self.path)
+        self.now = 1.4
+        self.assertEqual(set(), watcher.poll())
+        self.now = 1.8
+        self.assertEqual(set(), watcher.poll())
+
+        self.now = 2.0
+        self.assertEqual({self.path}, watcher.poll())
+        self.now = 3.0
+        self.assertEqual(set(), watcher.poll())
+
+    def test_missing_file(self):
+        watcher = FileWatcher([self.path], debounce=0, clock=lambda: self.now)
+        os.remove(self.path)
+        self.assertEqual(set(), watcher.poll())
+        self.assertEqual(set(), watcher.poll())
+
+        with open(self.path, 'w') as file:
+            file.write('replaced')
+        self.assertEqual(set(), watcher.poll())
+        self.assertEqual({self.path}, watcher.poll())
+
+
+class TestWatchSession(TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        for file_name in ['unit_test_01.plan.xlsx', 'unit_test_01_config.xlsx', 'unit_test_dummy_ppt.pptx']:
+            shutil.copyfile(os.path.join(unit_test_files, file_name), os.path.join(self.folder, file_name))
+        self.parameters = {
+            'excel_plan_workbook': os.path.join(self.folder, 'unit_test_01.plan.xlsx'),
+            'excel_plan_sheet': 'Plan',
+            'excel_config_workbook': os.path.join(self.folder, 'unit_test_01_config.xlsx'),
+            'ppt_template_file': os.path.join(self.folder, 'unit_test_dummy_ppt.pptx'),
+            'timings_report': os.path.join(self.folder, 'timings.jsonl'),
+        }
+        self.plotted = []
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def plot(self, visualiser, parameters):
+        visualiser.plot_slide()
+        self.plotted.append(visualiser)
+
+    def test_only_changed_file_read(self):
+        session = WatchSession(self.parameters, self.plot)
+
+        first = session.run_cycle()
+        self.assertTrue({'config_load', 'plan_read'} <= {span.name for span in first.spans})
+        format_registry = session.format_registry
+
+        touch(self.parameters['excel_config_workbook'])
+        second = session.run_cycle({self.parameters['excel_config_workbook']})
+        span_names = {span.name for span in second.spans}
+        self.assertIn('config_load', span_names)
+        self.assertNotIn('plan_read', span_names)
+        self.assertIsNot(format_registry, session.format_registry)
+
+        third = session.run_cycle({self.parameters['ppt_template_file']})
+        span_names = {span.name for span in third.spans}
+        self.assertNotIn('config_load', span_names)
+        self.assertNotIn('plan_read', span_names)
+        self.assertEqual(1, session.template_cache.misses)
+
+        self.assertEqual(3, len(self.plotted))
+        self.assertTrue(os.path.exists(self.plotted[-1].slides_out_path))
+        self.assertEqual(
+            len(self.plotted[0].plan_data), len(self.plotted[-1].plan_data)
+        )
+
+    def test_swimlane_order_same_as_fresh_run(self):
+        # Neither plan's swimlanes are in the config, so they are added after the configured ones in plan order.
+        write_plan(self.parameters['excel_plan_workbook'], ['Lane X', 'Lane Y'])
+        session = WatchSession(self.parameters, self.plot)
+        session.run_cycle()
+        self.assertEqual(['Lane X', 'Lane Y'], list(self.plotted[-1].swimlane_data))
+
+        write_plan(self.parameters['excel_plan_workbook'], ['Lane Y', 'Lane X'])
+        touch(self.parameters['excel_plan_workbook'])
+        session.run_cycle({self.parameters['excel_plan_workbook']})
+        self.assertEqual(['Lane Y', 'Lane X'], list(self.plotted[-1].swimlane_data))
+
+    def test_run(self):
+        session = WatchSession(self.parameters, self.plot)
+        sleeps = []
+
+        def sleep(seconds):
+            if not sleeps:
+                touch(self.parameters['excel_plan_workbook'])
+            sleeps.append(seconds)
+
+        session.run(poll_interval=0.1, debounce=0, max_cycles=2, sleep=sleep)
+
+        self.assertEqual(2, session.num_cycles)
+        with open(self.parameters['timings_report']) as report_file:
+            cycles = [json.loads(line) for line in report_file]
+        self.assertEqual([1, 2], [cycle['cycle'] for cycle in cycles])
+        span_names = {span['name'] for span in cycles[1]['spans']}
+        self.assertIn('plan_read', span_names)
+        self.assertNotIn('config_load', span_names)
@@ -1,6 +1,8 @@
 from datetime import datetime as dt
 
+import openpyxl
 from dateutil.relativedelta import relativedelta
+from pptx import Presentation
 
 
 def parse_date(date_string):
@@ -20,3 +22,35 @@ def date_to_points(date, left, right, start_date, end_date):
     rounded_width = width
 
     return rounded_width
+
+
+plan_columns = [
+    'Task Name', 'Visual Text', 'Duration', 'Start', 'Finish', 'Visual Flag', 'Visual Swimlane',
+    'Visual Track # Within Swimlane', 'Visual # Tracks To Cover', 'Text Layout', 'Format String', 'Done Format String'
+]
+
+
+def write_plan(plan_path, swimlanes):
+    """
+    Writes a plan with an activity in each of the swimlanes, in that order.
+    """
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = 'Plan'
+    sheet.append(plan_columns)
+    for index, swimlane in enumerate(swimlanes):
+        sheet.append([
+            f'Activity {index}', None, 10, dt(2021, 3, 1), dt(2021, 3, 11), True, swimlane, 1, 1, 'Shape',
+            'Test Config 01', None
+        ])
+    workbook.save(plan_path)
+
+
+def swimlane_order(slides, swimlanes):
+    """
+    :param slides: Path or file-like object of a plotted deck.
+    :return: The swimlanes in the order they are plotted, top to bottom.
+    """
+    shapes = Presentation(slides).slides[0].shapes
+    lanes = [shape for shape in shapes if shape.has_text_frame and shape.text_frame.text in swimlanes]
+    return [shape.text_frame.text for shape in sorted(lanes, key=lambda shape: shape.top)]
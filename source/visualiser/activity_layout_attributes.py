@@ -1,16 +1,23 @@
 class ActivityLayoutAttributes:
     """
     Encapsulates the parameters which drive the layout of a specific activity or milestone.
+
+    track_number_specified is False where the plan didn't give a track number, so that the track can be allocated
+    automatically (see track_allocation).
     """
+    __slots__ = ('swimlane_name', 'track_number', 'number_of_tracks_to_span', 'text_layout', 'track_number_specified')
+
     def __init__(
             self,
             swimlane_name,
             track_number,
             number_of_tracks_to_span,
-            text_layout
+            text_layout,
+            track_number_specified=True
     ):
         self.swimlane_name = swimlane_name
         self.track_number = track_number
         self.number_of_tracks_to_span = number_of_tracks_to_span
         self.text_layout = text_layout
+        self.track_number_specified = track_number_specified
 
@@ -0,0 +1,378 @@
+import json
+import logging
+import os
+import shutil
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict
+from datetime import date
+from typing import List, Optional
+
+from source.visualiser.excel_config import ExcelConfigWorkbook
+from source.visualiser.excel_plan import ExcelPlan
+from source.visualiser.exceptions import PptPlanVisualiserException
+from source.visualiser.format_registry import FormatRegistry
+from source.visualiser.instrumentation import Instrumentation
+from source.visualiser.parse_cache import ParsedInputCache
+from source.visualiser.plan_visualiser import PlanVisualiser
+from source.visualiser.plot_driver import PlotDriver
+from source.visualiser.raster_renderer import RasterRenderer
+from source.visualiser.template_cache import TemplateCache
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+root_logger = logging.getLogger()
+
+
+@dataclass(frozen=True)
+class BatchJob:
+    """
+    One plan to plot as part of a batch.  The fields are the same as the command line parameters (see
+    ppt_plot_plan_main.get_parameters), plus the name to report the job under and optionally where to save the slide.
+    """
+    name: str
+    excel_plan_workbook: str
+    excel_plan_sheet: str
+    excel_config_workbook: str
+    ppt_template_file: str
+    plot_config_sheet: str = 'PlotConfig'
+    format_config_sheet: str = 'FormatConfig'
+    swimlanes_sheet: str = 'Swimlanes'
+    output_file: Optional[str] = None
+    pack_tracks: bool = False
+    collision_check: Optional[str] = None
+
+
+@dataclass
+class BatchJobResult:
+    name: str
+    succeeded: bool
+    seconds: float
+    output_file: Optional[str] = None
+    error: Optional[str] = None
+    # Instrumentation.report for the job, if it got far enough to record anything.
+    timings: Optional[dict] = None
+    thumbnail_file: Optional[str] = None
+
+
+def read_manifest(manifest_path) -> List[BatchJob]:
+    """
+    Reads the list of jobs for a batch from a JSON or YAML (if PyYAML is installed) manifest.  The manifest is either
+    a list of jobs or a dict with the list under 'jobs'.  Each job is a dict with the fields of BatchJob, of which only
+    the workbooks, plan sheet and template are required.  Relative paths are taken as relative to the manifest's folder.
+
+    :param manifest_path:
+    :return:
+    """
+    with open(manifest_path) as manifest_file:
+        if os.path.splitext(manifest_path)[1].lower() in ('.yaml', '.yml'):
+            if yaml is None:
+                raise PptPlanVisualiserException(f'PyYAML must be installed to read {manifest_path}')
+            manifest = yaml.safe_load(manifest_file)
+        else:
+            manifest = json.load(manifest_file)
+
+    if isinstance(manifest, dict):
+        manifest = manifest.get('jobs')
+    if not isinstance(manifest, list):
+        raise PptPlanVisualiserException(f'Manifest {manifest_path} should contain a list of jobs')
+
+    manifest_folder = os.path.dirname(os.path.abspath(manifest_path))
+    path_fields = ['excel_plan_workbook', 'excel_config_workbook', 'ppt_template_file', 'output_file']
+
+    jobs = []
+    for index, job_fields in enumerate(manifest):
+        job_fields = dict(job_fields)
+        for field in path_fields:
+            if job_fields.get(field) is not None:
+                job_fields[field] = os.path.join(manifest_folder, os.path.expanduser(job_fields[field]))
+        job_fields.setdefault('name', f"{index + 1}: {os.path.basename(job_fields.get('excel_plan_workbook', ''))}")
+        try:
+            jobs.append(BatchJob(**job_fields))
+        except TypeError as e:
+            raise PptPlanVisualiserException(f'Invalid job {index + 1} in manifest {manifest_path}: {e}')
+
+    return jobs
+
+
+def run_batch(
+        jobs: List[BatchJob], max_workers=None, cache_dir=None, thumbnail_width=None, result_cache=None
+) -> List[BatchJobResult]:
+    """
+    Plots every job in a batch, spread across a pool of processes.  A job which fails is reported in its result and
+    doesn't stop the others.
+
+    Each process parses each config workbook and template only once however many of its jobs use them, and
+    if cache_dir is supplied the processes also share a ParsedInputCache in that folder.
+
+    If result_cache is supplied, a job whose slide is already in the cache isn't plotted at all, and jobs which would
+    plot exactly the same slide (to different output files) are only plotted once.
+
+    :param jobs:
+    :param max_workers: Number of processes to use (default is one per CPU).  With 1 the jobs are plotted one after the
+    other in this process.
+    :param cache_dir: Folder for the parse cache, or None not to use it.
+    :param thumbnail_width: If supplied, a PNG thumbnail this many pixels wide is also saved for each job, alongside
+    the slide (see PlanVisualiser.plot_thumbnail).  The result cache isn't used when plotting thumbnails.
+    :param result_cache: Optional RenderResultCache.
+    :return: A BatchJobResult for each job, in the same order as the jobs.
+    """
+    output_files = [_output_file(job) for job in jobs]
+    duplicates = sorted({path for path in output_files if output_files.count(path) > 1})
+    if duplicates:
+        raise PptPlanVisualiserException(f'More than one job would write to {", ".join(duplicates)}')
+
+    root_logger.info(f'Plotting batch of {len(jobs)} plans')
+    if result_cache is not None and thumbnail_width is None:
+        return _run_cached_jobs(jobs, max_workers, cache_dir, result_cache)
+    return _run_jobs(jobs, max_workers, cache_dir, thumbnail_width)
+
+
+def _run_jobs(jobs: List[BatchJob], max_workers, cache_dir, thumbnail_width=None) -> List[BatchJobResult]:
+    if max_workers == 1:
+        _init_worker(cache_dir, thumbnail_width)
+        return [run_job(job, cache_dir, thumbnail_width) for job in jobs]
+
+    with ProcessPoolExecutor(max_workers) as executor:
+        futures = [executor.submit(run_job, job, cache_dir, thumbnail_width) for job in jobs]
+
+        results = []
+        for job, future in zip(jobs, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                # Only happens if the worker process itself fails, as run_job catches any error plotting the plan.
+                results.append(BatchJobResult(job.name, False, 0.0, error=f'{type(e).__name__}: {e}'))
+        return results
+
+
+def _run_cached_jobs(jobs: List[BatchJob], max_workers, cache_dir, result_cache) -> List[BatchJobResult]:
+    today = date.today()
+    results = [None] * len(jobs)
+    keys = []
+    leaders = {}  # Key -> position of the job which plots the slide for every job with that key.
+    for position, job in enumerate(jobs):
+        try:
+            key = job_cache_key(result_cache, job, today)
+        except OSError:
+            # A missing file, which the job itself will report when it is plotted.
+            key = ('uncached', position)
+        keys.append(key)
+        if key in leaders:
+            continue
+        start = time.perf_counter()
+        cached = None if isinstance(key, tuple) else result_cache.get(key)
+        if cached is None:
+            leaders[key] = position
+        else:
+            results[position] = _write_cached(job, cached, start)
+
+    to_plot = sorted(leaders.values())
+    for position, result in zip(to_plot, _run_jobs([jobs[position] for position in to_plot], max_workers, cache_dir)):
+        results[position] = result
+        if result.succeeded and not isinstance(keys[position], tuple):
+            with open(result.output_file, 'rb') as slide_file:
+                result_cache.put(keys[position], slide_file.read(), result.seconds)
+
+    for position, job in enumerate(jobs):
+        if results[position] is not None:
+            continue
+        start = time.perf_counter()
+        leader_result = results[leaders[keys[position]]]
+        cached = result_cache.get(keys[position]) if leader_result.succeeded else None
+        if cached is not None:
+            results[position] = _write_cached(job, cached, start)
+        elif leader_result.succeeded:
+            # Too big to keep in the cache, so copied from the job which plotted it.
+            shutil.copyfile(leader_result.output_file, _output_file(job))
+            results[position] = BatchJobResult(
+                job.name, True, time.perf_counter() - start, output_file=_output_file(job)
+            )
+        else:
+            results[position] = BatchJobResult(job.name, False, 0.0, error=leader_result.error)
+
+    result_cache.log_stats()
+    return results
+
+
+def _write_cached(job: BatchJob, cached, start) -> BatchJobResult:
+    output_file = _output_file(job)
+    with open(output_file, 'wb') as slide_file:
+        slide_file.write(cached.content)
+    return BatchJobResult(
+        job.name, True, time.perf_counter() - start, output_file=output_file, timings={'result_cache': cached.source}
+    )
+
+
+def job_cache_key(result_cache, job: BatchJob, today):
+    """
+    Key for the slide a job plots, in a RenderResultCache.
+    """
+    return result_cache.key(
+        [job.excel_plan_workbook, job.excel_config_workbook, job.ppt_template_file],
+        job.excel_plan_sheet, job.plot_config_sheet, job.format_config_sheet, job.swimlanes_sheet,
+        job.pack_tracks, job.collision_check, today.isoformat()
+    )
+
+
+def log_summary(results: List[BatchJobResult]):
+    for result in results:
+        if result.succeeded:
+            root_logger.info(f'[OK    ] {result.name} ({result.seconds:.2f}s) -> {result.output_file}')
+        else:
+            root_logger.error(f'[FAILED] {result.name} ({result.seconds:.2f}s): {result.error}')
+
+    num_failed = sum(1 for result in results if not result.succeeded)
+    total_seconds = sum(result.seconds for result in results)
+    root_logger.info(
+        f'Batch complete: {len(results) - num_failed} succeeded, {num_failed} failed, {total_seconds:.2f}s plotting'
+    )
+
+
+def write_timings_report(results: List[BatchJobResult], report_path):
+    report = {'jobs': [asdict(result) for result in results]}
+    with open(report_path, 'w') as report_file:
+        json.dump(report, report_file, indent=2)
+
+
+# State for the jobs run in each process, set up by _init_worker.
+_parse_cache = None
+_configs = {}
+_template_cache = None
+_thumbnail_renderer = None
+_worker_settings = None
+
+
+def _init_worker(cache_dir, thumbnail_width=None):
+    global _parse_cache, _template_cache, _thumbnail_renderer, _worker_settings
+    _parse_cache = None if cache_dir is None else ParsedInputCache(cache_dir)
+    _template_cache = TemplateCache()
+    _thumbnail_renderer = None if thumbnail_width is None else RasterRenderer(thumbnail_width)
+    _configs.clear()
+    _worker_settings = (cache_dir, thumbnail_width)
+
+
+def _ensure_worker(cache_dir, thumbnail_width=None):
+    # Set up by the first job a process runs rather than by a ProcessPoolExecutor initializer, which needs Python 3.7,
+    # and set up again if a job comes with different settings.
+    if _worker_settings != (cache_dir, thumbnail_width):
+        _init_worker(cache_dir, thumbnail_width)
+
+
+def run_job(job: BatchJob, cache_dir=None, thumbnail_width=None) -> BatchJobResult:
+    """
+    Plots a single job, catching any error so that it can be reported along with the other jobs.
+
+    :param job:
+    :param cache_dir: Folder for the parse cache, or None not to use it.
+    :param thumbnail_width: See run_batch.
+    :return:
+    """
+    _ensure_worker(cache_dir, thumbnail_width)
+    return _run_job(job)[0]
+
+
+def run_job_in_memory(job: BatchJob, cache_dir=None):
+    """
+    As run_job, but returns the slide file rather than saving it (job.output_file is ignored and no thumbnail is
+    plotted).
+
+    :param job:
+    :param cache_dir:
+    :return: Tuple of the BatchJobResult and the bytes of the slide file (None if it failed).
+    """
+    _ensure_worker(cache_dir)
+    return _run_job(job, in_memory=True)
+
+
+def _run_job(job: BatchJob, in_memory=False):
+    start = time.perf_counter()
+    instrumentation = Instrumentation()
+    try:
+        with instrumentation.span('config_load'):
+            plot_area_config, format_config, swimlanes, format_registry = _config(job)
+        # Each job gets its own PlotDriver as the visualiser updates it (e.g. aligning the dates to whole months).
+        plot_config = PlotDriver(plot_area_config)
+        plan_data = ExcelPlan.read_plan_data(
+            job.excel_plan_workbook,
+            job.excel_plan_sheet,
+            format_config,
+            plot_config,
+            cache=_parse_cache,
+            instrumentation=instrumentation,
+            format_registry=format_registry
+        )
+        visualiser = PlanVisualiser(
+            plan_data,
+            plot_config,
+            format_config,
+            job.ppt_template_file,
+            swimlanes,
+            slides_out_path=_output_file(job),
+            template_cache=_template_cache,
+            instrumentation=instrumentation,
+            pack_tracks=job.pack_tracks,
+            collision_check=job.collision_check,
+            format_registry=format_registry
+        )
+        slide_bytes = None
+        thumbnail_file = None
+        if in_memory:
+            slide_bytes = visualiser.plot_slide_bytes()
+        else:
+            visualiser.plot_slide()
+            if _thumbnail_renderer is not None:
+                thumbnail_file = visualiser.plot_thumbnail(raster_renderer=_thumbnail_renderer)
+    except Exception as e:
+        root_logger.debug(f'Job {job.name} failed:\n{traceback.format_exc()}')
+        return BatchJobResult(
+            job.name, False, time.perf_counter() - start, error=f'{type(e).__name__}: {e}',
+            timings=instrumentation.report()
+        ), None
+
+    return BatchJobResult(
+        job.name, True, time.perf_counter() - start, output_file=None if in_memory else visualiser.slides_out_path,
+        timings=instrumentation.report(), thumbnail_file=thumbnail_file
+    ), slide_bytes
+
+
+def _output_file(job: BatchJob):
+    if job.output_file is not None:
+        return os.path.abspath(job.output_file)
+    folder, file_name = os.path.split(os.path.abspath(job.ppt_template_file))
+    base, ext = os.path.splitext(file_name)
+    return os.path.join(folder, base + '_out' + ext)
+
+
+def _file_key(path, *extra):
+    stat = os.stat(path)
+    return (os.path.abspath(path), stat.st_size, stat.st_mtime_ns) + extra
+
+
+def _config(job: BatchJob):
+    # The parsed config isn't changed by plotting, so the same objects can be used for every job with the same config.
+    # So can the formats compiled from it, which are only compiled the first time a job uses them.
+    key = _file_key(job.excel_config_workbook, job.plot_config_sheet, job.format_config_sheet, job.swimlanes_sheet)
+    config = _configs.get(key)
+    if config is None:
+        with ExcelConfigWorkbook(
+                job.excel_config_workbook,
+                plot_config_sheet=job.plot_config_sheet,
+                format_config_sheet=job.format_config_sheet,
+                swimlanes_sheet=job.swimlanes_sheet,
+                cache=_parse_cache
+        ) as config_workbook:
+            plot_area_config = config_workbook.parse_plot_area_config()
+            format_config = config_workbook.parse_format_config()
+            config = _configs[key] = (
+                plot_area_config,
+                format_config,
+                config_workbook.parse_swimlane_config(),
+                FormatRegistry(format_config, PlotDriver(plot_area_config))
+            )
+    return config
+
@@ -0,0 +1,167 @@
+import heapq
+from bisect import bisect_left
+import json
+import logging
+from collections import Counter
+from dataclasses import dataclass, asdict
+from operator import itemgetter
+from typing import List, Tuple
+
+from source.visualiser.layout import LayoutElement, PlanLayout
+
+root_logger = logging.getLogger()
+
+# Kinds of collision, depending upon what is overlapping.
+SHAPE_OVERLAP = 'shape_overlap'
+LABEL_OVERLAPS_SHAPE = 'label_overlaps_shape'
+LABEL_OVERLAP = 'label_overlap'
+
+
+@dataclass
+class Collision:
+    """
+    Two elements of different activities which overlap on the slide.
+
+    activity_ids: The activities the elements belong to, in drawing order.
+    z_orders: Drawing order of the elements (see LayoutElement), so that they can be found in the layout.
+    overlap: (left, top, right, bottom) of the overlapping area in EMUs.
+    """
+    kind: str
+    activity_ids: Tuple[int, int]
+    z_orders: Tuple[int, int]
+    overlap: Tuple[int, int, int, int]
+
+
+@dataclass
+class CollisionReport:
+    collisions: List[Collision]
+    num_elements_checked: int = 0
+
+    @property
+    def counts(self):
+        return dict(Counter(collision.kind for collision in self.collisions))
+
+    def to_dict(self):
+        return {
+            'num_elements_checked': self.num_elements_checked,
+            'counts': self.counts,
+            'collisions': [asdict(collision) for collision in self.collisions],
+        }
+
+    def write_json(self, report_path):
+        with open(report_path, 'w') as report_file:
+            json.dump(self.to_dict(), report_file, indent=2)
+
+    def log(self, max_logged=20):
+        """
+        Logs a warning for each collision (up to max_logged of them) and a summary.
+        """
+        if not self.collisions:
+            root_logger.info(f'No collisions between {self.num_elements_checked} activity shapes and labels')
+            return
+        for collision in self.collisions[:max_logged]:
+            first_id, second_id = collision.activity_ids
+            root_logger.warning(
+                f'Collision ({collision.kind}) between activities {first_id} and {second_id} at {collision.overlap}'
+            )
+        if len(self.collisions) > max_logged:
+            root_logger.warning(f'... and {len(self.collisions) - max_logged} more collisions')
+        counts = ', '.join(f'{count} {kind}' for kind, count in self.counts.items())
+        root_logger.warning(f'{len(self.collisions)} collisions found ({counts})')
+
+
+def find_collisions(layout: PlanLayout) -> CollisionReport:
+    """
+    Finds every place where the shape or label of one activity overlaps the shape or label of another.
+
+    The activity elements are indexed by row, with a row for each distinct top edge (so normally one per track), and
+    each element is in every row whose top edge it covers.  Two elements overlap vertically exactly when they share a
+    row, so each row is swept from left to right keeping a heap of the elements the sweep is within, and every element
+    in the heap overlaps the one being added.  This takes O(n log n) plus the number of collisions found.
+
+    A label which lies entirely within its activity's shapes (i.e. text laid out within the shape) is skipped, as
+    anything it overlaps the shape overlaps too.  Elements which just touch don't count as overlapping.
+
+    :param layout:
+    :return:
+    """
+    elements = _elements_to_check(layout)
+    if not elements:
+        return CollisionReport([], 0)
+
+    tops = sorted({element.top for element in elements})
+    rows = [[] for _ in tops]
+    for element in elements:
+        left, top, right, bottom = element.left, element.top, element.right, element.bottom
+        entry = (left, right, top, bottom, element)
+        for row in range(bisect_left(tops, top), bisect_left(tops, bottom)):
+            rows[row].append(entry)
+
+    collisions = []
+    found = set()
+    for row_entries in rows:
+        row_entries.sort(key=itemgetter(0))
+        active = []  # Heap of (right, z_order, entry) for the elements the sweep is within.
+        for entry in row_entries:
+            left = entry[0]
+            while active and active[0][0] <= left:
+                heapq.heappop(active)
+            element = entry[4]
+            for _, _, other in active:
+                other_element = other[4]
+                if other_element.activity_id != element.activity_id:
+                    pair = (other_element.z_order, element.z_order)
+                    if pair[0] > pair[1]:
+                        pair = pair[::-1]
+                    if pair not in found:
+                        found.add(pair)
+                        collisions.append(_collision(other, entry))
+            heapq.heappush(active, (entry[1], element.z_order, entry))
+
+    collisions.sort(key=lambda collision: collision.z_orders)
+    return CollisionReport(collisions, len(elements))
+
+
+def _elements_to_check(layout: PlanLayout) -> List[LayoutElement]:
+    shape_extents = {}
+    for element in layout.elements:
+        if element.kind == 'activity':
+            extent = shape_extents.get(element.activity_id)
+            if extent is None:
+                shape_extents[element.activity_id] = (element.left, element.top, element.right, element.bottom)
+            else:
+                shape_extents[element.activity_id] = (
+                    min(extent[0], element.left), min(extent[1], element.top),
+                    max(extent[2], element.right), max(extent[3], element.bottom)
+                )
+
+    elements = []
+    for element in layout.elements:
+        if element.width <= 0 or element.height <= 0:
+            continue
+        if element.kind == 'activity':
+            elements.append(element)
+        elif element.kind == 'activity_text' and element.text:
+            extent = shape_extents.get(element.activity_id)
+            if extent is None or not (
+                    extent[0] <= element.left and extent[1] <= element.top and
+                    element.right <= extent[2] and element.bottom <= extent[3]
+            ):
+                elements.append(element)
+    return elements
+
+
+def _collision(first, second) -> Collision:
+    """
+    The collision between two overlapping elements, each given as (left, right, top, bottom, element).
+    """
+    if first[4].z_order > second[4].z_order:
+        first, second = second, first
+    first_element, second_element = first[4], second[4]
+    num_labels = (first_element.kind == 'activity_text') + (second_element.kind == 'activity_text')
+    return Collision(
+        (SHAPE_OVERLAP, LABEL_OVERLAPS_SHAPE, LABEL_OVERLAP)[num_labels],
+        (first_element.activity_id, second_element.activity_id),
+        (first_element.z_order, second_element.z_order),
+        (max(first[0], second[0]), max(first[2], second[2]), min(first[1], second[1]), min(first[3], second[3]))
+    )
@@ -0,0 +1,132 @@
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, replace
+from datetime import date, datetime
+from typing import List, Optional
+
+from source.visualiser.utilities import first_day_of_month, last_day_of_month, month_increment
+
+
+@dataclass(frozen=True)
+class DateWindow:
+    """
+    A range of dates to plot part of a plan for, e.g. the next six months or one quarter.  Both ends are included.
+
+    name: What the window is called, e.g. 'Q1 2021', for logging.
+    """
+    start: date
+    end: date
+    name: Optional[str] = None
+
+    @classmethod
+    def months(cls, start: date, num_months, name=None):
+        """
+        Window of whole months, starting with the month start is in.
+        """
+        first_month = first_day_of_month(as_date(start))
+        return cls(first_month, last_day_of_month(month_increment(first_month, num_months - 1)), name)
+
+
+def quarter_windows(start: date, end: date) -> List[DateWindow]:
+    """
+    A window for each calendar quarter from the one containing start to the one containing end.
+    """
+    end = as_date(end)
+    windows = []
+    quarter_start = date(start.year, 3 * ((start.month - 1) // 3) + 1, 1)
+    while quarter_start <= end:
+        quarter = (quarter_start.month - 1) // 3 + 1
+        windows.append(DateWindow.months(quarter_start, 3, f'Q{quarter} {quarter_start.year}'))
+        quarter_start = month_increment(quarter_start, 3)
+    return windows
+
+
+class DateWindowIndex:
+    """
+    Index of the date ranges of a plan's activities, for finding the activities which fall at least partly within a
+    window without checking every one.
+
+    The activities are sorted by start date, so those starting before the end of a window can be found with a binary
+    search.  Of those, only activities no longer than the longest activity can end inside or after the window, so the
+    search can also start no earlier than that far before the window.  To stop one long activity making every query
+    scan most of the plan, activities are grouped by length (in powers of two days) with a sorted list for each group,
+    so the scan in each group only goes back as far as the longest activity in that group.  This gives
+    O(log n) per group plus roughly the number of activities found.
+
+    :param plan_data: List of PlanActivity
+    """
+    def __init__(self, plan_data):
+        groups = {}
+        for index, activity in enumerate(plan_data):
+            start = activity.start_date.toordinal()
+            end = start if activity.end_date is None else activity.end_date.toordinal()
+            groups.setdefault(max(0, end - start).bit_length(), []).append((start, end, index))
+
+        # For each group, the start and end ordinals and activity index, sorted by start, and the longest duration.
+        self._groups = []
+        for entries in groups.values():
+            entries.sort()
+            self._groups.append((
+                [start for start, _, _ in entries],
+                [end for _, end, _ in entries],
+                [index for _, _, index in entries],
+                max(end - start for start, end, _ in entries)
+            ))
+
+    def intersecting(self, start: date, end: date) -> List[int]:
+        """
+        :param start: First day of the window.
+        :param end: Last day of the window.
+        :return: Positions in the plan data of the activities with at least one day in the window, in plan order.
+        """
+        window_start = start.toordinal()
+        window_end = end.toordinal()
+        found = []
+        for starts, ends, indexes, max_duration in self._groups:
+            first = bisect_left(starts, window_start - max_duration)
+            last = bisect_right(starts, window_end)
+            found.extend(indexes[position] for position in range(first, last) if ends[position] >= window_start)
+        found.sort()
+        return found
+
+
+def as_date(value):
+    """
+    Plan dates are sometimes datetimes (e.g. as read from Excel), which can't be compared with dates.
+    """
+    return value.date() if isinstance(value, datetime) else value
+
+
+# Added to the text of an activity which carries on before or after the window it is plotted in.
+CLIPPED_START_MARK = '◀ '
+CLIPPED_END_MARK = ' ▶'
+
+
+def clip_to_window(activity, window: DateWindow):
+    """
+    The activity as it is plotted in a window - unchanged if it is entirely within the window, otherwise a copy cut
+    down to the part within the window, with its text marked at whichever ends have been cut off.
+
+    :param activity: PlanActivity
+    :param window:
+    :return: PlanActivity
+    """
+    clipped_start = as_date(activity.start_date) < window.start
+    clipped_end = activity.end_date is not None and as_date(activity.end_date) > window.end
+    if not clipped_start and not clipped_end:
+        return activity
+
+    changes = {'x_geometry': None, 'description': activity.description}
+    if clipped_start:
+        changes['start_date'] = date_like(window.start, activity.start_date)
+        changes['description'] = CLIPPED_START_MARK + changes['description']
+    if clipped_end:
+        changes['end_date'] = date_like(window.end, activity.end_date)
+        changes['description'] = changes['description'] + CLIPPED_END_MARK
+    return replace(activity, **changes)
+
+
+def date_like(window_date: date, like):
+    """
+    window_date as a datetime if like is one, otherwise as a date.
+    """
+    return datetime(window_date.year, window_date.month, window_date.day) if isinstance(like, datetime) else window_date
@@ -1,7 +1,7 @@
 from pptx.util import Cm, Pt
 
 from source.visualiser.plot_driver import PlotDriver
-from source.visualiser.read_excel import read_excel, iterrows
+from source.visualiser.read_excel import read_excel, load_workbook
 
 
 class ExcelFormatConfig:
@@ -63,6 +63,15 @@ class ExcelPlotConfig:
         self.records = read_excel(excel_path, excel_sheet, skip_rows)
 
     def parse_plot_config(self):
+        return PlotDriver(self.parse_plot_area_config())
+
+    def parse_plot_area_config(self):
+        """
+        The plot config as read from the sheet, before it is used to create a PlotDriver.  Kept separate so that it can
+        be cached, as a PlotDriver also includes things (such as today's date) which mustn't be.
+
+        :return:
+        """
         record = self.records[0]
 
         plot_area_config = {
@@ -81,7 +90,7 @@ class ExcelPlotConfig:
             'activity_shape': record['Activity Shape'],
             'milestone_shape': record['Milestone Shape']
         }
-        return PlotDriver(plot_area_config)
+        return plot_area_config
 
 
 class ExcelSwimlaneConfig:
@@ -97,3 +106,86 @@ class ExcelSwimlaneConfig:
         for id, swimlane_record in enumerate(self.records):
             swimlanes.append(swimlane_record['Swimlane'])
         return swimlanes
+
+
+class ExcelConfigWorkbook:
+    """
+    Class to read all the configuration sheets from a single load of the config workbook.
+
+    Each of the parser classes above will happily load the workbook for itself, but as they all read from the same
+    file it is much quicker to load it once and pass the loaded workbook to each of them.  The workbook isn't loaded
+    until a sheet is first read.
+
+    The sheet names default to the names used in the config workbook template but can be overridden.  Any other sheet
+    can be read using read_sheet.
+
+    If a ParsedInputCache is supplied then the parsed config is taken from it where possible, in which case the
+    workbook is never loaded at all.
+
+    The workbook can be a path, a file-like object or the bytes of the workbook (see read_excel.workbook_source).  Only
+    a path can be cached.
+    """
+
+    def __init__(
+            self,
+            excel_path,
+            plot_config_sheet='PlotConfig',
+            format_config_sheet='FormatConfig',
+            swimlanes_sheet='Swimlanes',
+            cache=None
+    ):
+        self.excel_path = excel_path
+        self.plot_config_sheet = plot_config_sheet
+        self.format_config_sheet = format_config_sheet
+        self.swimlanes_sheet = swimlanes_sheet
+        self.cache = cache
+        self._workbook = None
+
+    @property
+    def workbook(self):
+        if self._workbook is None:
+            self._workbook = load_workbook(self.excel_path)
+        return self._workbook
+
+    def read_sheet(self, sheet_name, skip_rows=0):
+        return read_excel(self.workbook, sheet_name, skip_rows)
+
+    def parse_plot_config(self):
+        return PlotDriver(self.parse_plot_area_config())
+
+    def parse_plot_area_config(self):
+        return self._parse(
+            'plot_config',
+            self.plot_config_sheet,
+            lambda: ExcelPlotConfig(self.workbook, self.plot_config_sheet).parse_plot_area_config()
+        )
+
+    def parse_format_config(self):
+        return self._parse(
+            'format_config',
+            self.format_config_sheet,
+            lambda: ExcelFormatConfig(self.workbook, self.format_config_sheet).parse_format_config()
+        )
+
+    def parse_swimlane_config(self):
+        return self._parse(
+            'swimlane_config',
+            self.swimlanes_sheet,
+            lambda: ExcelSwimlaneConfig(self.workbook, self.swimlanes_sheet).parse_swimlane_config()
+        )
+
+    def _parse(self, kind, sheet_name, parse):
+        if self.cache is None:
+            return parse()
+        return self.cache.get_or_parse(self.excel_path, kind, sheet_name, parse)
+
+    def close(self):
+        if self._workbook is not None:
+            self._workbook.close()
+            self._workbook = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -2,9 +2,10 @@ import logging
 
 from source.visualiser.exceptions import PptPlanVisualiserException
 from source.visualiser.activity_layout_attributes import ActivityLayoutAttributes
+from source.visualiser.format_registry import FormatRegistry
+from source.visualiser.instrumentation import Instrumentation
 from source.visualiser.plan_activity import PlanActivity
-from source.visualiser.read_excel import read_excel
-from source.visualiser.shape_formatting import ShapeFormatting
+from source.visualiser.read_excel import stream_excel
 
 root_logger = logging.getLogger()
 
@@ -22,9 +23,72 @@ class ExcelPlan:
             excel_plan_file,
             excel_plan_sheet_name,
             format_properties_list,
-            plan_visual_config
+            plan_visual_config,
+            engine=None,
+            cache=None,
+            instrumentation=None,
+            format_registry=None
     ):
+        """
+        Reads the flagged rows from the plan sheet and creates a PlanActivity for each.
 
+        :param excel_plan_file: Path of the plan workbook, a file-like object or the bytes of the workbook.
+        :param excel_plan_sheet_name:
+        :param format_properties_list:
+        :param plan_visual_config:
+        :param engine: See read_excel.stream_excel
+        :param cache: Optional ParsedInputCache.  If supplied the flagged rows are taken from the cache when the plan
+        file hasn't changed, so that Excel isn't read at all.
+        :param instrumentation: Optional Instrumentation to record the time taken in.
+        :param format_registry: Optional FormatRegistry for the format config, e.g. with formats already compiled for an
+        earlier plan.  If not supplied a new one is created.
+        :return:
+        """
+        if instrumentation is None:
+            instrumentation = Instrumentation()
+
+        with instrumentation.span('plan_read', rows_read=0) as span:
+            if cache is None:
+                flagged_rows = ExcelPlan.read_flagged_rows(excel_plan_file, excel_plan_sheet_name, engine, span.counts)
+            else:
+                flagged_rows = cache.get_or_parse(
+                    excel_plan_file,
+                    'plan_rows',
+                    excel_plan_sheet_name,
+                    lambda: list(ExcelPlan.read_flagged_rows(
+                        excel_plan_file, excel_plan_sheet_name, engine, span.counts
+                    ))
+                )
+
+            if format_registry is None:
+                format_registry = FormatRegistry(format_properties_list, plan_visual_config)
+            compile_seconds = format_registry.compile_seconds
+            compile_cpu_seconds = format_registry.compile_cpu_seconds
+            num_compiled = format_registry.num_compiled
+            plan_data = ExcelPlan.plan_data_from_rows(
+                flagged_rows, format_properties_list, plan_visual_config, format_registry
+            )
+            span.add('rows_flagged', len(plan_data))
+
+            # Formats are compiled as the activities which use them are created, so are timed separately.
+            instrumentation.record(
+                'format_compile',
+                format_registry.compile_seconds - compile_seconds,
+                format_registry.compile_cpu_seconds - compile_cpu_seconds,
+                formats=format_registry.num_compiled - num_compiled
+            )
+
+        return plan_data
+
+    @staticmethod
+    def read_flagged_rows(excel_plan_file, excel_plan_sheet_name, engine=None, counts=None):
+        """
+        Reads just the columns used for the visual from the rows which have the Visual Flag set.
+
+        :param counts: Optional dict in which 'rows_read' is incremented for every row read from the sheet (flagged
+        or not), e.g. Span.counts.
+        :return: generator of (row_index, row_dict) pairs (see read_excel.stream_excel)
+        """
         read_cols =[
             'Task Name',
             'Visual Text',
@@ -40,124 +104,151 @@ class ExcelPlan:
             'Done Format String'
         ]
 
-        converters = {
+        # Unflagged rows are dropped by the reader before a row dict is built for them.
+        row_filters = {
             'Visual Flag': ExcelPlan.bool_converter
         }
+        if counts is not None:
+            def counting_bool_converter(smartsheet_flag_value):
+                counts['rows_read'] = counts.get('rows_read', 0) + 1
+                return ExcelPlan.bool_converter(smartsheet_flag_value)
+            row_filters['Visual Flag'] = counting_bool_converter
+
+        return stream_excel(
+            excel_plan_file,
+            excel_plan_sheet_name,
+            columns=read_cols,
+            row_filters=row_filters,
+            engine=engine
+        )
 
-        pd_object = read_excel(excel_plan_file, excel_plan_sheet_name)
+    @staticmethod
+    def plan_data_from_rows(flagged_rows, format_properties_list, plan_visual_config, format_registry=None):
+        # Each format is only compiled once, however many activities use it.
+        if format_registry is None:
+            format_registry = FormatRegistry(format_properties_list, plan_visual_config)
         plan_data = []
         swimlane_max_track_num = {}
 
-        for index, milestone_data in enumerate(pd_object):
-            flag = milestone_data['Visual Flag']
-            if flag is True:
-                start_date = milestone_data['Start']
-                end_date = milestone_data['Finish']
-                duration = milestone_data['Duration']
-                description = milestone_data['Task Name']
-                visual_text = milestone_data['Visual Text']
-                visual_swimlane = milestone_data['Visual Swimlane']
-                track_num = milestone_data['Visual Track # Within Swimlane']
-                num_tracks = milestone_data['Visual # Tracks To Cover']
-                format_1_id = milestone_data['Format String']
-                format_2_id = milestone_data['Done Format String']
-                text_layout = milestone_data['Text Layout']
-
-                # Pre-processing and setting defaults for missing values
-
-                if visual_text is None:
-                    text = description
-                else:
-                    text = visual_text
+        # The reader creates a new object for every cell, but a large plan has far fewer distinct swimlanes, text
+        # layouts and dates than activities, so the activities share one object for each value.
+        shared_values = {}
+        share = shared_values.setdefault
+        # Checked once, rather than formatting a debug message for every row only for it to be dropped.
+        log_debug = root_logger.isEnabledFor(logging.DEBUG)
+
+        for index, milestone_data in flagged_rows:
+            start_date = share(milestone_data['Start'], milestone_data['Start'])
+            end_date = share(milestone_data['Finish'], milestone_data['Finish'])
+            duration = milestone_data['Duration']
+            description = milestone_data['Task Name']
+            visual_text = milestone_data['Visual Text']
+            visual_swimlane = share(milestone_data['Visual Swimlane'], milestone_data['Visual Swimlane'])
+            track_num = milestone_data['Visual Track # Within Swimlane']
+            num_tracks = milestone_data['Visual # Tracks To Cover']
+            format_1_id = milestone_data['Format String']
+            format_2_id = milestone_data['Done Format String']
+            text_layout = share(milestone_data['Text Layout'], milestone_data['Text Layout'])
 
-                if duration == '0' or duration == 0:
-                    activity_type = 'milestone'
+            # Pre-processing and setting defaults for missing values
+
+            if visual_text is None:
+                text = description
+            else:
+                text = visual_text
+
+            if duration == '0' or duration == 0:
+                activity_type = 'milestone'
+                if log_debug:
                     root_logger.debug(f'Activity [{description}:40.40] is a milestone')
-                else:
-                    activity_type = 'bar'
+            else:
+                activity_type = 'bar'
+                if log_debug:
                     root_logger.debug(f'Activity [{description}:40.40] is an activity')
 
-                if visual_swimlane is None:
-                    root_logger.warning(f'No swimlane specified for [{description:40.40}], setting to "Default"')
-                    visual_swimlane = 'Default'
-
-                # Allocate track num if not already set and update max track num for this swimlane if necessary.
-
-                # Remember that track_num is None so that log message can be output later.
-                if track_num is None:
-                    if visual_swimlane not in swimlane_max_track_num:
-                        track_num = 1
-                        swimlane_max_track_num[visual_swimlane] = 1
-                    else:
-                        track_num = swimlane_max_track_num[visual_swimlane] + 1
-                        swimlane_max_track_num[visual_swimlane] = max(track_num, swimlane_max_track_num[visual_swimlane])
-                    root_logger.warning(f'No track num specified for [{description:40.40}], setting to {track_num}')
+            if visual_swimlane is None:
+                root_logger.warning(f'No swimlane specified for [{description:40.40}], setting to "Default"')
+                visual_swimlane = 'Default'
+
+            # Allocate track num if not already set and update max track num for this swimlane if necessary.
+
+            # Remember that track_num is None so that log message can be output later.
+            track_num_specified = track_num is not None
+            if track_num is None:
+                if visual_swimlane not in swimlane_max_track_num:
+                    track_num = 1
+                    swimlane_max_track_num[visual_swimlane] = 1
                 else:
-                    if visual_swimlane not in swimlane_max_track_num:
-                        swimlane_max_track_num[visual_swimlane] = track_num
+                    track_num = swimlane_max_track_num[visual_swimlane] + 1
                     swimlane_max_track_num[visual_swimlane] = max(track_num, swimlane_max_track_num[visual_swimlane])
+                root_logger.warning(f'No track num specified for [{description:40.40}], setting to {track_num}')
+            else:
+                if visual_swimlane not in swimlane_max_track_num:
+                    swimlane_max_track_num[visual_swimlane] = track_num
+                swimlane_max_track_num[visual_swimlane] = max(track_num, swimlane_max_track_num[visual_swimlane])
 
-                if num_tracks is None:
-                    root_logger.warning(f'Num tracks not specified for [{description:40.40}], setting to 1')
-                    num_tracks = 1
-
-                if format_1_id is None:
-                    root_logger.warning(f'Format name not specified for [{description:40.40}], setting to "Default"')
-                    format_1_id = 'Default'
-
-                if format_2_id is None:
-                    root_logger.warning(f'Format name not specified for [{description:40.40}], setting to "Default"')
-                    format_2_id = None
-
-                if text_layout is None:
-                    # Text layout isn't specified, so:
-                    # - if it's a milestone position to left
-                    # - if it's an activity, position within shape
-
-                    if activity_type == "milestone":
-                        root_logger.warning(f'Text layout for {activity_type} not specified for [{description:40.40}], setting to "Left"')
-                        text_layout = 'Left'
-                    elif activity_type == "bar":
-                        root_logger.warning(f'Text layout for {activity_type} not specific for [{description:40.40}], setting to "Shape"')
-                        text_layout = 'Left'
-                    else:
-                        root_logger.warning(f'Text layout not specific for [{description:40.40}], setting to "Left"')
-                        raise PptPlanVisualiserException(f'Unknown value for activity_type ({activity_type})')
-
-                activity_layout_attributes = ActivityLayoutAttributes(
-                    visual_swimlane,
-                    track_num,
-                    num_tracks,
-                    text_layout,
-                )
+            if num_tracks is None:
+                root_logger.warning(f'Num tracks not specified for [{description:40.40}], setting to 1')
+                num_tracks = 1
 
-                shape_formatting_1 = ShapeFormatting.from_dict(format_properties_list[format_1_id], plan_visual_config)
-                if format_2_id is None:
-                    shape_formatting_2 = None
-                else:
-                    shape_formatting_2 = ShapeFormatting.from_dict(format_properties_list[format_2_id], plan_visual_config)
+            if format_1_id is None:
+                root_logger.warning(f'Format name not specified for [{description:40.40}], setting to "Default"')
+                format_1_id = 'Default'
 
-                if activity_type == "bar":
-                    display_shape = plan_visual_config.activity_shape
-                elif activity_type == "milestone":
-                    display_shape = plan_visual_config.milestone_shape
+            if format_2_id is None:
+                root_logger.warning(f'Format name not specified for [{description:40.40}], setting to "Default"')
+                format_2_id = None
+
+            if text_layout is None:
+                # Text layout isn't specified, so:
+                # - if it's a milestone position to left
+                # - if it's an activity, position within shape
+
+                if activity_type == "milestone":
+                    root_logger.warning(f'Text layout for {activity_type} not specified for [{description:40.40}], setting to "Left"')
+                    text_layout = 'Left'
+                elif activity_type == "bar":
+                    root_logger.warning(f'Text layout for {activity_type} not specific for [{description:40.40}], setting to "Shape"')
+                    text_layout = 'Left'
                 else:
-                    raise PptPlanVisualiserException(f"Unexpected activity type '{activity_type}'")
-
-                activity = PlanActivity(
-                    activity_id=index,
-                    description=text,
-                    activity_type=activity_type,
-                    start_date=start_date,
-                    end_date=end_date,
-                    activity_layout_attributes=activity_layout_attributes,
-                    display_shape=display_shape,
-                    plan_visual_config=plan_visual_config,
-                    shape_formatting_1=shape_formatting_1,
-                    shape_formatting_2=shape_formatting_2
-                )
+                    root_logger.warning(f'Text layout not specific for [{description:40.40}], setting to "Left"')
+                    raise PptPlanVisualiserException(f'Unknown value for activity_type ({activity_type})')
+
+            activity_layout_attributes = ActivityLayoutAttributes(
+                visual_swimlane,
+                track_num,
+                num_tracks,
+                text_layout,
+                track_num_specified
+            )
+
+            shape_formatting_1 = format_registry.shape_formatting(format_1_id)
+            if format_2_id is None:
+                shape_formatting_2 = None
+            else:
+                shape_formatting_2 = format_registry.shape_formatting(format_2_id)
+
+            if activity_type == "bar":
+                display_shape = plan_visual_config.activity_shape
+            elif activity_type == "milestone":
+                display_shape = plan_visual_config.milestone_shape
+            else:
+                raise PptPlanVisualiserException(f"Unexpected activity type '{activity_type}'")
+
+            activity = PlanActivity(
+                activity_id=index,
+                description=text,
+                activity_type=activity_type,
+                start_date=start_date,
+                end_date=end_date,
+                activity_layout_attributes=activity_layout_attributes,
+                display_shape=display_shape,
+                plan_visual_config=plan_visual_config,
+                shape_formatting_1=shape_formatting_1,
+                shape_formatting_2=shape_formatting_2
+            )
 
-                plan_data.append(activity)
+            plan_data.append(activity)
 
         return plan_data
 
@@ -0,0 +1,44 @@
+import time
+
+from source.visualiser.plot_driver import PlotDriver
+from source.visualiser.shape_formatting import ShapeFormatting
+
+
+class FormatRegistry:
+    """
+    Compiles each named format from the format config (see ExcelFormatConfig) into a ShapeFormatting the first time it
+    is used, and then hands out the same (immutable) instance every time that format is asked for.
+
+    Large plans typically use a handful of formats across thousands of activities, so this saves creating new colour
+    and formatting objects for every activity.
+
+    :param format_config: dict of format name -> format record, as returned by ExcelFormatConfig.parse_format_config
+    :param plot_config: Supplies the text margin used in the formats.
+    """
+    def __init__(self, format_config: dict, plot_config: PlotDriver):
+        self.format_config = format_config
+        self.plot_config = plot_config
+        self._shape_formats = {}
+
+        # Time spent compiling formats, for instrumentation.
+        self.compile_seconds = 0.0
+        self.compile_cpu_seconds = 0.0
+
+    def shape_formatting(self, format_name) -> ShapeFormatting:
+        """
+        :param format_name:
+        :return: The formatting for the named format.  Raises KeyError if the format isn't in the format config.
+        """
+        shape_formatting = self._shape_formats.get(format_name)
+        if shape_formatting is None:
+            wall_start = time.perf_counter()
+            cpu_start = time.process_time()
+            shape_formatting = ShapeFormatting.from_dict(self.format_config[format_name], self.plot_config)
+            shape_formatting = self._shape_formats.setdefault(format_name, shape_formatting)
+            self.compile_seconds += time.perf_counter() - wall_start
+            self.compile_cpu_seconds += time.process_time() - cpu_start
+        return shape_formatting
+
+    @property
+    def num_compiled(self):
+        return len(self._shape_formats)
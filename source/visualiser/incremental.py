@@ -0,0 +1,95 @@
+import logging
+from dataclasses import dataclass
+
+from lxml import etree
+
+root_logger = logging.getLogger()
+
+A_NAMESPACE = 'http://schemas.openxmlformats.org/drawingml/2006/main'
+P_NAMESPACE = 'http://schemas.openxmlformats.org/presentationml/2006/main'
+PV_NAMESPACE = 'urn:ppt-plan-visual:tags'
+
+# Identifies the extension holding the tags, as PowerPoint expects each extension to have a unique uri.
+TAG_EXT_URI = '{5C3F8B0E-6A41-4E3A-9D8E-2B7A51C0F4D6}'
+
+_EXT = f'{{{A_NAMESPACE}}}ext'
+_EXT_LST = f'{{{A_NAMESPACE}}}extLst'
+_ELEMENT_TAG = f'{{{PV_NAMESPACE}}}element'
+_PLAN_TAG = f'{{{PV_NAMESPACE}}}plan'
+_ELEMENT_TAG_PATH = f'./*/{{{P_NAMESPACE}}}cNvPr/{_EXT_LST}/{_EXT}/{_ELEMENT_TAG}'
+_PLAN_TAG_PATH = f'./*/{{{P_NAMESPACE}}}cNvPr/{_EXT_LST}/{_EXT}/{_PLAN_TAG}'
+
+
+@dataclass
+class RenderStats:
+    """
+    What happened to the plotted shapes when a slide was rendered.  For a full render every shape is added.
+
+    reused: Shapes from the previous output which were unchanged so were left as they were.
+    """
+    full_render: bool
+    added: int = 0
+    modified: int = 0
+    removed: int = 0
+    reused: int = 0
+
+    @property
+    def touched(self):
+        return self.added + self.modified + self.removed
+
+    def log(self):
+        render_type = 'Full' if self.full_render else 'Incremental'
+        root_logger.info(
+            f'{render_type} render: {self.touched} shapes touched ({self.added} added, {self.modified} modified, '
+            f'{self.removed} removed), {self.reused} reused'
+        )
+
+
+def tag_shape(sp, key, content_hash):
+    """
+    Records which layout element a plotted shape is for, and a hash of the element's contents, in the shape's
+    non-visual properties (where PowerPoint keeps the shape's id and name).
+
+    :param sp: The shape's XML element (p:sp, p:cxnSp etc.)
+    :param key: See PlanLayout.element_keys
+    :param content_hash: See PlanLayout.element_keys
+    """
+    _set_tag(sp[0][0], _ELEMENT_TAG, {'key': key, 'hash': content_hash})
+
+
+def shape_tag(sp):
+    """
+    :return: The (key, content_hash) pair the shape was tagged with, or None if it wasn't plotted from a layout.
+    """
+    tag = sp.find(_ELEMENT_TAG_PATH)
+    if tag is None:
+        return None
+    return tag.get('key'), tag.get('hash')
+
+
+def tag_slide(sp_tree, signature):
+    """
+    Records the signature of the layout (see PlanVisualiser.layout_signature) against the slide's shape tree.
+    """
+    _set_tag(sp_tree[0][0], _PLAN_TAG, {'signature': signature})
+
+
+def slide_signature(sp_tree):
+    tag = sp_tree.find(_PLAN_TAG_PATH)
+    if tag is None:
+        return None
+    return tag.get('signature')
+
+
+def _set_tag(c_nv_pr, tag_name, attributes):
+    ext_lst = c_nv_pr.find(_EXT_LST)
+    if ext_lst is None:
+        ext_lst = etree.SubElement(c_nv_pr, _EXT_LST)
+    for ext in ext_lst.iterchildren(_EXT):
+        if ext.get('uri') == TAG_EXT_URI:
+            ext.clear()
+            ext.set('uri', TAG_EXT_URI)
+            break
+    else:
+        ext = etree.SubElement(ext_lst, _EXT, uri=TAG_EXT_URI)
+    etree.SubElement(ext, tag_name, attributes, nsmap={'pv': PV_NAMESPACE})
@@ -0,0 +1,123 @@
+import json
+import logging
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+from typing import Optional
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, where peak memory isn't reported.
+    resource = None
+
+root_logger = logging.getLogger()
+
+
+@dataclass
+class Span:
+    """
+    Timings and counts for one stage of plotting a plan.
+
+    parent: Name of the span this one was recorded within, if any.
+    peak_rss_delta_bytes: How much the peak memory use of the process went up during the stage (None if it can't be
+    measured on this platform).
+    counts: Numbers of things processed, e.g. rows read or shapes plotted.
+    """
+    name: str
+    parent: Optional[str] = None
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    peak_rss_delta_bytes: Optional[int] = None
+    counts: dict = field(default_factory=dict)
+
+    def add(self, count_name, amount=1):
+        self.counts[count_name] = self.counts.get(count_name, 0) + amount
+
+
+class Instrumentation:
+    """
+    Records how long each stage of plotting a plan takes, along with counts of what was processed, so that it's clear
+    where the time goes and so that changes in performance can be tracked.
+
+    Each stage is recorded as a Span, using the span context manager.  Spans can be nested, in which case the inner
+    span's parent is set to the outer one.
+    """
+    def __init__(self):
+        self.spans = []
+        self._open_spans = []
+
+    @contextmanager
+    def span(self, name, **counts):
+        """
+        Records a span for the code run within the with block.
+
+        :param name:
+        :param counts: Initial counts for the span.  More can be added with Span.add.
+        :return: The Span (as the target of the with statement).
+        """
+        span = Span(name, self._parent_name(), counts=dict(counts))
+        self.spans.append(span)
+        self._open_spans.append(span)
+
+        peak_rss_before = peak_rss_bytes()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield span
+        finally:
+            span.wall_seconds = time.perf_counter() - wall_start
+            span.cpu_seconds = time.process_time() - cpu_start
+            if peak_rss_before is not None:
+                span.peak_rss_delta_bytes = peak_rss_bytes() - peak_rss_before
+            self._open_spans.pop()
+
+    def record(self, name, wall_seconds, cpu_seconds, **counts):
+        """
+        Adds a span for a stage which was timed separately, e.g. because it is interleaved with other work.
+
+        :return: The new Span
+        """
+        span = Span(name, self._parent_name(), wall_seconds, cpu_seconds, counts=dict(counts))
+        self.spans.append(span)
+        return span
+
+    def report(self):
+        """
+        :return: dict with all the spans, in the order they were started, and the totals for the top level spans.
+        """
+        top_level_spans = [span for span in self.spans if span.parent is None]
+        return {
+            'spans': [asdict(span) for span in self.spans],
+            'total_wall_seconds': sum(span.wall_seconds for span in top_level_spans),
+            'total_cpu_seconds': sum(span.cpu_seconds for span in top_level_spans),
+            'peak_rss_bytes': peak_rss_bytes(),
+        }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.report(), **kwargs)
+
+    def write_json(self, report_path):
+        with open(report_path, 'w') as report_file:
+            report_file.write(self.to_json(indent=2))
+
+    def log_summary(self):
+        for span in self.spans:
+            indent = '  ' if span.parent is not None else ''
+            counts = ', '.join(f'{count_name}={count}' for count_name, count in span.counts.items())
+            root_logger.info(
+                f'{indent}{span.name}: {span.wall_seconds:.3f}s wall, {span.cpu_seconds:.3f}s cpu'
+                f'{" (" + counts + ")" if counts else ""}'
+            )
+
+    def _parent_name(self):
+        return self._open_spans[-1].name if self._open_spans else None
+
+
+def peak_rss_bytes():
+    if resource is None:
+        return None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS, but in kilobytes everywhere else.
+    return peak_rss if sys.platform == 'darwin' else peak_rss * 1024
@@ -0,0 +1,234 @@
+import hashlib
+import json
+from dataclasses import dataclass, asdict
+from typing import Optional, Tuple, List
+
+# Shape name used in a layout for a straight line, as opposed to one of the VisualElementShapes.
+LINE_SHAPE = 'LINE'
+
+
+@dataclass(frozen=True)
+class ShapeStyle:
+    """
+    Fully resolved line and fill for a layout element.  Colours are (red, green, blue) tuples of 0-255 ints.  A shape
+    with no fill colour is drawn with no fill and no line.
+    """
+    fill_rgb: Optional[Tuple[int, int, int]] = None
+    line_rgb: Optional[Tuple[int, int, int]] = None
+
+
+@dataclass(frozen=True)
+class TextStyle:
+    """
+    Fully resolved text formatting for a layout element.  Margins and font size are in EMUs (the units PowerPoint
+    uses), the font colour is a (red, green, blue) tuple of 0-255 ints.
+    """
+    margin_top: int = 0
+    margin_left: int = 0
+    margin_bottom: int = 0
+    margin_right: int = 0
+    vertical_align: str = 'middle'
+    horizontal_align: str = 'centre'
+    font_size: int = 127000
+    font_bold: bool = False
+    font_italic: bool = False
+    font_rgb: Tuple[int, int, int] = (0, 0, 0)
+
+
+@dataclass
+class LayoutElement:
+    """
+    One element of a plan layout, with everything needed to draw it.
+
+    kind: What the element represents - 'swimlane', 'month', 'activity', 'activity_text' or 'today_line'.
+    shape: Name of the VisualElementShape to draw ('LINE' for the today line).
+    left, top, width, height: Position and size in EMUs, already rounded as they are plotted.
+    shape_style_id: Index of the element's ShapeStyle in PlanLayout.shape_styles.
+    text_style_id: Index of the element's TextStyle in PlanLayout.text_styles, or None if the element has no text.
+    text: The element's text, or None.
+    z_order: Drawing order, lowest first.
+    activity_id: Id of the activity the element was created for (None for swimlanes, months etc.)
+    corner_adjustment: For rounded rectangles, the adjustment which gives the configured corner radius.
+    """
+    kind: str
+    shape: str
+    left: int
+    top: int
+    width: int
+    height: int
+    shape_style_id: int
+    text_style_id: Optional[int] = None
+    text: Optional[str] = None
+    z_order: int = 0
+    activity_id: Optional[int] = None
+    corner_adjustment: Optional[float] = None
+
+    @property
+    def right(self):
+        return self.left + self.width
+
+    @property
+    def bottom(self):
+        return self.top + self.height
+
+
+class PlanLayout:
+    """
+    The complete layout of a plan visual, as a list of LayoutElements in drawing order along with the styles they
+    use.  Everything is plain data so a layout can be saved (to_json), compared or drawn by any renderer without
+    needing PowerPoint.
+
+    Styles are interned, so each distinct style is only held once however many elements use it.
+
+    :param slide_width: Width of the slide the layout was created for, in EMUs (if known).
+    :param slide_height: Height of the slide the layout was created for, in EMUs (if known).
+    """
+    def __init__(self, slide_width=None, slide_height=None):
+        self.slide_width = slide_width
+        self.slide_height = slide_height
+        self.elements: List[LayoutElement] = []
+        self.shape_styles: List[ShapeStyle] = []
+        self.text_styles: List[TextStyle] = []
+        self._shape_style_ids = {}
+        self._text_style_ids = {}
+
+    def add_element(
+            self,
+            kind,
+            shape,
+            left,
+            top,
+            width,
+            height,
+            shape_style: ShapeStyle,
+            text=None,
+            text_style: Optional[TextStyle] = None,
+            activity_id=None,
+            corner_adjustment=None
+    ) -> LayoutElement:
+        """
+        Adds an element to the end of the drawing order.  Positions are stored as plain ints, as pptx lengths (Cm, Pt
+        etc.) don't survive being copied or saved.
+
+        :return: The new element.
+        """
+        element = LayoutElement(
+            kind=kind,
+            shape=shape,
+            left=int(left),
+            top=int(top),
+            width=int(width),
+            height=int(height),
+            shape_style_id=self.shape_style_id(shape_style),
+            text_style_id=None if text_style is None else self.text_style_id(text_style),
+            text=text,
+            z_order=len(self.elements),
+            activity_id=activity_id,
+            corner_adjustment=corner_adjustment
+        )
+        self.elements.append(element)
+        return element
+
+    def shape_style_id(self, shape_style: ShapeStyle):
+        return self._intern(shape_style, self.shape_styles, self._shape_style_ids)
+
+    def text_style_id(self, text_style: TextStyle):
+        return self._intern(text_style, self.text_styles, self._text_style_ids)
+
+    def shape_style(self, element: LayoutElement) -> ShapeStyle:
+        return self.shape_styles[element.shape_style_id]
+
+    def text_style(self, element: LayoutElement) -> Optional[TextStyle]:
+        if element.text_style_id is None:
+            return None
+        return self.text_styles[element.text_style_id]
+
+    def size(self):
+        """
+        :return: (width, height) of the slide the layout was created for, or if that isn't known the extent of the
+        elements.
+        """
+        if self.slide_width is not None and self.slide_height is not None:
+            return self.slide_width, self.slide_height
+        return (
+            max((element.right for element in self.elements), default=0),
+            max((element.bottom for element in self.elements), default=0)
+        )
+
+    def elements_in_drawing_order(self):
+        return sorted(self.elements, key=lambda element: element.z_order)
+
+    def element_keys(self):
+        """
+        Identifies each element in a way which stays the same from one layout of a plan to the next, for comparing
+        layouts.
+
+        :return: A (key, content_hash) pair for each element, in drawing order.  The key is made from the element's
+        kind, activity id and its position amongst the elements with the same kind and activity id (e.g. the done and
+        not done parts of an activity).  The content hash covers everything about the element which affects how it is
+        drawn, other than its position in the drawing order.
+        """
+        element_keys = []
+        num_elements = {}
+        for element in self.elements_in_drawing_order():
+            identity = (element.kind, element.activity_id)
+            index = num_elements.get(identity, 0)
+            num_elements[identity] = index + 1
+            activity_id = '' if element.activity_id is None else element.activity_id
+            key = f'{element.kind}:{activity_id}:{index}'
+
+            content = (
+                element.shape, element.left, element.top, element.width, element.height, self.shape_style(element),
+                element.text, self.text_style(element), element.corner_adjustment
+            )
+            content_hash = hashlib.sha1(repr(content).encode('utf-8')).hexdigest()[:16]
+            element_keys.append((key, content_hash))
+        return element_keys
+
+    def to_dict(self):
+        return {
+            'slide_width': self.slide_width,
+            'slide_height': self.slide_height,
+            'shape_styles': [asdict(style) for style in self.shape_styles],
+            'text_styles': [asdict(style) for style in self.text_styles],
+            'elements': [asdict(element) for element in self.elements],
+        }
+
+    @classmethod
+    def from_dict(cls, layout_dict):
+        layout = cls(layout_dict['slide_width'], layout_dict['slide_height'])
+        for style_dict in layout_dict['shape_styles']:
+            layout.shape_style_id(ShapeStyle(**_tuples(style_dict, 'fill_rgb', 'line_rgb')))
+        for style_dict in layout_dict['text_styles']:
+            layout.text_style_id(TextStyle(**_tuples(style_dict, 'font_rgb')))
+        layout.elements = [LayoutElement(**element_dict) for element_dict in layout_dict['elements']]
+        return layout
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.to_dict(), **kwargs)
+
+    @classmethod
+    def from_json(cls, layout_json):
+        return cls.from_dict(json.loads(layout_json))
+
+    def __eq__(self, other):
+        if not isinstance(other, PlanLayout):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    @staticmethod
+    def _intern(style, styles, style_ids):
+        style_id = style_ids.get(style)
+        if style_id is None:
+            style_id = style_ids[style] = len(styles)
+            styles.append(style)
+        return style_id
+
+
+def _tuples(style_dict, *colour_fields):
+    # JSON turns the colour tuples into lists, which would stop the styles being hashable.
+    style_dict = dict(style_dict)
+    for colour_field in colour_fields:
+        if style_dict[colour_field] is not None:
+            style_dict[colour_field] = tuple(style_dict[colour_field])
+    return style_dict
@@ -0,0 +1,381 @@
+import datetime
+import posixpath
+import re
+import zipfile
+
+from dateutil.parser import isoparse
+from lxml import etree
+
+SHEET_MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+PKG_REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+
+ROW_TAG = f'{{{SHEET_MAIN_NS}}}row'
+CELL_TAG = f'{{{SHEET_MAIN_NS}}}c'
+VALUE_TAG = f'{{{SHEET_MAIN_NS}}}v'
+INLINE_STRING_TAG = f'{{{SHEET_MAIN_NS}}}is'
+SHARED_STRING_TAG = f'{{{SHEET_MAIN_NS}}}si'
+TEXT_TAG = f'{{{SHEET_MAIN_NS}}}t'
+RICH_TEXT_RUN_TAG = f'{{{SHEET_MAIN_NS}}}r'
+
+WINDOWS_EPOCH = datetime.datetime(1899, 12, 30)
+MAC_EPOCH = datetime.datetime(1904, 1, 1)
+SECS_PER_DAY = 86400
+
+# Built in number formats which are dates, times or durations.  Built in formats are referred to by id only.
+BUILTIN_DATE_FORMAT_IDS = frozenset(list(range(14, 23)) + [45, 46, 47])
+BUILTIN_TIMEDELTA_FORMAT_IDS = frozenset([46])
+
+# Same rules as openpyxl for deciding whether a custom number format is a date.
+LITERAL_GROUP = r'".*?"'  # anything in quotes
+LOCALE_GROUP = r'\[(?!hh?\]|mm?\]|ss?\])[^\]]*\]'  # anything in square brackets, except hours or minutes or seconds
+STRIP_RE = re.compile(f"{LITERAL_GROUP}|{LOCALE_GROUP}")
+DATE_RE = re.compile(r"(?<![_\\])[dmhysDMHYS]")
+TIMEDELTA_RE = re.compile(r'\[hh?\](:mm(:ss(\.0*)?)?)?|\[mm?\](:ss(\.0*)?)?|\[ss?\](\.0*)?', re.I)
+
+# Placeholder for a cell which has a value which hasn't been converted because its column wasn't selected.
+NOT_READ = object()
+
+
+def iter_sheet_rows(excel_path, sheet_name, skiprows=0):
+    """
+    Fast alternative to reading a sheet with openpyxl, which parses the worksheet XML directly out of the xlsx package
+    using lxml.  Even in read-only mode openpyxl creates an object for every cell, and for large plan exports that is
+    where almost all of the load time goes.
+
+    Only cell values are read:
+    - Shared strings, numbers, booleans, inline strings and error values are resolved.
+    - Numbers whose cell style has a date or time number format are converted to datetime (or time/timedelta) values
+      using the workbook's date system (1900 or 1904), following the same rules as openpyxl.
+    - Formulas aren't evaluated, the value cached in the file is used (the same as openpyxl with data_only=True).
+
+    Returns an iterator which yields a tuple of cell values for each row of the named sheet, starting at row
+    1 + skiprows, in the same way as openpyxl's iter_rows(values_only=True).  Rows which are missing from the file
+    (because they have no cells) are yielded as empty tuples.
+
+    Typically only a few of the columns in a sheet are actually used, so the caller can use select_columns on the
+    returned iterator (after reading the heading row) to say which columns it needs, and values in other columns
+    won't be converted (see SheetRows.select_columns).
+
+    :param excel_path: Path to xlsx file, or file-like object.
+    :param sheet_name:
+    :param skiprows:
+    :return:
+    """
+    return SheetRows(excel_path, sheet_name, skiprows)
+
+
+class SheetRows:
+    """
+    Iterator over the rows of a worksheet, returned by iter_sheet_rows.
+    """
+    def __init__(self, excel_path, sheet_name, skiprows=0):
+        self.selected_columns = None
+        self.num_columns = None
+        self.last_selected_column = None
+        self._rows = self._iter_rows(excel_path, sheet_name, skiprows)
+
+    def select_columns(self, positions, num_columns):
+        """
+        Limits which values are converted in the rows still to be read.
+
+        - Values in the (zero based) positions given are converted as normal.
+        - Other cells up to num_columns are only looked at if no other value has been found in the row so far, and if
+          they have a value they are given the placeholder NOT_READ, so that the caller can still tell blank rows from
+          rows with data.
+        - Cells beyond num_columns are ignored, as is the rest of a row once it has a value and the last selected
+          column has been passed.
+
+        :param positions:
+        :param num_columns:
+        :return:
+        """
+        self.selected_columns = frozenset(positions)
+        self.num_columns = num_columns
+        self.last_selected_column = max(positions, default=-1) + 1
+
+    def close(self):
+        self._rows.close()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._rows)
+
+    def _iter_rows(self, excel_path, sheet_name, skiprows):
+        with zipfile.ZipFile(excel_path) as package:
+            workbook = _WorkbookInfo(package)
+            sheet_path = workbook.sheet_path(sheet_name)
+            shared_strings = workbook.read_shared_strings()
+            date_styles, timedelta_styles = workbook.read_date_styles()
+
+            with package.open(sheet_path) as sheet_xml:
+                rows = _parse_rows(self, sheet_xml, shared_strings, date_styles, timedelta_styles, workbook.epoch)
+                first_row = 1 + skiprows
+                expected_row = first_row
+                for row_number, row in rows:
+                    if row_number < first_row:
+                        continue
+                    # Some rows are missing
+                    while expected_row < row_number:
+                        expected_row += 1
+                        yield ()
+                    expected_row += 1
+                    yield row
+
+
+class _WorkbookInfo:
+    """
+    Reads the workbook level parts of the package needed to interpret a worksheet.
+    """
+    def __init__(self, package):
+        self.package = package
+        self.workbook_path = self._office_document_path()
+        self.workbook_rels = self._read_rels(self.workbook_path)
+
+        workbook_root = etree.fromstring(package.read(self.workbook_path))
+        workbook_properties = workbook_root.find(f'{{{SHEET_MAIN_NS}}}workbookPr')
+        date1904 = workbook_properties is not None and workbook_properties.get('date1904') in ('1', 'true')
+        self.epoch = MAC_EPOCH if date1904 else WINDOWS_EPOCH
+
+        self.sheet_rel_ids = {}
+        for sheet in workbook_root.iter(f'{{{SHEET_MAIN_NS}}}sheet'):
+            self.sheet_rel_ids[sheet.get('name')] = sheet.get(f'{{{REL_NS}}}id')
+
+    def sheet_path(self, sheet_name):
+        if sheet_name not in self.sheet_rel_ids:
+            raise KeyError(f'Worksheet {sheet_name} does not exist.')
+        _, target = self.workbook_rels[self.sheet_rel_ids[sheet_name]]
+        return target
+
+    def read_shared_strings(self):
+        path = self._workbook_part_path('sharedStrings')
+        if path is None:
+            return []
+        strings = []
+        with self.package.open(path) as shared_strings_xml:
+            for _, element in etree.iterparse(shared_strings_xml, tag=SHARED_STRING_TAG):
+                strings.append(_text_content(element).replace('x005F_', ''))
+                element.clear()
+        return strings
+
+    def read_date_styles(self):
+        """
+        Works out which cell styles (by index) have a date or a duration number format.
+
+        :return: (set of date style indexes, set of timedelta style indexes)
+        """
+        date_styles = set()
+        timedelta_styles = set()
+        path = self._workbook_part_path('styles')
+        if path is None:
+            return date_styles, timedelta_styles
+
+        styles_root = etree.fromstring(self.package.read(path))
+        custom_formats = {
+            int(num_fmt.get('numFmtId')): num_fmt.get('formatCode')
+            for num_fmt in styles_root.iter(f'{{{SHEET_MAIN_NS}}}numFmt')
+        }
+        cell_xfs = styles_root.find(f'{{{SHEET_MAIN_NS}}}cellXfs')
+        if cell_xfs is None:
+            return date_styles, timedelta_styles
+
+        for index, xf in enumerate(cell_xfs.iterchildren(f'{{{SHEET_MAIN_NS}}}xf')):
+            num_fmt_id = int(xf.get('numFmtId', 0))
+            if num_fmt_id in custom_formats:
+                format_code = custom_formats[num_fmt_id].split(';')[0]
+                if DATE_RE.search(STRIP_RE.sub('', format_code)) is not None:
+                    date_styles.add(index)
+                if TIMEDELTA_RE.search(format_code) is not None:
+                    timedelta_styles.add(index)
+            else:
+                if num_fmt_id in BUILTIN_DATE_FORMAT_IDS:
+                    date_styles.add(index)
+                if num_fmt_id in BUILTIN_TIMEDELTA_FORMAT_IDS:
+                    timedelta_styles.add(index)
+        return date_styles, timedelta_styles
+
+    def _office_document_path(self):
+        for rel_type, target in self._read_rels('').values():
+            if rel_type.endswith('/officeDocument'):
+                return target
+        return 'xl/workbook.xml'
+
+    def _workbook_part_path(self, rel_type_name):
+        for rel_type, target in self.workbook_rels.values():
+            if rel_type.endswith('/' + rel_type_name):
+                return target
+        return None
+
+    def _read_rels(self, source_path):
+        """
+        Reads the relationships for the given part, returning a dict of rel id -> (type, target path within package)
+        """
+        folder, file_name = posixpath.split(source_path)
+        rels_path = posixpath.join(folder, '_rels', file_name + '.rels')
+        try:
+            rels_root = etree.fromstring(self.package.read(rels_path))
+        except KeyError:
+            return {}
+
+        rels = {}
+        for rel in rels_root.iterchildren(f'{{{PKG_REL_NS}}}Relationship'):
+            target = rel.get('Target')
+            if target.startswith('/'):
+                target = target[1:]
+            else:
+                target = posixpath.normpath(posixpath.join(folder, target))
+            rels[rel.get('Id')] = (rel.get('Type'), target)
+        return rels
+
+
+def _parse_rows(sheet_rows, sheet_xml, shared_strings, date_styles, timedelta_styles, epoch):
+    """
+    Parses the rows of a worksheet, yielding (row number, tuple of values) for each row element in the file.
+    """
+    column_indexes = {}
+    row_number = 0
+    for _, row_element in etree.iterparse(sheet_xml, tag=ROW_TAG):
+        row_ref = row_element.get('r')
+        row_number = int(row_ref) if row_ref else row_number + 1
+
+        # Read for each row as the column selection is made after the heading row has been read.
+        selected_columns = sheet_rows.selected_columns
+        num_columns = sheet_rows.num_columns
+        last_selected_column = sheet_rows.last_selected_column
+
+        values = []
+        column = 0
+        row_has_value = False
+        for cell in row_element.iterchildren(CELL_TAG):
+            cell_ref = cell.get('r')
+            if cell_ref:
+                letters = cell_ref.rstrip('0123456789')
+                column = column_indexes.get(letters)
+                if column is None:
+                    column = _column_index(letters)
+                    column_indexes[letters] = column
+            else:
+                column += 1
+
+            if selected_columns is None or column - 1 in selected_columns:
+                value = _cell_value(cell, shared_strings, date_styles, timedelta_styles, epoch)
+                if value is None:
+                    continue
+            elif row_has_value or column > num_columns:
+                # Once a row is known not to be blank there's no need to look at cells which won't be used, and as
+                # cells are in column order, nothing else in the row is needed once past the last selected column.
+                if column > last_selected_column:
+                    break
+                continue
+            elif _has_value(cell):
+                value = NOT_READ
+            else:
+                continue
+
+            row_has_value = True
+            if len(values) < column - 1:
+                values.extend([None] * (column - 1 - len(values)))
+            values.append(value)
+
+        # Free the memory for rows already read.
+        row_element.clear()
+        while row_element.getprevious() is not None:
+            del row_element.getparent()[0]
+
+        yield row_number, tuple(values)
+
+
+def _cell_value(cell, shared_strings, date_styles, timedelta_styles, epoch):
+    data_type = cell.get('t', 'n')
+    if data_type == 'inlineStr':
+        inline_string = cell.find(INLINE_STRING_TAG)
+        if inline_string is None:
+            return None
+        return _text_content(inline_string)
+
+    value = _value_text(cell)
+    if not value:
+        return None
+
+    if data_type == 'n':
+        if '.' in value or 'E' in value or 'e' in value:
+            value = float(value)
+        else:
+            value = int(value)
+        style = cell.get('s')
+        if style is not None and int(style) in date_styles:
+            try:
+                value = from_excel(value, epoch, timedelta=int(style) in timedelta_styles)
+            except (OverflowError, ValueError):
+                value = '#VALUE!'
+        return value
+    elif data_type == 's':
+        return shared_strings[int(value)]
+    elif data_type == 'b':
+        return bool(int(value))
+    elif data_type == 'd':
+        return isoparse(value.rstrip('Z'))
+    # 'str' (formula result) and 'e' (error) values are returned as they are.
+    return value
+
+
+def _value_text(cell):
+    # Iterating the (one or two) children is a lot quicker than cell.findtext()
+    for child in cell:
+        if child.tag == VALUE_TAG:
+            return child.text
+    return None
+
+
+def _has_value(cell):
+    if cell.get('t') == 'inlineStr':
+        return cell.find(INLINE_STRING_TAG) is not None
+    return bool(_value_text(cell))
+
+
+def from_excel(value, epoch=WINDOWS_EPOCH, timedelta=False):
+    """
+    Converts an Excel date serial to a Python value, following the same rules as openpyxl.
+    """
+    if timedelta:
+        td = datetime.timedelta(days=value)
+        if td.microseconds:
+            # round to millisecond precision
+            td = datetime.timedelta(seconds=td.total_seconds() // 1, microseconds=round(td.microseconds, -3))
+        return td
+
+    day, fraction = divmod(value, 1)
+    diff = datetime.timedelta(milliseconds=round(fraction * SECS_PER_DAY * 1000))
+    if 0 <= value < 1 and diff.days == 0:
+        mins, seconds = divmod(diff.seconds, 60)
+        hours, mins = divmod(mins, 60)
+        return datetime.time(hours, mins, seconds, diff.microseconds)
+    if 0 < value < 60 and epoch == WINDOWS_EPOCH:
+        # Excel's 1900 date system has a non-existent 29th February 1900.
+        day += 1
+    return epoch + datetime.timedelta(days=day) + diff
+
+
+def _text_content(element):
+    """
+    Text of a shared or inline string, which is either plain text or a list of rich text runs.  Phonetic runs are
+    ignored.
+    """
+    snippets = []
+    for child in element.iterchildren(TEXT_TAG, RICH_TEXT_RUN_TAG):
+        if child.tag == TEXT_TAG:
+            text = child.text
+        else:
+            text = child.findtext(TEXT_TAG)
+        if text is not None:
+            snippets.append(text)
+    return ''.join(snippets)
+
+
+def _column_index(letters):
+    index = 0
+    for letter in letters:
+        index = index * 26 + (ord(letter.upper()) - ord('A') + 1)
+    return index
@@ -0,0 +1,209 @@
+import copy
+import logging
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import List
+
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.oxml import parse_xml
+
+from source.visualiser.plot_driver import PlotDriver
+
+root_logger = logging.getLogger()
+
+_R_NAMESPACE = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_EXT_LST = '{http://schemas.openxmlformats.org/presentationml/2006/main}extLst'
+
+
+@dataclass
+class Page:
+    """
+    The part of a plan which is plotted on one slide.
+
+    swimlane_data: The swimlanes (or parts of swimlanes) on the page, in the same form as
+    PlanVisualiser.swimlane_data, with the start and end track of each on the page.  Each entry also has
+    first_track_within_lane, the track within the swimlane plotted at start_track (more than 1 where a swimlane is
+    continued from the previous page), and plan_row, the swimlane's position in the whole plan (so that alternate
+    swimlanes keep their formats across pages).
+    activity_indexes: Positions in the plan data of the activities plotted on the page.
+    """
+    swimlane_data: dict = field(default_factory=dict)
+    activity_indexes: List[int] = field(default_factory=list)
+
+    @property
+    def num_tracks(self):
+        return max((swimlane['end_track'] for swimlane in self.swimlane_data.values()), default=0)
+
+
+def tracks_per_page(plot_driver: PlotDriver):
+    """
+    Number of tracks which fit between the top and bottom of the plot area.
+    """
+    track_pitch = plot_driver.track_height + plot_driver.track_gap
+    return max(1, int((plot_driver.bottom - plot_driver.top + plot_driver.track_gap) // track_pitch))
+
+
+def paginate(plan_data, swimlane_data, max_tracks) -> List[Page]:
+    """
+    Splits the swimlanes of a plan (see PlanVisualiser.extract_swimlane_data) across as many pages as are needed so
+    that no page has more than max_tracks tracks.
+
+    Pages are filled with whole swimlanes in order, a new page being started for a swimlane which doesn't fit on the
+    current one.  Only a swimlane with more tracks than fit on a page at all is split, and then at the lowest track
+    which doesn't cut through an activity covering more than one track, if there is one.  A split swimlane is carried
+    on at the top of the next page.
+
+    :param plan_data: List of PlanActivity
+    :param swimlane_data:
+    :param max_tracks: Number of tracks which fit on a page (see tracks_per_page).
+    :return: The pages in order.  Every activity is on exactly one page, the one its first track is on.
+    """
+    swimlane_activities = {}
+    for index, activity in enumerate(plan_data):
+        swimlane_activities.setdefault(activity.activity_layout_attributes.swimlane_name, []).append(index)
+
+    pages = [Page()]
+    used_tracks = 0
+    for plan_row, (swimlane, lane) in enumerate(swimlane_data.items()):
+        num_lane_tracks = lane['end_track'] - lane['start_track'] + 1
+        activity_indexes = swimlane_activities.get(swimlane, [])
+        crossed = _crossed_track_boundaries(plan_data, activity_indexes, num_lane_tracks)
+
+        pieces = []  # (first track within lane, page index) for each part of the swimlane.
+        first_track = 1
+        while first_track <= num_lane_tracks:
+            tracks_left = num_lane_tracks - first_track + 1
+            space = max_tracks - used_tracks
+            if tracks_left > space and used_tracks > 0 and tracks_left <= max_tracks:
+                # Rather than split the swimlane, start it on a new page.
+                pages.append(Page())
+                used_tracks = 0
+                continue
+
+            last_track = min(num_lane_tracks, first_track + space - 1)
+            if last_track < num_lane_tracks:
+                # The swimlane has to be split, so try not to split an activity covering several tracks.
+                break_track = last_track
+                while break_track >= first_track and crossed[break_track]:
+                    break_track -= 1
+                if break_track >= first_track:
+                    last_track = break_track
+                elif used_tracks > 0:
+                    pages.append(Page())
+                    used_tracks = 0
+                    continue
+                else:
+                    root_logger.warning(
+                        f'Swimlane {swimlane} has an activity which is split across pages at track {last_track}'
+                    )
+
+            page = pages[-1]
+            start_track = used_tracks + 1
+            page.swimlane_data[swimlane] = {
+                'start_track': start_track,
+                'end_track': start_track + last_track - first_track,
+                'first_track_within_lane': first_track,
+                'plan_row': plan_row,
+            }
+            pieces.append((first_track, len(pages) - 1))
+            used_tracks += last_track - first_track + 1
+            first_track = last_track + 1
+            if first_track <= num_lane_tracks:
+                pages.append(Page())
+                used_tracks = 0
+
+        piece_first_tracks = [first_track for first_track, _ in pieces]
+        for index in activity_indexes:
+            track_number = plan_data[index].activity_layout_attributes.track_number
+            _, page_index = pieces[bisect_right(piece_first_tracks, track_number) - 1]
+            pages[page_index].activity_indexes.append(index)
+
+    for page in pages:
+        page.activity_indexes.sort()
+    return [page for page in pages if page.swimlane_data] or pages[:1]
+
+
+def _crossed_track_boundaries(plan_data, activity_indexes, num_tracks):
+    """
+    :return: List where item t is True if an activity covers both track t and track t + 1 of the swimlane.
+    """
+    starts = [0] * (num_tracks + 2)
+    for index in activity_indexes:
+        layout_attributes = plan_data[index].activity_layout_attributes
+        if layout_attributes.number_of_tracks_to_span > 1:
+            first = layout_attributes.track_number
+            last = min(num_tracks, first + layout_attributes.number_of_tracks_to_span - 1)
+            # The boundaries below tracks first to last - 1 are crossed.
+            starts[first] += 1
+            starts[last] -= 1
+    crossed = []
+    running = 0
+    for count in starts:
+        running += count
+        crossed.append(running > 0)
+    return crossed
+
+
+def add_page_slides(prs, num_pages):
+    """
+    Adds slides to a presentation so that there is one for each page, each a copy of the first slide (the template
+    slide) as it is before anything is plotted on it.
+
+    :param prs: python-pptx Presentation
+    :param num_pages:
+    :return: The slide for each page, the first being the template slide itself.
+    """
+    template_slide = prs.slides[0]
+    slides = [template_slide]
+    for _ in range(num_pages - 1):
+        slides.append(_copy_slide(prs, template_slide))
+    return slides
+
+
+def add_shapes(slide, shape_xml: List[bytes]):
+    """
+    Adds shapes, as serialised XML, to a slide (after anything already on it).
+
+    :param slide: python-pptx Slide
+    :param shape_xml:
+    :return:
+    """
+    sp_tree = slide.shapes._spTree
+    ext_lst = sp_tree.find(_EXT_LST)
+    for xml in shape_xml:
+        sp = parse_xml(xml)
+        if ext_lst is None:
+            sp_tree.append(sp)
+        else:
+            ext_lst.addprevious(sp)
+
+
+def _copy_slide(prs, slide):
+    new_slide = prs.slides.add_slide(slide.slide_layout)
+
+    # Anything on the template slide which refers to another part (e.g. a picture) needs a relationship to it from
+    # the new slide, which may end up with a different id.
+    relationship_ids = {}
+    for relationship_id, relationship in slide.part.rels.items():
+        if relationship.reltype in (RT.SLIDE_LAYOUT, RT.NOTES_SLIDE):
+            continue
+        if relationship.is_external:
+            relationship_ids[relationship_id] = new_slide.part.relate_to(
+                relationship.target_ref, relationship.reltype, is_external=True
+            )
+        else:
+            relationship_ids[relationship_id] = new_slide.part.relate_to(relationship.target_part, relationship.reltype)
+
+    # Replace the placeholders from the slide layout with the template slide's own shapes.
+    new_sp_tree = new_slide.shapes._spTree
+    for sp in list(new_sp_tree)[2:]:
+        new_sp_tree.remove(sp)
+    for sp in list(slide.shapes._spTree)[2:]:
+        sp = copy.deepcopy(sp)
+        for element in sp.iter():
+            for name, value in element.attrib.items():
+                if name.startswith(f'{{{_R_NAMESPACE}}}') and value in relationship_ids:
+                    element.set(name, relationship_ids[value])
+        new_sp_tree.append(sp)
+
+    return new_slide
@@ -0,0 +1,254 @@
+import copyreg
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+
+from pptx.util import Length
+
+root_logger = logging.getLogger()
+
+# Must be increased whenever the output of any of the cached parsers changes, so that entries written by an older
+# version are no longer found.
+SCHEMA_VERSION = 1
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.ppt_plan_visual', 'parse_cache')
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+CACHE_FILE_EXT = '.pickle'
+
+
+class ParsedInputCache:
+    """
+    On-disk cache of the parsed contents of the plan and config workbooks.
+
+    Most runs re-render unchanged workbooks, so once a sheet has been parsed the result is pickled to the cache folder
+    and subsequent runs pick it up from there without Excel being read at all.
+
+    Each entry is keyed on the size, modification time and content hash of the workbook together with the kind of data
+    parsed from it, the sheet name and SCHEMA_VERSION.  Any change to the workbook or to the parser means a new key, so
+    stale entries are never used - they just age out of the cache.
+
+    The total size of the cache folder is capped at max_bytes.  When it goes over, the least recently used entries
+    (based on the file modification time, which is updated on each hit) are deleted.
+
+    :param cache_dir: Folder to store the cache entries in.  Created if it doesn't exist.
+    :param max_bytes: Maximum total size of the entries in the cache folder.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # So that a workbook which several sheets are read from is only hashed once.
+        self._content_hashes = ContentHashes()
+
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def get_or_parse(self, excel_path, kind, sheet_name, parse):
+        """
+        Returns the cached result of parsing the given sheet, calling parse() to create it if it isn't in the cache.
+
+        :param excel_path: Workbook the data is parsed from.  Anything other than a path (e.g. an already loaded
+        workbook) can't be keyed reliably so is always parsed.
+        :param kind: Identifies which parser the data comes from, e.g. 'format_config'.
+        :param sheet_name:
+        :param parse: Function taking no arguments which parses the sheet.  The result must be picklable.
+        :return:
+        """
+        if not isinstance(excel_path, (str, os.PathLike)):
+            return parse()
+
+        entry_path = self._entry_path(self.key(excel_path, kind, sheet_name))
+        try:
+            with open(entry_path, 'rb') as entry_file:
+                value = pickle.load(entry_file)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            # A corrupt or unreadable entry is treated as a miss, and overwritten below.
+            root_logger.warning(f'Ignoring unreadable parse cache entry {entry_path}: {e}')
+        else:
+            self.hits += 1
+            root_logger.debug(f'Parse cache hit for {kind} from sheet {sheet_name} of {excel_path}')
+            touch_file(entry_path)
+            return value
+
+        self.misses += 1
+        root_logger.debug(f'Parse cache miss for {kind} from sheet {sheet_name} of {excel_path}')
+        value = parse()
+        self._store(entry_path, value)
+        return value
+
+    def key(self, excel_path, kind, sheet_name):
+        stat = os.stat(excel_path)
+        content_hash = self._content_hashes.file_hash(excel_path, stat)
+        key_text = '\n'.join(str(part) for part in (
+            SCHEMA_VERSION, kind, sheet_name, stat.st_size, stat.st_mtime_ns, content_hash
+        ))
+        return hashlib.sha256(key_text.encode('utf-8')).hexdigest()
+
+    def clear(self):
+        for entry_path in self._entry_paths():
+            os.remove(entry_path)
+
+    def log_stats(self):
+        root_logger.info(
+            f'Parse cache: {self.hits} hits, {self.misses} misses, {self.evictions} evictions ({self.cache_dir})'
+        )
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, key + CACHE_FILE_EXT)
+
+    def _entry_paths(self):
+        return [
+            entry.path for entry in os.scandir(self.cache_dir)
+            if entry.is_file() and entry.name.endswith(CACHE_FILE_EXT)
+        ]
+
+    def _store(self, entry_path, value):
+        def write(entry_file):
+            _ParsedInputPickler(entry_file, protocol=pickle.HIGHEST_PROTOCOL).dump(value)
+
+        # Failing to cache shouldn't stop the plan being plotted.
+        if write_cache_file(entry_path, write, 'parse cache entry'):
+            self.evictions += evict_least_recently_used(self._entry_paths(), self.max_bytes)
+
+
+class _ParsedInputPickler(pickle.Pickler):
+    """
+    The parsed config includes pptx lengths (Cm, Pt etc.), which are ints holding a value in EMUs but which are
+    constructed from a value in their own unit.  Default pickling would pass the EMU value back to the constructor on
+    loading and so scale it again, so they are pickled as their EMU value instead.
+    """
+    dispatch_table = copyreg.dispatch_table.copy()
+
+
+def _reduce_length(length):
+    return _restore_length, (type(length), int(length))
+
+
+def _restore_length(length_class, emu):
+    return int.__new__(length_class, emu)
+
+
+def _length_classes(length_class=Length):
+    yield length_class
+    for subclass in length_class.__subclasses__():
+        yield from _length_classes(subclass)
+
+
+# The dispatch table is looked up by exact type, so each of the units needs its own entry.
+for _length_class in _length_classes():
+    _ParsedInputPickler.dispatch_table[_length_class] = _reduce_length
+
+
+class ContentHashes:
+    """
+    Content hashes of the files used by a cache, keyed on path, size and modification time, so that a file which is
+    used again unchanged isn't hashed again.
+    """
+
+    def __init__(self):
+        self._hashes = {}
+
+    def file_hash(self, path, stat=None):
+        """
+        :param path:
+        :param stat: The result of os.stat for the file, if the caller already has it.
+        :return: Hex digest of the file contents.
+        """
+        if stat is None:
+            stat = os.stat(path)
+        file_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        content_hash = self._hashes.get(file_key)
+        if content_hash is None:
+            content_hash = self._hashes[file_key] = file_content_hash(path)
+        return content_hash
+
+
+def write_cache_file(entry_path, write, description):
+    """
+    Writes a cache entry to a temporary file in the same folder first and then moves it into place, so that another
+    process never sees a partly written entry.  Failures are logged rather than raised.
+
+    :param entry_path:
+    :param write: Function taking the open (binary) file, which writes the entry to it.
+    :param description: What the entry is, for the warning if it can't be written.
+    :return: True if the entry was written.
+    """
+    temp_path = None
+    try:
+        file_descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(entry_path), suffix='.tmp')
+        with os.fdopen(file_descriptor, 'wb') as temp_file:
+            write(temp_file)
+        os.replace(temp_path, entry_path)
+    except (OSError, pickle.PicklingError) as e:
+        root_logger.warning(f'Unable to write {description} {entry_path}: {e}')
+        if temp_path is not None and os.path.exists(temp_path):
+            _remove_file(temp_path)
+        return False
+    return True
+
+
+def touch_file(entry_path):
+    """
+    Marks a cache entry as used, for evict_least_recently_used.
+    """
+    try:
+        os.utime(entry_path)
+    except OSError:
+        pass
+
+
+def evict_least_recently_used(entry_paths, max_bytes):
+    """
+    Deletes the least recently used files (based on their modification time, see touch_file) until the total size of
+    those left is no more than max_bytes.
+
+    :param entry_paths: Files in the cache.
+    :param max_bytes:
+    :return: The number of files deleted.
+    """
+    entries = []
+    for entry_path in entry_paths:
+        try:
+            stat = os.stat(entry_path)
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime_ns, stat.st_size, entry_path))
+
+    total_bytes = sum(size for _, size, _ in entries)
+    evictions = 0
+    for _, size, entry_path in sorted(entries):
+        if total_bytes <= max_bytes:
+            break
+        if _remove_file(entry_path):
+            total_bytes -= size
+            evictions += 1
+    return evictions
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        return True
+    except OSError as e:
+        # E.g. on Windows a file which is open or memory-mapped (see RenderResultCache) can't be deleted.
+        root_logger.debug(f'Unable to delete cache file {path}: {e}')
+        return False
+    return True
+
+
+def file_content_hash(path, chunk_size=1024 * 1024):
+    content_hash = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            content_hash.update(chunk)
+    return content_hash.hexdigest()
@@ -5,15 +5,18 @@ from typing import Union
 from colour import Color
 from pptx.util import Cm, Pt
 
+from source.visualiser.layout import PlanLayout
 from source.visualiser.plotable_element import PlotableElement
 from source.visualiser.shape_formatting import ShapeFormatting
 from source.visualiser.exceptions import PptPlanVisualiserException
 from source.visualiser.activity_layout_attributes import ActivityLayoutAttributes
-from source.visualiser.plot_driver import PlotDriver
+from source.visualiser.plot_driver import PlotDriver, ActivityXGeometry
 from source.visualiser.text_formatting import TextFormatting
+from source.visualiser.utilities import slotted
 from source.visualiser.visual_element_shape import VisualElementShape
 
 
+@slotted
 @dataclass
 class PlanActivity:
     """
@@ -67,6 +70,12 @@ class PlanActivity:
     plot_visual_config:
     done_display_attributes: Drives formatting attributes for the 'done' part of the activity if user wants
     to include it.  Absence of this parameter means don't split into done and not done.
+    x_geometry: Horizontal geometry of the activity, if it has already been calculated along with all the other
+    activities (see PlotDriver.activity_x_geometry_list).  If not supplied it is calculated as needed.
+
+    Plans can have 100,000s of activities, so activities have __slots__ rather than a __dict__ each, and share
+    everything they can with the other activities in the plan - the PlotDriver, the formatting (see FormatRegistry)
+    and, as read by ExcelPlan, swimlane names, text layouts and dates.
     """
     activity_id: int
     description: str
@@ -80,6 +89,7 @@ class PlanActivity:
     shape_formatting_2: Union[ShapeFormatting, None] = None
     today_override: Union[date, None] = None
     swimlane_start_track: Union[int, None] = None
+    x_geometry: Union[ActivityXGeometry, None] = None
 
     @property
     def today(self):
@@ -115,7 +125,12 @@ class PlanActivity:
             shape_formatting,
             text=None,
     ):
-        plot_element = PlotableElement(
+        plot_element = self.plotable_shape(display_shape, top, left, width, height, shape_formatting, text)
+        shape = plot_element.plot_ppt(ppt_shapes_object)
+        return shape
+
+    def plotable_shape(self, display_shape, top, left, width, height, shape_formatting, text=None):
+        return PlotableElement(
             shape=display_shape,
             top=top,
             left=left,
@@ -125,8 +140,6 @@ class PlanActivity:
             text=text,
             text_formatting=self.text_formatting,
         )
-        shape = plot_element.plot_ppt(ppt_shapes_object)
-        return shape
 
     def plot_ppt_shapes(self, ppt_shapes_object):
         """
@@ -135,13 +148,33 @@ class PlanActivity:
         :param ppt_shapes_object:
         :return:
         """
-        shapes = []  # Collect all shapes plotted and return them
+        return [plot_element.plot_ppt(ppt_shapes_object) for plot_element in self.plotable_elements()]
+
+    def add_to_layout(self, layout: PlanLayout):
+        """
+        Adds the shapes for this activity to a layout, in the order they would be plotted.
+
+        :param layout:
+        :return:
+        """
+        plot_elements = self.plotable_elements()
+        for plot_element in plot_elements[:-1]:
+            plot_element.add_to_layout(layout, 'activity', self.activity_id)
+        plot_elements[-1].add_to_layout(layout, 'activity_text', self.activity_id)
+
+    def plotable_elements(self):
+        """
+        Works out what to plot for this activity, without plotting it.
+
+        :return: The PlotableElements for the activity's shape (or shapes, if split into done and not done), followed
+        by the element for its text.
+        """
+        shapes = []  # Collect all shapes to be plotted and return them
         if not self.multi_format_enabled:
             # Simple case.  Just plot one activity shape and one text shape with formatting_1
             if self.activity_type == "milestone":
                 left, top, width, height = self.get_milestone_coords()
-                shape = self.ppt_plot_shape(
-                    ppt_shapes_object,
+                shape = self.plotable_shape(
                     self.display_shape,
                     top,
                     left,
@@ -155,8 +188,7 @@ class PlanActivity:
                 top = self._plot_top
                 width = self._shape_width("activity")
                 height = self._plot_height
-                shape = self.ppt_plot_shape(
-                    ppt_shapes_object,
+                shape = self.plotable_shape(
                     self.display_shape,
                     top=top,
                     left=left,
@@ -180,8 +212,7 @@ class PlanActivity:
                 top = self._plot_top
                 width = self._shape_width("milestone")
                 height = self._plot_height
-                shape = self.ppt_plot_shape(
-                    ppt_shapes_object,
+                shape = self.plotable_shape(
                     self.display_shape,
                     top,
                     left,
@@ -199,8 +230,7 @@ class PlanActivity:
                     top = self._plot_top
                     width = self._shape_width("activity")
                     height = self._plot_height
-                    shape = self.ppt_plot_shape(
-                        ppt_shapes_object,
+                    shape = self.plotable_shape(
                         self.display_shape,
                         top,
                         left,
@@ -224,8 +254,7 @@ class PlanActivity:
                     left_2 = self._shape_left("today")
                     width_2 = self._shape_width("part_2")
 
-                    shape = self.ppt_plot_shape(
-                        ppt_shapes_object,
+                    shape = self.plotable_shape(
                         self.display_shape,
                         top,
                         left_1,
@@ -235,8 +264,7 @@ class PlanActivity:
                     )
                     shapes.append(shape)
 
-                    shape = self.ppt_plot_shape(
-                        ppt_shapes_object,
+                    shape = self.plotable_shape(
                         self.display_shape,
                         top,
                         left_2,
@@ -245,7 +273,7 @@ class PlanActivity:
                         self.shape_formatting_1
                     )
                     shapes.append(shape)
-        shape = self.plot_ppt_text_shape(ppt_shapes_object)
+        shape = self.text_plotable_element()
         shapes.append(shape)
         return shapes
 
@@ -271,10 +299,14 @@ class PlanActivity:
         :return: left value to be used in ppt plot.
         """
         if case == "activity":
+            if self.x_geometry is not None:
+                return self.x_geometry.start_x
             return self.plan_visual_config.date_to_x_coordinate(self.start_date, "start")
         elif case == "today":
             return self.plan_visual_config.date_to_x_coordinate(self.today, "start")
         elif case == "milestone":
+            if self.x_geometry is not None:
+                return self.x_geometry.milestone_left
             milestone_width = self.plan_visual_config.milestone_width
             milestone_left_adjust = milestone_width / 2
 
@@ -297,6 +329,8 @@ class PlanActivity:
         """
 
         if case == "activity":
+            if self.x_geometry is not None:
+                return self.x_geometry.width
             end = self.plan_visual_config.date_to_x_coordinate(self.end_date, "end")
             start = self.plan_visual_config.date_to_x_coordinate(self.start_date)
             return round(end - start)
@@ -331,8 +365,12 @@ class PlanActivity:
         :return:
         """
         text_bottom = self._plot_top + self._plot_height
-        left = self._shape_left("activity")
         text_top = self._plot_top
+        text_left, text_right, text_align = self._text_x_coords()
+        return text_top, text_left, text_bottom, text_right, text_align
+
+    def _text_x_coords(self):
+        left = self._shape_left("activity")
         width = self._shape_width("activity")
 
         min_activity_text_width = max(width, self.plan_visual_config.min_activity_text_width)
@@ -353,9 +391,30 @@ class PlanActivity:
             text_align = 'centre'
             text_left = left
             text_right = text_left + width
-        return text_top, text_left, text_bottom, text_right, text_align
+        return text_left, text_right, text_align
+
+    def horizontal_extent(self):
+        """
+        The horizontal space the activity takes up on its track, including any text which overflows the shape (see
+        get_ppt_text_coords).  Doesn't depend on which track the activity is on, so can be used to allocate tracks.
+
+        :return: (left, right)
+        """
+        if self.activity_type == "milestone":
+            shape_left = self._shape_left("milestone")
+            shape_right = shape_left + self._shape_width("milestone")
+        else:
+            shape_left = self._shape_left("activity")
+            shape_right = shape_left + self._shape_width("activity")
+        text_left, text_right, _ = self._text_x_coords()
+        return min(shape_left, text_left), max(shape_right, text_right)
 
     def plot_ppt_text_shape(self, ppt_shapes_object):
+        plot_element = self.text_plotable_element()
+        shape = plot_element.plot_ppt(ppt_shapes_object)
+        return shape
+
+    def text_plotable_element(self):
         text_top, text_left, text_bottom, text_right, text_align = self.get_ppt_text_coords()
 
         left_margin = self.plan_visual_config.text_margin
@@ -383,11 +442,12 @@ class PlanActivity:
                 font_colour=Color(rgb=(0, 0, 0))
             )
         else:
-            text_formatting = self.text_formatting
-
-        text_formatting.horizontal_align = text_align
-        text_formatting.margin_left = left_margin
-        text_formatting.margin_right = right_margin
+            # The formatting is shared with other activities so take a variant rather than changing it.
+            text_formatting = self.text_formatting.variant(
+                horizontal_align=text_align,
+                margin_left=left_margin,
+                margin_right=right_margin
+            )
 
         shape_formatting = ShapeFormatting(
             line_colour=None,
@@ -405,8 +465,7 @@ class PlanActivity:
             text=self.description,
             text_formatting=text_formatting
         )
-        shape = plot_element.plot_ppt(ppt_shapes_object)
-        return shape
+        return plot_element
 
     def get_milestone_coords(self):
         left = self._shape_left("milestone")
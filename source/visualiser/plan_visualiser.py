@@ -1,23 +1,42 @@
+import hashlib
+import io
 import logging
 import os
 from calendar import month_name
+from concurrent.futures import ProcessPoolExecutor
 from datetime import date
 from functools import reduce
+from itertools import repeat
 from typing import List
 
+from lxml import etree
 from pptx import Presentation
 from pptx.dml.color import RGBColor
 from pptx.enum.shapes import MSO_AUTO_SHAPE_TYPE, MSO_CONNECTOR_TYPE
 from pptx.enum.text import PP_PARAGRAPH_ALIGNMENT as PP_ALIGN
 from pptx.enum.text import MSO_VERTICAL_ANCHOR as MSO_ANCHOR
 
-from source.visualiser.excel_config import ExcelPlotConfig, ExcelFormatConfig, ExcelSwimlaneConfig
+from source.visualiser.collision_index import CollisionReport, find_collisions
+from source.visualiser.date_window import DateWindow, DateWindowIndex, clip_to_window, as_date, date_like
+from source.visualiser.excel_config import ExcelConfigWorkbook
 from source.visualiser.excel_plan import ExcelPlan
+from source.visualiser.exceptions import PptPlanVisualiserException
+from source.visualiser.format_registry import FormatRegistry
+from source.visualiser.incremental import RenderStats, tag_shape, shape_tag, tag_slide, slide_signature, P_NAMESPACE
+from source.visualiser.instrumentation import Instrumentation
+from source.visualiser.layout import PlanLayout, ShapeStyle, LINE_SHAPE
+from source.visualiser import pagination
 from source.visualiser.plan_activity import PlanActivity
 from source.visualiser.plot_driver import PlotDriver
 from source.visualiser.plotable_element import PlotableElement
-from source.visualiser.shape_formatting import ShapeFormatting
+from source.visualiser.ppt_xml_renderer import PptXmlRenderer
+from source.visualiser.raster_renderer import RasterRenderer
+from source.visualiser.read_excel import source_name
+from source.visualiser.streaming_writer import save_streaming, DEFAULT_COMPRESS_LEVEL
+from source.visualiser.svg_renderer import SvgRenderer
+from source.visualiser.template_cache import TemplateCache, open_template, template_source
 from source.visualiser.text_formatting import TextFormatting
+from source.visualiser import track_allocation
 from source.visualiser.visual_element_shape import VisualElementShape
 from source.visualiser.utilities import get_path_name_ext, SwimlaneManager, first_day_of_month, iterate_months, \
     num_months_between_dates, last_day_of_month
@@ -33,6 +52,26 @@ class PlanVisualiser:
     The supplied data
 
     :param plan_data:
+    :param template_path: Path of the template, or the template itself as bytes or a file-like object (see
+    template_cache.template_source).
+    :param slides_out_path: Where to save the plotted slide - a path, or a binary stream to write it to.  Defaults to
+    the template file name with '_out' added.  There is no default for a template which isn't a path, so either supply
+    one or say where to save it when plotting (see plot_slide and plot_slide_bytes).
+    :param template_cache: Optional TemplateCache to take the template from, so that it is only parsed once when
+    plotting several plans from the same template.
+    :param instrumentation: Instrumentation to record the time taken by each stage in.  If not supplied a new one is
+    created.  Either way it is available as the instrumentation attribute.
+    :param pack_tracks: If True, activities without a track number in the plan are packed into as few tracks as
+    possible within their swimlane (see allocate_tracks), rather than each being put on a new track.
+    :param format_registry: FormatRegistry for format_config, so that formats compiled for an earlier plot with the same
+    config can be used again.  If not supplied a new one is created.
+    :param collision_check: 'warn' to check every layout for activities whose shapes or labels overlap each other and
+    log a warning for each one found, 'fail' to also raise an exception rather than plot a layout with collisions, or
+    None not to check.  The result of the last check is available as the collision_report attribute.
+    :param streaming_save: If True the deck is saved with streaming_writer.save_streaming, which writes the slides a
+    shape at a time and copies the rest of the template as it is stored, rather than building the whole file in memory
+    first (as Presentation.save does).  Worth using for very large plans.
+    :param compress_level: zlib compression level (0 to 9) for the parts compressed by a streaming save.
     """
 
     def __init__(
@@ -40,8 +79,19 @@ class PlanVisualiser:
             plan_data: List[PlanActivity],
             plot_config: PlotDriver,
             format_config: dict,
-            template_path: str,
-            swimlanes: List[dict]):
+            template_path,
+            swimlanes: List[dict],
+            renderer: str = 'xml',
+            slides_out_path=None,
+            template_cache: TemplateCache = None,
+            instrumentation: Instrumentation = None,
+            pack_tracks: bool = False,
+            collision_check: str = None,
+            format_registry: FormatRegistry = None,
+            streaming_save: bool = False,
+            compress_level: int = DEFAULT_COMPRESS_LEVEL):
+        self.instrumentation = Instrumentation() if instrumentation is None else instrumentation
+
         # The actual plan data with activities and milestones, start/finish dates etc.
         self.plan_data = plan_data
 
@@ -50,35 +100,102 @@ class PlanVisualiser:
 
         # Data with pre-determined formatting properties to apply to elements.
         self.format_config = format_config
+        if format_registry is None:
+            format_registry = FormatRegistry(format_config, plot_config)
+        self.format_registry = format_registry
 
         # # Config to drive slide level objects such as the swimlane rectangle shapes as background.
         # self.slide_level_config = slide_level_config
         #
-        self.template = template_path
-        folder, base, ext = get_path_name_ext(template_path)
-        self.slides_out_path = os.path.join(folder, base + '_out' + ext)
+        self.template = template_source(template_path)
+        if slides_out_path is None and isinstance(self.template, (str, os.PathLike)):
+            folder, base, ext = get_path_name_ext(self.template)
+            self.slides_out_path = os.path.join(folder, base + '_out' + ext)
+        else:
+            self.slides_out_path = slides_out_path
 
-        self.prs = Presentation(template_path)
+        self.streaming_save = streaming_save
+        self.compress_level = compress_level
+        # The package the presentation was opened from, which a streaming save copies the unchanged parts from.
+        self.package_source = self.template
 
-        visual_slide = self.prs.slides[0]  # Assume there is one slide and that's where we will place the visual
+        self.renderer = renderer
+        with self.instrumentation.span('template_load'):
+            if template_cache is None:
+                self.open_presentation(open_template(self.template))
+            else:
+                self.open_presentation(template_cache.presentation(self.template))
 
-        self.shapes = visual_slide.shapes
         self.plot_driver = plot_config
 
-        self.align_months()
+        with self.instrumentation.span('align_months', activities=len(plan_data)):
+            self.align_months()
 
         # We can't be sure of knowing the number of days in the range until align_months has been called, so do the
         # calculation here, not in PlotDriver (where it used to be)
         self.plot_driver.num_days_in_date_range = self.plot_driver.max_end_date.toordinal() - self.plot_driver.min_start_date.toordinal() + 1
 
+        if pack_tracks:
+            with self.instrumentation.span('track_allocation', activities=len(plan_data)) as span:
+                span.add('tracks', self.allocate_tracks())
+
         self.swimlanes = swimlanes
-        self.swimlane_data = self.extract_swimlane_data()
+        with self.instrumentation.span('extract_swimlane_data') as span:
+            self.swimlane_data = self.extract_swimlane_data()
+            span.add('swimlanes', len(self.swimlane_data))
+
+        # The layout plotted by plot_slide or plot_slide_incremental (the first page for plot_pages).
+        self.layout = None
+        # The layout of each slide plotted by plot_pages or plot_windows.
+        self.page_layouts = None
+        # Built the first time part of the plan is plotted for a window of dates.
+        self.date_window_index = None
+
+        if collision_check not in (None, 'warn', 'fail'):
+            raise PptPlanVisualiserException(
+                f"Unknown collision check '{collision_check}', should be 'warn' or 'fail'"
+            )
+        self.collision_check = collision_check
+        self.collision_report = None
 
     @classmethod
-    def from_excel(cls, excel_plan_file, excel_config_workbook, ppt_template_file, excel_plan_sheet=None):
+    def from_excel(
+            cls,
+            excel_plan_file,
+            excel_config_workbook,
+            ppt_template_file,
+            excel_plan_sheet=None,
+            plot_config_sheet='PlotConfig',
+            format_config_sheet='FormatConfig',
+            swimlanes_sheet='Swimlanes',
+            excel_engine=None,
+            parse_cache=None,
+            renderer='xml',
+            template_cache=None,
+            instrumentation=None,
+            pack_tracks=False,
+            collision_check=None,
+            streaming_save=False,
+            compress_level=DEFAULT_COMPRESS_LEVEL
+    ):
         """
         Reads plan and configuration information from Excel workbooks and then creates instance of PlanVisualiser
 
+        The config workbook is only loaded once, and all the config sheets are read from it.  The plan sheet is read
+        using excel_engine ('openpyxl' or 'lxml', see read_excel.stream_excel).
+
+        If parse_cache (a ParsedInputCache) is supplied, the parsed config and plan rows are taken from it for any
+        workbook which hasn't changed since it was last read, and are added to it otherwise.
+
+        The workbooks and template can each be a path, a file-like object or the bytes of the file, so a plan can be
+        plotted without anything being saved to disk first.  Plot it with plot_slide_bytes, or plot_slide with a
+        stream, to get the deck back without saving that either.
+
+        renderer is 'xml' or 'pptx', template_cache an optional TemplateCache, instrumentation an optional
+        Instrumentation, pack_tracks whether to allocate missing track numbers automatically, collision_check
+        whether to check the layout for overlapping activities and streaming_save and compress_level how to save the
+        deck (see __init__).
+
         :return:
         """
         print("Plan Visualiser - starting...")
@@ -86,27 +203,61 @@ class PlanVisualiser:
         root_logger.debug('Plan to PowerPoint plotting programme starting...')
         root_logger.info(f"Running from IDE, using fixed arguments")
 
-        root_logger.info(f'Using plan data from {excel_plan_file}')
+        root_logger.info(f'Using plan data from {source_name(excel_plan_file)}')
 
-        plot_config_object = ExcelPlotConfig(excel_config_workbook, excel_sheet='PlotConfig')
-        plot_area_config = plot_config_object.parse_plot_config()
+        if instrumentation is None:
+            instrumentation = Instrumentation()
 
-        excel_format_config_object = ExcelFormatConfig(excel_config_workbook, excel_sheet='FormatConfig')
-        shape_config = excel_format_config_object.parse_format_config()
+        with instrumentation.span('config_load') as span, ExcelConfigWorkbook(
+                excel_config_workbook,
+                plot_config_sheet=plot_config_sheet,
+                format_config_sheet=format_config_sheet,
+                swimlanes_sheet=swimlanes_sheet,
+                cache=parse_cache
+        ) as config_workbook:
+            plot_area_config = config_workbook.parse_plot_config()
+            shape_config = config_workbook.parse_format_config()
+            swimlanes = config_workbook.parse_swimlane_config()
+            span.add('formats', len(shape_config))
+            span.add('swimlanes', len(swimlanes))
 
         plan_data = ExcelPlan.read_plan_data(
             excel_plan_file,
             excel_plan_sheet,
             shape_config,
-            plot_area_config
+            plot_area_config,
+            engine=excel_engine,
+            cache=parse_cache,
+            instrumentation=instrumentation
         )
+        if parse_cache is not None:
+            parse_cache.log_stats()
+
+        return cls(
+            plan_data, plot_area_config, shape_config, ppt_template_file, swimlanes, renderer,
+            template_cache=template_cache,
+            instrumentation=instrumentation,
+            pack_tracks=pack_tracks,
+            collision_check=collision_check,
+            streaming_save=streaming_save,
+            compress_level=compress_level
+        )
+
+    def open_presentation(self, prs):
+        """
+        Sets the presentation to plot onto - either the template or, for an incremental render, the previous output.
+
+        :param prs: python-pptx Presentation
+        :return:
+        """
+        self.prs = prs
 
-        swimlane_config_object = ExcelSwimlaneConfig(excel_config_workbook, excel_sheet='Swimlanes')
-        swimlanes = swimlane_config_object.parse_swimlane_config()
+        visual_slide = self.prs.slides[0]  # Assume there is one slide and that's where we will place the visual
 
-        return cls(plan_data, plot_area_config, shape_config, ppt_template_file, swimlanes)
+        self.shapes = visual_slide.shapes
+        self.plot_target = plot_target(self.shapes, self.renderer)
 
-    def plot_slide(self):
+    def plot_slide(self, slides_out=None):
         """
         Opens a supplied template file in order to allow consistency with other slides in a deck.
 
@@ -114,26 +265,427 @@ class PlanVisualiser:
 
         Then writes the one-slide deck to a different filename in the same folder.
 
+        :param slides_out: Path or binary stream to save the deck to instead of slides_out_path.
+        :return: RenderStats
+        """
+        self.layout = self.create_layout()
+        render_stats = self.render_layout(self.layout)
+        self.save(slides_out)
+        return render_stats
+
+    def plot_slide_bytes(self) -> bytes:
+        """
+        As plot_slide, but returns the deck as the bytes of the .pptx file rather than saving it anywhere.
+
         :return:
         """
+        slides_out = io.BytesIO()
+        self.plot_slide(slides_out)
+        # Returns the BytesIO's own buffer rather than a copy, as nothing else is using it.
+        return slides_out.getvalue()
 
-        self.plot_swimlanes(self.format_config)
-        self.plot_month_bar()
+    def plot_slide_incremental(self, previous_output=None):
+        """
+        As plot_slide, but starts from the slide saved by a previous run and only changes the shapes for elements of
+        the plan which have been added, removed or changed since.  If there is no previous output, or the date range
+        or swimlanes have changed (so that most shapes would move anyway), the whole slide is plotted from the
+        template instead.
+
+        :param previous_output: Deck saved by the previous run.  Defaults to the file this run saves to.
+        :return: RenderStats
+        """
+        if previous_output is None:
+            previous_output = self.slides_out_path
+
+        layout = self.layout = self.create_layout()
+        previous_prs = None
+        if os.path.exists(previous_output):
+            with self.instrumentation.span('previous_output_load'):
+                previous_prs = Presentation(previous_output)
+            if slide_signature(previous_prs.slides[0].shapes._spTree) != self.layout_signature():
+                root_logger.info(f'Date range or swimlanes have changed since {previous_output} was plotted')
+                previous_prs = None
+
+        if previous_prs is None:
+            render_stats = self.render_layout(layout)
+        else:
+            self.open_presentation(previous_prs)
+            self.package_source = previous_output
+            render_stats = self.patch_layout(layout)
 
-        root_logger.info(f'Plotting {len(self.plan_data)} elements')
+        self.save()
+        return render_stats
 
-        for activity in self.plan_data:
-            start = activity.start_date
-            end = activity.end_date
-            description = activity.description
+    def plot_pages(self, max_workers=None, today=None):
+        """
+        As plot_slide, but for plans with more tracks than fit in the plot area.  The swimlanes are split across as
+        many slides as are needed (see pagination.paginate), each with the month bar and the headers of the swimlanes
+        on it, and all the slides are saved in one deck.
+
+        Each page is laid out here, as the plan data can't be passed to other processes, and then the pages are
+        plotted onto copies of the template in a pool of processes and the shapes merged into the deck (see
+        plot_layouts).
+
+        :param max_workers: Number of processes to plot the pages in (default is one per CPU).  With 1, or if there is
+        only one page, they are plotted in this process.
+        :param today: Date to draw the today line at.  Defaults to the current date.
+        :return: RenderStats
+        """
+        if today is None:
+            today = date.today()
 
-            root_logger.debug(f'Plotting activity: [{description:40.40}], start: {start}, end: {end}')
+        with self.instrumentation.span('pagination') as span:
+            pages = pagination.paginate(
+                self.plan_data, self.swimlane_data, pagination.tracks_per_page(self.plot_driver)
+            )
+            span.add('pages', len(pages))
+        root_logger.info(f'Plotting plan on {len(pages)} slides')
 
-            activity.swimlane_start_track = self.swimlane_data[activity.activity_layout_attributes.swimlane_name]['start_track']
-            activity.plot_ppt_shapes(self.shapes)
+        return self.plot_layouts([self.create_layout(today, page) for page in pages], max_workers)
 
-        self.plot_vertical_line(date.today())
-        self.prs.save(self.slides_out_path)
+    def plot_windows(self, windows: List[DateWindow], max_workers=None, today=None):
+        """
+        Plots a slide for each of a number of windows of dates (e.g. the next six months, or each quarter), all from
+        the plan as already read, and saves them in one deck.  Only the activities with some part in a window are
+        plotted on its slide (found with a DateWindowIndex), those which carry on outside the window being cut off at
+        its edges and marked (see date_window.clip_to_window).  The swimlanes are the same on every slide, so each
+        activity stays in the same place from one slide to the next.
+
+        :param windows:
+        :param max_workers: See plot_pages.
+        :param today: Date to draw the today line at, on the slides for windows which include it.  Defaults to the
+        current date.
+        :return: RenderStats
+        """
+        if today is None:
+            today = date.today()
+
+        layouts = []
+        for window in windows:
+            with self.instrumentation.span('window') as span:
+                layout = self.create_layout(today, window=window)
+                span.add('activities', len({element.activity_id for element in layout.elements} - {None}))
+            root_logger.info(f'Laid out window {window.name or ""} ({window.start} to {window.end})')
+            layouts.append(layout)
+        return self.plot_layouts(layouts, max_workers)
+
+    def plot_layouts(self, layouts: List[PlanLayout], max_workers=None):
+        """
+        Plots each layout on its own slide, copied from the template, and saves them all in one deck.  The slides
+        are plotted in a pool of processes and the shapes merged into the deck here.
+
+        :param layouts:
+        :param max_workers: Number of processes to use (default is one per CPU).  With 1, or if there is only one
+        layout, the slides are plotted in this process.
+        :return: RenderStats
+        """
+        self.page_layouts = layouts
+        self.layout = layouts[0]
+
+        with self.instrumentation.span('render', pages=len(layouts)) as span:
+            if max_workers == 1 or len(layouts) == 1:
+                page_shapes = [_render_page(self.template, self.renderer, layout) for layout in layouts]
+            else:
+                with ProcessPoolExecutor(max_workers) as executor:
+                    page_shapes = list(executor.map(
+                        _render_page, repeat(self.template), repeat(self.renderer), layouts
+                    ))
+
+            for slide, shape_xml in zip(pagination.add_page_slides(self.prs, len(layouts)), page_shapes):
+                pagination.add_shapes(slide, shape_xml)
+            num_shapes = sum(len(shape_xml) for shape_xml in page_shapes)
+            span.add('shapes_emitted', num_shapes)
+
+        self.save()
+        return RenderStats(full_render=True, added=num_shapes)
+
+    def save(self, slides_out=None):
+        """
+        :param slides_out: Path or binary stream to save the deck to.  Defaults to slides_out_path.
+        """
+        if slides_out is None:
+            slides_out = self.slides_out_path
+        if slides_out is None:
+            raise PptPlanVisualiserException('Nowhere to save the slide, as the template was not supplied as a file')
+        with self.instrumentation.span('save', streaming=self.streaming_save) as span:
+            if self.streaming_save:
+                save_streaming(self.prs, slides_out, self.package_source, self.compress_level, span.counts)
+            else:
+                self.prs.save(slides_out)
+
+    def plot_svg(self, svg_out_path=None):
+        """
+        Draws the plan as an SVG image (see SvgRenderer) rather than on the slide, as a quick preview.  The slide
+        isn't changed or saved.
+
+        :param svg_out_path: Path of the SVG file to write.  Defaults to where the slide would be saved, but with an
+        .svg extension.
+        :return: The path written to.
+        """
+        if svg_out_path is None:
+            svg_out_path = os.path.splitext(self.slides_out_path)[0] + '.svg'
+
+        layout = self.create_layout()
+        with self.instrumentation.span('render_svg', shapes_emitted=len(layout.elements)):
+            SvgRenderer().write(layout, svg_out_path)
+        return svg_out_path
+
+    def plot_thumbnail(self, image_out_path=None, raster_renderer: RasterRenderer = None):
+        """
+        Draws the plan as a bitmap image (see RasterRenderer), e.g. as a thumbnail of the slide.  If the slide has
+        already been plotted the same layout is used, otherwise the plan is laid out first.
+
+        :param image_out_path: Path of the image file to write, the format being taken from the extension.  Defaults to
+        where the slide is saved, but with a .png extension.
+        :param raster_renderer: Defaults to a RasterRenderer with the default size.
+        :return: The path written to.
+        """
+        if image_out_path is None:
+            image_out_path = os.path.splitext(self.slides_out_path)[0] + '.png'
+        if raster_renderer is None:
+            raster_renderer = RasterRenderer()
+
+        layout = self.create_layout() if self.layout is None else self.layout
+        with self.instrumentation.span('render_thumbnail', shapes_emitted=len(layout.elements)):
+            raster_renderer.render(layout).save(image_out_path)
+        return image_out_path
+
+    def create_layout(self, today=None, page: pagination.Page = None, window: DateWindow = None) -> PlanLayout:
+        """
+        Works out where everything on the plan visual goes - swimlanes, month bar, activities and the today line - and
+        how each is formatted, without plotting anything.
+
+        :param today: Date to draw the today line at.  Defaults to the current date.
+        :param page: If supplied, only the swimlanes and activities on this page of the plan are laid out (see
+        plot_pages).
+        :param window: If supplied, only this range of dates is laid out, rather than the whole plan, with activities
+        which carry on outside it cut off at its edges (see plot_windows).
+        :return: PlanLayout with the elements in the order they are to be drawn.
+        """
+        if today is None:
+            today = date.today()
+
+        if page is None:
+            swimlane_data = self.swimlane_data
+            activity_indexes = range(len(self.plan_data))
+        else:
+            swimlane_data = page.swimlane_data
+            activity_indexes = page.activity_indexes
+
+        if window is None:
+            plan_data = [self.plan_data[index] for index in activity_indexes]
+            return self._create_layout(today, swimlane_data, plan_data)
+
+        if self.date_window_index is None:
+            self.date_window_index = DateWindowIndex(self.plan_data)
+        in_window = self.date_window_index.intersecting(window.start, window.end)
+        if page is not None:
+            on_page = set(activity_indexes)
+            in_window = [index for index in in_window if index in on_page]
+        plan_data = [clip_to_window(self.plan_data[index], window) for index in in_window]
+
+        # Plot the window across the whole plot area, putting the plan's own date range back afterwards.
+        plot_driver = self.plot_driver
+        date_range = plot_driver.min_start_date, plot_driver.max_end_date, plot_driver.num_days_in_date_range
+        plot_driver.min_start_date = date_like(window.start, plot_driver.min_start_date)
+        plot_driver.max_end_date = date_like(window.end, plot_driver.max_end_date)
+        plot_driver.num_days_in_date_range = window.end.toordinal() - window.start.toordinal() + 1
+        try:
+            return self._create_layout(today, swimlane_data, plan_data, window.start <= as_date(today) <= window.end)
+        finally:
+            plot_driver.min_start_date, plot_driver.max_end_date, plot_driver.num_days_in_date_range = date_range
+
+    def _create_layout(self, today, swimlane_data, plan_data, today_line=True) -> PlanLayout:
+        layout = PlanLayout(int(self.prs.slide_width), int(self.prs.slide_height))
+        instrumentation = self.instrumentation
+
+        with instrumentation.span('layout'):
+            with instrumentation.span('swimlanes') as span:
+                for plotable in self.swimlane_elements(self.format_config, swimlane_data):
+                    plotable.add_to_layout(layout, 'swimlane')
+                span.add('shapes', len(layout.elements))
+
+            with instrumentation.span('month_bar') as span:
+                num_elements = len(layout.elements)
+                for plotable in self.month_bar_elements():
+                    plotable.add_to_layout(layout, 'month')
+                span.add('shapes', len(layout.elements) - num_elements)
+
+            root_logger.info(f'Laying out {len(plan_data)} elements')
+
+            with instrumentation.span('activities', activities=len(plan_data)) as span:
+                num_elements = len(layout.elements)
+
+                # Work out the horizontal position of all the activities in one go rather than one at a time.
+                x_geometry = self.plot_driver.activity_x_geometry_list(
+                    [activity.start_date for activity in plan_data],
+                    [activity.end_date for activity in plan_data]
+                )
+
+                for activity, activity_x_geometry in zip(plan_data, x_geometry):
+                    start = activity.start_date
+                    end = activity.end_date
+                    description = activity.description
+
+                    root_logger.debug(f'Laying out activity: [{description:40.40}], start: {start}, end: {end}')
+
+                    swimlane = swimlane_data[activity.activity_layout_attributes.swimlane_name]
+                    # Where a swimlane is continued from the previous page, its first track on the page isn't track 1.
+                    activity.swimlane_start_track = \
+                        swimlane['start_track'] - swimlane.get('first_track_within_lane', 1) + 1
+                    activity.x_geometry = activity_x_geometry
+                    activity.add_to_layout(layout)
+
+                span.add('shapes', len(layout.elements) - num_elements)
+
+            if today_line:
+                with instrumentation.span('today_line', shapes=1):
+                    self.add_today_line_to_layout(layout, today)
+
+        if self.collision_check is not None:
+            self.check_collisions(layout)
+
+        return layout
+
+    def check_collisions(self, layout: PlanLayout) -> CollisionReport:
+        """
+        Finds activities whose shapes or labels overlap in the layout and logs a warning for each (see
+        collision_index.find_collisions).
+
+        :param layout:
+        :return: CollisionReport, also kept as the collision_report attribute.
+        """
+        with self.instrumentation.span('collision_check') as span:
+            report = self.collision_report = find_collisions(layout)
+            span.add('elements', report.num_elements_checked)
+            span.add('collisions', len(report.collisions))
+        report.log()
+
+        if report.collisions and self.collision_check == 'fail':
+            raise PptPlanVisualiserException(
+                f'{len(report.collisions)} collisions between activities found in the plan layout'
+            )
+        return report
+
+    def render_layout(self, layout: PlanLayout):
+        """
+        Plots every element of a layout onto the slide, using the renderer selected when the visualiser was created.
+
+        Each shape is tagged with the key and content hash of its element (see PlanLayout.element_keys) so that a later
+        incremental render can tell what has changed.
+
+        :param layout:
+        :return: RenderStats
+        """
+        with self.instrumentation.span('render') as span:
+            shapes = plot_layout(self.plot_target, layout)
+            tag_slide(self.shapes._spTree, self.layout_signature())
+
+            span.add('shapes_emitted', len(shapes))
+
+        return RenderStats(full_render=True, added=len(shapes))
+
+    def patch_layout(self, layout: PlanLayout):
+        """
+        Updates a slide plotted from an earlier layout of the plan to match a new one, replacing only the shapes whose
+        elements have changed.  Unchanged shapes are left exactly as they were.
+
+        :param layout:
+        :return: RenderStats
+        """
+        with self.instrumentation.span('render') as span:
+            render_stats = self._patch_layout(layout)
+            span.add('shapes_emitted', render_stats.added + render_stats.modified)
+            span.add('shapes_removed', render_stats.removed)
+            span.add('shapes_reused', render_stats.reused)
+        return render_stats
+
+    def _patch_layout(self, layout):
+        sp_tree = self.shapes._spTree
+        render_stats = RenderStats(full_render=False)
+
+        previous_sps = []
+        previous_shapes = {}
+        for sp in sp_tree.iterchildren():
+            tag = shape_tag(sp)
+            if tag is not None:
+                previous_sps.append(sp)
+                previous_shapes[tag[0]] = (sp, tag[1])
+
+        # Remove the shapes which are to be replaced first, so that the new shapes' ids carry on from those left.
+        sps = []
+        changed_elements = []
+        for index, (element, (key, content_hash)) in enumerate(
+                zip(layout.elements_in_drawing_order(), layout.element_keys())
+        ):
+            previous_shape = previous_shapes.pop(key, None)
+            if previous_shape is not None and previous_shape[1] == content_hash:
+                sps.append(previous_shape[0])
+                render_stats.reused += 1
+                continue
+
+            if previous_shape is None:
+                render_stats.added += 1
+            else:
+                sp_tree.remove(previous_shape[0])
+                render_stats.modified += 1
+            sps.append(None)
+            changed_elements.append((index, element, key, content_hash))
+
+        for sp, _ in previous_shapes.values():
+            sp_tree.remove(sp)
+            render_stats.removed += 1
+
+        for index, element, key, content_hash in changed_elements:
+            sp = PlotableElement.plot_layout_element(self.plot_target, element, layout)._element
+            tag_shape(sp, key, content_hash)
+            sps[index] = sp
+        if isinstance(self.plot_target, PptXmlRenderer):
+            self.plot_target.flush()
+
+        # New shapes have been added at the end, so move each of them to follow the shape before it in drawing order.
+        # That's enough as long as the shapes which were kept are still in the same order as each other, otherwise
+        # everything is put back in order.
+        reused_sps = [sp for sp in previous_sps if sp.getparent() is sp_tree]
+        changed_indexes = {index for index, _, _, _ in changed_elements}
+        if reused_sps == [sp for index, sp in enumerate(sps) if index not in changed_indexes]:
+            for index in sorted(changed_indexes):
+                if index > 0:
+                    sps[index - 1].addnext(sps[index])
+                elif reused_sps:
+                    reused_sps[0].addprevious(sps[index])
+        else:
+            ext_lst = sp_tree.find(f'{{{P_NAMESPACE}}}extLst')
+            for sp in sps:
+                if ext_lst is None:
+                    sp_tree.append(sp)
+                else:
+                    ext_lst.addprevious(sp)
+
+        return render_stats
+
+    def layout_signature(self):
+        """
+        Hash of the things which, if they change, move most of the plotted shapes - the date range and the extent of
+        each swimlane.
+
+        :return:
+        """
+        signature = (
+            self.plot_driver.min_start_date,
+            self.plot_driver.max_end_date,
+            list(self.swimlane_data.items()),
+        )
+        return hashlib.sha1(repr(signature).encode('utf-8')).hexdigest()
+
+    def add_today_line_to_layout(self, layout: PlanLayout, current_date):
+        # PowerPoint positions are whole EMUs, so the x coordinate is rounded here rather than left as a float (which
+        # python-pptx would write into the slide as is).
+        x = round(self.plot_driver.date_to_x_coordinate(current_date, "start"))
+        top = self.plot_config.top
+        bottom = self.plot_config.bottom
+        line_style = ShapeStyle(line_rgb=tuple(self.format_config['today_line']['line_rgb']))
+        layout.add_element('today_line', LINE_SHAPE, x, top, 0, bottom - top, line_style)
 
     def plot_text_for_shape(self, left, top, width, height, text, shape_properties, text_layout):
         activity_text_width = self.plot_config.min_activity_text_width
@@ -256,12 +808,32 @@ class PlanVisualiser:
 
         :return:
         """
+        for plotable in self.swimlane_elements(format_data):
+            plotable.plot_ppt(self.plot_target)
+
+    def swimlane_elements(self, format_data, swimlane_data=None):
+        """
+        Works out the background rectangle for each swimlane (see plot_swimlanes) without plotting them.
+
+        :param format_data:
+        :param swimlane_data: Swimlanes to work out the rectangles for.  Defaults to all of them.
+        :return: List of PlotableElements, one per swimlane.
+        """
+        if swimlane_data is None:
+            swimlane_data = self.swimlane_data
+
+        swimlane_elements = []
+
+        if format_data is self.format_config:
+            format_registry = self.format_registry
+        else:
+            format_registry = FormatRegistry(format_data, self.plot_config)
 
-        for row, swimlane in enumerate(self.swimlane_data):
+        for row, swimlane in enumerate(swimlane_data):
             row_number = row + 1
 
-            start_track = self.swimlane_data[swimlane]['start_track']
-            end_track = self.swimlane_data[swimlane]['end_track']
+            start_track = swimlane_data[swimlane]['start_track']
+            end_track = swimlane_data[swimlane]['end_track']
             top = self.plot_driver.track_number_to_y_coordinate(start_track)
 
             # Need to adjust to start between track end and track start, unless this is the first row
@@ -274,15 +846,15 @@ class PlanVisualiser:
             width = right - self.plot_config.left
             height = bottom - top
 
-            # For the purposes of this decision, the first row is 1 (odd)
-            if row_number % 2 == 0:
-                format_info = format_data['swimlane_format_even']
+            # For the purposes of this decision, the first row is 1 (odd).  On a page of a larger plan, it is the row
+            # within the whole plan that counts.
+            if (swimlane_data[swimlane].get('plan_row', row) + 1) % 2 == 0:
+                format_name = 'swimlane_format_even'
             else:
-                format_info = format_data['swimlane_format_odd']
-            # Hard code alignment for now.  May need to re-visit
-            format_info['text_align'] = 'left'
-            shape_formatting = ShapeFormatting.from_dict(format_info, self.plot_config)
-            # ToDo: Add configuration of horizontal alignment for swimlanes
+                format_name = 'swimlane_format_odd'
+            format_info = format_data[format_name]
+            shape_formatting = format_registry.shape_formatting(format_name)
+            # ToDo: Add configuration of horizontal alignment for swimlanes (hard coded to left below for now)
 
             text_formatting = TextFormatting(
                 vertical_align='top',
@@ -304,7 +876,9 @@ class PlanVisualiser:
                 swimlane,
                 text_formatting
             )
-            plottable.plot_ppt(self.shapes)
+            swimlane_elements.append(plottable)
+
+        return swimlane_elements
 
     def plot_month_bar(self):
         """
@@ -314,8 +888,19 @@ class PlanVisualiser:
 
         :return:
         """
+        for plotable in self.month_bar_elements():
+            plotable.plot_ppt(self.plot_target)
+
+    def month_bar_elements(self):
+        """
+        Works out the rectangle for each month on the timeline (see plot_month_bar) without plotting them.
+
+        :return: List of PlotableElements, one per month.
+        """
+        month_elements = []
         first_of_start_month = first_day_of_month(self.plot_driver.min_start_date)
         first_of_end_month = first_day_of_month(self.plot_driver.max_end_date)
+        month_text_formatting = TextFormatting()
 
         for month_index, month_start_date in enumerate(iterate_months(first_of_start_month,
                                                                       num_months_between_dates(first_of_start_month,
@@ -327,12 +912,11 @@ class PlanVisualiser:
             top = self.plot_config.top - height
 
             if month_index % 2 == 1:
-                shape_format = self.format_config['month_shape_format_odd']
+                shape_formatting = self.format_registry.shape_formatting('month_shape_format_odd')
             else:
-                shape_format = self.format_config['month_shape_format_even']
+                shape_formatting = self.format_registry.shape_formatting('month_shape_format_even')
 
-            shape_formatting = ShapeFormatting.from_dict(shape_format, self.plot_config)
-            text_formatting = TextFormatting()
+            text_formatting = month_text_formatting
 
             month = month_name[month_start_date.month][:3]
             bottom = top + height
@@ -345,7 +929,46 @@ class PlanVisualiser:
                 month,
                 text_formatting)
 
-            plotable.plot_ppt(self.shapes)
+            month_elements.append(plotable)
+
+        return month_elements
+
+    def allocate_tracks(self):
+        """
+        Packs the activities which weren't given a track number in the plan into as few tracks as possible within each
+        swimlane, around the activities which were (see track_allocation.pack_tracks).  Two activities only share a
+        track if neither they nor their text overlap.
+
+        :return: Total number of tracks used across all the swimlanes.
+        """
+        x_geometry = self.plot_driver.activity_x_geometry_list(
+            [activity.start_date for activity in self.plan_data],
+            [activity.end_date for activity in self.plan_data]
+        )
+        swimlane_activities = {}
+        for activity, activity_x_geometry in zip(self.plan_data, x_geometry):
+            activity.x_geometry = activity_x_geometry
+            swimlane = activity.activity_layout_attributes.swimlane_name
+            swimlane_activities.setdefault(swimlane, []).append(activity)
+
+        num_tracks = 0
+        for activities in swimlane_activities.values():
+            intervals = []
+            for activity in activities:
+                layout_attributes = activity.activity_layout_attributes
+                track = layout_attributes.track_number if layout_attributes.track_number_specified else None
+                left, right = activity.horizontal_extent()
+                num_tracks_to_span = layout_attributes.number_of_tracks_to_span
+                intervals.append(track_allocation.TrackInterval(left, right, num_tracks_to_span, track))
+
+            tracks = track_allocation.pack_tracks(intervals)
+            for activity, track in zip(activities, tracks):
+                activity.activity_layout_attributes.track_number = track
+            num_tracks += max(
+                track + interval.num_tracks - 1 for track, interval in zip(tracks, intervals)
+            )
+
+        return num_tracks
 
     def extract_swimlane_data(self):
         """
@@ -438,3 +1061,57 @@ class PlanVisualiser:
         today_line_format = self.format_config['today_line']
         today_line_colour = today_line_format['line_rgb']
         line.line.color.rgb = RGBColor(*today_line_colour)
+
+
+def plot_target(shapes, renderer):
+    """
+    What the plan elements are plotted onto.  'xml' is much quicker for large plans (see PptXmlRenderer), 'pptx' plots
+    each element directly with python-pptx.
+
+    :param shapes: Shapes of the slide to plot onto.
+    :param renderer: 'xml' or 'pptx'
+    :return:
+    """
+    if renderer == 'xml':
+        return PptXmlRenderer(shapes)
+    elif renderer == 'pptx':
+        return shapes
+    else:
+        raise PptPlanVisualiserException(f"Unknown renderer '{renderer}', should be 'xml' or 'pptx'")
+
+
+def plot_layout(target, layout: PlanLayout):
+    """
+    Plots every element of a layout onto a slide, tagging each shape with the key and content hash of its element (see
+    PlanLayout.element_keys).
+
+    :param target: See plot_target.
+    :param layout:
+    :return: The python-pptx shape for each element, in drawing order.
+    """
+    shapes = [
+        PlotableElement.plot_layout_element(target, element, layout)
+        for element in layout.elements_in_drawing_order()
+    ]
+    if isinstance(target, PptXmlRenderer):
+        target.flush()
+
+    for shape, (key, content_hash) in zip(shapes, layout.element_keys()):
+        tag_shape(shape._element, key, content_hash)
+    return shapes
+
+
+# Templates for the pages plotted in each process (see _render_page).
+_page_template_cache = TemplateCache()
+
+
+def _render_page(template_path, renderer, layout: PlanLayout):
+    """
+    Plots one page of a plan (see PlanVisualiser.plot_pages) onto a copy of the template.
+
+    :return: The XML of each shape plotted, to be added to the page's slide in the deck.
+    """
+    shapes = _page_template_cache.presentation(template_path).slides[0].shapes
+    template_shapes = set(shapes._spTree)
+    plot_layout(plot_target(shapes, renderer), layout)
+    return [etree.tostring(sp) for sp in shapes._spTree if sp not in template_shapes]
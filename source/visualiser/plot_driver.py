@@ -1,10 +1,16 @@
+from collections import namedtuple
 from datetime import datetime
 
+import numpy as np
 from dateutil.utils import today
 
 from source.visualiser.visual_element_shape import VisualElementShape
 
 
+# Horizontal geometry for one activity, as returned (per activity) by PlotDriver.activity_x_geometry.
+ActivityXGeometry = namedtuple('ActivityXGeometry', ['start_x', 'left', 'right', 'width', 'milestone_left'])
+
+
 class PlotDriver:
     """
     Used to translate plan type data into data which can be used to plot shapes.
@@ -44,6 +50,11 @@ class PlotDriver:
 
         self.plot_area_width = self.right - self.left
 
+        # See _day_lookup
+        self._day_lookup_key = None
+        self._day_starts = None
+        self._day_middles = None
+
     def date_to_x_coordinate(self, date, alignment_case="start"):
         """
         Calculates the x coordinate within a PowerPoint slide of a specific date.
@@ -71,10 +82,27 @@ class PlotDriver:
         Case = "middle"
         - The result is 0.5 days more than the number of whole days before the day to be plotted.
 
+        Within the plot date range the result is taken from a lookup table (see _day_lookup) which holds exactly the
+        values the calculation would give.
+
         :param date:
         :param alignment_case: Values are "start" (default), "end", "middle"
         :return:
         """
+        day_starts, day_middles = self._day_lookup()
+        if day_starts is not None:
+            num_days = date.toordinal() - self.min_start_date.toordinal()
+            if alignment_case == "end":
+                num_days += 1
+            if 0 <= num_days < len(day_starts):
+                if alignment_case == "start" or alignment_case == "end":
+                    return day_starts[num_days]
+                elif num_days < len(day_middles):
+                    return day_middles[num_days]
+
+        return self._date_to_x_coordinate(date, alignment_case)
+
+    def _date_to_x_coordinate(self, date, alignment_case="start"):
         if alignment_case == "start":
             num_days = date.toordinal() - self.min_start_date.toordinal()
             additional_units = 0  # 1 unit, not one Cm (1/360000 of Cm)
@@ -135,3 +163,84 @@ class PlotDriver:
         left = int(self.date_to_x_coordinate(start_date, "middle") - (milestone_width / 2))
 
         return left
+
+    def activity_x_geometry(self, start_dates, end_dates):
+        """
+        Calculates the horizontal geometry for a whole plan's worth of activities in one go, rather than a date at a
+        time.
+
+        The x coordinates are calculated with numpy using exactly the same sequence of floating point operations as
+        date_to_x_coordinate, and the integer values are rounded the same way as when the shapes are plotted (numpy's
+        rint rounds halves to even, as round does), so the results are identical to plotting each activity separately.
+
+        :param start_dates: Sequence of start dates, one per activity.
+        :param end_dates: Sequence of end dates, one per activity.
+        :return: dict of numpy arrays, each with one entry per activity:
+        - start_x: (float) x coordinate of the start of the start date.
+        - left: (int) left of an activity bar.
+        - right: (int) right of an activity bar (left + width).
+        - width: (int) width of an activity bar.
+        - milestone_left: (int) left of a milestone shape centred on the middle of the start date.
+        """
+        min_start_ordinal = self.min_start_date.toordinal()
+        start_days = np.fromiter((date.toordinal() for date in start_dates), dtype=np.int64) - min_start_ordinal
+        end_days = np.fromiter((date.toordinal() for date in end_dates), dtype=np.int64) - min_start_ordinal + 1
+
+        start_x = self._days_to_x(start_days)
+        end_x = self._days_to_x(end_days)
+        middle_x = self._days_to_x(start_days, self.width_of_one_day() / 2)
+
+        left = np.rint(start_x).astype(np.int64)
+        width = np.rint(end_x - start_x).astype(np.int64)
+        milestone_left = np.rint(middle_x - self.milestone_width / 2).astype(np.int64)
+
+        return {
+            'start_x': start_x,
+            'left': left,
+            'right': left + width,
+            'width': width,
+            'milestone_left': milestone_left,
+        }
+
+    def activity_x_geometry_list(self, start_dates, end_dates):
+        """
+        As activity_x_geometry but as a list with an ActivityXGeometry (of python numbers) for each activity, which is
+        what PlanActivity uses.
+
+        :param start_dates:
+        :param end_dates:
+        :return:
+        """
+        geometry = self.activity_x_geometry(start_dates, end_dates)
+        return [
+            ActivityXGeometry(*values) for values in zip(*(geometry[name].tolist() for name in ActivityXGeometry._fields))
+        ]
+
+    def _days_to_x(self, num_days, additional_units=0):
+        # Must stay in step with the calculation in _date_to_x_coordinate.
+        main = (num_days / self.num_days_in_date_range) * self.plot_area_width
+        return self.left + (main + additional_units)
+
+    def _day_lookup(self):
+        """
+        Lookup tables of the x coordinate of the start and middle of each day in the plot date range (the start table
+        has one more entry, for the end of the last day), so that date_to_x_coordinate doesn't need to repeat the
+        calculation for every activity.
+
+        The date range is sometimes adjusted after the PlotDriver has been created (see PlanVisualiser.align_months),
+        so the tables are rebuilt whenever any of the values they depend upon have changed.
+
+        :return: day starts and day middles, or None, None if the date range isn't known yet.
+        """
+        num_days_in_date_range = getattr(self, 'num_days_in_date_range', None)
+        if self.min_start_date is None or not num_days_in_date_range:
+            return None, None
+
+        key = (self.min_start_date, num_days_in_date_range, self.left, self.plot_area_width)
+        if key != self._day_lookup_key:
+            num_days = np.arange(num_days_in_date_range + 1)
+            self._day_starts = self._days_to_x(num_days).tolist()
+            self._day_middles = self._days_to_x(num_days[:-1], self.width_of_one_day() / 2).tolist()
+            self._day_lookup_key = key
+
+        return self._day_starts, self._day_middles
@@ -1,8 +1,10 @@
 from pptx.dml.color import RGBColor
+from pptx.enum.shapes import MSO_CONNECTOR_TYPE
 from pptx.shapes.shapetree import SlideShapes
-from pptx.util import Cm
+from pptx.util import Cm, Emu
 from pptx.enum.text import PP_PARAGRAPH_ALIGNMENT as PP_ALIGN
 from pptx.enum.text import MSO_VERTICAL_ANCHOR as MSO_ANCHOR
+from source.visualiser.layout import PlanLayout, LayoutElement, ShapeStyle, TextStyle, LINE_SHAPE
 from source.visualiser.shape_formatting import ShapeFormatting
 from source.visualiser.text_formatting import TextFormatting
 from source.visualiser.visual_element_shape import VisualElementShape
@@ -75,66 +77,213 @@ class PlotableElement:
     def height(self):
         return self.bottom - self.top
 
+    def ppt_position(self):
+        """
+        :return: left, top, width, height in the whole units which PowerPoint uses.
+        """
+        return round(self.left), round(self.top), round(self.width), round(self.height)
+
+    def corner_adjustment(self):
+        """
+        :return: The adjustment which gives a rounded rectangle the configured corner radius.
+        """
+        target_radius = self.shape_formatting.corner_radius
+        return target_radius / self.height
+
+    def layout_styles(self):
+        """
+        Resolves the element's formatting into the plain values used in a PlanLayout.
+
+        :return: ShapeStyle, TextStyle (None if the element has no text)
+        """
+        if self.shape_formatting.fill_colour is None:
+            shape_style = ShapeStyle()
+        else:
+            shape_style = ShapeStyle(
+                fill_rgb=tuple(self.rgb_ppt_format(self.shape_formatting.fill_colour.get_rgb())),
+                line_rgb=tuple(self.rgb_ppt_format(self.shape_formatting.line_colour.get_rgb()))
+            )
+
+        if self.text is None:
+            text_style = None
+        else:
+            text_style = TextStyle(
+                margin_top=int(self.text_formatting.margin_top),
+                margin_left=int(self.text_formatting.margin_left),
+                margin_bottom=int(self.text_formatting.margin_bottom),
+                margin_right=int(self.text_formatting.margin_right),
+                vertical_align=self.text_formatting.vertical_align,
+                horizontal_align=self.text_formatting.horizontal_align,
+                font_size=int(self.text_formatting.font_size),
+                font_bold=self.text_formatting.font_bold,
+                font_italic=self.text_formatting.font_italic,
+                font_rgb=tuple(self.rgb_ppt_format(self.text_formatting.font_colour.get_rgb()))
+            )
+        return shape_style, text_style
+
+    def add_to_layout(self, layout: PlanLayout, kind, activity_id=None) -> LayoutElement:
+        """
+        Adds the element to a layout, with its position rounded and its formatting resolved exactly as they would be
+        when plotting it.
+
+        :param layout:
+        :param kind: See LayoutElement
+        :param activity_id:
+        :return:
+        """
+        shape_style, text_style = self.layout_styles()
+        left, top, width, height = self.ppt_position()
+        if self.shape == VisualElementShape.ROUNDED_RECTANGLE:
+            corner_adjustment = self.corner_adjustment()
+        else:
+            corner_adjustment = None
+
+        return layout.add_element(
+            kind,
+            self.shape.name,
+            left,
+            top,
+            width,
+            height,
+            shape_style,
+            text=self.text,
+            text_style=text_style,
+            activity_id=activity_id,
+            corner_adjustment=corner_adjustment
+        )
+
     def plot_ppt(self, shapes_object: SlideShapes):
         """
         Plots a shape on a PowerPoint slide given a shapes object.
+
+        A PptXmlRenderer can be supplied instead of the shapes object, in which case the renderer does the plotting.
         :return:
         """
-        plotted_shape = shapes_object.add_shape(
-            self.shape.ppt_shape,
-            round(self.left),
-            round(self.top),
-            round(self.width),
-            round(self.height)
+        if hasattr(shapes_object, 'plot_element'):
+            return shapes_object.plot_element(self)
+
+        shape_style, text_style = self.layout_styles()
+        if self.shape == VisualElementShape.ROUNDED_RECTANGLE:
+            corner_adjustment = self.corner_adjustment()
+        else:
+            corner_adjustment = None
+
+        return self.plot_ppt_shape(
+            shapes_object,
+            self.shape,
+            *self.ppt_position(),
+            shape_style,
+            self.text,
+            text_style,
+            corner_adjustment
         )
 
+    @staticmethod
+    def plot_layout_element(shapes_object: SlideShapes, element: LayoutElement, layout: PlanLayout):
+        """
+        Plots an element of a PlanLayout on a PowerPoint slide.  As for plot_ppt, a PptXmlRenderer can be supplied in
+        place of the shapes object.
+
+        :param shapes_object:
+        :param element:
+        :param layout:
+        :return:
+        """
+        if hasattr(shapes_object, 'plot_layout_element'):
+            return shapes_object.plot_layout_element(element, layout)
+
+        if element.shape == LINE_SHAPE:
+            return PlotableElement.plot_ppt_line(
+                shapes_object, element.left, element.top, element.height, layout.shape_style(element)
+            )
+
+        return PlotableElement.plot_ppt_shape(
+            shapes_object,
+            VisualElementShape[element.shape],
+            element.left,
+            element.top,
+            element.width,
+            element.height,
+            layout.shape_style(element),
+            element.text,
+            layout.text_style(element),
+            element.corner_adjustment
+        )
+
+    @staticmethod
+    def plot_ppt_shape(
+            shapes_object: SlideShapes,
+            shape: VisualElementShape,
+            left: int,
+            top: int,
+            width: int,
+            height: int,
+            shape_style: ShapeStyle,
+            text: str = None,
+            text_style: TextStyle = None,
+            corner_adjustment: float = None
+    ):
+        """
+        Does the actual plotting of a shape on a PowerPoint slide from fully resolved values.
+
+        :return: The python-pptx shape.
+        """
+        plotted_shape = shapes_object.add_shape(shape.ppt_shape, left, top, width, height)
+
         # Adjust rounded corner radius, but only if the shape has corners
-        if self.shape == VisualElementShape.ROUNDED_RECTANGLE:
-            target_radius = self.shape_formatting.corner_radius
-            adjustment_value = target_radius / self.height
-            plotted_shape.adjustments[0] = adjustment_value
+        if shape == VisualElementShape.ROUNDED_RECTANGLE:
+            plotted_shape.adjustments[0] = corner_adjustment
 
         fill = plotted_shape.fill
         line = plotted_shape.line
 
-        if self.shape_formatting.fill_colour is None:
+        if shape_style.fill_rgb is None:
             fill.background()
             line.fill.background()
         else:
             fill.solid()
+            fill.fore_color.rgb = RGBColor(*shape_style.fill_rgb)
 
-            fill_colour_ppt = self.rgb_ppt_format(self.shape_formatting.fill_colour.get_rgb())
-            fill.fore_color.rgb = RGBColor(*fill_colour_ppt)
-
-            line.color.rgb = RGBColor(*self.rgb_ppt_format(self.shape_formatting.line_colour.get_rgb()))
+            line.color.rgb = RGBColor(*shape_style.line_rgb)
 
         # If the object has text, then add to the shape
-        if self.text is not None:
+        if text is not None:
             text_frame = plotted_shape.text_frame
 
             # Adjust text margin depending upon positioning. To help readability by having small gap
 
-            text_frame.margin_top = self.text_formatting.margin_top
-            text_frame.margin_bottom = self.text_formatting.margin_bottom
-            text_frame.margin_left = self.text_formatting.margin_left
-            text_frame.margin_right = self.text_formatting.margin_right
-            text_frame.vertical_anchor = self._text_vertical_alignment(self.text_formatting.vertical_align)
+            text_frame.margin_top = Emu(text_style.margin_top)
+            text_frame.margin_bottom = Emu(text_style.margin_bottom)
+            text_frame.margin_left = Emu(text_style.margin_left)
+            text_frame.margin_right = Emu(text_style.margin_right)
+            text_frame.vertical_anchor = PlotableElement._text_vertical_alignment(text_style.vertical_align)
 
             paragraph = text_frame.paragraphs[0]
             run = paragraph.add_run()
-            run.text = self.text
+            run.text = text
 
             font = run.font
             paragraph.line_spacing = 0.8
-            paragraph.alignment = self._text_horizontal_alignment(self.text_formatting.horizontal_align)
+            paragraph.alignment = PlotableElement._text_horizontal_alignment(text_style.horizontal_align)
 
             font.name = 'Calibri'  # Hard-coded for now
-            font.size = self.text_formatting.font_size
-            font.bold = self.text_formatting.font_bold
-            font.italic = self.text_formatting.font_italic
-            font.color.rgb = RGBColor(*self.rgb_ppt_format(self.text_formatting.font_colour.get_rgb()))
+            font.size = Emu(text_style.font_size)
+            font.bold = text_style.font_bold
+            font.italic = text_style.font_italic
+            font.color.rgb = RGBColor(*text_style.font_rgb)
         return plotted_shape
 
+    @staticmethod
+    def plot_ppt_line(shapes_object: SlideShapes, x: int, top: int, height: int, shape_style: ShapeStyle):
+        """
+        Plots a vertical line (e.g. the today line) on a PowerPoint slide.
+
+        :return: The python-pptx connector.
+        """
+        line = shapes_object.add_connector(MSO_CONNECTOR_TYPE.STRAIGHT, x, top, x, top + height)
+        line.line.color.rgb = RGBColor(*shape_style.line_rgb)
+        return line
+
     @staticmethod
     def _text_vertical_alignment(alignment):
         if alignment == "top":
@@ -1,8 +1,17 @@
+import argparse
 import logging
+import os
 import sys
 import time
 from logging.handlers import RotatingFileHandler
+from source.visualiser import batch
+from source.visualiser.date_window import DateWindow, quarter_windows
+from source.visualiser.parse_cache import ParsedInputCache, DEFAULT_CACHE_DIR
 from source.visualiser.plan_visualiser import PlanVisualiser
+from source.visualiser.raster_renderer import RasterRenderer
+from source.visualiser.render_cache import RenderResultCache
+from source.visualiser.streaming_writer import DEFAULT_COMPRESS_LEVEL
+from source.visualiser.watch import WatchSession
 
 root_logger = logging.getLogger()
 
@@ -41,32 +50,130 @@ parameters_to_use = parameters_04  # Set to whichever we are testing with or run
 
 def get_parameters():
     """
-    Gets command line parameters.  There should be 4 parameters which are:
+    Gets command line parameters.  There should be either 4 or 7 parameters which are:
     - Excel Plan File
-    - Excel Config File
     - Excel Plan Sheet Name: Defaults to the name of the file as that is what is used in SmartSheets
+    - Excel Config File
+    - Plot Config Sheet Name, Format Config Sheet Name, Swimlanes Sheet Name: (7 parameter form only) Names of the
+      sheets within the config file.  If not supplied the standard names are used.
     - PPT Template File: Takes first slide as template for output.
 
+    These can be mixed with the following options:
+    - --cache: Reuse data parsed from the same workbooks on an earlier run (see ParsedInputCache), rather than always
+      reading them.  For a batch, also reuse slides already plotted from the same files (see RenderResultCache).  Off
+      unless asked for, as it keeps copies of the plans in the cache folder.
+    - --cache-dir DIR: Folder for the cache (implies --cache), with the slides already plotted for a batch in its
+      renders folder.  Defaults to .ppt_plan_visual/parse_cache in the home folder.
+    - --no-cache: Don't use the cache (the default).
+    - --batch MANIFEST: Plot every plan listed in a JSON (or YAML) manifest instead (see batch.read_manifest), in
+      which case no files should be given.
+    - --workers N: Number of processes to use for a batch or for plotting pages (defaults to one per CPU).
+    - --incremental: Update the output from the previous run, only changing the shapes for activities which have
+      changed (see PlanVisualiser.plot_slide_incremental).
+    - --timings-report FILE: Write the time taken by each stage of plotting, and counts of what was processed, to FILE
+      as JSON (see Instrumentation).  For a batch the report has an entry for each job.
+    - --svg FILE: Draw the plan as an SVG image in FILE, as a quick preview, instead of plotting the slide.
+    - --pack-tracks: Pack activities which don't have a track number in the plan into as few tracks as possible
+      within their swimlane, rather than putting each on a new track.
+    - --thumbnail WIDTH: Also save a PNG thumbnail of the plan, WIDTH pixels wide, next to the slide (for a batch,
+      next to each slide).
+    - --check-collisions warn|fail: Check for activities whose shapes or labels overlap each other, logging a warning
+      for each one found, and with 'fail' not plotting the slide if there are any.
+    - --paginate: Split a plan with more tracks than fit in the plot area across as many slides as are needed (see
+      PlanVisualiser.plot_pages).
+    - --window-months N: Plot only the next N months (from the start of the current month), cutting off activities
+      at the edges (see PlanVisualiser.plot_windows).
+    - --quarters: Plot a slide for each quarter of the plan, all in one deck.
+    - --watch: Keep running, plotting the plan again whenever the plan, config or template file changes.  Only the
+      file which has changed is read again.  With --timings-report, a line of timings is added to the report for
+      each time the plan is plotted.
+    - --collision-report FILE: Write the collisions found to FILE as JSON (implies --check-collisions warn).
+    - --streaming-save: Save the deck a shape at a time, copying the rest of the template as it is, rather than
+      building the whole file in memory first.  Uses much less memory for very large plans.
+    - --compress-level N: zlib compression level (0 to 9) for a streaming save - lower is faster but the file is
+      bigger (defaults to 6).
+
     :return:
     """
-    args = sys.argv
-    # There should either be no parameters or 7, otherwise report error and finish
-    # Note the length of argv is one more than the number of arguments as the file is always first.
+    parser = argparse.ArgumentParser(description='Plot a plan from Excel as a PowerPoint slide.')
+    parser.add_argument('files', nargs='*')
+    parser.add_argument('--cache', dest='use_cache', action='store_true')
+    parser.add_argument('--no-cache', dest='use_cache', action='store_false')
+    parser.add_argument('--cache-dir')
+    parser.add_argument('--batch', dest='batch_manifest')
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--incremental', action='store_true')
+    parser.add_argument('--timings-report')
+    parser.add_argument('--svg', dest='svg_out_path')
+    parser.add_argument('--pack-tracks', action='store_true')
+    parser.add_argument('--thumbnail', dest='thumbnail_width', type=int)
+    parser.add_argument('--check-collisions', dest='collision_check', choices=('warn', 'fail'))
+    parser.add_argument('--collision-report')
+    parser.add_argument('--paginate', action='store_true')
+    parser.add_argument('--window-months', type=int)
+    parser.add_argument('--quarters', action='store_true')
+    parser.add_argument('--watch', action='store_true')
+    parser.add_argument('--streaming-save', action='store_true')
+    parser.add_argument('--compress-level', type=int, default=DEFAULT_COMPRESS_LEVEL)
+    args = parser.parse_args(sys.argv[1:])
+
+    options = {
+        'use_cache': args.use_cache or args.cache_dir is not None,
+        'cache_dir': DEFAULT_CACHE_DIR if args.cache_dir is None else args.cache_dir,
+        'incremental': args.incremental,
+        'timings_report': args.timings_report,
+        'svg_out_path': args.svg_out_path,
+        'thumbnail_width': args.thumbnail_width,
+        'pack_tracks': args.pack_tracks,
+        'collision_check': args.collision_check,
+        'collision_report': args.collision_report,
+        'paginate': args.paginate,
+        'window_months': args.window_months,
+        'quarters': args.quarters,
+        'watch': args.watch,
+        'workers': args.workers,
+        'streaming_save': args.streaming_save,
+        'compress_level': args.compress_level,
+    }
+
+    if args.batch_manifest is not None:
+        if args.files:
+            root_logger.error('Files should not be given as well as a batch manifest')
+            return None
+        return dict(options, batch_manifest=args.batch_manifest)
 
+    # There should either be no parameters, 4 or 7, otherwise report error and finish
+    files = args.files
     expected_num_args = 4
-    if len(args) == 1:
-        return parameters_to_use
+    expected_num_args_with_sheets = 7
+    if len(files) == 0:
+        return dict(parameters_to_use, **options)
 
-    if len(args) == expected_num_args + 1:
+    if len(files) == expected_num_args:
         parameters = {
-            'excel_plan_workbook': args[1],
-            'excel_plan_sheet': args[2],
-            'excel_config_workbook': args[3],
-            'ppt_template_file': args[4],
+            'excel_plan_workbook': files[0],
+            'excel_plan_sheet': files[1],
+            'excel_config_workbook': files[2],
+            'ppt_template_file': files[3],
         }
-        return parameters
+        return dict(parameters, **options)
 
-    root_logger.error(f'Wrong number of parameters provided ({len(args)-1}).  Should be 0 or {expected_num_args}')
+    if len(files) == expected_num_args_with_sheets:
+        parameters = {
+            'excel_plan_workbook': files[0],
+            'excel_plan_sheet': files[1],
+            'excel_config_workbook': files[2],
+            'plot_config_sheet': files[3],
+            'format_config_sheet': files[4],
+            'swimlanes_sheet': files[5],
+            'ppt_template_file': files[6],
+        }
+        return dict(parameters, **options)
+
+    root_logger.error(
+        f'Wrong number of parameters provided ({len(files)}).  '
+        f'Should be 0, {expected_num_args} or {expected_num_args_with_sheets}'
+    )
     return None
 
 
@@ -88,17 +195,93 @@ def configure_logger(logger):
     logger.setLevel(logging.DEBUG)
 
 
+def run_batch(parameters):
+    """
+    Plots all the plans in a batch manifest, and returns the exit status for the app - non-zero if any failed.
+    """
+    jobs = batch.read_manifest(parameters['batch_manifest'])
+    cache_dir = parameters['cache_dir'] if parameters.get('use_cache', False) else None
+    result_cache = None if cache_dir is None else RenderResultCache(cache_dir=os.path.join(cache_dir, 'renders'))
+    results = batch.run_batch(
+        jobs, parameters.get('workers'), cache_dir, parameters.get('thumbnail_width'), result_cache
+    )
+    batch.log_summary(results)
+    if parameters.get('timings_report') is not None:
+        batch.write_timings_report(results, parameters['timings_report'])
+    return 0 if all(result.succeeded for result in results) else 1
+
+
 def main():
     configure_logger(root_logger)
     parameters = get_parameters()
-    if parameters is not None:
+    if parameters is not None and 'batch_manifest' in parameters:
+        sys.exit(run_batch(parameters))
+    elif parameters is not None and parameters.get('watch', False):
+        WatchSession(parameters, plot).run()
+    elif parameters is not None:
         excel_plan_file = parameters['excel_plan_workbook']
         excel_plan_sheet = parameters['excel_plan_sheet']
         excel_config_workbook = parameters['excel_config_workbook']
         ppt_template_file = parameters['ppt_template_file']
 
-        visualiser = PlanVisualiser.from_excel(excel_plan_file, excel_config_workbook, ppt_template_file, excel_plan_sheet)
-        visualiser.plot_slide()
+        if parameters.get('use_cache', False):
+            parse_cache = ParsedInputCache(parameters.get('cache_dir', DEFAULT_CACHE_DIR))
+        else:
+            parse_cache = None
+
+        collision_check = parameters.get('collision_check')
+        if collision_check is None and parameters.get('collision_report') is not None:
+            collision_check = 'warn'
+
+        visualiser = PlanVisualiser.from_excel(
+            excel_plan_file,
+            excel_config_workbook,
+            ppt_template_file,
+            excel_plan_sheet,
+            plot_config_sheet=parameters.get('plot_config_sheet', 'PlotConfig'),
+            format_config_sheet=parameters.get('format_config_sheet', 'FormatConfig'),
+            swimlanes_sheet=parameters.get('swimlanes_sheet', 'Swimlanes'),
+            parse_cache=parse_cache,
+            pack_tracks=parameters.get('pack_tracks', False),
+            collision_check=collision_check,
+            streaming_save=parameters.get('streaming_save', False),
+            compress_level=parameters.get('compress_level', DEFAULT_COMPRESS_LEVEL)
+        )
+        try:
+            plot(visualiser, parameters)
+        finally:
+            if parameters.get('collision_report') is not None and visualiser.collision_report is not None:
+                visualiser.collision_report.write_json(parameters['collision_report'])
+
+        visualiser.instrumentation.log_summary()
+        if parameters.get('timings_report') is not None:
+            visualiser.instrumentation.write_json(parameters['timings_report'])
+
+
+def plot(visualiser, parameters):
+    """
+    Plots the slide (or SVG preview) and any thumbnail asked for in the parameters.
+    """
+    if parameters.get('svg_out_path') is not None:
+        svg_out_path = visualiser.plot_svg(parameters['svg_out_path'])
+        root_logger.info(f'Plan preview written to {svg_out_path}')
+    else:
+        if parameters.get('paginate', False):
+            render_stats = visualiser.plot_pages(parameters.get('workers'))
+        elif parameters.get('window_months') is not None:
+            num_months = parameters['window_months']
+            window = DateWindow.months(visualiser.plot_driver.today, num_months, f'Next {num_months} months')
+            render_stats = visualiser.plot_windows([window], parameters.get('workers'))
+        elif parameters.get('quarters', False):
+            windows = quarter_windows(visualiser.plot_driver.min_start_date, visualiser.plot_driver.max_end_date)
+            render_stats = visualiser.plot_windows(windows, parameters.get('workers'))
+        elif parameters.get('incremental', False):
+            render_stats = visualiser.plot_slide_incremental()
+        else:
+            render_stats = visualiser.plot_slide()
+        render_stats.log()
+        if parameters.get('thumbnail_width') is not None:
+            visualiser.plot_thumbnail(raster_renderer=RasterRenderer(parameters['thumbnail_width']))
 
 
 if __name__ == '__main__':
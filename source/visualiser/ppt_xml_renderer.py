@@ -0,0 +1,218 @@
+import copy
+
+from pptx.oxml import parse_xml
+from pptx.oxml.ns import nsdecls
+from pptx.shapes.shapetree import SlideShapeFactory, SlideShapes
+
+from source.visualiser.layout import LayoutElement, PlanLayout, LINE_SHAPE
+from source.visualiser.plotable_element import PlotableElement
+from source.visualiser.visual_element_shape import VisualElementShape
+
+
+class PptXmlRenderer:
+    """
+    Faster alternative to plotting each element with PlotableElement.plot_ppt, for use when plotting a large number of
+    elements onto a slide.
+
+    plot_ppt builds each shape through the python-pptx proxies (fill, line, text frame, font etc.), each of which edits
+    the slide XML, and python-pptx searches the whole slide for the highest shape id every time a shape is added.  For
+    a plan with thousands of activities this is where most of the time goes.
+
+    Instead, the first time an element with a given shape and style is plotted it is plotted through python-pptx as
+    normal and the resulting p:sp element is kept as a template.  Every other element with the same shape and style is
+    then a copy of the template with just the id, name, position, size, text and (for rounded rectangles) corner
+    adjustment changed.  The elements are held back and added to the slide in one go by flush, with ids allocated in
+    sequence, so the slide ends up with exactly the XML that plot_ppt would have produced.
+
+    The renderer can be passed to PlotableElement.plot_ppt (and so to PlanActivity.plot_ppt_shapes) or to
+    PlotableElement.plot_layout_element in place of the slide's shapes object.  Anything plotted directly onto the slide
+    through python-pptx must only be plotted after flush has been called.
+
+    :param shapes: The shapes object of the slide to plot onto.
+    """
+    def __init__(self, shapes):
+        self.shapes = shapes
+        self._templates = {}
+        self._formatting_styles = {}
+        self._pending = []
+        self._next_shape_id = None
+        self._template_shapes = None
+
+    def plot_element(self, element: PlotableElement):
+        """
+        Plots a PlotableElement, returning the python-pptx shape for it.  The shape isn't actually on the slide until
+        flush is called.
+
+        :param element:
+        :return:
+        """
+        shape_style, text_style = self._styles(element)
+        if element.shape == VisualElementShape.ROUNDED_RECTANGLE:
+            corner_adjustment = element.corner_adjustment()
+        else:
+            corner_adjustment = None
+
+        return self._plot(element.shape.name, *element.ppt_position(), shape_style, element.text, text_style,
+                          corner_adjustment)
+
+    def plot_layout_element(self, element: LayoutElement, layout: PlanLayout):
+        """
+        Plots an element of a PlanLayout, returning the python-pptx shape for it.  As for plot_element, the shape isn't
+        actually on the slide until flush is called.
+
+        :param element:
+        :param layout:
+        :return:
+        """
+        return self._plot(element.shape, element.left, element.top, element.width, element.height,
+                          layout.shape_style(element), element.text, layout.text_style(element),
+                          element.corner_adjustment)
+
+    def plot_layout(self, layout: PlanLayout):
+        """
+        Plots every element of a layout, in drawing order, and adds them to the slide.
+
+        :param layout:
+        :return:
+        """
+        for element in layout.elements_in_drawing_order():
+            self.plot_layout_element(element, layout)
+        self.flush()
+
+    def flush(self):
+        """
+        Adds all the elements plotted since the last flush to the slide.
+
+        :return:
+        """
+        if self._pending:
+            sp_tree = self.shapes._spTree
+            ext_lst = sp_tree.find('{http://schemas.openxmlformats.org/presentationml/2006/main}extLst')
+            if ext_lst is None:
+                sp_tree.extend(self._pending)
+            else:
+                # Shapes always go before any extension list, which must be the last child.
+                for sp in self._pending:
+                    ext_lst.addprevious(sp)
+            self._pending = []
+        self._next_shape_id = None
+
+    def _plot(self, shape, left, top, width, height, shape_style, text, text_style, corner_adjustment):
+        if self._next_shape_id is None:
+            self._next_shape_id = self._max_shape_id() + 1
+        shape_id = self._next_shape_id
+        self._next_shape_id += 1
+
+        key = (shape, shape_style, text is not None, text_style)
+        template = self._templates.get(key)
+        if template is None:
+            # Plot the element the normal way, but onto an empty shape tree, as python-pptx searches every shape
+            # already plotted for the next free id (which is slow when re-rendering a slide which already has
+            # thousands of shapes).  The element is moved onto the slide by flush.
+            if self._template_shapes is None:
+                self._template_shapes = SlideShapes(parse_xml(_EMPTY_SP_TREE), self.shapes.parent)
+            if shape == LINE_SHAPE:
+                plotted_shape = PlotableElement.plot_ppt_line(self._template_shapes, left, top, height, shape_style)
+            else:
+                plotted_shape = PlotableElement.plot_ppt_shape(
+                    self._template_shapes, VisualElementShape[shape], left, top, width, height, shape_style, text,
+                    text_style, corner_adjustment
+                )
+            sp = plotted_shape._element
+            sp.getparent().remove(sp)
+            template = self._templates[key] = _ShapeTemplate(copy.deepcopy(sp))
+        else:
+            sp = template.create_sp(left, top, width, height, text, corner_adjustment)
+        template.set_id(sp, shape_id)
+
+        self._pending.append(sp)
+        return SlideShapeFactory(sp, self.shapes)
+
+    def _max_shape_id(self):
+        # Same as python-pptx, so that ids carry on from those already on the slide.
+        used_ids = [int(id_str) for id_str in self.shapes._spTree.xpath('//@id') if id_str.isdigit()]
+        return max(used_ids, default=0)
+
+    def _styles(self, element: PlotableElement):
+        # Formatting objects are immutable so the styles for each combination are only worked out once.  The objects
+        # are kept alongside the styles so that their ids can't be re-used by other objects.
+        has_text = element.text is not None
+        key = (id(element.shape_formatting), id(element.text_formatting), has_text)
+        formatting_styles = self._formatting_styles.get(key)
+        if formatting_styles is None:
+            formatting_styles = (element.shape_formatting, element.text_formatting, *element.layout_styles())
+            self._formatting_styles[key] = formatting_styles
+        return formatting_styles[2:]
+
+
+_EMPTY_SP_TREE = (
+    f'<p:spTree {nsdecls("a", "p", "r")}><p:nvGrpSpPr><p:cNvPr id="1" name=""/><p:cNvGrpSpPr/><p:nvPr/></p:nvGrpSpPr>'
+    f'<p:grpSpPr/></p:spTree>'
+)
+
+
+class _ShapeTemplate:
+    """
+    A p:sp (or p:cxnSp) element plotted through python-pptx, along with where to find the parts of it which vary
+    between elements.
+    """
+    def __init__(self, sp):
+        self.sp = sp
+
+        c_nv_pr = sp[0][0]
+        self.base_name = c_nv_pr.get('name').rsplit(' ', 1)[0]
+        self.c_nv_pr_path = _path_to(sp, c_nv_pr)
+
+        off, ext = sp.xpath('./p:spPr/a:xfrm/a:off | ./p:spPr/a:xfrm/a:ext')
+        self.off_path = _path_to(sp, off)
+        self.ext_path = _path_to(sp, ext)
+
+        guides = sp.xpath('./p:spPr/a:prstGeom/a:avLst/a:gd')
+        self.gd_path = _path_to(sp, guides[0]) if guides else None
+
+        runs = sp.xpath('./p:txBody/a:p/a:r')
+        self.r_path = _path_to(sp, runs[0]) if runs else None
+
+    def create_sp(self, left, top, width, height, text, corner_adjustment):
+        sp = copy.deepcopy(self.sp)
+
+        off = _follow(sp, self.off_path)
+        off.set('x', str(left))
+        off.set('y', str(top))
+        ext = _follow(sp, self.ext_path)
+        ext.set('cx', str(width))
+        ext.set('cy', str(height))
+
+        if self.gd_path is not None:
+            # As written by python-pptx when an adjustment is set.
+            actual = int(corner_adjustment * 100000.0)
+            _follow(sp, self.gd_path).set('fmla', 'val %d' % actual)
+
+        if self.r_path is not None:
+            # The run's text setter escapes any control characters the same way as python-pptx does.
+            _follow(sp, self.r_path).text = text
+
+        return sp
+
+    def set_id(self, sp, shape_id):
+        c_nv_pr = _follow(sp, self.c_nv_pr_path)
+        c_nv_pr.set('id', str(shape_id))
+        c_nv_pr.set('name', f'{self.base_name} {shape_id - 1}')
+
+
+def _path_to(root, element):
+    # Positions of each ancestor of element within its parent, from root down, so that the equivalent element can be
+    # found quickly in a copy of root.
+    path = []
+    while element is not root:
+        parent = element.getparent()
+        path.append(parent.index(element))
+        element = parent
+    return list(reversed(path))
+
+
+def _follow(root, path):
+    element = root
+    for index in path:
+        element = element[index]
+    return element
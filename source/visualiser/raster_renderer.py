@@ -0,0 +1,155 @@
+from functools import lru_cache
+
+from PIL import Image, ImageDraw, ImageFont
+
+from source.visualiser.layout import LayoutElement, PlanLayout, TextStyle, LINE_SHAPE
+
+# Width of shape outlines and lines, in EMUs (1pt).
+LINE_WIDTH = 12700
+
+DEFAULT_FONT = 'DejaVuSans.ttf'
+DEFAULT_BOLD_FONT = 'DejaVuSans-Bold.ttf'
+
+
+class RasterRenderer:
+    """
+    Draws a PlanLayout as a bitmap image (e.g. a PNG thumbnail) using Pillow, so that an image of a plan visual can be
+    produced without PowerPoint or LibreOffice.
+
+    The image is drawn at supersample times the requested size and then scaled down, which smooths the edges of the
+    shapes and text.  Text which would be smaller than min_font_pixels in the final image is left out, as it wouldn't
+    be readable anyway.  As with SvgRenderer, each paragraph of text is drawn on one line, without wrapping.
+
+    Fonts and the sizes of text drawn with them are cached for the life of the process, so plotting many similar plans
+    (e.g. in a batch) doesn't measure the same labels again.
+
+    :param width: Width of the image in pixels.  The height is in proportion to the slide.
+    :param supersample:
+    :param font_path: TrueType font for normal text (found on the system font path if not a full path).
+    :param bold_font_path: TrueType font for bold text.
+    :param min_font_pixels:
+    """
+    def __init__(
+            self,
+            width=640,
+            supersample=2,
+            font_path=DEFAULT_FONT,
+            bold_font_path=DEFAULT_BOLD_FONT,
+            min_font_pixels=4
+    ):
+        self.width = width
+        self.supersample = supersample
+        self.font_path = font_path
+        self.bold_font_path = bold_font_path
+        self.min_font_pixels = min_font_pixels
+
+    def render(self, layout: PlanLayout) -> Image.Image:
+        """
+        :param layout:
+        :return: RGB Pillow image of the layout.
+        """
+        layout_width, layout_height = layout.size()
+        height = max(1, round(self.width * layout_height / layout_width)) if layout_width else self.width
+        scale = self.width * self.supersample / layout_width if layout_width else 1
+
+        image = Image.new('RGB', (self.width * self.supersample, height * self.supersample), 'white')
+        draw = ImageDraw.Draw(image)
+        line_width = max(1, round(LINE_WIDTH * scale))
+        for element in layout.elements_in_drawing_order():
+            self._draw_element(draw, element, layout, scale, line_width)
+
+        if self.supersample > 1:
+            image = image.resize((self.width, height), Image.LANCZOS)
+        return image
+
+    def write(self, layout: PlanLayout, output, image_format='PNG'):
+        """
+        Draws the layout and saves it to output.
+
+        :param layout:
+        :param output: Path of the image file to write, or a binary file object to write to.
+        :param image_format: Any format Pillow can write.
+        :return:
+        """
+        self.render(layout).save(output, format=image_format)
+
+    def _draw_element(self, draw, element: LayoutElement, layout: PlanLayout, scale, line_width):
+        shape_style = layout.shape_style(element)
+        box = [
+            round(element.left * scale), round(element.top * scale),
+            round(element.right * scale), round(element.bottom * scale)
+        ]
+
+        if element.shape == LINE_SHAPE:
+            draw.line(box, fill=shape_style.line_rgb, width=line_width)
+        elif shape_style.fill_rgb is not None:
+            # Shapes with no fill are drawn with no line either, so there's nothing to draw.
+            outline = shape_style.line_rgb
+            if element.shape == 'DIAMOND':
+                left, top, right, bottom = box
+                middle_x = (left + right) / 2
+                middle_y = (top + bottom) / 2
+                draw.polygon(
+                    [(middle_x, top), (right, middle_y), (middle_x, bottom), (left, middle_y)],
+                    fill=shape_style.fill_rgb, outline=outline
+                )
+            elif element.shape == 'ROUNDED_RECTANGLE' and element.corner_adjustment:
+                # The adjustment is the radius as a proportion of the shorter side.
+                radius = round(element.corner_adjustment * min(box[2] - box[0], box[3] - box[1]))
+                draw.rounded_rectangle(box, radius, fill=shape_style.fill_rgb, outline=outline, width=line_width)
+            else:
+                draw.rectangle(box, fill=shape_style.fill_rgb, outline=outline, width=line_width)
+
+        if element.text is not None:
+            self._draw_text(draw, element, layout.text_style(element), scale)
+
+    def _draw_text(self, draw, element: LayoutElement, text_style: TextStyle, scale):
+        font_size = round(text_style.font_size * scale)
+        if font_size < self.min_font_pixels * self.supersample or not element.text:
+            return
+
+        font_path = self.bold_font_path if text_style.font_bold else self.font_path
+        font = _font(font_path, font_size)
+
+        left = (element.left + text_style.margin_left) * scale
+        right = (element.right - text_style.margin_right) * scale
+        top = (element.top + text_style.margin_top) * scale
+        bottom = (element.bottom - text_style.margin_bottom) * scale
+
+        lines = element.text.split('\n')
+        text_height = font_size * len(lines)
+        if text_style.vertical_align == 'top':
+            y = top
+        elif text_style.vertical_align == 'bottom':
+            y = bottom - text_height
+        else:
+            y = (top + bottom - text_height) / 2
+
+        for line in lines:
+            line_width = _text_width(font_path, font_size, line)
+            if text_style.horizontal_align == 'left':
+                x = left
+            elif text_style.horizontal_align == 'right':
+                x = right - line_width
+            else:
+                x = (left + right - line_width) / 2
+            draw.text((x, y), line, fill=text_style.font_rgb, font=font)
+            y += font_size
+
+
+@lru_cache(maxsize=64)
+def _font(font_path, font_size):
+    try:
+        return ImageFont.truetype(font_path, font_size)
+    except OSError:
+        # Font not installed, so use Pillow's own.
+        try:
+            return ImageFont.load_default(font_size)
+        except TypeError:
+            # Older versions of Pillow only have a fixed size default font.
+            return ImageFont.load_default()
+
+
+@lru_cache(maxsize=16384)
+def _text_width(font_path, font_size, text):
+    return _font(font_path, font_size).getlength(text)
@@ -1,6 +1,16 @@
+import io
+import os
+
 import openpyxl
 
-def read_excel(excel_path, sheet_name, skiprows=0):
+from source.visualiser.exceptions import PptPlanVisualiserException
+
+# Engines which can be used to read a sheet.  'lxml' parses the sheet XML directly and is much quicker for large sheets.
+ENGINES = ('openpyxl', 'lxml')
+DEFAULT_ENGINE = 'openpyxl'
+
+
+def read_excel(excel_path, sheet_name, skiprows=0, engine=None):
     """
     Meant to be a replacement for using Pandas in plan visualiser so trying to keep as simple as possible for now.
 
@@ -9,62 +19,174 @@ def read_excel(excel_path, sheet_name, skiprows=0):
     - First blank heading denotes last column of data
     - Last row of data defined by first row with blanks in all columns
     - Store the data in a dictionary with headings as key
-    - Store each column as an array under the key of column heading
-    - Allow iteration through rows returning dict for each row under column headings
+    - Return a list with a dict for each row under column headings
+
+    Now just collects the output of stream_excel, which does the actual reading.
 
     :param excel_path:
     :param sheet_name:
     :param skiprows:
+    :param engine: See stream_excel
     :return:
     """
-    wb_obj = openpyxl.load_workbook(excel_path, data_only=True)
-    sheet = wb_obj[sheet_name]
-    start_row = 1+skiprows
-
-    table = {}
-    headings = get_headers(sheet, start_row)
-    table = {heading:[] for heading in headings}
-
-    row_confirmed = True
-    read_row_num = start_row
-    while row_confirmed:
-        row_confirmed = read_row(read_row_num, sheet, headings, table)
-        read_row_num += 1
-
-    iterable_by_row = iterrows(table)
-    return iterable_by_row
-
-
-def read_row(table_row_num, sheet, headings, table, skiprows=0):
-    maybe_row = {}
-    row_confirmed = False
-    for col, heading in enumerate(headings):
-        cell_value = sheet.cell(table_row_num + skiprows + 1, col + 1).value
-        maybe_row[heading] = cell_value
-        if cell_value is not None:
-            row_confirmed = True
-    if row_confirmed:
-        for heading in headings:
-            table[heading].append(maybe_row[heading])
-    return row_confirmed
-
-
-def get_headers(sheet, start_row):
+    return [row for _, row in stream_excel(excel_path, sheet_name, skiprows, engine=engine)]
+
+
+def stream_excel(excel_path, sheet_name, skiprows=0, columns=None, row_filters=None, engine=None):
+    """
+    Streaming version of read_excel for large sheets (e.g. SmartSheet exports).  The workbook is opened in read-only
+    mode and rows are yielded one at a time as they are parsed, rather than the whole sheet being read into memory
+    first.
+
+    The rules for finding the table within the sheet are the same as for read_excel.
+
+    :param excel_path: Path to the workbook, a file-like object or the bytes of the workbook (see workbook_source), or
+    a workbook which has already been loaded (see load_workbook), in which case it is left open for the caller to read
+    other sheets from.
+    :param sheet_name:
+    :param skiprows:
+    :param columns: Headings of the columns to include in each row dict.  None means include all columns.  Any
+    requested column which isn't in the sheet is included with a value of None.
+    :param row_filters: dict of column heading -> predicate.  Each predicate is called with the raw cell value and any
+    row for which a predicate returns False is dropped before a dict is built for it.
+    :param engine: 'openpyxl' or 'lxml' (see lxml_sheet_reader).  None means use DEFAULT_ENGINE.  An already loaded
+    workbook is always read with openpyxl.
+    :return: generator of (row_index, row_dict) pairs, where row_index is the (zero based) position of the row within
+    the table.  This is the same whether or not rows are being filtered out.
+    """
+    if engine is None:
+        engine = DEFAULT_ENGINE
+    if engine not in ENGINES:
+        raise PptPlanVisualiserException(f"Unknown engine '{engine}' for reading Excel, should be one of {ENGINES}")
+
+    if isinstance(excel_path, openpyxl.Workbook):
+        yield from stream_sheet(excel_path[sheet_name], skiprows, columns, row_filters)
+        return
+
+    if engine == 'lxml':
+        # Only imported when used so that lxml is only needed if this engine is selected.
+        from source.visualiser.lxml_sheet_reader import iter_sheet_rows
+        rows = iter_sheet_rows(workbook_source(excel_path), sheet_name, skiprows)
+        try:
+            yield from stream_rows(rows, columns, row_filters)
+        finally:
+            rows.close()
+        return
+
+    wb_obj = load_workbook(excel_path)
+    try:
+        yield from stream_sheet(wb_obj[sheet_name], skiprows, columns, row_filters)
+    finally:
+        wb_obj.close()
+
+
+def load_workbook(excel_path):
+    """
+    Loads a workbook the way the readers in this module expect it, so that it can be read more than once without being
+    re-parsed.  The caller is responsible for closing it.
+
+    :param excel_path: See workbook_source.
+    :return:
+    """
+    return openpyxl.load_workbook(workbook_source(excel_path), read_only=True, data_only=True)
+
+
+def workbook_source(excel_path):
+    """
+    Workbooks can be read from a path, a file-like object or the bytes of the workbook (e.g. as uploaded), so that
+    they don't have to be saved to a file first.  Bytes are wrapped in a BytesIO, which uses them as they are rather
+    than copying them.
+    """
+    if isinstance(excel_path, (bytes, bytearray, memoryview)):
+        return io.BytesIO(excel_path)
+    return excel_path
+
+
+def source_name(excel_path):
+    """
+    Describes where a workbook is read from, for logging.
+    """
+    if isinstance(excel_path, (str, os.PathLike)):
+        return str(excel_path)
+    return f'{type(excel_path).__name__} in memory'
+
+
+def stream_sheet(sheet, skiprows=0, columns=None, row_filters=None):
+    """
+    Does the work for stream_excel given a worksheet from an already opened workbook.
+
+    :param sheet:
+    :param skiprows:
+    :param columns:
+    :param row_filters:
+    :return:
+    """
+    if hasattr(sheet, 'reset_dimensions'):
+        # Read-only sheets trust the dimensions recorded in the file, which aren't always right for exported files.
+        sheet.reset_dimensions()
+    rows = sheet.iter_rows(min_row=1 + skiprows, values_only=True)
+    yield from stream_rows(rows, columns, row_filters)
+
+
+def stream_rows(rows, columns=None, row_filters=None):
+    """
+    Applies the table rules to an iterator of row value tuples, the first of which is the heading row.
+
+    Kept separate from the workbook handling so that any source of row tuples can be used.
+
+    :param rows:
+    :param columns:
+    :param row_filters:
+    :return:
+    """
+    heading_row = next(rows, None)
+    if heading_row is None:
+        return
+    headings = get_headers(heading_row)
+    num_columns = len(headings)
+    if num_columns == 0:
+        return
+
+    # Where a heading is duplicated the last one wins, as it did when building a dict for each row.
+    heading_positions = {heading: position for position, heading in enumerate(headings)}
+    if columns is None:
+        columns = list(heading_positions)
+    projection = [(column, heading_positions.get(column)) for column in columns]
+
+    if row_filters is None:
+        filters = []
+    else:
+        filters = [(heading_positions.get(column), predicate) for column, predicate in row_filters.items()]
+
+    if hasattr(rows, 'select_columns'):
+        # The row source can save time by only converting the values which will actually be used.
+        used_positions = [position for _, position in projection] + [position for position, _ in filters]
+        rows.select_columns([position for position in used_positions if position is not None], num_columns)
+
+    for row_index, row in enumerate(rows):
+        row_length = min(len(row), num_columns)
+
+        # Last row of data is the one before the first row with blanks in all columns.
+        if all(row[col] is None for col in range(row_length)):
+            return
+
+        if not all(predicate(_cell_value(row, position, row_length)) for position, predicate in filters):
+            continue
+
+        yield row_index, {column: _cell_value(row, position, row_length) for column, position in projection}
+
+
+def get_headers(heading_row):
     headings = []  # Need to store headings in column order so list not dict
-    blank = False
-    row = start_row
-    column = 1
-    while not blank:
-        maybe_heading = sheet.cell(row, column).value
-        if maybe_heading is not None:
-            headings.append(maybe_heading)
-            column += 1
-        else:
-            blank = True
+    for maybe_heading in heading_row:
+        if maybe_heading is None:
+            break
+        headings.append(maybe_heading)
     return headings
 
 
-def iterrows(excel_table):
-    # Work out num rows by checking any of the column arrays
-    num_rows = len(next(iter(excel_table.values())))
-    return [{heading:excel_table[heading][row] for heading in excel_table} for row in range(num_rows)]
+def _cell_value(row, position, row_length):
+    # Read-only rows stop at the last cell with a value, so anything beyond that (or not in the sheet at all) is blank.
+    if position is None or position >= row_length:
+        return None
+    return row[position]
@@ -0,0 +1,272 @@
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass, replace
+from typing import Optional
+
+from source.visualiser.parse_cache import ContentHashes, evict_least_recently_used, touch_file, write_cache_file
+
+root_logger = logging.getLogger()
+
+# Must be increased whenever a change to the app changes the slides it plots, so that slides plotted by an older
+# version are no longer found.
+RENDER_VERSION = 1
+
+DEFAULT_MAX_BYTES = 128 * 1024 * 1024
+DEFAULT_MAX_DISK_BYTES = 512 * 1024 * 1024
+
+CACHE_FILE_EXT = '.render'
+
+# Each file in the cache folder starts with the seconds the render took, followed by the slide file itself.
+_HEADER = struct.Struct('<d')
+
+RENDERED = 'rendered'
+MEMORY = 'memory'
+DISK = 'disk'
+COALESCED = 'coalesced'
+
+
+@dataclass(frozen=True)
+class RenderOutcome:
+    """
+    The slide file from a render, or why it couldn't be plotted.
+
+    content: The bytes of the slide file (a memoryview of the cached copy, so it isn't copied), or None if it failed.
+    seconds: How long the render took - when it was actually plotted, not when the slide was found in the cache.
+    source: Where the content came from - RENDERED, MEMORY, DISK, or COALESCED if it was plotted for another
+    request at the same time.
+    """
+    content: Optional[memoryview]
+    seconds: float
+    error: Optional[str] = None
+    source: str = RENDERED
+
+    @property
+    def succeeded(self):
+        return self.content is not None
+
+
+class RenderResultCache:
+    """
+    Cache of plotted slide files, keyed on everything which goes into them - the contents of the plan, config and
+    template files, the sheets used, the plotting options and today's date (for the today line).  Plotting the same
+    plan again, e.g. when it has just been published and lots of people and dashboards ask for it at once, then costs
+    nothing.
+
+    Slides are held in memory, and also in files in cache_dir if one is supplied so that they can be shared between
+    processes and runs.  Both are capped in size, the least recently used slides being dropped first.  Slides are
+    returned as memoryviews of the cached bytes, or of the memory-mapped file, so serving one doesn't copy it.
+
+    get_or_render also coalesces renders: if a slide is asked for again while it is still being plotted, the second
+    request waits for the first render rather than plotting the same slide again.
+
+    The cache can be shared between threads.
+
+    :param max_bytes: Maximum total size of the slides held in memory.
+    :param cache_dir: Folder to store slides in, or None to only hold them in memory.
+    :param max_disk_bytes: Maximum total size of the slides in cache_dir.
+    """
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, cache_dir=None, max_disk_bytes=DEFAULT_MAX_DISK_BYTES):
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.saved_seconds = 0.0
+
+        self._entries = OrderedDict()  # key -> (content, seconds), least recently used first.
+        self._num_bytes = 0
+        self._in_flight = {}  # key -> Future for the RenderOutcome of a render in progress.
+        self._content_hashes = ContentHashes()
+        self._lock = threading.Lock()
+
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, paths, *options):
+        """
+        :param paths: Files the slide is plotted from.
+        :param options: Anything else the slide depends on, e.g. sheet names and today's date.  Must have a repr which
+        identifies it.
+        :return:
+        """
+        parts = [str(RENDER_VERSION)]
+        parts.extend(self.file_hash(path) for path in paths)
+        parts.extend(repr(option) for option in options)
+        return hashlib.sha256('\n'.join(parts).encode('utf-8')).hexdigest()
+
+    def file_hash(self, path):
+        return self._content_hashes.file_hash(path)
+
+    def get(self, key) -> Optional[RenderOutcome]:
+        """
+        :return: The cached slide, or None if it isn't in the cache.
+        """
+        outcome = self._lookup(key)
+        with self._lock:
+            self._record(outcome)
+        return outcome
+
+    def put(self, key, content, seconds):
+        """
+        Adds a slide to the cache.
+
+        :param key:
+        :param content: The bytes of the slide file.
+        :param seconds: How long it took to plot.
+        """
+        content = bytes(content)
+        with self._lock:
+            if key not in self._entries and len(content) <= self.max_bytes:
+                self._entries[key] = (content, seconds)
+                self._num_bytes += len(content)
+                while self._num_bytes > self.max_bytes:
+                    _, (evicted, _) = self._entries.popitem(last=False)
+                    self._num_bytes -= len(evicted)
+                    self.evictions += 1
+        if self.cache_dir is not None:
+            self._write_file(key, content, seconds)
+
+    def get_or_render(self, key, render) -> RenderOutcome:
+        """
+        Returns the cached slide, or plots it if it isn't in the cache.  If the same slide is already being plotted,
+        waits for that render instead.
+
+        :param key: See key().
+        :param render: Function taking no arguments which plots the slide, returning a tuple of the bytes of the slide
+        file (None if it failed), the seconds it took and the error if it failed.  Failures aren't cached.
+        :return:
+        """
+        outcome = self._lookup(key)
+        with self._lock:
+            if outcome is not None:
+                self._record(outcome)
+                return outcome
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+        if not leader:
+            outcome = future.result()
+            with self._lock:
+                self.coalesced += 1
+                if outcome.succeeded:
+                    self.saved_seconds += outcome.seconds
+            return replace(outcome, source=COALESCED)
+
+        try:
+            # It may have been added while this request was checking, in which case the render has just finished.
+            outcome = self._lookup(key)
+            with self._lock:
+                self._record(outcome)
+            if outcome is None:
+                content, seconds, error = render()
+                if content is not None:
+                    self.put(key, content, seconds)
+                    content = memoryview(content)
+                outcome = RenderOutcome(content, seconds, error)
+            future.set_result(outcome)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+        return outcome
+
+    @property
+    def hit_rate(self):
+        requests = self.hits + self.misses + self.coalesced
+        return 0.0 if requests == 0 else (self.hits + self.coalesced) / requests
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'evictions': self.evictions,
+                'hit_rate': self.hit_rate,
+                'saved_seconds': self.saved_seconds,
+                'entries': len(self._entries),
+                'bytes': self._num_bytes,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._num_bytes = 0
+        for entry_path in self._entry_paths():
+            os.remove(entry_path)
+
+    def log_stats(self):
+        root_logger.info(
+            f'Render cache: {self.hits} hits, {self.coalesced} coalesced, {self.misses} misses, '
+            f'{self.evictions} evictions, {self.saved_seconds:.2f}s saved'
+        )
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return RenderOutcome(memoryview(entry[0]), entry[1], source=MEMORY)
+        return self._read_file(key)
+
+    def _record(self, outcome):
+        if outcome is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.saved_seconds += outcome.seconds
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, key + CACHE_FILE_EXT)
+
+    def _entry_paths(self):
+        if self.cache_dir is None:
+            return []
+        return [
+            entry.path for entry in os.scandir(self.cache_dir)
+            if entry.is_file() and entry.name.endswith(CACHE_FILE_EXT)
+        ]
+
+    def _read_file(self, key):
+        if self.cache_dir is None:
+            return None
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, 'rb') as entry_file:
+                mapped = mmap.mmap(entry_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            # ValueError if the file is empty, which can't be mapped.
+            return None
+        if len(mapped) <= _HEADER.size:
+            return None
+        touch_file(entry_path)
+        # The memoryview keeps the file mapped for as long as it is in use.
+        view = memoryview(mapped)
+        return RenderOutcome(view[_HEADER.size:], _HEADER.unpack(view[:_HEADER.size])[0], source=DISK)
+
+    def _write_file(self, key, content, seconds):
+        entry_path = self._entry_path(key)
+        if os.path.exists(entry_path):
+            return
+
+        def write(entry_file):
+            entry_file.write(_HEADER.pack(seconds))
+            entry_file.write(content)
+
+        # Failing to cache shouldn't stop the slide being returned.
+        if write_cache_file(entry_path, write, 'render cache entry'):
+            evictions = evict_least_recently_used(self._entry_paths(), self.max_disk_bytes)
+            with self._lock:
+                self.evictions += evictions
@@ -0,0 +1,403 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import socketserver
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import fields
+from datetime import date
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from source.visualiser import batch
+from source.visualiser.batch import BatchJob, BatchJobResult
+from source.visualiser.exceptions import PptPlanVisualiserException
+from source.visualiser.parse_cache import evict_least_recently_used, touch_file
+from source.visualiser.render_cache import RenderOutcome, RenderResultCache
+
+root_logger = logging.getLogger()
+
+PPTX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.presentationml.presentation'
+FILE_FIELDS = ('excel_plan_workbook', 'excel_config_workbook', 'ppt_template_file')
+REQUIRED_FIELDS = ('excel_plan_workbook', 'excel_plan_sheet', 'excel_config_workbook')
+DEFAULT_MAX_QUEUE = 16
+DEFAULT_MAX_UPLOAD_BYTES = 256 * 1024 * 1024
+NUM_LATENCIES_KEPT = 1000
+
+
+class RenderService:
+    """
+    HTTP service which plots plans and returns the slides, for other tools to use without starting the app (and
+    importing and parsing everything again) for each plan.
+
+    Renders are run in a pool of processes which are kept between requests, each holding the parsed configs, compiled
+    formats and parsed templates it has used (see batch.run_job), so a plan using a config and template which have been
+    used before only has the plan itself to read.  Requests beyond those being plotted wait in a queue of at most
+    max_queue, and any more are turned away with 503 rather than left to pile up.  A request for a slide which has
+    already been plotted from the same files is answered from the result cache, and one for a slide which is being
+    plotted for another request waits for that render (see RenderResultCache).
+
+    Endpoints:
+
+    - POST /render: Plot a plan and return the .pptx.  Either a JSON object with the same fields as a BatchJob (other
+      than name and output_file) giving the paths of the files, or multipart/form-data where each of the files can be
+      uploaded or given as a path.  The template can be left out if the service has a default template.
+    - GET /health: Whether the service is running, how busy it is and how much the result cache has saved.
+    - GET /latency: Statistics for the time taken by recent renders, including time waiting in the queue.
+
+    The service only listens on localhost unless told otherwise, as it reads whatever local paths it is given.
+
+    :param host:
+    :param port: Port to listen on, or 0 for any free port (see the port attribute once started).
+    :param max_workers: Number of processes to plot in (default is one per CPU).
+    :param max_queue: Maximum number of requests to hold waiting for a process.
+    :param cache_dir: Folder for the parse cache shared by the processes, or None not to use it.
+    :param default_template: Template to use for requests which don't supply one.
+    :param result_cache: RenderResultCache for the slides plotted.  Defaults to one holding them in memory.
+    :param max_upload_bytes: Maximum total size of the uploaded files kept for later requests, once the requests which
+    uploaded them have been answered.  The least recently used are deleted first.
+    """
+    def __init__(
+            self,
+            host='127.0.0.1',
+            port=0,
+            max_workers=None,
+            max_queue=DEFAULT_MAX_QUEUE,
+            cache_dir=None,
+            default_template=None,
+            result_cache=None,
+            max_upload_bytes=DEFAULT_MAX_UPLOAD_BYTES
+    ):
+        self.host = host
+        self.port = port
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.cache_dir = cache_dir
+        self.default_template = default_template
+        self.result_cache = RenderResultCache() if result_cache is None else result_cache
+        self.max_upload_bytes = max_upload_bytes
+
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_queue)
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=NUM_LATENCIES_KEPT)
+        self.num_in_progress = 0
+        self._uploads_in_use = Counter()
+        self.num_rendered = 0
+        self.num_failed = 0
+        self.num_rejected = 0
+
+        self._executor = None
+        self._server = None
+        self._thread = None
+        self._work_dir = None
+
+    def start(self):
+        """
+        Starts the worker processes and serves requests in a background thread.
+        """
+        self._work_dir = tempfile.mkdtemp(prefix='plan_render_')
+        self._executor = ProcessPoolExecutor(self.max_workers)
+        self._server = _Server((self.host, self.port), _make_handler(self))
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name='render_service', daemon=True)
+        self._thread.start()
+        root_logger.info(f'Render service listening on http://{self.host}:{self.port} with {self.max_workers} workers')
+        return self
+
+    def close(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self._work_dir is not None:
+            shutil.rmtree(self._work_dir, ignore_errors=True)
+            self._work_dir = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def url(self):
+        return f'http://{self.host}:{self.port}'
+
+    def render(self, job: BatchJob) -> RenderOutcome:
+        """
+        Plots a job in one of the worker processes, waiting for a process to be free if need be - unless the same slide
+        is in the result cache, or is already being plotted for another request, in which case that is returned.
+
+        :param job:
+        :return:
+        """
+        start = time.perf_counter()
+        key = batch.job_cache_key(self.result_cache, job, date.today())
+        outcome = self.result_cache.get_or_render(key, lambda: self._render_job(job))
+        with self._lock:
+            self._latencies.append(time.perf_counter() - start)
+            if outcome.succeeded:
+                self.num_rendered += 1
+            else:
+                self.num_failed += 1
+        return outcome
+
+    def _render_job(self, job: BatchJob):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.num_rejected += 1
+            raise ServiceBusy(f'Already {self.max_workers + self.max_queue} renders in progress or queued')
+
+        start = time.perf_counter()
+        with self._lock:
+            self.num_in_progress += 1
+        try:
+            # The slide comes back from the worker in memory, rather than being saved to a file and read back.
+            result, slide_bytes = self._executor.submit(batch.run_job_in_memory, job, self.cache_dir).result()
+        except Exception as e:
+            # Only happens if the worker process itself fails, as run_job catches any error plotting the plan.
+            result = BatchJobResult(job.name, False, time.perf_counter() - start, error=f'{type(e).__name__}: {e}')
+            slide_bytes = None
+        finally:
+            self._slots.release()
+            with self._lock:
+                self.num_in_progress -= 1
+        return slide_bytes, result.seconds, result.error
+
+    def health(self):
+        with self._lock:
+            return {
+                'status': 'ok',
+                'workers': self.max_workers,
+                'in_progress': self.num_in_progress,
+                'queued': max(0, self.num_in_progress - self.max_workers),
+                'max_queue': self.max_queue,
+                'rendered': self.num_rendered,
+                'failed': self.num_failed,
+                'rejected': self.num_rejected,
+                'result_cache': self.result_cache.stats(),
+            }
+
+    def latency(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+        if not latencies:
+            return {'count': 0}
+        return {
+            'count': len(latencies),
+            'mean': sum(latencies) / len(latencies),
+            'p50': _percentile(latencies, 0.5),
+            'p95': _percentile(latencies, 0.95),
+            'max': latencies[-1],
+        }
+
+    def job_from_json(self, body):
+        try:
+            values = json.loads(body)
+        except ValueError as e:
+            raise PptPlanVisualiserException(f'Request is not valid JSON: {e}')
+        if not isinstance(values, dict):
+            raise PptPlanVisualiserException('Request should be a JSON object')
+        return self.job_from_values(values)
+
+    def job_from_form(self, content_type, body, uploads=None):
+        """
+        Job from a multipart/form-data request, saving any uploaded files in the service's folder.  The files are named
+        after a hash of their contents, so the same workbook or template uploaded again is the same file as far as the
+        workers' caches are concerned.
+
+        :param content_type:
+        :param body:
+        :param uploads: If supplied, the paths of the uploaded files are added to it, and the files are kept until they
+        are passed to release_uploads.  Otherwise they may be deleted as soon as other requests are answered.
+        :return:
+        """
+        message = BytesParser(policy=HTTP).parsebytes(
+            b'Content-Type: ' + content_type.encode('latin-1') + b'\r\n\r\n' + body
+        )
+        if not message.is_multipart():
+            raise PptPlanVisualiserException('Request is not valid multipart/form-data')
+
+        values = {}
+        for part in message.iter_parts():
+            name = part.get_param('name', header='content-disposition')
+            if name is None:
+                continue
+            content = part.get_payload(decode=True) or b''
+            if part.get_filename() is not None:
+                if name not in FILE_FIELDS:
+                    raise PptPlanVisualiserException(f'{name} is not a file')
+                values[name] = self._save_upload(content, os.path.splitext(part.get_filename())[1], uploads)
+            else:
+                values[name] = content.decode('utf-8')
+        return self.job_from_values(values)
+
+    def job_from_values(self, values):
+        allowed = {field.name for field in fields(BatchJob)} - {'name', 'output_file'}
+        unknown = sorted(set(values) - allowed)
+        if unknown:
+            raise PptPlanVisualiserException(f'Unknown fields: {", ".join(unknown)}')
+
+        values = dict(values)
+        if values.get('ppt_template_file') is None and self.default_template is not None:
+            values['ppt_template_file'] = self.default_template
+        missing = [name for name in REQUIRED_FIELDS + ('ppt_template_file',) if not values.get(name)]
+        if missing:
+            raise PptPlanVisualiserException(f'Missing fields: {", ".join(missing)}')
+        for name in FILE_FIELDS:
+            # From JSON it could be anything, and os.path.isfile would take an int as a file descriptor.
+            if not isinstance(values[name], str):
+                raise PptPlanVisualiserException(f'{name} should be a path')
+            if not os.path.isfile(values[name]):
+                raise PptPlanVisualiserException(f'{name} not found: {values[name]}')
+
+        if isinstance(values.get('pack_tracks'), str):
+            values['pack_tracks'] = values['pack_tracks'].lower() in ('1', 'true', 'yes', 'on')
+        if values.get('collision_check') not in (None, 'warn', 'fail'):
+            raise PptPlanVisualiserException(f'Invalid collision_check: {values["collision_check"]}')
+        return BatchJob(name=os.path.basename(values['excel_plan_workbook']), **values)
+
+    def release_uploads(self, uploads):
+        """
+        Called once a request's uploaded files (see job_from_form) are no longer needed.  They are kept for later
+        requests which upload the same files, but the least recently used uploads which aren't in use are deleted once
+        they take up more than max_upload_bytes.
+        """
+        if not uploads:
+            return
+        with self._lock:
+            for path in uploads:
+                self._uploads_in_use[path] -= 1
+                if self._uploads_in_use[path] == 0:
+                    del self._uploads_in_use[path]
+            unused = [
+                entry.path for entry in os.scandir(self._work_dir)
+                if entry.is_file() and not entry.name.endswith('.partial') and entry.path not in self._uploads_in_use
+            ]
+            # Under the lock, so that a file isn't deleted just as another request finds it is already there.
+            evict_least_recently_used(unused, self.max_upload_bytes)
+
+    def _save_upload(self, content, extension, uploads):
+        path = os.path.join(self._work_dir, hashlib.sha256(content).hexdigest() + extension)
+        if uploads is not None:
+            with self._lock:
+                self._uploads_in_use[path] += 1
+            uploads.append(path)
+        if os.path.exists(path):
+            touch_file(path)
+        else:
+            # Written under another name first, so another request never sees a partly written file.
+            partial_path = f'{path}.{uuid.uuid4().hex}.partial'
+            with open(partial_path, 'wb') as upload_file:
+                upload_file.write(content)
+            os.replace(partial_path, path)
+        return path
+
+
+class ServiceBusy(PptPlanVisualiserException):
+    pass
+
+
+class _Server(socketserver.ThreadingMixIn, HTTPServer):
+    # Requests still being answered don't stop the service from closing.
+    daemon_threads = True
+
+
+def _percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))]
+
+
+def _make_handler(service: RenderService):
+    class RenderRequestHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == '/health':
+                self.send_json(200, service.health())
+            elif self.path == '/latency':
+                self.send_json(200, service.latency())
+            else:
+                self.send_json(404, {'error': f'Not found: {self.path}'})
+
+        def do_POST(self):
+            if self.path != '/render':
+                self.send_json(404, {'error': f'Not found: {self.path}'})
+                return
+
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            content_type = self.headers.get('Content-Type', 'application/json')
+            uploads = []
+            try:
+                if content_type.startswith('multipart/form-data'):
+                    job = service.job_from_form(content_type, body, uploads)
+                else:
+                    job = service.job_from_json(body)
+                outcome = service.render(job)
+            except ServiceBusy as e:
+                self.send_json(503, {'error': str(e)})
+                return
+            except PptPlanVisualiserException as e:
+                self.send_json(400, {'error': str(e)})
+                return
+            finally:
+                service.release_uploads(uploads)
+
+            if not outcome.succeeded:
+                self.send_json(422, {'error': outcome.error, 'seconds': outcome.seconds})
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', PPTX_CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(outcome.content)))
+            self.send_header('X-Render-Seconds', f'{outcome.seconds:.3f}')
+            self.send_header('X-Render-Source', outcome.source)
+            self.end_headers()
+            self.wfile.write(outcome.content)
+
+        def send_json(self, status, value):
+            body = json.dumps(value).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            root_logger.debug(f'{self.address_string()} {format % args}')
+
+    return RenderRequestHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve plan plotting over HTTP.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--max-queue', type=int, default=DEFAULT_MAX_QUEUE)
+    parser.add_argument('--cache-dir')
+    parser.add_argument('--template', dest='default_template')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    service = RenderService(
+        args.host, args.port, args.workers, args.max_queue, args.cache_dir, args.default_template
+    ).start()
+    try:
+        service._thread.join()
+    except KeyboardInterrupt:
+        root_logger.info('Stopping render service')
+    finally:
+        service.close()
+
+
+if __name__ == '__main__':
+    main()
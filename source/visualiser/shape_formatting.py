@@ -1,3 +1,4 @@
+from dataclasses import dataclass
 from typing import Union, Optional
 
 from colour import Color
@@ -7,20 +8,17 @@ from source.visualiser.plot_driver import PlotDriver
 from source.visualiser.text_formatting import TextFormatting
 
 
+@dataclass(frozen=True)
 class ShapeFormatting:
     """
     Encapsulates visual display attributes which are relevant for any visual element to be displayed.
+
+    Immutable so that one instance can be shared by every activity using the same format (see FormatRegistry).
     """
-    def __init__(self,
-                 line_colour: Union[Color, None],
-                 fill_colour: Union[Color, None],
-                 corner_radius: Union[Cm, None] = None,
-                 text_formatting: Optional[TextFormatting] = None
-                 ):
-        self.line_colour = line_colour
-        self.fill_colour = fill_colour
-        self.corner_radius = corner_radius
-        self.text_formatting = text_formatting
+    line_colour: Union[Color, None]
+    fill_colour: Union[Color, None]
+    corner_radius: Union[Cm, None] = None
+    text_formatting: Optional[TextFormatting] = None
 
     @classmethod
     def from_dict(cls, format_dict, plot_config: PlotDriver):
@@ -0,0 +1,405 @@
+import io
+import os
+import re
+import struct
+import time
+import zipfile
+import zlib
+from xml.sax.saxutils import escape
+
+from lxml import etree
+from pptx.opc.constants import CONTENT_TYPE as CT
+from pptx.opc.oxml import CT_Types, serialize_part_xml
+from pptx.opc.packuri import CONTENT_TYPES_URI, PACKAGE_URI
+from pptx.opc.spec import default_content_types
+
+from source.visualiser.exceptions import PptPlanVisualiserException
+
+DEFAULT_COMPRESS_LEVEL = 6
+
+XML_DECLARATION = b"<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n"
+
+# Zip record layouts (see the PKWARE APPNOTE).  Only what is needed for a .pptx is supported - no zip64, encryption or
+# comments.
+_LOCAL_HEADER = struct.Struct('<4s5H3L2H')
+_LOCAL_HEADER_SIGNATURE = b'PK\x03\x04'
+_DATA_DESCRIPTOR = struct.Struct('<4s3L')
+_DATA_DESCRIPTOR_SIGNATURE = b'PK\x07\x08'
+_CENTRAL_HEADER = struct.Struct('<4s6H3L5H2L')
+_CENTRAL_HEADER_SIGNATURE = b'PK\x01\x02'
+_END_OF_CENTRAL_DIRECTORY = struct.Struct('<4s4H2LH')
+_END_OF_CENTRAL_DIRECTORY_SIGNATURE = b'PK\x05\x06'
+
+_TAG_NAME = re.compile(rb'<([^\s/>]+)')
+# Children of the shape tree which aren't shapes.
+_NOT_SHAPES = {'nvGrpSpPr', 'grpSpPr', 'extLst'}
+
+_FLAG_DATA_DESCRIPTOR = 0x08
+_FLAG_UTF8 = 0x800
+_VERSION = 20
+_MAX_SIZE = 0xFFFFFFFF
+
+
+def save_streaming(prs, slides_out, source=None, compress_level=DEFAULT_COMPRESS_LEVEL, counts=None):
+    """
+    Saves a presentation as Presentation.save does, but without building the whole package in memory first.
+
+    Presentation.save serialises each part to a string and adds it to a zip file in memory, so for a slide with tens
+    of thousands of shapes the slide's XML tree, the serialised XML and the compressed package are all held at once.
+    Instead:
+
+    - The shapes of each slide are serialised one at a time and compressed straight into the output, so only the
+      slide's XML tree is held in memory.
+    - Every other part which is the same as in the source package (the template the presentation was opened from) -
+      masters, layouts, themes, images etc. - is copied from the source as the compressed bytes stored in it, without
+      being decompressed and compressed again.
+    - Anything else (the presentation part, which lists the slides, the relationships of the slides and any parts which
+      aren't in the source) is serialised as python-pptx would.
+
+    The plotting only ever changes the slides (and, when slides are added, the presentation part), so the parts copied
+    are only those python-pptx wouldn't have changed either.
+
+    :param prs: python-pptx Presentation
+    :param slides_out: Path or binary stream to save the deck to.
+    :param source: Path or bytes of the package the presentation was opened from, or None to serialise every part.
+    :param compress_level: zlib compression level (0 to 9) for the parts which are compressed here.
+    :param counts: Optional dict to add counts of the parts streamed, copied and serialised and the shapes streamed to.
+    :return:
+    """
+    if not 0 <= compress_level <= 9:
+        raise PptPlanVisualiserException(f'Invalid compression level {compress_level}, should be 0 to 9')
+    if counts is None:
+        counts = {}
+    for name in ('parts_streamed', 'parts_copied', 'parts_serialised', 'shapes_streamed'):
+        counts.setdefault(name, 0)
+
+    package = prs.part.package
+    parts = list(package.iter_parts())
+    slide_parts = {slide.part for slide in prs.slides}
+
+    if isinstance(source, (str, os.PathLike)) and isinstance(slides_out, (str, os.PathLike)) \
+            and os.path.abspath(source) == os.path.abspath(slides_out):
+        # Saving over the package being copied from, so it has to be read before the output overwrites it.
+        with open(source, 'rb') as source_file:
+            source = source_file.read()
+
+    with _open_source(source) as source_package, _open_output(slides_out) as out:
+        writer = ZipStreamWriter(out, compress_level)
+
+        # Generated rather than copied, as slides may have been added.
+        writer.write_bytes(CONTENT_TYPES_URI.membername, serialize_part_xml(content_types_xml(parts)))
+        if not writer.copy_from(source_package, PACKAGE_URI.rels_uri.membername):
+            writer.write_bytes(PACKAGE_URI.rels_uri.membername, _package_rels(package).xml)
+
+        for part in parts:
+            membername = part.partname.membername
+            rels_membername = part.partname.rels_uri.membername
+            if part in slide_parts:
+                with writer.open(membername) as part_stream:
+                    counts['shapes_streamed'] += write_slide_xml(part._element, part_stream.write)
+                counts['parts_streamed'] += 1
+            elif part.partname != prs.part.partname and writer.copy_from(source_package, membername):
+                counts['parts_copied'] += 1
+                # Its relationships can't have changed either.
+                if len(part.rels) and writer.copy_from(source_package, rels_membername):
+                    continue
+            else:
+                writer.write_bytes(membername, part.blob)
+                counts['parts_serialised'] += 1
+            if len(part.rels):
+                writer.write_bytes(rels_membername, part.rels.xml)
+        writer.close()
+
+
+def content_types_xml(parts):
+    """
+    The [Content_Types].xml item for a package of parts, as python-pptx composes it when saving: each part's content
+    type is given by a Default for its extension if it is the standard one for the extension, otherwise by an Override
+    for the part.  python-pptx has no public API for this.
+
+    :param parts:
+    :return: The p:Types element.
+    """
+    defaults = {'rels': CT.OPC_RELATIONSHIPS, 'xml': CT.XML}
+    overrides = {}
+    for part in parts:
+        ext = part.partname.ext
+        if (ext.lower(), part.content_type) in default_content_types:
+            defaults[ext.lower()] = part.content_type
+        else:
+            overrides[part.partname] = part.content_type
+
+    types = CT_Types.new()
+    for ext in sorted(defaults):
+        types.add_default(ext, defaults[ext])
+    for partname in sorted(overrides):
+        types.add_override(partname, overrides[partname])
+    return types
+
+
+def _package_rels(package):
+    # Public in older versions of python-pptx, private from 1.0.
+    return package.rels if hasattr(type(package), 'rels') else package._rels
+
+
+def write_slide_xml(sld, write):
+    """
+    Serialises the XML of a slide as lxml would (see pptx.opc.oxml.serialize_part_xml), but a shape at a time, passing
+    each piece to write as it goes.
+
+    :param sld: The slide's p:sld element.
+    :param write: Function to pass each piece of the serialised XML to.
+    :return: Number of shapes serialised.
+    """
+    sp_tree = sld.find('p:cSld/p:spTree', {'p': sld.nsmap.get('p')})
+    if sp_tree is None:
+        write(XML_DECLARATION + etree.tostring(sld, encoding='UTF-8'))
+        return 0
+
+    path = set()
+    element = sp_tree
+    while element is not None:
+        path.add(element)
+        element = element.getparent()
+
+    write(XML_DECLARATION)
+    _write_element(sld, sp_tree, path, write)
+    return sum(1 for child in sp_tree if etree.QName(child).localname not in _NOT_SHAPES)
+
+
+def _write_element(element, sp_tree, path, write):
+    start_tag, end_tag = _tags(element)
+    write(start_tag)
+    if element.text:
+        write(escape(element.text).encode('utf-8'))
+    declarations = _declarations(element.nsmap)
+    for child in element:
+        if child in path:
+            _write_element(child, sp_tree, path, write)
+        else:
+            write(_strip_declarations(etree.tostring(child, encoding='UTF-8', xml_declaration=False), declarations))
+    write(end_tag)
+    if element.tail and element.getparent() is not None:
+        write(escape(element.tail).encode('utf-8'))
+
+
+def _tags(element):
+    # The element without its children, serialised and split into start and end tags.
+    shell = etree.Element(element.tag, element.attrib, nsmap=element.nsmap)
+    empty = etree.tostring(shell, encoding='UTF-8', xml_declaration=False)
+    parent = element.getparent()
+    if parent is not None:
+        empty = _strip_declarations(empty, _declarations(parent.nsmap))
+    return empty[:-2] + b'>', b'</' + _TAG_NAME.match(empty).group(1) + b'>'
+
+
+def _declarations(nsmap):
+    # The namespace declarations for nsmap, as they appear in a start tag.
+    return [
+        (b' xmlns="' if prefix is None else b' xmlns:' + prefix.encode('utf-8') + b'="') +
+        escape(uri, {'"': '&quot;'}).encode('utf-8') + b'"'
+        for prefix, uri in nsmap.items()
+    ]
+
+
+def _strip_declarations(xml, declarations):
+    """
+    An element serialised on its own declares every namespace it uses, but the ones already declared by its parent
+    don't need declaring again.  Attribute values never contain '>' (lxml escapes it), so the start tag ends at the
+    first one.
+    """
+    end = xml.index(b'>')
+    start_tag = xml[:end]
+    for declaration in declarations:
+        start_tag = start_tag.replace(declaration, b'', 1)
+    return start_tag + xml[end:]
+
+
+class _open_source:
+    def __init__(self, source):
+        self.source = source
+        self.package = None
+
+    def __enter__(self):
+        if self.source is None:
+            return None
+        try:
+            source = io.BytesIO(self.source) if isinstance(self.source, (bytes, bytearray, memoryview)) else self.source
+            self.package = zipfile.ZipFile(source)
+        except (OSError, zipfile.BadZipFile):
+            # Everything is serialised instead.
+            return None
+        return self.package
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.package is not None:
+            self.package.close()
+
+
+class _open_output:
+    def __init__(self, slides_out):
+        self.slides_out = slides_out
+        self.file = None
+
+    def __enter__(self):
+        if isinstance(self.slides_out, (str, os.PathLike)):
+            self.file = open(self.slides_out, 'wb')
+            return self.file
+        return self.slides_out
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.file is not None:
+            self.file.close()
+
+
+class ZipStreamWriter:
+    """
+    Writes a zip file entry by entry, compressing each entry as it is written rather than holding it in memory, and
+    able to copy entries from another zip file as they are stored there.
+
+    zipfile can only add an entry by compressing it itself, so copying an entry from one zip file to another means
+    decompressing and compressing it again.  Here the stored bytes are copied as they are, along with their CRC and
+    sizes.
+
+    Entries written here which are of unknown size are followed by a data descriptor with their CRC and sizes, so that
+    the output doesn't need to be seekable.
+
+    :param out: Binary stream to write to, positioned where the zip file should start.
+    :param compress_level: zlib compression level for the entries compressed here.
+    """
+    def __init__(self, out, compress_level=DEFAULT_COMPRESS_LEVEL):
+        self.out = out
+        self.compress_level = compress_level
+        self._offset = 0
+        self._entries = []  # (name, flags, method, dos_time, dos_date, crc, compressed size, size, header offset)
+        self._names = set()
+
+    def open(self, name):
+        """
+        :return: Stream to write the entry's content to, which must be closed (e.g. with a with statement) before the
+        next entry is written.
+        """
+        return _EntryStream(self, name)
+
+    def write_bytes(self, name, content):
+        with self.open(name) as entry:
+            entry.write(content)
+
+    def copy_from(self, package: zipfile.ZipFile, name):
+        """
+        Copies an entry from another zip file, as it is stored there.
+
+        :param package: zip file to copy from, or None.
+        :param name:
+        :return: False if the package doesn't have the entry, otherwise True.
+        """
+        if package is None:
+            return False
+        try:
+            info = package.getinfo(name)
+        except KeyError:
+            return False
+
+        package.fp.seek(info.header_offset)
+        header = package.fp.read(_LOCAL_HEADER.size)
+        name_length, extra_length = struct.unpack('<2H', header[26:30])
+        package.fp.seek(info.header_offset + _LOCAL_HEADER.size + name_length + extra_length)
+
+        dos_time, dos_date = _dos_time(info.date_time)
+        flags = info.flag_bits & _FLAG_UTF8
+        self._start_entry(
+            name, flags, info.compress_type, dos_time, dos_date, info.CRC, info.compress_size, info.file_size
+        )
+        remaining = info.compress_size
+        while remaining:
+            chunk = package.fp.read(min(remaining, 1024 * 1024))
+            if not chunk:
+                raise PptPlanVisualiserException(f'Unexpected end of {name} in source package')
+            self._write(chunk)
+            remaining -= len(chunk)
+        return True
+
+    def close(self):
+        central_directory_offset = self._offset
+        for name, flags, method, dos_time, dos_date, crc, compressed_size, size, header_offset in self._entries:
+            encoded_name = name.encode('utf-8')
+            self._write(_CENTRAL_HEADER.pack(
+                _CENTRAL_HEADER_SIGNATURE, _VERSION, _VERSION, flags, method, dos_time, dos_date, crc, compressed_size,
+                size, len(encoded_name), 0, 0, 0, 0, 0, header_offset
+            ))
+            self._write(encoded_name)
+        self._write(_END_OF_CENTRAL_DIRECTORY.pack(
+            _END_OF_CENTRAL_DIRECTORY_SIGNATURE, 0, 0, len(self._entries), len(self._entries),
+            self._offset - central_directory_offset, central_directory_offset, 0
+        ))
+
+    def _start_entry(self, name, flags, method, dos_time, dos_date, crc, compressed_size, size):
+        if name in self._names:
+            raise PptPlanVisualiserException(f'{name} written to package twice')
+        self._names.add(name)
+        encoded_name = name.encode('utf-8')
+        if any(byte >= 128 for byte in encoded_name):
+            flags |= _FLAG_UTF8
+        entry = [name, flags, method, dos_time, dos_date, crc, compressed_size, size, self._offset]
+        self._entries.append(entry)
+        self._write(_LOCAL_HEADER.pack(
+            _LOCAL_HEADER_SIGNATURE, _VERSION, flags, method, dos_time, dos_date, crc, compressed_size, size,
+            len(encoded_name), 0
+        ))
+        self._write(encoded_name)
+        return entry
+
+    def _write(self, data):
+        self.out.write(data)
+        self._offset += len(data)
+        if self._offset > _MAX_SIZE:
+            raise PptPlanVisualiserException('Package too large to save without zip64')
+
+
+class _EntryStream:
+    """
+    An entry being written to a ZipStreamWriter, compressed as it goes.
+    """
+    def __init__(self, writer: ZipStreamWriter, name):
+        self.writer = writer
+        dos_time, dos_date = _dos_time(time.localtime(time.time())[:6])
+        # The CRC and sizes aren't known until the entry has been written, so go in the data descriptor after it.
+        self._entry = writer._start_entry(
+            name, _FLAG_DATA_DESCRIPTOR, zipfile.ZIP_DEFLATED, dos_time, dos_date, 0, 0, 0
+        )
+        self._compressor = zlib.compressobj(writer.compress_level, zlib.DEFLATED, -15)
+        self._crc = 0
+        self._size = 0
+        self._compressed_size = 0
+
+    def write(self, data):
+        self._crc = zlib.crc32(data, self._crc)
+        self._size += len(data)
+        self._emit(self._compressor.compress(data))
+
+    def close(self):
+        self._emit(self._compressor.flush())
+        if self._size > _MAX_SIZE:
+            raise PptPlanVisualiserException('Part too large to save without zip64')
+        self.writer._write(_DATA_DESCRIPTOR.pack(
+            _DATA_DESCRIPTOR_SIGNATURE, self._crc, self._compressed_size, self._size
+        ))
+        self._entry[5:8] = [self._crc, self._compressed_size, self._size]
+
+    def _emit(self, compressed):
+        if compressed:
+            self.writer._write(compressed)
+            self._compressed_size += len(compressed)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+
+
+def _dos_time(date_time):
+    year, month, day, hour, minute, second = date_time[:6]
+    year = max(year, 1980)
+    return (hour << 11) | (minute << 5) | (second // 2), ((year - 1980) << 9) | (month << 5) | day
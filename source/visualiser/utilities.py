@@ -1,5 +1,6 @@
 import os
 from calendar import monthrange
+from dataclasses import fields
 from datetime import date
 
 from dateutil.relativedelta import relativedelta
@@ -68,10 +69,13 @@ class SwimlaneManager:
     - Implements method to return swimlane number to user during visual creation.
       If a request for the number of a non-existent swimlane is made, the class will add the swimlane to the end of the list
       and return it's implied number, to ensure consistency.
+
+    The swimlanes are added to a copy of the list, as the list from the config may be shared, e.g. by every plan in a
+    batch which uses the same config, and the swimlanes one plan adds mustn't change the order for the others.
     """
 
     def __init__(self, swimlane_data):
-        self.swimlane_data = swimlane_data
+        self.swimlane_data = list(swimlane_data)
 
     def get_swimlane_number(self, swimlane_name):
         # Make sure there is an entry for this swimlane.  If not already there, add it.
@@ -82,3 +86,19 @@ class SwimlaneManager:
         # If there is a duplicate, ignore and just return the lowest.  That will be consistent.
         this_swimlane_only = [index for index, swimlane in enumerate(self.swimlane_data) if swimlane == swimlane_name]
         return this_swimlane_only[0] + 1
+
+
+def slotted(cls):
+    """
+    Class decorator which gives a dataclass __slots__ for its fields (as dataclass(slots=True) does from Python 3.10),
+    so that instances don't each carry a __dict__.  Must be applied after (i.e. above) @dataclass.
+
+    The class is recreated, as __slots__ only takes effect when a class is created, without the fields' defaults as
+    class attributes (they would clash with the slots), as the generated __init__ already has them.
+    """
+    field_names = tuple(field.name for field in fields(cls))
+    cls_dict = {name: value for name, value in cls.__dict__.items() if name not in field_names}
+    cls_dict['__slots__'] = field_names
+    cls_dict.pop('__dict__', None)
+    cls_dict.pop('__weakref__', None)
+    return type(cls)(cls.__name__, cls.__bases__, cls_dict)
@@ -0,0 +1,206 @@
+import json
+import logging
+import os
+import time
+
+from source.visualiser.excel_config import ExcelConfigWorkbook
+from source.visualiser.excel_plan import ExcelPlan
+from source.visualiser.format_registry import FormatRegistry
+from source.visualiser.instrumentation import Instrumentation
+from source.visualiser.plan_visualiser import PlanVisualiser
+from source.visualiser.plot_driver import PlotDriver
+from source.visualiser.streaming_writer import DEFAULT_COMPRESS_LEVEL
+from source.visualiser.template_cache import TemplateCache
+
+root_logger = logging.getLogger()
+
+
+class FileWatcher:
+    """
+    Watches files for changes by polling their modification time and size.
+
+    A change is only reported once the file has stayed the same for debounce seconds, so that a file which is written
+    in several goes (as Excel does when saving) is only reported once it has been completely saved.  A file which is
+    missing (e.g. part way through being replaced) is treated as still changing.
+
+    :param paths:
+    :param debounce: Seconds a file must be unchanged for before the change is reported.
+    :param clock: Function returning the current time in seconds.
+    """
+    def __init__(self, paths, debounce=0.5, clock=time.monotonic):
+        self.paths = list(paths)
+        self.debounce = debounce
+        self.clock = clock
+        self._signatures = {path: _signature(path) for path in self.paths}
+        self._pending = {}  # path -> (signature, time it was first seen) for changes not yet reported.
+
+    def poll(self):
+        """
+        Checks each file once.
+
+        :return: Set of the paths which have changed, and finished changing, since they were last reported.
+        """
+        now = self.clock()
+        changed = set()
+        for path in self.paths:
+            signature = _signature(path)
+            if signature == self._signatures[path]:
+                self._pending.pop(path, None)
+                continue
+
+            pending = self._pending.get(path)
+            if pending is None or pending[0] != signature:
+                self._pending[path] = (signature, now)
+            elif signature is not None and now - pending[1] >= self.debounce:
+                self._signatures[path] = signature
+                del self._pending[path]
+                changed.add(path)
+        return changed
+
+
+def _signature(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class WatchSession:
+    """
+    Keeps everything needed to plot a plan in memory between runs - the parsed config, the compiled formats, the rows
+    read from the plan and the parsed template - so that when a planner changes one of the files the plan can be
+    plotted again by re-reading just that file.
+
+    :param parameters: Command line parameters (see ppt_plot_plan_main.get_parameters).
+    :param plot: Function plotting a PlanVisualiser as the parameters say, e.g. ppt_plot_plan_main.plot.
+    """
+    def __init__(self, parameters, plot):
+        self.parameters = parameters
+        self.plot = plot
+
+        self.plan_file = parameters['excel_plan_workbook']
+        self.config_file = parameters['excel_config_workbook']
+        self.template_file = parameters['ppt_template_file']
+
+        self.template_cache = TemplateCache()
+        self.plot_area_config = None
+        self.format_config = None
+        self.swimlanes = None
+        self.format_registry = None
+        self.flagged_rows = None
+
+        self.num_cycles = 0
+
+    @property
+    def paths(self):
+        return [self.plan_file, self.config_file, self.template_file]
+
+    def run_cycle(self, changed_paths=None):
+        """
+        Re-reads whichever files have changed (all of them the first time) and plots the plan.
+
+        :param changed_paths: The files which have changed.  None to read everything.
+        :return: Instrumentation for the cycle.
+        """
+        self.num_cycles += 1
+        instrumentation = Instrumentation()
+        start = time.perf_counter()
+
+        if changed_paths is None or self.config_file in changed_paths or self.format_config is None:
+            self.load_config(instrumentation)
+        if changed_paths is None or self.plan_file in changed_paths or self.flagged_rows is None:
+            self.load_plan(instrumentation)
+        # A changed template is parsed again by the template cache, as it is keyed on the template's contents.
+
+        # The visualiser updates the PlotDriver (e.g. aligning the dates to whole months), so each cycle has its own.
+        plot_driver = PlotDriver(self.plot_area_config)
+        with instrumentation.span('plan_build', rows=len(self.flagged_rows)):
+            plan_data = ExcelPlan.plan_data_from_rows(
+                self.flagged_rows, self.format_config, plot_driver, self.format_registry
+            )
+
+        visualiser = PlanVisualiser(
+            plan_data,
+            plot_driver,
+            self.format_config,
+            self.template_file,
+            self.swimlanes,
+            template_cache=self.template_cache,
+            instrumentation=instrumentation,
+            format_registry=self.format_registry,
+            pack_tracks=self.parameters.get('pack_tracks', False),
+            collision_check=self.parameters.get('collision_check'),
+            streaming_save=self.parameters.get('streaming_save', False),
+            compress_level=self.parameters.get('compress_level', DEFAULT_COMPRESS_LEVEL)
+        )
+        self.plot(visualiser, self.parameters)
+
+        root_logger.info(
+            f'Cycle {self.num_cycles}: plotted {len(plan_data)} activities in {time.perf_counter() - start:.2f}s'
+        )
+        instrumentation.log_summary()
+        if self.parameters.get('timings_report') is not None:
+            # One line per cycle, so the report builds up a history of the session.
+            with open(self.parameters['timings_report'], 'a') as report_file:
+                report_file.write(json.dumps(dict(instrumentation.report(), cycle=self.num_cycles)) + '\n')
+        return instrumentation
+
+    def load_config(self, instrumentation):
+        with instrumentation.span('config_load') as span, ExcelConfigWorkbook(
+                self.config_file,
+                plot_config_sheet=self.parameters.get('plot_config_sheet', 'PlotConfig'),
+                format_config_sheet=self.parameters.get('format_config_sheet', 'FormatConfig'),
+                swimlanes_sheet=self.parameters.get('swimlanes_sheet', 'Swimlanes')
+        ) as config_workbook:
+            self.plot_area_config = config_workbook.parse_plot_area_config()
+            self.format_config = config_workbook.parse_format_config()
+            self.swimlanes = config_workbook.parse_swimlane_config()
+            span.add('formats', len(self.format_config))
+            span.add('swimlanes', len(self.swimlanes))
+
+        # The formats are compiled as they are first used, and then kept until the config changes again.
+        self.format_registry = FormatRegistry(self.format_config, PlotDriver(self.plot_area_config))
+
+    def load_plan(self, instrumentation):
+        with instrumentation.span('plan_read', rows_read=0) as span:
+            self.flagged_rows = list(ExcelPlan.read_flagged_rows(
+                self.plan_file, self.parameters['excel_plan_sheet'], counts=span.counts
+            ))
+            span.add('rows_flagged', len(self.flagged_rows))
+
+    def run(self, poll_interval=0.5, debounce=0.5, max_cycles=None, sleep=time.sleep):
+        """
+        Plots the plan, then watches the plan, config and template files and plots it again whenever any of them
+        changes, until interrupted (or max_cycles plots have been done).  A cycle which fails, e.g. because a workbook
+        was saved with an error in it, is logged and the files watched for the next change.
+
+        :param poll_interval: Seconds between checks of the files.
+        :param debounce: See FileWatcher.
+        :param max_cycles:
+        :param sleep:
+        :return:
+        """
+        watcher = FileWatcher(self.paths, debounce)
+        changed_paths = None
+        try:
+            while True:
+                retry_paths = set()
+                try:
+                    self.run_cycle(changed_paths)
+                except Exception as e:
+                    root_logger.error(f'Cycle {self.num_cycles} failed: {type(e).__name__}: {e}')
+                    # Read the same files again next time, as well as whatever changes.
+                    retry_paths = set(self.paths) if changed_paths is None else changed_paths
+                if max_cycles is not None and self.num_cycles >= max_cycles:
+                    return
+
+                root_logger.info(f'Watching {", ".join(self.paths)} for changes')
+                changed_paths = set()
+                while not changed_paths:
+                    sleep(poll_interval)
+                    changed_paths = watcher.poll()
+                changed_paths |= retry_paths
+                root_logger.info(f'Changed: {", ".join(sorted(changed_paths))}')
+        except KeyboardInterrupt:
+            root_logger.info('Stopped watching')